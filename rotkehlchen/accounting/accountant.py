@@ -1,6 +1,9 @@
+import hashlib
+import json
 import logging
+from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Set, Tuple, Union, cast
 
 import gevent
 
@@ -45,6 +48,72 @@ from rotkehlchen.utils.misc import timestamp_to_date
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# The processing state is checkpointed at the start of each such period of time
+ACCOUNTING_CHECKPOINT_PERIOD = 30 * 24 * 60 * 60
+# How many of the latest checkpoints are kept for each combination of settings
+ACCOUNTING_CHECKPOINTS_TO_KEEP = 12
+# Should be increased whenever what is saved in a checkpoint changes
+ACCOUNTING_CHECKPOINT_VERSION = 2
+
+
+def _serialize_digest_value(value: Any) -> Any:
+    if isinstance(value, (Asset, UnknownEthereumToken)):
+        return value.identifier
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, FVal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _serialize_action_for_digest(action: TaxableAction) -> bytes:
+    """Serializes the fields of an action that affect its processing
+
+    The digest of a checkpoint is made from these for all actions before it. So
+    they should stay the same for the same action across versions, unlike the
+    action's repr() which depends on how its members represent themselves.
+    """
+    fields: List[Any]
+    if isinstance(action, Trade):
+        fields = [
+            action.timestamp, action.location, action.pair, action.trade_type,
+            action.amount, action.rate, action.fee, action.fee_currency,
+        ]
+    elif isinstance(action, AMMTrade):
+        fields = [
+            action.identifier, action.timestamp, action.location, action.trade_type,
+            action.base_asset, action.quote_asset, action.amount, action.rate,
+        ]
+    elif isinstance(action, AssetMovement):
+        fields = [
+            action.timestamp, action.location, action.category, action.asset,
+            action.amount, action.fee_asset, action.fee,
+        ]
+    elif isinstance(action, EthereumTransaction):
+        fields = [
+            action.timestamp, action.tx_hash, action.from_address, action.nonce,
+            action.gas_price, action.gas_used,
+        ]
+    elif isinstance(action, MarginPosition):
+        fields = [
+            action.close_time, action.open_time, action.location, action.profit_loss,
+            action.pl_currency, action.fee, action.fee_currency,
+        ]
+    elif isinstance(action, Loan):
+        fields = [
+            action.close_time, action.open_time, action.location, action.currency,
+            action.fee, action.earned, action.amount_lent,
+        ]
+    elif isinstance(action, DefiEvent):
+        fields = [action.timestamp, action.event_type, action.asset, action.amount]
+    else:
+        raise AssertionError(f'TaxableAction of unknown type {type(action)} encountered')
+
+    serialized = [action_get_type(action)] + [_serialize_digest_value(x) for x in fields]
+    return json.dumps(serialized).encode()
+
 
 class Accountant():
 
@@ -255,6 +324,174 @@ class Accountant():
                 is_virtual=False,
             )
 
+    def prefetch_prices(
+            self,
+            actions: List[TaxableAction],
+            end_ts: Timestamp,
+            db_settings: DBSettings,
+    ) -> None:
+        """Goes through the sorted actions and prefetches all historical prices
+        they will need in the profit currency
+
+        The (asset, profit currency) pairs are collected along with the time range
+        in which they are needed so that each pair's price history can be fetched in
+        one go before processing, instead of at each cache miss inside the loop.
+        """
+        price_ranges: Dict[Tuple[Asset, Asset], Tuple[Timestamp, Timestamp]] = {}
+        ignored_assets = self.db.get_ignored_assets()
+        for action in actions:
+            timestamp = action_get_timestamp(action)
+            if timestamp > end_ts:
+                break
+
+            assets: Set[Asset] = set()
+            if isinstance(action, (Trade, AMMTrade)):
+                try:
+                    base_asset, quote_asset = action_get_assets(action)
+                    assets.add(base_asset)
+                    if quote_asset is not None:
+                        assets.add(quote_asset)
+                    assets.add(action.fee_currency)
+                except (UnknownAsset, UnsupportedAsset, DeserializationError):
+                    continue  # will be reported during processing
+                if isinstance(action, Trade) and action.trade_type == TradeType.SETTLEMENT_BUY:
+                    assets.add(A_BTC)
+            elif timestamp < self.start_ts:
+                # non-trade actions before the start of the period are not priced
+                continue
+            elif isinstance(action, AssetMovement):
+                if not self.events.account_for_assets_movements:
+                    continue
+                assets.add(action.fee_asset)
+            elif isinstance(action, EthereumTransaction):
+                if not db_settings.include_gas_costs:
+                    continue
+                assets.add(A_ETH)
+            else:
+                assets.add(action_get_assets(action)[0])
+
+            for asset in assets:
+                if asset == self.profit_currency or asset in ignored_assets:
+                    continue
+
+                pair = (asset, self.profit_currency)
+                # actions are sorted so the first timestamp seen for a pair is its start
+                start_ts, _ = price_ranges.get(pair, (timestamp, timestamp))
+                price_ranges[pair] = (start_ts, timestamp)
+
+        log.debug(f'Prefetching historical prices for {len(price_ranges)} asset pairs')
+        PriceHistorian().prefetch_historical_prices(price_ranges)
+
+    def _checkpoint_settings_key(self, db_settings: DBSettings) -> str:
+        """Identifies the settings that affect the processing state
+
+        Checkpoints are only reused by a history processing with the same settings
+        """
+        settings = {
+            'version': ACCOUNTING_CHECKPOINT_VERSION,
+            'profit_currency': self.profit_currency.identifier,
+            'include_crypto2crypto': self.events.include_crypto2crypto,
+            'taxfree_after_period': self.events.taxfree_after_period,
+            'account_for_assets_movements': self.events.account_for_assets_movements,
+            'include_gas_costs': db_settings.include_gas_costs,
+            'create_csv': self.csvexporter.create_csv,
+            'ignored_assets': sorted(x.identifier for x in self.db.get_ignored_assets()),
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    def _save_checkpoint(
+            self,
+            settings_key: str,
+            timestamp: Timestamp,
+            actions_digest: str,
+    ) -> None:
+        state = {
+            'events': self.events.serialize_state(),
+            'last_gas_price': self.last_gas_price,
+            'asset_movement_fees': str(self.asset_movement_fees),
+            'eth_transactions_gas_costs': str(self.eth_transactions_gas_costs),
+        }
+        log.debug('Saving accounting checkpoint', timestamp=timestamp)
+        self.db.add_accounting_checkpoint(
+            settings_key=settings_key,
+            timestamp=timestamp,
+            actions_digest=actions_digest,
+            state=json.dumps(state),
+            keep_latest=ACCOUNTING_CHECKPOINTS_TO_KEEP,
+        )
+
+    def _restore_checkpoint(
+            self,
+            actions: List[TaxableAction],
+            settings_key: str,
+            start_ts: Timestamp,
+    ) -> Tuple[int, 'hashlib._Hash', Timestamp]:
+        """Restores the processing state from the latest usable checkpoint
+
+        A checkpoint is usable if it's not after start_ts and if the actions before it
+        are exactly the ones it was saved with. A checkpoint after an edited, added or
+        removed action can never be used again so all those are deleted.
+
+        Returns the index of the first action still to be processed, the digest of all
+        actions before it and the timestamp of the restored checkpoint or -1 if no
+        checkpoint was restored.
+        """
+        no_checkpoint = (0, hashlib.sha256(), Timestamp(-1))
+        digest = hashlib.sha256()
+        idx = 0
+        usable = []
+        for checkpoint_ts, actions_digest, state in self.db.get_accounting_checkpoints(
+                settings_key=settings_key,
+                up_to_ts=start_ts,
+        ):
+            while idx < len(actions) and action_get_timestamp(actions[idx]) < checkpoint_ts:
+                digest.update(_serialize_action_for_digest(actions[idx]))
+                idx += 1
+
+            if digest.hexdigest() != actions_digest:
+                log.debug('Deleting outdated accounting checkpoints', from_ts=checkpoint_ts)
+                self.db.delete_accounting_checkpoints(settings_key, checkpoint_ts)
+                break
+
+            usable.append((idx, digest.copy(), checkpoint_ts, state))
+
+        # Try the latest checkpoint first and fall back to the older ones if it
+        # can't be restored, for example due to an asset this version doesn't know
+        for checkpoint in reversed(usable):
+            idx, digest, checkpoint_ts, state = checkpoint
+            try:
+                state_data = json.loads(state)
+                last_gas_price = int(state_data['last_gas_price'])
+                asset_movement_fees = FVal(state_data['asset_movement_fees'])
+                eth_transactions_gas_costs = FVal(state_data['eth_transactions_gas_costs'])
+                self.events.restore_state(state_data['events'])
+            except (
+                    json.decoder.JSONDecodeError,
+                    KeyError,
+                    TypeError,
+                    ValueError,
+                    DeserializationError,
+            ) as e:
+                log.warning(
+                    f'Skipping accounting checkpoint at {checkpoint_ts} since it '
+                    f'could not be restored: {str(e)}',
+                )
+                continue
+
+            break
+        else:
+            return no_checkpoint
+
+        self.last_gas_price = last_gas_price
+        self.asset_movement_fees = asset_movement_fees
+        self.eth_transactions_gas_costs = eth_transactions_gas_costs
+        log.debug(
+            'Restored accounting checkpoint',
+            timestamp=checkpoint_ts,
+            skipped_actions=idx,
+        )
+        return idx, digest, checkpoint_ts
+
     def process_history(
             self,
             start_ts: Timestamp,
@@ -271,7 +508,8 @@ class Accountant():
 
         start_ts here is the timestamp at which to start taking trades and other
         taxable events into account. Not where processing starts from. Processing
-        always starts from the very first event we find in the history.
+        starts from the very first event we find in the history, or from the latest
+        checkpoint before start_ts if the actions before it have not changed.
         """
         log.info(
             'Start of history processing',
@@ -310,15 +548,50 @@ class Accountant():
         self.currently_processing_timestamp = first_ts
         self.started_processing_timestamp = first_ts
 
+        settings_key = self._checkpoint_settings_key(db_settings)
+        start_idx, actions_digest, checkpoint_ts = self._restore_checkpoint(
+            actions=actions,
+            settings_key=settings_key,
+            start_ts=start_ts,
+        )
+        self.prefetch_prices(actions=actions[start_idx:], end_ts=end_ts, db_settings=db_settings)
+
+        if checkpoint_ts == -1:
+            checkpoint_ts = first_ts
+        next_checkpoint_ts = (
+            checkpoint_ts - checkpoint_ts % ACCOUNTING_CHECKPOINT_PERIOD +
+            ACCOUNTING_CHECKPOINT_PERIOD
+        )
+        # A checkpoint must not depend on the actions that failed to process since they
+        # may succeed next time, nor on the events exported for the report period
+        can_checkpoint = True
         prev_time = Timestamp(0)
         count = 0
-        for action in actions:
+        for action in actions[start_idx:]:
+            timestamp = action_get_timestamp(action)
+            if timestamp >= next_checkpoint_ts:
+                new_checkpoint_ts = Timestamp(timestamp - timestamp % ACCOUNTING_CHECKPOINT_PERIOD)
+                can_checkpoint = (
+                    can_checkpoint and
+                    new_checkpoint_ts <= start_ts and
+                    len(self.csvexporter.all_events) == 0
+                )
+                if can_checkpoint:
+                    self._save_checkpoint(
+                        settings_key=settings_key,
+                        timestamp=new_checkpoint_ts,
+                        actions_digest=actions_digest.hexdigest(),
+                    )
+                next_checkpoint_ts = Timestamp(new_checkpoint_ts + ACCOUNTING_CHECKPOINT_PERIOD)
+            actions_digest.update(_serialize_action_for_digest(action))
+
             try:
                 (
                     should_continue,
                     prev_time,
                 ) = self.process_action(action, end_ts, prev_time, db_settings)
             except PriceQueryUnsupportedAsset as e:
+                can_checkpoint = False
                 ts = action_get_timestamp(action)
                 self.msg_aggregator.add_error(
                     f'Skipping action at '
@@ -332,6 +605,7 @@ class Accountant():
                 )
                 continue
             except NoPriceForGivenTimestamp as e:
+                can_checkpoint = False
                 ts = action_get_timestamp(action)
                 self.msg_aggregator.add_error(
                     f'Skipping action at '
@@ -345,6 +619,7 @@ class Accountant():
                 )
                 continue
             except RemoteError as e:
+                can_checkpoint = False
                 ts = action_get_timestamp(action)
                 self.msg_aggregator.add_error(
                     f'Skipping action at '
@@ -563,7 +838,4 @@ class Accountant():
         if asset not in self.events.events:
             return None
 
-        amount = FVal(0)
-        for buy_event in self.events.events[asset].buys:
-            amount += buy_event.amount
-        return amount
+        return self.events.events[asset].buys.total_amount
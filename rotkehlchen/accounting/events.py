@@ -1,13 +1,24 @@
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from rotkehlchen.accounting.structures import DefiEvent
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import BTC_BCH_FORK_TS, ETH_DAO_FORK_TS, ZERO
 from rotkehlchen.constants.assets import A_BCH, A_BTC, A_ETC, A_ETH
 from rotkehlchen.csv_exporter import CSVExporter
-from rotkehlchen.errors import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
-from rotkehlchen.exchanges.data_structures import BuyEvent, Events, MarginPosition, SellEvent
+from rotkehlchen.errors import (
+    DeserializationError,
+    NoPriceForGivenTimestamp,
+    PriceQueryUnsupportedAsset,
+    UnknownAsset,
+)
+from rotkehlchen.exchanges.data_structures import (
+    BuyEvent,
+    BuyEventsQueue,
+    Events,
+    MarginPosition,
+    SellEvent,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -46,6 +57,75 @@ class TaxableEvents():
         self.margin_positions_profit_loss = ZERO
         self.defi_profit_loss = ZERO
 
+    def serialize_state(self) -> Dict[str, Any]:
+        """Serializes the buy lots, sells and profit/loss totals so far to a JSON
+        compatible dict that can be restored with restore_state()"""
+        return {
+            'events': {
+                asset.identifier: {
+                    'buys': [
+                        [x.timestamp, str(x.amount), str(x.rate), str(x.fee_rate)]
+                        for x in events.buys
+                    ],
+                    'sells': [
+                        [x.timestamp, str(x.amount), str(x.rate), str(x.fee_rate), str(x.gain)]
+                        for x in events.sells
+                    ],
+                } for asset, events in self.events.items()
+            },
+            'general_trade_profit_loss': str(self.general_trade_profit_loss),
+            'taxable_trade_profit_loss': str(self.taxable_trade_profit_loss),
+            'loan_profit': str(self.loan_profit),
+            'defi_profit_loss': str(self.defi_profit_loss),
+            'settlement_losses': str(self.settlement_losses),
+            'margin_positions_profit_loss': str(self.margin_positions_profit_loss),
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restores the state serialized by serialize_state(). Should follow a reset()
+
+        May raise:
+        - DeserializationError if the given state is not valid
+        """
+        events = {}
+        try:
+            for identifier, entry in state['events'].items():
+                buys = BuyEventsQueue()
+                for timestamp, amount, rate, fee_rate in entry['buys']:
+                    buys.append(BuyEvent(
+                        timestamp=Timestamp(timestamp),
+                        amount=FVal(amount),
+                        rate=FVal(rate),
+                        fee_rate=FVal(fee_rate),
+                    ))
+                sells = [
+                    SellEvent(
+                        timestamp=Timestamp(timestamp),
+                        amount=FVal(amount),
+                        rate=FVal(rate),
+                        fee_rate=FVal(fee_rate),
+                        gain=FVal(gain),
+                    ) for timestamp, amount, rate, fee_rate, gain in entry['sells']
+                ]
+                events[Asset(identifier)] = Events(buys, sells)
+
+            general_trade_profit_loss = FVal(state['general_trade_profit_loss'])
+            taxable_trade_profit_loss = FVal(state['taxable_trade_profit_loss'])
+            loan_profit = FVal(state['loan_profit'])
+            defi_profit_loss = FVal(state['defi_profit_loss'])
+            settlement_losses = FVal(state['settlement_losses'])
+            margin_positions_profit_loss = FVal(state['margin_positions_profit_loss'])
+        except (KeyError, TypeError, ValueError, UnknownAsset) as e:
+            raise DeserializationError(f'Invalid taxable events state: {str(e)}') from e
+
+        self.events = events
+        self.general_trade_profit_loss = general_trade_profit_loss
+        self.taxable_trade_profit_loss = taxable_trade_profit_loss
+        self.loan_profit = loan_profit
+        self.defi_profit_loss = defi_profit_loss
+        self.settlement_losses = settlement_losses
+        self.margin_positions_profit_loss = margin_positions_profit_loss
+
     @property
     def include_crypto2crypto(self) -> Optional[bool]:
         return self._include_crypto2crypto
@@ -79,13 +159,13 @@ class TaxableEvents():
         now = ts_now()
         for asset, events in self.events.items():
             tax_free_amount_left = ZERO
-            amount_sum = ZERO
+            if self.taxfree_after_period is not None:
+                tax_free_amount_left = events.buys.amount_bought_before(
+                    Timestamp(now - self.taxfree_after_period),
+                )
+            amount_sum = events.buys.total_amount
             average = ZERO
             for buy_event in events.buys:
-                if self.taxfree_after_period is not None:
-                    if buy_event.timestamp + self.taxfree_after_period < now:
-                        tax_free_amount_left += buy_event.amount
-                amount_sum += buy_event.amount
                 average += buy_event.amount * buy_event.rate
 
             if amount_sum == ZERO:
@@ -127,29 +207,21 @@ class TaxableEvents():
         if asset not in self.events or len(self.events[asset].buys) == 0:
             return False
 
-        remaining_amount_from_last_buy = FVal('-1')
+        buys = self.events[asset].buys
         remaining_amount = amount
-        for idx, buy_event in enumerate(self.events[asset].buys):
+        while len(buys) != 0:
+            buy_event = buys[0]
             if remaining_amount < buy_event.amount:
-                stop_index = idx
-                remaining_amount_from_last_buy = buy_event.amount - remaining_amount
-                # stop iterating since we found all buys to satisfy reduction
-                break
+                # modify the amount of the buy where we stopped
+                buys.reduce_first(buy_event.amount - remaining_amount)
+                # stop since we found all buys to satisfy reduction
+                return True
 
-            # else
+            # else the buy is used up entirely
             remaining_amount -= buy_event.amount
-            if idx == len(self.events[asset].buys) - 1:
-                stop_index = idx + 1
-
-        # Otherwise, delete all the used up buys from the list
-        del self.events[asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_amount != ZERO:
-            return False
+            buys.popleft()
 
-        return True
+        return remaining_amount == ZERO
 
     def handle_prefork_asset_buys(
             self,
@@ -344,7 +416,7 @@ class TaxableEvents():
         )
 
         if bought_asset not in self.events:
-            self.events[bought_asset] = Events([], [])
+            self.events[bought_asset] = Events(BuyEventsQueue(), [])
 
         gross_cost = bought_amount * buy_rate
         cost_in_profit_currency = gross_cost + fee_in_profit_currency
@@ -488,7 +560,7 @@ class TaxableEvents():
             return
 
         if selling_asset not in self.events:
-            self.events[selling_asset] = Events([], [])
+            self.events[selling_asset] = Events(BuyEventsQueue(), [])
 
         self.events[selling_asset].sells.append(
             SellEvent(
@@ -647,14 +719,26 @@ class TaxableEvents():
             - `taxfree_bought_cost`: How much it cost in `profit_currency` to buy
                                      the taxfree_amount (selling_amount - taxable_amount)
         """
+        buys = self.events[selling_asset].buys
+        if len(buys) == 0:
+            log.critical(
+                'No documented buy found for "{}" before {}'.format(
+                    selling_asset,
+                    timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
+                ),
+            )
+            # That means we had no documented buy for that asset. This is not good
+            # because we can't prove a corresponding buy and as such we are burdened
+            # calculating the entire sell as profit which needs to be taxed
+            return selling_amount, ZERO, ZERO
+
         remaining_sold_amount = selling_amount
-        stop_index = -1
         taxfree_bought_cost = ZERO
         taxable_bought_cost = ZERO
         taxable_amount = ZERO
         taxfree_amount = ZERO
-        remaining_amount_from_last_buy = FVal('-1')
-        for idx, buy_event in enumerate(self.events[selling_asset].buys):
+        while len(buys) != 0:
+            buy_event = buys[0]
             if self.taxfree_after_period is None:
                 at_taxfree_period = False
             else:
@@ -663,7 +747,6 @@ class TaxableEvents():
                 )
 
             if remaining_sold_amount < buy_event.amount:
-                stop_index = idx
                 buying_cost = remaining_sold_amount.fma(
                     buy_event.rate,
                     (buy_event.fee_rate * remaining_sold_amount),
@@ -676,7 +759,6 @@ class TaxableEvents():
                     taxable_amount += remaining_sold_amount
                     taxable_bought_cost += buying_cost
 
-                remaining_amount_from_last_buy = buy_event.amount - remaining_sold_amount
                 log.debug(
                     'Sell uses up part of historical buy',
                     sensitive_log=True,
@@ -688,6 +770,9 @@ class TaxableEvents():
                     profit_currency=self.profit_currency,
                     trade_timestamp=buy_event.timestamp,
                 )
+                # modify the amount of the buy where we stopped
+                buys.reduce_first(buy_event.amount - remaining_sold_amount)
+                remaining_sold_amount = ZERO
                 # stop iterating since we found all buys to satisfy this sell
                 break
 
@@ -714,29 +799,10 @@ class TaxableEvents():
                 profit_currency=self.profit_currency,
                 trade_timestamp=buy_event.timestamp,
             )
+            # the sell used up the whole buy so remove it
+            buys.popleft()
 
-            # If the sell used up the last historical buy
-            if idx == len(self.events[selling_asset].buys) - 1:
-                stop_index = idx + 1
-
-        if len(self.events[selling_asset].buys) == 0:
-            log.critical(
-                'No documented buy found for "{}" before {}'.format(
-                    selling_asset,
-                    timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
-                ),
-            )
-            # That means we had no documented buy for that asset. This is not good
-            # because we can't prove a corresponding buy and as such we are burdened
-            # calculating the entire sell as profit which needs to be taxed
-            return selling_amount, ZERO, ZERO
-
-        # Otherwise, delete all the used up buys from the list
-        del self.events[selling_asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[selling_asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_sold_amount != ZERO:
+        if remaining_sold_amount != ZERO:
             # if we still have sold amount but no buys to satisfy it then we only
             # found buys to partially satisfy the sell
             adjusted_amount = selling_amount - taxfree_amount
@@ -772,7 +838,7 @@ class TaxableEvents():
         rate = self.get_rate_in_profit_currency(gained_asset, timestamp)
 
         if gained_asset not in self.events:
-            self.events[gained_asset] = Events([], [])
+            self.events[gained_asset] = Events(BuyEventsQueue(), [])
 
         net_gain_amount = gained_amount - fee_in_asset
         gain_in_profit_currency = net_gain_amount * rate
@@ -821,9 +887,9 @@ class TaxableEvents():
         or with reading the response returned by the server
         """
         if margin.pl_currency not in self.events:
-            self.events[margin.pl_currency] = Events([], [])
+            self.events[margin.pl_currency] = Events(BuyEventsQueue(), [])
         if margin.fee_currency not in self.events:
-            self.events[margin.fee_currency] = Events([], [])
+            self.events[margin.fee_currency] = Events(BuyEventsQueue(), [])
 
         pl_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
         fee_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
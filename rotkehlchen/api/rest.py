@@ -3,11 +3,24 @@ import hashlib
 import json
 import logging
 import traceback
+from collections import OrderedDict
 from functools import wraps
 from http import HTTPStatus
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 import gevent
 from flask import Response, make_response, send_file
@@ -49,7 +62,7 @@ from rotkehlchen.errors import (
     SystemPermissionError,
     TagConstraintError,
 )
-from rotkehlchen.exchanges.data_structures import Trade
+from rotkehlchen.exchanges.data_structures import AssetMovement, Trade
 from rotkehlchen.exchanges.manager import SUPPORTED_EXCHANGES
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
@@ -77,6 +90,7 @@ from rotkehlchen.typing import (
     TradePair,
     TradeType,
 )
+from rotkehlchen.utils.profiling import TaskProfile
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 if TYPE_CHECKING:
@@ -85,6 +99,36 @@ if TYPE_CHECKING:
 
 
 OK_RESULT = {'result': True, 'message': ''}
+# How many of the latest task profiles to keep around
+MAX_TASK_PROFILES = 100
+
+T = TypeVar('T', Trade, AssetMovement)
+
+
+def _paginate_entries(
+        entries: Sequence[T],
+        limit: int,
+        after: Optional[Tuple[Timestamp, str]],
+        ascending: bool,
+) -> List[T]:
+    """Returns a page of the given entries, which should be ordered from oldest to newest
+
+    Follows the same (timestamp, identifier) order as the DB pagination
+    """
+    ordered = list(entries) if ascending else list(reversed(entries))
+    if after is not None and ascending:
+        ordered = [x for x in ordered if (x.timestamp, x.identifier) > after]
+    elif after is not None:
+        ordered = [x for x in ordered if (x.timestamp, x.identifier) < after]
+    return ordered[:limit]
+
+
+def _trade_has_asset(trade: Trade, asset: Asset) -> bool:
+    """Matches either side of the trade's pair, like the asset filter of the DB trades"""
+    return (
+        trade.pair.startswith(f'{asset.identifier}_') or
+        trade.pair.endswith(f'_{asset.identifier}')
+    )
 
 
 def _wrap_in_ok_result(result: Any) -> Dict[str, Any]:
@@ -193,6 +237,7 @@ class RestAPI():
         self.task_lock = Semaphore()
         self.task_id = 0
         self.task_results: Dict[int, Any] = {}
+        self.task_profiles: 'OrderedDict[int, TaskProfile]' = OrderedDict()
 
         self.trade_schema = TradeSchema()
 
@@ -238,11 +283,22 @@ class RestAPI():
             self._write_task_result(task_id, result)
 
     def _do_query_async(self, command: str, task_id: int, **kwargs: Any) -> None:
-        result = getattr(self, command)(**kwargs)
+        try:
+            result = getattr(self, command)(**kwargs)
+        finally:
+            profile = self.task_profiles.get(task_id, None)
+            if profile is not None:
+                profile.finish()
+                log.debug('Task profile', task_id=task_id, command=command, **profile.serialize())
         self._write_task_result(task_id, result)
 
     def _query_async(self, command: str, **kwargs: Any) -> Response:
         task_id = self._new_task_id()
+        profile = TaskProfile()
+        with self.task_lock:
+            self.task_profiles[task_id] = profile
+            if len(self.task_profiles) > MAX_TASK_PROFILES:
+                self.task_profiles.popitem(last=False)
 
         greenlet = gevent.spawn(
             self._do_query_async,
@@ -251,6 +307,7 @@ class RestAPI():
             **kwargs,
         )
         greenlet.task_id = task_id
+        greenlet.task_profile = profile
         greenlet.link_exception(self._handle_killed_greenlets)
         self.killable_greenlets.append(greenlet)
         return api_response(_wrap_in_ok_result({'task_id': task_id}), status_code=HTTPStatus.OK)
@@ -332,6 +389,19 @@ class RestAPI():
         }
         return api_response(result=result_dict, status_code=HTTPStatus.NOT_FOUND)
 
+    @require_loggedin_user()
+    def query_task_profile(self, task_id: int) -> Response:
+        with self.task_lock:
+            profile = self.task_profiles.get(task_id, None)
+
+        if profile is None:
+            return api_response(
+                wrap_in_fail_result(f'No profile for task with id {task_id} found'),
+                status_code=HTTPStatus.NOT_FOUND,
+            )
+
+        return api_response(_wrap_in_ok_result(profile.serialize()), status_code=HTTPStatus.OK)
+
     @staticmethod
     def get_exchange_rates(given_currencies: Optional[List[Asset]]) -> Response:
         if given_currencies is not None and len(given_currencies) == 0:
@@ -565,7 +635,22 @@ class RestAPI():
             from_ts: Timestamp,
             to_ts: Timestamp,
             location: Optional[Location],
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            ascending: bool = False,
     ) -> Dict[str, Any]:
+        if limit is not None:
+            return self._get_trades_page(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=location,
+                asset=asset,
+                limit=limit,
+                after=after,
+                ascending=ascending,
+            )
+
         try:
             trades = self.rotkehlchen.query_trades(from_ts=from_ts, to_ts=to_ts, location=location)
         except RemoteError as e:
@@ -594,6 +679,65 @@ class RestAPI():
 
         return {'result': result, 'message': '', 'status_code': HTTPStatus.OK}
 
+    def _get_trades_page(
+            self,
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            location: Optional[Location],
+            asset: Optional[Asset],
+            limit: int,
+            after: Optional[Tuple[Timestamp, str]],
+            ascending: bool,
+    ) -> Dict[str, Any]:
+        """Returns a single page of the trades saved in the DB
+
+        Unlike _get_trades this does not query the exchanges for new trades
+        """
+        db = self.rotkehlchen.data.db
+        if self.rotkehlchen.premium is None:
+            # Only the oldest trades are visible so paginate them in memory. The asset
+            # is filtered after the limit so that the same trades are visible as without it
+            free_trades = db.get_trades(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=location,
+                limit=FREE_TRADES_LIMIT,
+            )
+            trades = _paginate_entries(
+                entries=[x for x in free_trades if asset is None or _trade_has_asset(x, asset)],
+                limit=limit,
+                after=after,
+                ascending=ascending,
+            )
+        else:
+            trades = db.get_trades(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=location,
+                asset=asset,
+                limit=limit,
+                after=after,
+                descending=not ascending,
+            )
+
+        trades_result = []
+        for trade in trades:
+            serialized_trade = self.trade_schema.dump(trade)
+            serialized_trade['trade_id'] = trade.identifier
+            trades_result.append(serialized_trade)
+
+        result = {
+            'entries': trades_result,
+            'entries_found': db.count_trades(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=location,
+                asset=asset,
+            ),
+            'entries_limit': FREE_TRADES_LIMIT if self.rotkehlchen.premium is None else -1,
+        }
+        return {'result': result, 'message': '', 'status_code': HTTPStatus.OK}
+
     @require_loggedin_user()
     def get_trades(
             self,
@@ -601,6 +745,10 @@ class RestAPI():
             to_ts: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            ascending: bool = False,
     ) -> Response:
         if async_query:
             return self._query_async(
@@ -608,12 +756,20 @@ class RestAPI():
                 from_ts=from_ts,
                 to_ts=to_ts,
                 location=location,
+                asset=asset,
+                limit=limit,
+                after=after,
+                ascending=ascending,
             )
 
         response = self._get_trades(
             from_ts=from_ts,
             to_ts=to_ts,
             location=location,
+            asset=asset,
+            limit=limit,
+            after=after,
+            ascending=ascending,
         )
         result_dict = {'result': response['result'], 'message': response['message']}
         return api_response(process_result(result_dict), status_code=response['status_code'])
@@ -701,25 +857,64 @@ class RestAPI():
             from_timestamp: Timestamp,
             to_timestamp: Timestamp,
             location: Optional[Location],
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            ascending: bool = False,
     ) -> Dict[str, Any]:
         msg = ''
         status_code = HTTPStatus.OK
         result = None
-        try:
-            movements = self.rotkehlchen.query_asset_movements(
+        db = self.rotkehlchen.data.db
+        free_limit = FREE_ASSET_MOVEMENTS_LIMIT if self.rotkehlchen.premium is None else -1
+        if limit is not None:
+            # A single page of the movements saved in the DB. Exchanges are not queried
+            if self.rotkehlchen.premium is None:
+                # The asset is filtered after the limit, as for the trades
+                free_movements = db.get_asset_movements(
+                    from_ts=from_timestamp,
+                    to_ts=to_timestamp,
+                    location=location,
+                    limit=FREE_ASSET_MOVEMENTS_LIMIT,
+                )
+                movements = _paginate_entries(
+                    entries=[x for x in free_movements if asset is None or x.asset == asset],
+                    limit=limit,
+                    after=after,
+                    ascending=ascending,
+                )
+            else:
+                movements = db.get_asset_movements(
+                    from_ts=from_timestamp,
+                    to_ts=to_timestamp,
+                    location=location,
+                    asset=asset,
+                    limit=limit,
+                    after=after,
+                    descending=not ascending,
+                )
+            entries_found = db.count_asset_movements(
                 from_ts=from_timestamp,
                 to_ts=to_timestamp,
                 location=location,
+                asset=asset,
             )
-        except RemoteError as e:
-            return {'result': None, 'message': str(e), 'status_code': HTTPStatus.BAD_GATEWAY}
+        else:
+            try:
+                movements = self.rotkehlchen.query_asset_movements(
+                    from_ts=from_timestamp,
+                    to_ts=to_timestamp,
+                    location=location,
+                )
+            except RemoteError as e:
+                return {'result': None, 'message': str(e), 'status_code': HTTPStatus.BAD_GATEWAY}
+            entries_found = db.get_entries_count('asset_movements')
 
         serialized_movements = [x.serialize() for x in movements]
-        limit = FREE_ASSET_MOVEMENTS_LIMIT if self.rotkehlchen.premium is None else -1
         result = {
             'entries': process_result_list(serialized_movements),
-            'entries_found': self.rotkehlchen.data.db.get_entries_count('asset_movements'),
-            'entries_limit': limit,
+            'entries_found': entries_found,
+            'entries_limit': free_limit,
         }
 
         return {'result': result, 'message': msg, 'status_code': status_code}
@@ -731,6 +926,10 @@ class RestAPI():
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            ascending: bool = False,
     ) -> Response:
         if async_query:
             return self._query_async(
@@ -738,12 +937,20 @@ class RestAPI():
                 from_timestamp=from_timestamp,
                 to_timestamp=to_timestamp,
                 location=location,
+                asset=asset,
+                limit=limit,
+                after=after,
+                ascending=ascending,
             )
 
         response = self._get_asset_movements(
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
             location=location,
+            asset=asset,
+            limit=limit,
+            after=after,
+            ascending=ascending,
         )
         result_dict = {'result': response['result'], 'message': response['message']}
         return api_response(process_result(result_dict), status_code=response['status_code'])
@@ -936,6 +1143,7 @@ class RestAPI():
         gevent.killall(self.killable_greenlets)
         with self.task_lock:
             self.task_results = {}
+            self.task_profiles = OrderedDict()
         self.rotkehlchen.logout()
         result_dict['result'] = True
         return api_response(result_dict, status_code=HTTPStatus.OK)
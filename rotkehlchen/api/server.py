@@ -24,6 +24,7 @@ from rotkehlchen.api.v1.resources import (
     AllBalancesResource,
     AssetIconsResource,
     AssetMovementsResource,
+    AsyncTaskProfileResource,
     AsyncTasksResource,
     BlockchainBalancesResource,
     BlockchainsAccountsResource,
@@ -96,6 +97,7 @@ URLS_V1: URLS = [
     ('/settings', SettingsResource),
     ('/tasks/', AsyncTasksResource),
     ('/tasks/<int:task_id>', AsyncTasksResource, 'specific_async_tasks_resource'),
+    ('/tasks/<int:task_id>/profile', AsyncTaskProfileResource),
     ('/exchange_rates', ExchangeRatesResource),
     ('/external_services/', ExternalServicesResource),
     ('/exchanges', ExchangesResource),
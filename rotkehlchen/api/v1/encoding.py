@@ -581,6 +581,10 @@ class AsyncTasksQuerySchema(Schema):
     task_id = fields.Integer(strict=True, missing=None)
 
 
+class AsyncTaskProfileQuerySchema(Schema):
+    task_id = fields.Integer(strict=True, required=True)
+
+
 class EthereumTransactionQuerySchema(Schema):
     async_query = fields.Boolean(missing=False)
     address = EthereumAddressField(missing=None)
@@ -595,6 +599,38 @@ class TimerangeLocationQuerySchema(Schema):
     async_query = fields.Boolean(missing=False)
 
 
+class TimerangeLocationPaginationQuerySchema(TimerangeLocationQuerySchema):
+    asset = AssetField(missing=None)
+    limit = fields.Integer(
+        strict=True,
+        validate=webargs.validate.Range(
+            min=1,
+            error='The number of entries per page should be >= 1',
+        ),
+        missing=None,
+    )
+    after_timestamp = TimestampField(missing=None)
+    after_id = fields.String(missing=None)
+    ascending = fields.Boolean(missing=False)
+
+    @validates_schema  # type: ignore
+    def validate_pagination_schema(  # pylint: disable=no-self-use
+            self,
+            data: Dict[str, Any],
+            **_kwargs: Any,
+    ) -> None:
+        if (data['after_timestamp'] is None) != (data['after_id'] is None):
+            raise ValidationError(
+                message='after_timestamp and after_id should be given together',
+                field_name='after_id',
+            )
+        if data['limit'] is None and (data['asset'] is not None or data['after_id'] is not None):
+            raise ValidationError(
+                message='Filtering by asset or giving a page cursor requires a limit',
+                field_name='limit',
+            )
+
+
 class TradeSchema(Schema):
     timestamp = TimestampField(required=True)
     location = LocationField(required=True)
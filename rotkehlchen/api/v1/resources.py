@@ -17,6 +17,7 @@ from rotkehlchen.api.v1.encoding import (
     AssetIconsSchema,
     AsyncHistoricalQuerySchema,
     AsyncQueryArgumentSchema,
+    AsyncTaskProfileQuerySchema,
     AsyncTasksQuerySchema,
     BaseXpubSchema,
     BlockchainAccountsDeleteSchema,
@@ -46,7 +47,7 @@ from rotkehlchen.api.v1.encoding import (
     TagDeleteSchema,
     TagEditSchema,
     TagSchema,
-    TimerangeLocationQuerySchema,
+    TimerangeLocationPaginationQuerySchema,
     TradeDeleteSchema,
     TradePatchSchema,
     TradeSchema,
@@ -178,6 +179,15 @@ class AsyncTasksResource(BaseResource):
         return self.rest_api.query_tasks_outcome(task_id=task_id)
 
 
+class AsyncTaskProfileResource(BaseResource):
+
+    get_schema = AsyncTaskProfileQuerySchema()
+
+    @use_kwargs(get_schema, location='view_args')  # type: ignore
+    def get(self, task_id: int) -> Response:
+        return self.rest_api.query_task_profile(task_id=task_id)
+
+
 class ExchangeRatesResource(BaseResource):
 
     get_schema = ExchangeRatesSchema()
@@ -354,7 +364,7 @@ class ManuallyTrackedBalancesResource(BaseResource):
 
 class TradesResource(BaseResource):
 
-    get_schema = TimerangeLocationQuerySchema()
+    get_schema = TimerangeLocationPaginationQuerySchema()
     put_schema = TradeSchema()
     patch_schema = TradePatchSchema()
     delete_schema = TradeDeleteSchema()
@@ -366,12 +376,21 @@ class TradesResource(BaseResource):
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            asset: Optional[Asset],
+            limit: Optional[int],
+            after_timestamp: Optional[Timestamp],
+            after_id: Optional[str],
+            ascending: bool,
     ) -> Response:
         return self.rest_api.get_trades(
             from_ts=from_timestamp,
             to_ts=to_timestamp,
             location=location,
             async_query=async_query,
+            asset=asset,
+            limit=limit,
+            after=None if after_timestamp is None else (after_timestamp, after_id),
+            ascending=ascending,
         )
 
     @use_kwargs(put_schema, location='json')  # type: ignore
@@ -437,7 +456,7 @@ class TradesResource(BaseResource):
 
 class AssetMovementsResource(BaseResource):
 
-    get_schema = TimerangeLocationQuerySchema()
+    get_schema = TimerangeLocationPaginationQuerySchema()
 
     @use_kwargs(get_schema, location='json_and_query')  # type: ignore
     def get(
@@ -446,12 +465,21 @@ class AssetMovementsResource(BaseResource):
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            asset: Optional[Asset],
+            limit: Optional[int],
+            after_timestamp: Optional[Timestamp],
+            after_id: Optional[str],
+            ascending: bool,
     ) -> Response:
         return self.rest_api.get_asset_movements(
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
             location=location,
             async_query=async_query,
+            asset=asset,
+            limit=limit,
+            after=None if after_timestamp is None else (after_timestamp, after_id),
+            ascending=ascending,
         )
 
 
@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from functools import total_ordering
-from typing import Any, Optional, Type, TypeVar
+from typing import Any, Optional, Tuple, Type, TypeVar
 
 from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.errors import DeserializationError, UnknownAsset, UnsupportedAsset
@@ -165,8 +165,11 @@ WORLD_TO_BITFINEX = {
 }
 
 
+A = TypeVar('A', bound='Asset')
+
+
 @total_ordering
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class Asset():
     identifier: str
     name: str = field(init=False)
@@ -181,6 +184,30 @@ class Asset():
     cryptocompare: Optional[str] = field(init=False)
     coingecko: Optional[str] = field(init=False)
 
+    def __new__(cls: Type[A], identifier: str) -> A:
+        """Returns the single instance of the class for the given identifier
+
+        Assets are immutable so all constructions of the same asset share one
+        instance and only the first one needs to be initialized.
+        """
+        instances = AssetResolver().asset_instances
+        if isinstance(identifier, str):
+            instance = instances.get((cls, identifier), None)
+            if instance is not None:
+                return instance
+
+        instance = object.__new__(cls)
+        object.__setattr__(instance, 'identifier', identifier)
+        instance.__post_init__()
+        # Identifiers differing only in case resolve to the same canonical instance
+        instance = instances.setdefault((cls, instance.identifier), instance)
+        instances[(cls, identifier)] = instance
+        return instance
+
+    def __reduce__(self) -> Tuple[Type['Asset'], Tuple[str]]:
+        # Copies and unpickled assets go through __new__ and get the shared instance
+        return self.__class__, (self.identifier,)
+
     def __post_init__(self) -> None:
         """
         Asset post initialization
@@ -275,6 +302,8 @@ class Asset():
         return hash(self.identifier)
 
     def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
         if other is None:
             return False
 
@@ -297,7 +326,7 @@ class Asset():
         raise ValueError(f'Invalid comparison of asset with {type(other)}')
 
 
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class HasEthereumToken(Asset):
     """ Marker to denote assets having an Ethereum token address """
     ethereum_address: ChecksumEthAddress = field(init=False)
@@ -320,7 +349,7 @@ class HasEthereumToken(Asset):
 T = TypeVar('T', bound='EthereumToken')
 
 
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class EthereumToken(HasEthereumToken):
 
     def token_info(self) -> EthTokenInfo:
@@ -124,11 +124,37 @@ def _attempt_initialization(
     return assets, True
 
 
+def _deserialize_asset_data(identifier: str, data: Dict[str, Any]) -> AssetData:
+    # If an unknown asset is found (can happen if list is updated but code is not)
+    # then default to the "own chain" type"
+    asset_type = asset_type_mapping.get(data['type'], AssetType.OWN_CHAIN)
+    return AssetData(
+        identifier=identifier,
+        symbol=data['symbol'],
+        name=data['name'],
+        # If active is in the data use it, else we assume it's true
+        active=data.get('active', True),
+        asset_type=asset_type,
+        started=data.get('started', None),
+        ended=data.get('ended', None),
+        forked=data.get('forked', None),
+        swapped_for=data.get('swapped_for', None),
+        ethereum_address=data.get('ethereum_address', None),
+        decimals=data.get('ethereum_token_decimals', None),
+        cryptocompare=data.get('cryptocompare', None),
+        coingecko=data.get('coingecko', None),
+    )
+
+
 class AssetResolver():
-    __instance = None
+    __instance: Optional['AssetResolver'] = None
     remote_check_happened: bool = False
     assets: Dict[str, Dict[str, Any]] = {}
     lowercase_mapping: Dict[str, str] = {}
+    assets_data: Dict[str, AssetData] = {}
+    # The Asset instances created so far keyed by class and given identifier.
+    # Lives here so that it's dropped whenever the assets are reloaded
+    asset_instances: Dict[Tuple[type, str], Any] = {}
     eth_token_info: Optional[List[EthTokenInfo]] = None
 
     def __new__(
@@ -145,8 +171,10 @@ class AssetResolver():
         From that point on all calls to AssetResolver() return the same data.
         """
         if AssetResolver.__instance is not None:
-            if AssetResolver.__instance.remote_check_happened:  # type: ignore
-                return AssetResolver.__instance
+            instance = AssetResolver.__instance
+            # Without a data directory the saved assets would just be used again
+            if instance.remote_check_happened or data_directory is None:
+                return instance
 
             # else we still have not performed the remote check
             assets, check_happened = _attempt_initialization(
@@ -174,6 +202,11 @@ class AssetResolver():
         # PITA.
         # ---> Think about it and if worth doing it address it
         AssetResolver.__instance.lowercase_mapping = {k.lower(): k for k, _ in assets.items()}
+        AssetResolver.__instance.assets_data = {
+            identifier: _deserialize_asset_data(identifier, data)
+            for identifier, data in assets.items()
+        }
+        AssetResolver.__instance.asset_instances = {}
         AssetResolver.__instance.remote_check_happened = check_happened
 
         return AssetResolver.__instance
@@ -189,27 +222,7 @@ class AssetResolver():
     @staticmethod
     def get_asset_data(asset_identifier: str) -> AssetData:
         """Get all asset data from the known assets file for valid asset symbol"""
-        data = AssetResolver().assets[asset_identifier]
-        # If an unknown asset is found (can happen if list is updated but code is not)
-        # then default to the "own chain" type"
-        asset_type = asset_type_mapping.get(data['type'], AssetType.OWN_CHAIN)
-        result = AssetData(
-            identifier=asset_identifier,
-            symbol=data['symbol'],
-            name=data['name'],
-            # If active is in the data use it, else we assume it's true
-            active=data.get('active', True),
-            asset_type=asset_type,
-            started=data.get('started', None),
-            ended=data.get('ended', None),
-            forked=data.get('forked', None),
-            swapped_for=data.get('swapped_for', None),
-            ethereum_address=data.get('ethereum_address', None),
-            decimals=data.get('ethereum_token_decimals', None),
-            cryptocompare=data.get('cryptocompare', None),
-            coingecko=data.get('coingecko', None),
-        )
-        return result
+        return AssetResolver().assets_data[asset_identifier]
 
     @staticmethod
     def get_all_eth_token_info() -> List[EthTokenInfo]:
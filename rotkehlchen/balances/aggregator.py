@@ -0,0 +1,93 @@
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict
+
+from rotkehlchen.accounting.structures import Balance
+from rotkehlchen.assets.asset import Asset
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.fval import FVal
+
+
+def _percentage_of(value: FVal, total: FVal) -> str:
+    if total == ZERO:
+        return '0%'
+    return (value / total).to_percentage()
+
+
+class BalanceSheetAggregator():
+    """Accumulates the per asset and per location totals of all balance sources
+
+    Each source is added as soon as it reports in so that no intermediate per
+    location mappings need to be combined at the end.
+    """
+
+    def __init__(self) -> None:
+        self.assets: DefaultDict[Asset, Balance] = defaultdict(Balance)
+        self.liabilities: DefaultDict[Asset, Balance] = defaultdict(Balance)
+        self.location_usd_values: Dict[str, FVal] = {}
+        self.net_usd = ZERO
+
+    def add_balance(self, location: str, asset: Asset, amount: FVal, usd_value: FVal) -> None:
+        balance = self.assets[asset]
+        balance.amount += amount
+        balance.usd_value += usd_value
+        self.location_usd_values[location] = (
+            self.location_usd_values.get(location, ZERO) + usd_value
+        )
+        self.net_usd += usd_value
+
+    def add_liability(self, location: str, asset: Asset, amount: FVal, usd_value: FVal) -> None:
+        balance = self.liabilities[asset]
+        balance.amount += amount
+        balance.usd_value += usd_value
+        self.location_usd_values[location] = (
+            self.location_usd_values.get(location, ZERO) - usd_value
+        )
+        self.net_usd -= usd_value
+
+    def add_location_balances(
+            self,
+            location: str,
+            balances: Dict[Asset, Dict[str, FVal]],
+    ) -> None:
+        """Adds the asset balances of a location. The location counts even if it's empty"""
+        self.location_usd_values.setdefault(location, ZERO)
+        for asset, entry in balances.items():
+            self.add_balance(location, asset, entry['amount'], entry['usd_value'])
+
+    def add_location_liabilities(
+            self,
+            location: str,
+            liabilities: Dict[Asset, Dict[str, FVal]],
+    ) -> None:
+        self.location_usd_values.setdefault(location, ZERO)
+        for asset, entry in liabilities.items():
+            self.add_liability(location, asset, entry['amount'], entry['usd_value'])
+
+    def serialize(self) -> Dict[str, Any]:
+        """Returns the balance sheet with the share of the net value of each entry"""
+        assets = {
+            asset: {
+                'amount': balance.amount,
+                'usd_value': balance.usd_value,
+                'percentage_of_net_value': _percentage_of(balance.usd_value, self.net_usd),
+            } for asset, balance in self.assets.items()
+        }
+        liabilities = {
+            asset: {
+                'amount': balance.amount,
+                'usd_value': balance.usd_value,
+                'percentage_of_net_value': _percentage_of(balance.usd_value, self.net_usd),
+            } for asset, balance in self.liabilities.items()
+        }
+        locations = {
+            location: {
+                'usd_value': usd_value,
+                'percentage_of_net_value': _percentage_of(usd_value, self.net_usd),
+            } for location, usd_value in self.location_usd_values.items()
+        }
+        return {
+            'assets': assets,
+            'liabilities': liabilities,
+            'location': locations,
+            'net_usd': self.net_usd,
+        }
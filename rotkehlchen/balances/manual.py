@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.misc import ZERO
@@ -8,6 +8,7 @@ from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.typing import Location, Price
 
 if TYPE_CHECKING:
+    from rotkehlchen.balances.aggregator import BalanceSheetAggregator
     from rotkehlchen.db.dbhandler import DBHandler
 
 
@@ -33,16 +34,16 @@ class ManuallyTrackedBalanceWithValue(NamedTuple):
 def get_manually_tracked_balances(db: 'DBHandler') -> List[ManuallyTrackedBalanceWithValue]:
     """Gets the manually tracked balances"""
     balances = db.get_manually_tracked_balances()
+    try:
+        usd_prices = Inquirer().find_usd_prices(entry.asset for entry in balances)
+    except RemoteError as e:
+        db.msg_aggregator.add_warning(
+            f'Could not find prices during manually tracked balance querying due to {str(e)}',
+        )
+        usd_prices = {}
     balances_with_value = []
     for entry in balances:
-        try:
-            price = Inquirer().find_usd_price(entry.asset)
-        except RemoteError as e:
-            db.msg_aggregator.add_warning(
-                f'Could not find price for {entry.asset.identifier} during '
-                f'manually tracked balance querying due to {str(e)}',
-            )
-            price = Price(ZERO)
+        price = usd_prices.get(entry.asset, Price(ZERO))
         # https://github.com/python/mypy/issues/2582 --> for the type ignore below
         balances_with_value.append(ManuallyTrackedBalanceWithValue(  # type: ignore
             **entry._asdict(),
@@ -102,30 +103,14 @@ def remove_manually_tracked_balances(db: 'DBHandler', labels: List[str]) -> None
 
 def account_for_manually_tracked_balances(
         db: 'DBHandler',
-        balances: Dict[str, Any],
-) -> Dict[str, Any]:
-    """Given the big balances mapping adds to it all manually tracked balances"""
+        aggregator: 'BalanceSheetAggregator',
+) -> None:
+    """Adds all manually tracked balances to the balances aggregator"""
     manually_tracked_balances = get_manually_tracked_balances(db)
     for m_entry in manually_tracked_balances:
-        location_str = str(m_entry.location)
-        if location_str not in balances:
-            balances[location_str] = {}
-            balances[location_str][m_entry.asset] = {
-                'amount': m_entry.amount,
-                'usd_value': m_entry.usd_value,
-            }
-        else:
-            if m_entry.asset not in balances[location_str]:
-                balances[location_str][m_entry.asset] = {
-                    'amount': m_entry.amount,
-                    'usd_value': m_entry.usd_value,
-                }
-            else:
-                old_amount = balances[location_str][m_entry.asset]['amount']
-                old_usd_value = balances[location_str][m_entry.asset]['usd_value']
-                balances[location_str][m_entry.asset] = {
-                    'amount': old_amount + m_entry.amount,
-                    'usd_value': old_usd_value + m_entry.usd_value,
-                }
-
-    return balances
+        aggregator.add_balance(
+            location=str(m_entry.location),
+            asset=m_entry.asset,
+            amount=m_entry.amount,
+            usd_value=m_entry.usd_value,
+        )
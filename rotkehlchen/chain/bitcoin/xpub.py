@@ -1,6 +1,7 @@
 import logging
 from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 
+import gevent
 from gevent.lock import Semaphore
 
 from rotkehlchen.chain.bitcoin import have_bitcoin_transactions
@@ -67,20 +68,40 @@ def _derive_addresses_loop(
         start_index: int,
         root: HDKey,
         gap_limit: int,
+        derived_cache: Dict[int, BTCAddress],
 ) -> List[XpubDerivedAddressData]:
-    """May raise:
+    """Derives addresses in batches of gap_limit until a batch has no used address
+
+    Addresses already in the derived cache are not derived again and any newly
+    derived address of a scanned batch is added to it. Each batch is derived while
+    the transactions of the previous one are being queried, but it is only scanned
+    and cached if the previous one had a used address.
+
+    May raise:
     - RemoteError: if blockstream/blockchain.info can't be reached
     """
+    def derive_batch(from_index: int) -> List[Tuple[int, BTCAddress]]:
+        batch = []
+        for idx in range(from_index, from_index + gap_limit):
+            address = derived_cache.get(idx)
+            if address is None:
+                address = root.derive_child(idx).address()
+            batch.append((idx, address))
+        return batch
+
     step_index = start_index
     addresses: List[XpubDerivedAddressData] = []
+    batch_addresses = derive_batch(step_index)
+    derived_cache.update(batch_addresses)
     should_continue = True
     while should_continue:
-        batch_addresses: List[Tuple[int, BTCAddress]] = []
-        for idx in range(step_index, step_index + gap_limit):
-            child = root.derive_child(idx)
-            batch_addresses.append((idx, child.address()))
-
-        have_tx_mapping = have_bitcoin_transactions([x[1] for x in batch_addresses])
+        have_tx_greenlet = gevent.spawn(
+            have_bitcoin_transactions,
+            [x[1] for x in batch_addresses],
+        )
+        gevent.sleep(0)  # let the query get sent before deriving the next batch
+        next_batch_addresses = derive_batch(step_index + gap_limit)
+        have_tx_mapping = have_tx_greenlet.get()
         should_continue = False
         for idx, address in batch_addresses:
             have_tx, balance = have_tx_mapping[address]
@@ -107,7 +128,10 @@ def _derive_addresses_loop(
                         balance=balance,
                     ))
 
+        if should_continue:
+            derived_cache.update(next_batch_addresses)
         step_index += gap_limit
+        batch_addresses = next_batch_addresses
 
     return addresses
 
@@ -117,11 +141,16 @@ def _derive_addresses_from_xpub_data(
         start_receiving_index: int,
         start_change_index: int,
         gap_limit: int,
+        derived_cache: Dict[int, Dict[int, BTCAddress]],
 ) -> List[XpubDerivedAddressData]:
     """Derive all addresses from the xpub that have had transactions. Also includes
     any addresses until the biggest index derived addresses that have had no transactions.
     This is to make it easier to later derive and check more addresses
 
+    The receiving and change chains are scanned concurrently. The derived cache
+    maps each account index to the already derived addresses of that chain and
+    gets all newly derived addresses added to it.
+
     May raise:
     - RemoteError: if blockstream/blockchain.info and others can't be reached
     """
@@ -130,26 +159,22 @@ def _derive_addresses_from_xpub_data(
     else:
         account_xpub = xpub_data.xpub
 
-    addresses = []
-    receiving_xpub = account_xpub.derive_child(0)
-    addresses.extend(
-        _derive_addresses_loop(
-            account_index=0,
-            start_index=start_receiving_index,
-            root=receiving_xpub,
-            gap_limit=gap_limit,
-        ),
-    )
-    change_xpub = account_xpub.derive_child(1)
-    addresses.extend(
-        _derive_addresses_loop(
-            account_index=1,
-            start_index=start_change_index,
-            root=change_xpub,
+    greenlets = [
+        gevent.spawn(
+            _derive_addresses_loop,
+            account_index=account_index,
+            start_index=start_index,
+            root=account_xpub.derive_child(account_index),
             gap_limit=gap_limit,
-        ),
-    )
-    return addresses
+            derived_cache=derived_cache.setdefault(account_index, {}),
+        ) for account_index, start_index in ((0, start_receiving_index), (1, start_change_index))
+    ]
+    try:
+        gevent.joinall(greenlets, raise_error=True)
+    finally:
+        gevent.killall(greenlets)
+
+    return greenlets[0].value + greenlets[1].value
 
 
 class XpubManager():
@@ -169,12 +194,17 @@ class XpubManager():
         - RemoteError: if blockstream/blockchain.info and others can't be reached
         """
         last_receiving_idx, last_change_idx = self.db.get_last_xpub_derived_indices(xpub_data)
+        derived_cache = self.db.get_xpub_derived_addresses_cache(xpub_data)
+        cached_num = sum(len(x) for x in derived_cache.values())
         derived_addresses_data = _derive_addresses_from_xpub_data(
             xpub_data=xpub_data,
             start_receiving_index=last_receiving_idx,
             start_change_index=last_change_idx,
             gap_limit=self.chain_manager.btc_derivation_gap_limit,
+            derived_cache=derived_cache,
         )
+        if sum(len(x) for x in derived_cache.values()) != cached_num:
+            self.db.update_xpub_derived_addresses_cache(xpub_data, derived_cache)
         known_btc_addresses = self.db.get_blockchain_accounts().btc
 
         new_addresses = []
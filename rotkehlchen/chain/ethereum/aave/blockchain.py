@@ -231,6 +231,7 @@ class AaveBlockchainInquirer(AaveInquirer):
         )
         mint_data = set()
         mint_data_to_log_index = {}
+        self.ethereum.prefetch_event_timestamps(mint_events)
         for event in mint_events:
             amount = hexstr_to_int(event['data'])
             if amount == 0:
@@ -247,6 +248,10 @@ class AaveBlockchainInquirer(AaveInquirer):
         reserve_asset = _atoken_to_reserve_asset(atoken)
         reserve_address, decimals = _get_reserve_address_decimals(reserve_asset.identifier)
         aave_events = []
+        self.ethereum.prefetch_event_timestamps(
+            event for event in deposit_events + withdraw_events
+            if hex_or_bytes_to_address(event['topics'][1]) == reserve_address
+        )
         for event in deposit_events:
             if hex_or_bytes_to_address(event['topics'][1]) == reserve_address:
                 # first 32 bytes of the data are the amount
@@ -14,7 +14,7 @@ from rotkehlchen.chain.ethereum.aave.common import (
     AaveInquirer,
     _get_reserve_address_decimals,
 )
-from rotkehlchen.chain.ethereum.graph import Graph
+from rotkehlchen.chain.ethereum.graph import Graph, query_addresses_concurrently
 from rotkehlchen.chain.ethereum.makerdao.common import RAY
 from rotkehlchen.chain.ethereum.structures import (
     AaveBorrowEvent,
@@ -318,19 +318,19 @@ class AaveGraphInquirer(AaveInquirer):
         This function should be entered while holding the history_lock
         semaphore
         """
-        result = {}
-        for address in addresses:
-            history_results = self.get_history_for_address(
+        address_results = query_addresses_concurrently(
+            query_address=lambda address: self.get_history_for_address(
                 user_address=address,
                 from_timestamp=from_timestamp,
                 to_timestamp=to_timestamp,
                 balances=aave_balances.get(address, AaveBalances({}, {})),
-            )
-            if history_results is None:
-                continue
-            result[address] = history_results
-
-        return result
+            ),
+            addresses=addresses,
+        )
+        return {
+            address: history_results for address, history_results in address_results.items()
+            if history_results is not None
+        }
 
     def _get_user_reserves(self, address: ChecksumEthAddress) -> List[AaveUserReserve]:
         query = self.graph.query(
@@ -592,14 +592,15 @@ class AaveGraphInquirer(AaveInquirer):
 
         # Add all new events to the DB
         new_events: List[AaveEvent] = deposits + withdrawals + result.interest_events + borrows + repays + liquidation_calls  # type: ignore  # noqa: E501
-        self.database.add_aave_events(address, new_events)
-        # After all events have been queried then also update the query range.
-        # Even if no events are found for an address we need to remember the range
-        self.database.update_used_query_range(
-            name=f'aave_events_{address}',
-            start_ts=Timestamp(0),
-            end_ts=now,
-        )
+        with self.database.transaction():
+            self.database.add_aave_events(address, new_events)
+            # After all events have been queried then also update the query range.
+            # Even if no events are found for an address we need to remember the range
+            self.database.update_used_query_range(
+                name=f'aave_events_{address}',
+                start_ts=Timestamp(0),
+                end_ts=now,
+            )
 
         # Sort actions so that actions with same time are sorted deposit -> interest -> withdrawal
         all_events: List[AaveEvent] = new_events + db_events
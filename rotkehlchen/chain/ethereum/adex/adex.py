@@ -39,6 +39,7 @@ from rotkehlchen.premium.premium import Premium
 from rotkehlchen.typing import ChecksumEthAddress, Price, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.interfaces import EthereumModule
+from rotkehlchen.utils.profiling import profile_session
 from rotkehlchen.utils.serialization import rlk_jsonloads_list
 
 from .graph import BONDS_QUERY, CHANNEL_WITHDRAWS_QUERY, UNBOND_REQUESTS_QUERY, UNBONDS_QUERY
@@ -98,7 +99,7 @@ class Adex(EthereumModule):
         self.database = database
         self.premium = premium
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = profile_session(requests.session())
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
         try:
             self.graph: Optional[Graph] = Graph(
@@ -1,12 +1,14 @@
 from rotkehlchen.typing import ChecksumEthAddress
-from typing import List, Dict, TextIO, Iterator, Tuple
+from typing import List, Dict
 from rotkehlchen.constants.assets import A_UNI, A_1INCH, A_TORN, A_CORN, A_GRAIN
 import csv
+import sqlite3
 import requests
 from pathlib import Path
 from collections import defaultdict
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.chain.ethereum.utils import token_normalized_value_decimals
+from rotkehlchen.utils.misc import get_chunks
 
 AIRDROPS = {
     'uniswap': (
@@ -40,9 +42,19 @@ AIRDROPS = {
         'https://claim.harvest.finance/',
     ),
 }
+# Airdrops whose CSV amounts are in wei
+AIRDROPS_WITH_WEI_AMOUNTS = ('cornichon', 'tornado', 'grain')
+AIRDROPS_INDEX_FILENAME = 'airdrops_index.db'
+# Keep the number of bound parameters of a lookup below the sqlite limit
+AIRDROPS_INDEX_LOOKUP_CHUNK_LENGTH = 500
 
 
-def get_airdrop_data(name: str, data_dir: Path) -> Tuple[Iterator, TextIO]:
+def get_airdrop_file(name: str, data_dir: Path) -> Path:
+    """Returns the path to the airdrop's CSV, downloading it if it's not cached
+
+    May raise:
+        - RemoteError if the remote request fails
+    """
     airdrops_dir = data_dir / 'airdrops'
     airdrops_dir.mkdir(parents=True, exist_ok=True)
     filename = airdrops_dir / f'{name}.csv'
@@ -56,10 +68,71 @@ def get_airdrop_data(name: str, data_dir: Path) -> Tuple[Iterator, TextIO]:
         with open(filename, 'w') as f:
             f.write(request.content.decode('utf-8'))
 
-    csvfile = open(filename, 'r')
-    iterator = csv.reader(csvfile)
-    next(iterator)  # skip header
-    return iterator, csvfile
+    return filename
+
+
+def _open_airdrops_index(data_dir: Path) -> sqlite3.Connection:
+    """Opens the index of the airdrop CSVs, creating it if needed
+
+    The index is an unencrypted sqlite DB next to the CSVs since it only holds
+    public data. Each airdrop's entries are keyed by address so that lookups don't
+    need to go through the whole CSV.
+    """
+    airdrops_dir = data_dir / 'airdrops'
+    airdrops_dir.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(airdrops_dir / AIRDROPS_INDEX_FILENAME))
+    connection.executescript("""
+    CREATE TABLE IF NOT EXISTS airdrop_sources (
+        name TEXT NOT NULL PRIMARY KEY,
+        file_size INTEGER NOT NULL,
+        file_mtime INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS airdrop_entries (
+        name TEXT NOT NULL,
+        address TEXT NOT NULL,
+        amount TEXT NOT NULL,
+        PRIMARY KEY(name, address)
+    );
+    """)
+    return connection
+
+
+def _update_airdrop_index(connection: sqlite3.Connection, name: str, data_dir: Path) -> None:
+    """Compiles the airdrop's CSV into the index if it changed since it was last compiled
+
+    May raise:
+        - RemoteError if the CSV is not cached and the remote request fails
+    """
+    filename = get_airdrop_file(name, data_dir)
+    stat = filename.stat()
+    cursor = connection.cursor()
+    saved = cursor.execute(
+        'SELECT file_size, file_mtime FROM airdrop_sources WHERE name=?;', (name,),
+    ).fetchone()
+    if saved == (stat.st_size, stat.st_mtime_ns):
+        return
+
+    in_wei = name in AIRDROPS_WITH_WEI_AMOUNTS
+    with connection, open(filename, 'r') as csvfile:
+        iterator = csv.reader(csvfile)
+        next(iterator)  # skip header
+        cursor.execute('DELETE FROM airdrop_entries WHERE name=?;', (name,))
+        # not doing to_checksum_address() here since the file addresses are checksummed
+        cursor.executemany(
+            'INSERT OR REPLACE INTO airdrop_entries(name, address, amount) VALUES(?, ?, ?);',
+            (
+                (
+                    name,
+                    addr,
+                    str(token_normalized_value_decimals(int(amount), 18)) if in_wei else amount,
+                ) for addr, amount, *_ in iterator
+            ),
+        )
+        cursor.execute(
+            'INSERT OR REPLACE INTO airdrop_sources(name, file_size, file_mtime) '
+            'VALUES(?, ?, ?);',
+            (name, stat.st_size, stat.st_mtime_ns),
+        )
 
 
 def check_airdrops(
@@ -72,19 +145,24 @@ def check_airdrops(
         - RemoteError if the remote request fails
     """
     found_data: Dict[ChecksumEthAddress, Dict] = defaultdict(lambda: defaultdict(dict))
-    for protocol_name, airdrop_data in AIRDROPS.items():
-        data, csvfile = get_airdrop_data(protocol_name, data_dir)
-        for addr, amount, *_ in data:
-            # not doing to_checksum_address() here since the file addresses are checksummed
-            # and doing to_checksum_address() so many times hits performance
-            if protocol_name in ('cornichon', 'tornado', 'grain'):
-                amount = token_normalized_value_decimals(int(amount), 18)
-            if addr in addresses:
-                found_data[addr][protocol_name] = {
-                    'amount': str(amount),
-                    'asset': airdrop_data[1],
-                    'link': airdrop_data[2],
-                }
-        csvfile.close()
+    connection = _open_airdrops_index(data_dir)
+    try:
+        cursor = connection.cursor()
+        for protocol_name, airdrop_data in AIRDROPS.items():
+            _update_airdrop_index(connection, protocol_name, data_dir)
+            for chunk in get_chunks(addresses, n=AIRDROPS_INDEX_LOOKUP_CHUNK_LENGTH):
+                query = cursor.execute(
+                    f'SELECT address, amount FROM airdrop_entries WHERE name=? AND '
+                    f'address IN ({",".join("?" * len(chunk))});',
+                    [protocol_name, *chunk],
+                )
+                for addr, amount in query:
+                    found_data[addr][protocol_name] = {
+                        'amount': amount,
+                        'asset': airdrop_data[1],
+                        'link': airdrop_data[2],
+                    }
+    finally:
+        connection.close()
 
     return dict(found_data)
@@ -7,6 +7,7 @@ from typing_extensions import Literal
 
 from rotkehlchen.accounting.structures import Balance, BalanceType
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.chain.ethereum.contracts import ContractCall
 from rotkehlchen.chain.ethereum.defi.structures import GIVEN_DEFI_BALANCES
 from rotkehlchen.chain.ethereum.graph import Graph, get_common_params
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
@@ -63,6 +64,11 @@ BORROW_EVENTS_QUERY_PREFIX = """{graph_event_name}
 log = logging.getLogger(__name__)
 
 
+def _rate_to_apy(rate: int) -> FVal:
+    """Turns a cToken supply/borrow rate per block to an apy"""
+    return ((FVal(rate) / ETH_MANTISSA * BLOCKS_PER_DAY) + 1) ** (DAYS_PER_YEAR - 1) - 1
+
+
 class CompoundBalance(NamedTuple):
     balance_type: BalanceType
     balance: Balance
@@ -157,8 +163,32 @@ class Compound(EthereumModule):
             log.error(f'Could not query cToken {address} for supply/borrow rate: {str(e)}')
             return None
 
-        apy = ((FVal(rate) / ETH_MANTISSA * BLOCKS_PER_DAY) + 1) ** (DAYS_PER_YEAR - 1) - 1  # noqa: E501
-        return apy
+        return _rate_to_apy(rate)
+
+    def _get_apys(
+            self,
+            ctokens: List[Tuple[ChecksumEthAddress, bool]],
+    ) -> Dict[Tuple[ChecksumEthAddress, bool], Optional[FVal]]:
+        """Gets the supply or borrow apy of each of the given cTokens
+
+        All rates are queried in a single aggregated call. If that fails each
+        cToken is queried on its own so that one failing call does not lose all apys.
+        """
+        calls = [ContractCall(
+            contract_address=address,
+            abi=CTOKEN_ABI,
+            method_name='supplyRatePerBlock' if supply else 'borrowRatePerBlock',
+        ) for address, supply in ctokens]
+        try:
+            rates = self.ethereum.call_contracts(calls)
+        except (RemoteError, BlockchainQueryError) as e:
+            log.warning(
+                f'Could not query cTokens for supply/borrow rates in one go due to: {str(e)}. '
+                f'Querying them one by one',
+            )
+            return {x: self._get_apy(address=x[0], supply=x[1]) for x in ctokens}
+
+        return {ctoken: _rate_to_apy(rate) for ctoken, rate in zip(ctokens, rates)}
 
     def get_balances(
             self,
@@ -170,9 +200,11 @@ class Compound(EthereumModule):
         else:
             defi_balances = given_defi_balances()
 
+        # The apys are queried for all entries together once all balances are known
+        apy_entries: List[Tuple[Dict[str, CompoundBalance], str, Tuple[ChecksumEthAddress, bool]]] = []  # noqa: E501
         for account, balance_entries in defi_balances.items():
-            lending_map = {}
-            borrowing_map = {}
+            lending_map: Dict[str, CompoundBalance] = {}
+            borrowing_map: Dict[str, CompoundBalance] = {}
             rewards_map = {}
             for balance_entry in balance_entries:
                 if balance_entry.protocol.name not in ('Compound Governance', 'Compound'):
@@ -213,8 +245,13 @@ class Compound(EthereumModule):
                     lending_map[underlying_asset.identifier] = CompoundBalance(
                         balance_type=BalanceType.ASSET,
                         balance=balance_entry.underlying_balances[0].balance,
-                        apy=self._get_apy(entry.token_address, supply=True),
+                        apy=None,
                     )
+                    apy_entries.append((
+                        lending_map,
+                        underlying_asset.identifier,
+                        (entry.token_address, True),
+                    ))
                 else:  # 'Debt'
                     try:
                         ctoken = EthereumToken('c' + entry.token_symbol)
@@ -228,8 +265,13 @@ class Compound(EthereumModule):
                     borrowing_map[asset.identifier] = CompoundBalance(
                         balance_type=BalanceType.LIABILITY,
                         balance=entry.balance,
-                        apy=self._get_apy(ctoken.ethereum_address, supply=False),
+                        apy=None,
                     )
+                    apy_entries.append((
+                        borrowing_map,
+                        asset.identifier,
+                        (ctoken.ethereum_address, False),
+                    ))
 
             if lending_map == {} and borrowing_map == {} and rewards_map == {}:
                 # no balances for the account
@@ -240,6 +282,11 @@ class Compound(EthereumModule):
                 'borrowing': borrowing_map,
             }
 
+        if len(apy_entries) != 0:
+            apys = self._get_apys(list({x[2] for x in apy_entries}))
+            for balance_map, identifier, apy_key in apy_entries:
+                balance_map[identifier] = balance_map[identifier]._replace(apy=apys[apy_key])
+
         return compound_balances
 
     def _get_borrow_events(
@@ -504,6 +551,7 @@ class Compound(EthereumModule):
             to_block=self.ethereum.etherscan.get_blocknumber_by_time(to_ts),
         )
 
+        self.ethereum.prefetch_event_timestamps(comp_events)
         events = []
         for event in comp_events:
             timestamp = self.ethereum.get_event_timestamp(event)
@@ -3,7 +3,8 @@ from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequenc
 from eth_typing.abi import Decodable
 from typing_extensions import Literal
 from web3 import Web3
-from web3._utils.abi import get_abi_output_types
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
 
 from rotkehlchen.typing import ChecksumEthAddress
 
@@ -13,6 +14,32 @@ if TYPE_CHECKING:
 WEB3 = Web3()
 
 
+class ContractCall(NamedTuple):
+    """A single eth_call of a contract method so it can be aggregated with others"""
+    contract_address: ChecksumEthAddress
+    abi: List[Dict[str, Any]]
+    method_name: str
+    arguments: Optional[List[Any]] = None
+
+    def encode(self) -> str:
+        contract = WEB3.eth.contract(address=self.contract_address, abi=self.abi)
+        return contract.encodeABI(self.method_name, args=self.arguments if self.arguments else [])
+
+    def decode(self, result: Decodable) -> Any:
+        """Decodes the raw result of the call the same way a web3 contract call does"""
+        contract = WEB3.eth.contract(address=self.contract_address, abi=self.abi)
+        fn_abi = contract._find_matching_fn_abi(
+            fn_identifier=self.method_name,
+            args=self.arguments if self.arguments else [],
+        )
+        output_types = get_abi_output_types(fn_abi)
+        output_data = WEB3.codec.decode_abi(output_types, result)
+        normalized_data = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output_data)
+        if len(normalized_data) == 1:
+            return normalized_data[0]
+        return normalized_data
+
+
 class EthereumContract(NamedTuple):
     address: ChecksumEthAddress
     abi: List[Dict[str, Any]]
@@ -33,6 +60,19 @@ class EthereumContract(NamedTuple):
             call_order=call_order,
         )
 
+    def contract_call(
+            self,
+            method_name: str,
+            arguments: Optional[List[Any]] = None,
+    ) -> ContractCall:
+        """Returns a call of the given method to be aggregated via call_contracts"""
+        return ContractCall(
+            contract_address=self.address,
+            abi=self.abi,
+            method_name=method_name,
+            arguments=arguments,
+        )
+
     def get_logs(
             self,
             ethereum: 'EthereumManager',
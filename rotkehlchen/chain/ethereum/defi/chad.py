@@ -1,6 +1,8 @@
 from collections import defaultdict
 from typing import TYPE_CHECKING, Dict, List
 
+from gevent.pool import Pool
+
 from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.chain.ethereum.defi.structures import (
     DefiBalance,
@@ -19,6 +21,8 @@ from rotkehlchen.user_messages import MessagesAggregator
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager
 
+DEFI_BALANCES_QUERY_CONCURRENCY = 4  # number of accounts to query at the same time
+
 
 class DefiChad():
     """An aggregator for many things ethereum DeFi"""
@@ -36,8 +40,9 @@ class DefiChad():
             addresses: List[ChecksumEthAddress],
     ) -> Dict[ChecksumEthAddress, List[DefiProtocolBalances]]:
         defi_balances = defaultdict(list)
-        for account in addresses:
-            balances = self.zerion_sdk.all_balances_for_account(account)
+        pool = Pool(DEFI_BALANCES_QUERY_CONCURRENCY)
+        accounts_balances = pool.map(self.zerion_sdk.all_balances_for_account, addresses)
+        for account, balances in zip(addresses, accounts_balances):
             if len(balances) != 0:
                 defi_balances[account] = balances
 
@@ -63,8 +63,10 @@ def _handle_yearn_curve_vault(
     pool you should follow the same approach with the weights and average or
     just take the current price of BTC. Same for other assets.
     """
-    virtual_price = curve_contract.call(ethereum, 'get_virtual_price')
-    price_per_full_share = yearn_contract.call(ethereum, 'getPricePerFullShare')
+    virtual_price, price_per_full_share = ethereum.call_contracts([
+        curve_contract.contract_call('get_virtual_price'),
+        yearn_contract.contract_call('getPricePerFullShare'),
+    ])
     usd_value = FVal(virtual_price * price_per_full_share) / 10 ** div_decimals
     return usd_value * asset_price
 
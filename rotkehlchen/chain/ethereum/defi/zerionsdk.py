@@ -2,6 +2,7 @@ import logging
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from eth_utils.address import to_checksum_address
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.assets.asset import Asset
@@ -32,6 +33,7 @@ log = logging.getLogger(__name__)
 
 
 PROTOCOLS_QUERY_NUM = 40  # number of protocols to query in a single call
+PROTOCOLS_QUERY_CONCURRENCY = 4  # number of protocol chunks to query at the same time
 KNOWN_ZERION_PROTOCOL_NAMES = (
     'Curve • Vesting',
     'Curve • Liquidity Gauges',
@@ -225,14 +227,17 @@ class ZerionSDK():
             list(protocol_names),
             n=PROTOCOLS_QUERY_NUM,
         ))
-        for protocol_names in protocol_chunks:
-            contract_result = self.contract.call(
+        # The chunks are independent so query them concurrently. map keeps their order
+        pool = Pool(PROTOCOLS_QUERY_CONCURRENCY)
+        chunk_results = pool.map(
+            lambda names: self.contract.call(
                 ethereum=self.ethereum,
                 method_name='getProtocolBalances',
-                arguments=[account, protocol_names],
-            )
-            if len(contract_result) == 0:
-                continue
+                arguments=[account, names],
+            ),
+            protocol_chunks,
+        )
+        for contract_result in chunk_results:
             result.extend(contract_result)
 
         return result
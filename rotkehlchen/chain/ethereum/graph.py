@@ -1,10 +1,13 @@
 import json
 import logging
 import re
-from typing import Any, Dict, Optional, Tuple
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import urlparse
 
 import gevent
 import requests
+from gevent.pool import Pool
 from gql import Client, gql
 from gql.transport.requests import RequestsHTTPTransport
 from typing_extensions import Literal
@@ -12,14 +15,19 @@ from typing_extensions import Literal
 from rotkehlchen.constants.timing import QUERY_RETRY_TIMES
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.typing import ChecksumEthAddress, Timestamp
+from rotkehlchen.utils.profiling import record_http_request
 
 log = logging.getLogger(__name__)
 
 
 GRAPH_QUERY_LIMIT = 1000
+# How many addresses are queried against a subgraph at the same time
+GRAPH_QUERY_CONCURRENCY = 4
 RE_MULTIPLE_WHITESPACE = re.compile(r'\s+')
 RETRY_BACKOFF_FACTOR = 0.2
 
+T = TypeVar('T')
+
 
 def format_query_indentation(querystr: str) -> str:
     """Format a triple quote and indented GraphQL query by:
@@ -49,11 +57,66 @@ def get_common_params(
     return param_types, param_values
 
 
+def query_all_by_id(
+        graph: 'Graph',
+        querystr: str,
+        schema: str,
+        param_types: Dict[str, Any],
+        param_values: Dict[str, Any],
+        limit: int = GRAPH_QUERY_LIMIT,
+) -> List[Dict[str, Any]]:
+    """Queries all the entities of a subgraph schema paginating with an id cursor
+
+    The query must request the entities' `id`, order them by id and filter them
+    with `id_gt: $last_id`. The `$limit` and `$last_id` params are added here.
+    Unlike paginating with `skip`, every page costs the same to the subgraph no
+    matter how deep into the results it is.
+
+    May raise:
+    - RemoteError: If there is a problem querying the subgraph
+    """
+    param_types = {**param_types, '$limit': 'Int!', '$last_id': 'ID!'}
+    param_values = {**param_values, 'limit': limit, 'last_id': ''}
+    entities: List[Dict[str, Any]] = []
+    while True:
+        result = graph.query(
+            querystr=querystr,
+            param_types=param_types,
+            param_values=param_values,
+        )
+        result_data = result[schema]
+        entities.extend(result_data)
+
+        # Check whether an extra request is needed
+        if len(result_data) < limit:
+            break
+
+        # Continue after the last entity of this page
+        param_values = {**param_values, 'last_id': result_data[-1]['id']}
+
+    return entities
+
+
+def query_addresses_concurrently(
+        query_address: Callable[[ChecksumEthAddress], T],
+        addresses: Sequence[ChecksumEthAddress],
+) -> Dict[ChecksumEthAddress, T]:
+    """Runs the subgraph query for each address with a bounded number of them in flight
+
+    Returns the query result of each address. An error raised by any of the
+    queries is propagated.
+    """
+    pool = Pool(GRAPH_QUERY_CONCURRENCY)
+    results = pool.map(query_address, addresses)
+    return dict(zip(addresses, results))
+
+
 class Graph():
 
     def __init__(self, url: str) -> None:
         """
         - May raise requests.RequestException if there is a problem connecting to the subgraph"""
+        self.host = urlparse(url).netloc
         transport = RequestsHTTPTransport(url=url)
         try:
             self.client = Client(transport=transport, fetch_schema_from_transport=False)
@@ -83,10 +146,12 @@ class Graph():
 
         retries_left = QUERY_RETRY_TIMES
         while retries_left > 0:
+            start = time.time()
             try:
                 result = self.client.execute(gql(querystr), variable_values=param_values)
             # need to catch Exception here due to stupidity of gql library
             except (requests.exceptions.RequestException, Exception) as e:  # pylint: disable=broad-except  # noqa: E501
+                record_http_request(host=self.host, duration=time.time() - start)
                 # NB: the lack of a good API error handling by The Graph combined
                 # with gql v2 raising bare exceptions doesn't allow us to act
                 # better on failed requests. Currently all trigger the retry logic.
@@ -106,6 +171,7 @@ class Graph():
                 else:
                     raise RemoteError(f'{base_msg}. No retries left.') from e
             else:
+                record_http_request(host=self.host, duration=time.time() - start)
                 break
 
         log.debug('Got result from The Graph query')
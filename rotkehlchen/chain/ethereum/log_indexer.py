@@ -0,0 +1,165 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+from gevent.lock import Semaphore
+from typing_extensions import Literal
+from web3 import Web3
+from web3._utils.contracts import find_matching_event_abi
+from web3._utils.filters import construct_event_filter_params
+
+from rotkehlchen.chain.ethereum.typing import NodeName
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import ChecksumEthAddress
+
+if TYPE_CHECKING:
+    from rotkehlchen.chain.ethereum.manager import EthereumManager
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Logs of the latest blocks can still be reorged away so they are never saved
+LOG_INDEXER_CONFIRMATIONS = 12
+# How long the latest block number is reused for before it's queried again
+LATEST_BLOCK_CACHE_SECS = 60
+
+
+def get_event_topics(
+        abi: List,
+        event_name: str,
+        argument_filters: Dict[str, Any],
+) -> List[Optional[Union[str, List[str]]]]:
+    """Returns the log topics matching the event with the given argument filters"""
+    event_abi = find_matching_event_abi(abi=abi, event_name=event_name)
+    _, filter_args = construct_event_filter_params(
+        event_abi=event_abi,
+        abi_codec=Web3().codec,
+        argument_filters=argument_filters,
+    )
+    # web3 gives the topics as hex strings
+    topics = cast(List[Optional[Union[str, List[str]]]], filter_args['topics'])
+    if event_abi['anonymous']:
+        # web3.py does not handle the anonymous events correctly and adds the first topic
+        topics = topics[1:]
+    return topics
+
+
+class EthereumLogIndexer():
+    """Keeps the logs of all queried ethereum contract events in the DB
+
+    A log filter is a contract address and a set of topics. For each filter the DB
+    remembers the block range whose logs it has saved. Querying the filter again
+    only queries the blocks outside of that range and reads the rest from the DB,
+    no matter which module queried the filter before.
+    """
+
+    def __init__(self, ethereum: 'EthereumManager', database: DBHandler) -> None:
+        self.ethereum = ethereum
+        self.database = database
+        self.filter_locks: DefaultDict[str, Semaphore] = defaultdict(Semaphore)
+        self.latest_block: Optional[Tuple[int, float]] = None
+
+    def _get_latest_block_number(self) -> int:
+        now = time.time()
+        if self.latest_block is None or now - self.latest_block[1] > LATEST_BLOCK_CACHE_SECS:
+            self.latest_block = self.ethereum.get_latest_block_number(), now
+        return self.latest_block[0]
+
+    def get_logs(
+            self,
+            contract_address: ChecksumEthAddress,
+            abi: List,
+            event_name: str,
+            argument_filters: Dict[str, Any],
+            from_block: int,
+            to_block: Union[int, Literal['latest']] = 'latest',
+            call_order: Optional[Sequence[NodeName]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the logs of the contract event matching the filters in the block range
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        """
+        topics = get_event_topics(
+            abi=abi,
+            event_name=event_name,
+            argument_filters=argument_filters,
+        )
+        filter_key = f'{contract_address}_{json.dumps(topics)}'
+        latest_block = self._get_latest_block_number()
+        until_block = latest_block if to_block == 'latest' else to_block
+        safe_block = latest_block - LOG_INDEXER_CONFIRMATIONS
+
+        # Only one query per filter at a time so the same blocks are never queried twice
+        with self.filter_locks[filter_key]:
+            saved_range = self.database.get_ethereum_log_range(filter_key)
+            if saved_range is None:
+                missing_ranges = [(from_block, until_block)]
+                range_start, range_end = from_block, from_block - 1
+            else:
+                range_start, range_end = saved_range
+                missing_ranges = []
+                if from_block < range_start:
+                    missing_ranges.append((from_block, range_start - 1))
+                if until_block > range_end:
+                    missing_ranges.append((range_end + 1, until_block))
+
+            new_logs: List[Dict[str, Any]] = []
+            for start, end in missing_ranges:
+                if start > end:
+                    continue
+                log.debug(
+                    'Querying logs missing from the log index',
+                    contract_address=contract_address,
+                    event_name=event_name,
+                    from_block=start,
+                    to_block=end,
+                )
+                new_logs.extend(self.ethereum.query_logs(
+                    contract_address=contract_address,
+                    abi=abi,
+                    event_name=event_name,
+                    argument_filters=argument_filters,
+                    from_block=start,
+                    to_block=end,
+                    call_order=call_order,
+                ))
+
+            # Save the new logs up to the safe block. Any range queried above it is
+            # always queried again so that the saved range stays contiguous.
+            range_start = min(range_start, from_block)
+            range_end = max(range_end, min(until_block, safe_block))
+            if len(missing_ranges) != 0 and range_end >= range_start:
+                self.database.add_ethereum_logs(
+                    logs=[x for x in new_logs if x['blockNumber'] <= range_end],
+                    filter_key=filter_key,
+                    from_block=range_start,
+                    to_block=range_end,
+                )
+
+        logs = self.database.get_ethereum_logs(
+            address=contract_address,
+            topics=topics,
+            from_block=from_block,
+            to_block=min(until_block, range_end),
+        )
+        logs.extend(
+            x for x in new_logs if
+            x['blockNumber'] > range_end and from_block <= x['blockNumber'] <= until_block
+        )
+        return logs
@@ -264,6 +264,7 @@ class MakerDAODSR(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_POT.deployed_block,
         )
+        self.ethereum.prefetch_event_timestamps(join_events)
         for join_event in join_events:
             try:
                 wad_val = hexstr_to_int(join_event['topics'][2])
@@ -318,6 +319,7 @@ class MakerDAODSR(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_POT.deployed_block,
         )
+        self.ethereum.prefetch_event_timestamps(exit_events)
         for exit_event in exit_events:
             try:
                 wad_val = hexstr_to_int(exit_event['topics'][2])
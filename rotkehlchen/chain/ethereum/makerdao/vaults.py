@@ -1,7 +1,7 @@
 import logging
 from collections import defaultdict
 from enum import Enum
-from typing import TYPE_CHECKING, Any, DefaultDict, Dict, List, NamedTuple, Optional
+from typing import TYPE_CHECKING, Any, DefaultDict, Dict, List, NamedTuple, Optional, Tuple
 
 from eth_utils.address import to_checksum_address
 from gevent.lock import Semaphore
@@ -128,6 +128,12 @@ def _shift_num_right_by(num: int, digits: int) -> int:
     return int(str(num)[:-digits])
 
 
+def _duty_to_stability_fee(jug_ilk: Tuple[Any, ...]) -> FVal:
+    """Turns the result of the jug ilks call for a collateral type to its stability fee"""
+    # jug_ilk[0] is the duty variable of the ilks in the contract
+    return FVal(jug_ilk[0] / RAY) ** (YEAR_IN_SECONDS) - 1
+
+
 class VaultEventType(Enum):
     DEPOSIT_COLLATERAL = 1
     WITHDRAW_COLLATERAL = 2
@@ -251,17 +257,22 @@ class MakerDAOVaults(MakerDAOCommon):
             return self.ilk_to_stability_fee[ilk]
 
         result = MAKERDAO_JUG.call(self.ethereum, 'ilks', arguments=[ilk])
-        # result[0] is the duty variable of the ilks in the contract
-        stability_fee = FVal(result[0] / RAY) ** (YEAR_IN_SECONDS) - 1
-        return stability_fee
+        return _duty_to_stability_fee(result)
 
-    def _query_vault_data(
+    def _deserialize_vault_data(
             self,
             identifier: int,
             owner: ChecksumEthAddress,
             urn: ChecksumEthAddress,
             ilk: bytes,
+            urn_data: Tuple[int, int],
+            ilk_data: Tuple[Any, Any, Any],
     ) -> Optional[MakerDAOVault]:
+        """Creates a vault out of the already queried urn and collateral type data
+
+        urn_data is the result of the vat urns call for the vault and ilk_data
+        the results of the vat, spot and jug ilks calls for its collateral type.
+        """
         collateral_type = ilk.split(b'\0', 1)[0].decode()
         asset = COLLATERAL_TYPE_MAPPING.get(collateral_type, None)
         if asset is None:
@@ -271,17 +282,15 @@ class MakerDAOVaults(MakerDAOCommon):
             )
             return None
 
-        result = MAKERDAO_VAT.call(self.ethereum, 'urns', arguments=[ilk, urn])
+        vat_ilk, spot_ilk, jug_ilk = ilk_data
         # also known as ink in their contract
-        collateral_amount = FVal(result[0] / WAD)
-        normalized_debt = result[1]  # known as art in their contract
-        result = MAKERDAO_VAT.call(self.ethereum, 'ilks', arguments=[ilk])
-        rate = result[1]  # Accumulated Rates
-        spot = FVal(result[2])  # Price with Safety Margin
+        collateral_amount = FVal(urn_data[0] / WAD)
+        normalized_debt = urn_data[1]  # known as art in their contract
+        rate = vat_ilk[1]  # Accumulated Rates
+        spot = FVal(vat_ilk[2])  # Price with Safety Margin
         # How many DAI owner needs to pay back to the vault
         debt_value = FVal(((normalized_debt / WAD) * rate) / RAY)
-        result = MAKERDAO_SPOT.call(self.ethereum, 'ilks', arguments=[ilk])
-        mat = result[1]
+        mat = spot_ilk[1]
         liquidation_ratio = FVal(mat / RAY)
         price = FVal((spot / RAY) * liquidation_ratio)
         self.usd_price[asset.identifier] = price
@@ -309,7 +318,7 @@ class MakerDAOVaults(MakerDAOCommon):
             collateralization_ratio=collateralization_ratio,
             liquidation_price=liquidation_price,
             urn=urn,
-            stability_fee=self.get_stability_fee(ilk),
+            stability_fee=self.ilk_to_stability_fee.get(ilk, _duty_to_stability_fee(jug_ilk)),
         )
 
     def _query_vault_details(
@@ -404,6 +413,9 @@ class MakerDAOVaults(MakerDAOCommon):
             from_block=gemjoin.deployed_block,
         ))
         deposit_tx_hashes = set()
+        self.ethereum.prefetch_event_timestamps(
+            x for x in events if x['transactionHash'] in frob_event_tx_hashes
+        )
         for event in events:
             tx_hash = event['transactionHash']
             if tx_hash in deposit_tx_hashes:
@@ -445,6 +457,9 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=gemjoin.deployed_block,
         )
+        self.ethereum.prefetch_event_timestamps(
+            x for x in events if x['transactionHash'] in frob_event_tx_hashes
+        )
         for event in events:
             tx_hash = event['transactionHash']
             if tx_hash not in frob_event_tx_hashes:
@@ -485,6 +500,7 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_VAT.deployed_block,
         )
+        self.ethereum.prefetch_event_timestamps(events)
         for event in events:
             given_amount = _shift_num_right_by(hexstr_to_int(event['topics'][3]), RAY_DIGITS)
             total_dai_wei += given_amount
@@ -519,6 +535,7 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_DAI_JOIN.deployed_block,
         )
+        self.ethereum.prefetch_event_timestamps(events)
         for event in events:
             given_amount = hexstr_to_int(event['topics'][3])
             total_dai_wei -= given_amount
@@ -557,6 +574,7 @@ class MakerDAOVaults(MakerDAOCommon):
         )
         sum_liquidation_amount = ZERO
         sum_liquidation_usd = ZERO
+        self.ethereum.prefetch_event_timestamps(events)
         for event in events:
             if isinstance(event['data'], str):
                 lot = event['data'][:66]
@@ -617,14 +635,33 @@ class MakerDAOVaults(MakerDAOCommon):
             arguments=[MAKERDAO_CDP_MANAGER.address, proxy_address],
         )
 
+        urns = [to_checksum_address(x) for x in result[1]]
+        ilks = result[2]
+        # Query the data of all vaults and of their collateral types in as few calls as possible
+        unique_ilks = list(dict.fromkeys(ilks))
+        calls = [MAKERDAO_VAT.contract_call('urns', [ilk, urn]) for ilk, urn in zip(ilks, urns)]
+        for ilk in unique_ilks:
+            calls.extend([
+                MAKERDAO_VAT.contract_call('ilks', [ilk]),
+                MAKERDAO_SPOT.contract_call('ilks', [ilk]),
+                MAKERDAO_JUG.contract_call('ilks', [ilk]),
+            ])
+        outputs = self.ethereum.call_contracts(calls)
+        urns_data = outputs[:len(urns)]
+        ilks_data = {
+            ilk: tuple(outputs[len(urns) + 3 * idx:len(urns) + 3 * idx + 3])
+            for idx, ilk in enumerate(unique_ilks)
+        }
+
         vaults = []
         for idx, identifier in enumerate(result[0]):
-            urn = to_checksum_address(result[1][idx])
-            vault = self._query_vault_data(
+            vault = self._deserialize_vault_data(
                 identifier=identifier,
                 owner=user_address,
-                urn=urn,
-                ilk=result[2][idx],
+                urn=urns[idx],
+                ilk=ilks[idx],
+                urn_data=urns_data[idx],
+                ilk_data=ilks_data[ilks[idx]],  # type: ignore # always a 3 entries tuple
             )
             if vault:
                 vaults.append(vault)
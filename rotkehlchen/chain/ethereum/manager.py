@@ -1,28 +1,49 @@
 import json
 import logging
 import random
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
+import time
+from collections import OrderedDict, defaultdict
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 from urllib.parse import urlparse
 
+import gevent
 import requests
 from ens import ENS
 from ens.abis import ENS as ENS_ABI, RESOLVER as ENS_RESOLVER_ABI
 from ens.main import ENS_MAINNET_ADDR
 from ens.utils import is_none_or_zero_address, normal_name_to_hash, normalize_name
+from eth_abi.exceptions import DecodingError
 from eth_typing import BlockNumber
 from eth_utils.address import to_checksum_address
+from gevent.queue import Empty, Queue
 from typing_extensions import Literal
 from web3 import HTTPProvider, Web3
 from web3._utils.abi import get_abi_output_types
 from web3._utils.contracts import find_matching_event_abi
 from web3._utils.filters import construct_event_filter_params
+from web3._utils.request import make_post_request
 from web3.datastructures import MutableAttributeDict
 from web3.middleware.exception_retry_request import http_retry_request_middleware
 from web3.types import FilterParams
 
+from rotkehlchen.chain.ethereum.contracts import ContractCall
 from rotkehlchen.chain.ethereum.eth2 import ETH2_DEPOSIT
+from rotkehlchen.chain.ethereum.log_indexer import EthereumLogIndexer
+from rotkehlchen.chain.ethereum.node_stats import NodeStats
 from rotkehlchen.chain.ethereum.transactions import EthTransactions
-from rotkehlchen.constants.ethereum import ETH_SCAN
+from rotkehlchen.constants.ethereum import ETH_MULTICALL, ETH_SCAN
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.errors import (
     BlockchainQueryError,
@@ -38,7 +59,14 @@ from rotkehlchen.serialization.deserialize import deserialize_int_from_hex
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.typing import ChecksumEthAddress, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
-from rotkehlchen.utils.misc import from_wei, hex_or_bytes_to_str, request_get_dict
+from rotkehlchen.utils.misc import (
+    from_wei,
+    get_chunks,
+    hex_or_bytes_to_str,
+    hexstring_to_bytes,
+    request_get_dict,
+)
+from rotkehlchen.utils.profiling import record_http_request
 
 from .typing import NodeName
 
@@ -46,6 +74,18 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 DEFAULT_ETH_RPC_TIMEOUT = 10
+# How many block timestamps to keep in memory in front of the DB table
+BLOCK_TIMESTAMPS_CACHE_SIZE = 8192
+# How many blocks to ask a node for in a single batched JSON-RPC request
+BLOCKS_BATCH_QUERY_SIZE = 100
+# How many contract calls to aggregate in a single request
+CONTRACT_CALLS_BATCH_SIZE = 50
+# Latency percentile of a node after which a hedged query also queries the next node
+HEDGE_LATENCY_PERCENTILE = 0.9
+# Seconds to wait before hedging to the next node if there are no stats for a node yet
+HEDGE_DEFAULT_DELAY = 2.0
+# Minimum seconds to wait before hedging to the next node
+HEDGE_MIN_DELAY = 0.2
 
 
 def _is_synchronized(current_block: int, latest_block: int) -> Tuple[bool, str]:
@@ -190,6 +230,7 @@ class EthereumManager():
             greenlet_manager: GreenletManager,
             connect_at_start: Sequence[NodeName],
             eth_rpc_timeout: int = DEFAULT_ETH_RPC_TIMEOUT,
+            hedge_own_node: bool = False,
     ) -> None:
         log.debug(f'Initializing Ethereum Manager with {ethrpc_endpoint}')
         self.greenlet_manager = greenlet_manager
@@ -198,11 +239,17 @@ class EthereumManager():
         self.etherscan = etherscan
         self.msg_aggregator = msg_aggregator
         self.eth_rpc_timeout = eth_rpc_timeout
+        # Queries to the user's own node are not hedged to the open nodes unless asked for
+        self.hedge_own_node = hedge_own_node
+        self.database = database
+        self.block_timestamps: 'OrderedDict[int, Timestamp]' = OrderedDict()
+        self.node_stats: DefaultDict[NodeName, NodeStats] = defaultdict(NodeStats)
         self.transactions = EthTransactions(
             database=database,
             etherscan=etherscan,
             msg_aggregator=msg_aggregator,
         )
+        self.log_indexer = EthereumLogIndexer(ethereum=self, database=database)
         for node in connect_at_start:
             self.greenlet_manager.spawn_and_track(
                 after_seconds=None,
@@ -225,7 +272,9 @@ class EthereumManager():
         """Default call order for ethereum nodes
 
         Own node always has preference. Then all other node types are randomly queried
-        in sequence depending on a weighted probability.
+        in sequence depending on a weighted probability. The static weight of each
+        node is scaled by its health as seen in the latest queries to it, so slow,
+        failing or lagging nodes drop towards the end of the order.
 
 
         Some benchmarks on weighted probability based random selection when compared
@@ -251,7 +300,9 @@ class EthereumManager():
         while len(selection) != 0:
             weights = []
             for entry in selection:
-                weights.append(OPEN_NODES_WEIGHT_MAP[entry])
+                weights.append(
+                    OPEN_NODES_WEIGHT_MAP[entry] * self.node_stats[entry].weight_factor(),
+                )
             node = random.choices(selection, weights, k=1)
             ordered_list.append(node[0])
             selection.remove(node[0])
@@ -327,6 +378,7 @@ class EthereumManager():
                         synchronized = False
                     else:
                         synchronized, msg = _is_synchronized(current_block, latest_block)
+                        self.node_stats[name].block_lag = max(0, latest_block - current_block)
             except ValueError as e:
                 message = (
                     f'Failed to connect to ethereum node {name} at endpoint '
@@ -369,19 +421,34 @@ class EthereumManager():
             self.own_rpc_endpoint = endpoint
         return result, message
 
-    def query(self, method: Callable, call_order: Sequence[NodeName], **kwargs: Any) -> Any:
+    def query(
+            self,
+            method: Callable,
+            call_order: Sequence[NodeName],
+            hedge: bool = False,
+            **kwargs: Any,
+    ) -> Any:
         """Queries ethereum related data by performing the provided method to all given nodes
 
         The first node in the call order that gets a succcesful response returns.
         If none get a result then a remote error is raised
+
+        If hedge is True and a node does not respond within its usual latency
+        then the next node is also queried and the first successful response wins.
+        Should only be used for read only queries.
         """
-        for node in call_order:
-            web3 = self.web3_mapping.get(node, None)
-            if web3 is None and node != NodeName.ETHERSCAN:
-                continue
+        nodes = [x for x in call_order if x in self.web3_mapping or x == NodeName.ETHERSCAN]
+        if hedge:
+            return self._hedged_query(
+                method=method,
+                nodes=nodes,
+                call_order=call_order,
+                kwargs=kwargs,
+            )
 
+        for node in nodes:
             try:
-                result = method(web3, **kwargs)
+                result = self._query_node(node=node, method=method, kwargs=kwargs)
             except (RemoteError, BlockchainQueryError, requests.exceptions.RequestException) as e:
                 log.warning(f'Failed to query {node} for {str(method)} due to {str(e)}')
                 # Catch all possible errors here and just try next node call
@@ -395,6 +462,111 @@ class EthereumManager():
             f'nodes: {[str(x) for x in call_order]}. Check logs for details.',
         )
 
+    def _query_node(self, node: NodeName, method: Callable, kwargs: Dict[str, Any]) -> Any:
+        """Performs the method against a single node recording its latency and outcome
+
+        May raise:
+        - RemoteError, BlockchainQueryError or requests.exceptions.RequestException
+        if the node query fails
+        """
+        start = time.time()
+        try:
+            result = method(self.web3_mapping.get(node, None), **kwargs)
+        except (RemoteError, BlockchainQueryError, requests.exceptions.RequestException):
+            self._record_node_query(node=node, duration=time.time() - start, success=False)
+            raise
+        except gevent.GreenletExit:
+            # Lost the race to a hedged query. Count it as failed, since otherwise a node
+            # that hangs and always loses would never be demoted
+            self._record_node_query(node=node, duration=time.time() - start, success=False)
+            raise
+
+        self._record_node_query(node=node, duration=time.time() - start, success=True)
+        return result
+
+    def _record_node_query(self, node: NodeName, duration: float, success: bool) -> None:
+        self.node_stats[node].record(latency=duration, success=success)
+        if node != NodeName.ETHERSCAN:  # etherscan requests are profiled by its session
+            record_http_request(host=str(node), duration=duration)
+
+    def _hedge_delay(self, node: NodeName) -> float:
+        """How many seconds to wait for the node before also querying the next one"""
+        latency = self.node_stats[node].latency_percentile(HEDGE_LATENCY_PERCENTILE)
+        if latency is None:
+            return HEDGE_DEFAULT_DELAY
+        return max(latency, HEDGE_MIN_DELAY)
+
+    def _hedged_query(
+            self,
+            method: Callable,
+            nodes: List[NodeName],
+            call_order: Sequence[NodeName],
+            kwargs: Dict[str, Any],
+    ) -> Any:
+        """Queries the nodes in order but hedges a slow node with the next one
+
+        At most two nodes are queried at the same time. Etherscan is never
+        hedged to since it is rate limited, it is only queried if all nodes
+        before it failed. The user's own node is only hedged if hedge_own_node
+        is set, otherwise the next nodes are only queried if it fails.
+
+        May raise:
+        - RemoteError if no node could be queried successfully
+        """
+        responses: Queue = Queue()
+        running: Dict[NodeName, gevent.Greenlet] = {}
+        remaining = list(nodes)
+
+        def query_node(node: NodeName) -> None:
+            try:
+                result = self._query_node(node=node, method=method, kwargs=kwargs)
+            except (RemoteError, BlockchainQueryError, requests.exceptions.RequestException) as e:
+                responses.put((node, False, e))
+            else:
+                responses.put((node, True, result))
+
+        def start_next_node() -> None:
+            node = remaining.pop(0)
+            running[node] = gevent.spawn(query_node, node)
+
+        try:
+            while True:
+                if len(running) == 0:
+                    if len(remaining) == 0:
+                        break
+                    start_next_node()
+
+                can_hedge = (
+                    len(running) == 1 and
+                    len(remaining) != 0 and
+                    remaining[0] != NodeName.ETHERSCAN and
+                    (self.hedge_own_node or NodeName.OWN not in running)
+                )
+                timeout = self._hedge_delay(next(iter(running))) if can_hedge else None
+                try:
+                    node, success, value = responses.get(timeout=timeout)
+                except Empty:
+                    log.debug(
+                        f'{next(iter(running))} is slow to respond to {str(method)}. '
+                        f'Also querying {remaining[0]}',
+                    )
+                    start_next_node()
+                    continue
+
+                del running[node]
+                if success:
+                    return value
+
+                log.warning(f'Failed to query {node} for {str(method)} due to {str(value)}')
+        finally:
+            gevent.killall(list(running.values()))
+
+        # no node in the call order list was succesfully queried
+        raise RemoteError(
+            f'Failed to query {str(method)} after trying the following '
+            f'nodes: {[str(x) for x in call_order]}. Check logs for details.',
+        )
+
     def _get_latest_block_number(self, web3: Optional[Web3]) -> int:
         if web3 is not None:
             return web3.eth.blockNumber
@@ -406,6 +578,7 @@ class EthereumManager():
         return self.query(
             method=self._get_latest_block_number,
             call_order=call_order if call_order is not None else self.default_call_order(),
+            hedge=True,
         )
 
     def query_eth_highest_block(self) -> BlockNumber:
@@ -479,6 +652,7 @@ class EthereumManager():
         return self.query(
             method=self._get_block_by_number,
             call_order=call_order if call_order is not None else self.default_call_order(),
+            hedge=True,
             num=num,
         )
 
@@ -504,6 +678,7 @@ class EthereumManager():
         return self.query(
             method=self._get_code,
             call_order=call_order if call_order is not None else self.default_call_order(),
+            hedge=True,
             account=account,
         )
 
@@ -638,6 +813,7 @@ class EthereumManager():
         return self.query(
             method=self._get_transaction_receipt,
             call_order=call_order if call_order is not None else self.default_call_order(),
+            hedge=True,
             tx_hash=tx_hash,
         )
 
@@ -652,6 +828,7 @@ class EthereumManager():
         return self.query(
             method=self._call_contract,
             call_order=call_order if call_order is not None else self.default_call_order(),
+            hedge=True,
             contract_address=contract_address,
             abi=abi,
             method_name=method_name,
@@ -691,6 +868,72 @@ class EthereumManager():
             ) from e
         return result
 
+    def call_contracts(
+            self,
+            calls: List[ContractCall],
+            call_order: Optional[Sequence[NodeName]] = None,
+    ) -> List[Any]:
+        """Performs many eth_calls in as few requests as possible
+
+        With the user's own node the calls are sent as batched JSON-RPC requests.
+        With open nodes and etherscan they are aggregated via the multicall contract.
+        Returns the decoded result of each call in the order the calls were given.
+
+        May raise:
+        - RemoteError if no node in the call order could perform all the calls.
+        Since the calls are aggregated a single failing call fails its whole batch.
+        """
+        results = []
+        for chunk in get_chunks(calls, n=CONTRACT_CALLS_BATCH_SIZE):
+            results.extend(self.query(
+                method=self._call_contracts,
+                call_order=call_order if call_order is not None else self.default_call_order(),
+                hedge=True,
+                calls=chunk,
+            ))
+
+        return results
+
+    def _call_contracts(
+            self,
+            web3: Optional[Web3],
+            calls: List[ContractCall],
+    ) -> List[Any]:
+        """Performs the given eth_calls in a single request
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        - BlockchainQueryError if web3 is used and there is a VM execution error
+        - requests.exceptions.RequestException if the own node can't be reached
+        """
+        if web3 is not None and web3 is self.web3_mapping.get(NodeName.OWN, None):
+            outputs = self._query_batched_rpc(
+                web3=web3,
+                method='eth_call',
+                params_list=[
+                    [{'to': call.contract_address, 'data': call.encode()}, 'latest']
+                    for call in calls
+                ],
+            )
+        else:
+            # Open nodes don't all support batching so go through the multicall contract
+            _, outputs = self._call_contract(
+                web3=web3,
+                contract_address=ETH_MULTICALL.address,
+                abi=ETH_MULTICALL.abi,
+                method_name='aggregate',
+                arguments=[[(call.contract_address, call.encode()) for call in calls]],
+            )
+
+        try:
+            return [
+                call.decode(hexstring_to_bytes(output) if isinstance(output, str) else output)
+                for call, output in zip(calls, outputs)
+            ]
+        except (DecodingError, ValueError) as e:
+            raise BlockchainQueryError(f'Could not decode the aggregated calls: {str(e)}') from e
+
     def get_logs(
             self,
             contract_address: ChecksumEthAddress,
@@ -701,6 +944,35 @@ class EthereumManager():
             to_block: Union[int, Literal['latest']] = 'latest',
             call_order: Optional[Sequence[NodeName]] = None,
     ) -> List[Dict[str, Any]]:
+        """Returns the logs of a contract event going through the log index
+
+        Only the blocks whose logs are not yet in the log index are queried.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        """
+        return self.log_indexer.get_logs(
+            contract_address=contract_address,
+            abi=abi,
+            event_name=event_name,
+            argument_filters=argument_filters,
+            from_block=from_block,
+            to_block=to_block,
+            call_order=call_order,
+        )
+
+    def query_logs(
+            self,
+            contract_address: ChecksumEthAddress,
+            abi: List,
+            event_name: str,
+            argument_filters: Dict[str, Any],
+            from_block: int,
+            to_block: Union[int, Literal['latest']] = 'latest',
+            call_order: Optional[Sequence[NodeName]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Queries the logs of a contract event from the nodes, skipping the log index"""
         if call_order is None:  # Default call order for logs
             call_order = (NodeName.OWN, NodeName.ETHERSCAN)
         return self.query(
@@ -824,19 +1096,24 @@ class EthereumManager():
                     start_block = end_block + 1
                 events.extend(new_events)
 
+            # Etherscan gives us the block timestamps for free so remember them
+            self._save_block_timestamps({
+                event['blockNumber']: Timestamp(event['timeStamp']) for event in events
+            })
+
         return events
 
     def get_event_timestamp(self, event: Dict[str, Any]) -> Timestamp:
         """Reads an event returned either by etherscan or web3 and gets its timestamp
 
         Etherscan events contain a timestamp. Normal web3 events don't so it needs to
-        be queried from the block number
+        be looked up from the block number. Block timestamps are cached in memory and
+        in the DB so each block is only ever queried once. When many events are to be
+        processed call prefetch_event_timestamps() first so that all missing blocks
+        are queried in batches instead of one by one.
 
-        WE could also add this to the get_logs() call but would add unnecessary
-        rpc calls for get_block_by_number() for each log entry. Better have it
-        lazy queried like this.
-
-        TODO: Perhaps better approach would be a log event class for this
+        May raise:
+        - RemoteError if the block timestamp could not be queried from any node
         """
         if 'timeStamp' in event:
             # event from etherscan
@@ -844,5 +1121,171 @@ class EthereumManager():
 
         # event from web3
         block_number = event['blockNumber']
-        block_data = self.get_block_by_number(block_number)
-        return Timestamp(block_data['timestamp'])
+        return self.get_blocks_timestamps([block_number])[block_number]
+
+    def prefetch_event_timestamps(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Makes sure the timestamps of the blocks of all given events are cached
+
+        May raise:
+        - RemoteError if the block timestamps could not be queried from any node
+        """
+        block_numbers = {x['blockNumber'] for x in events if 'timeStamp' not in x}
+        if len(block_numbers) != 0:
+            self.get_blocks_timestamps(block_numbers)
+
+    def get_blocks_timestamps(self, block_numbers: Iterable[int]) -> Dict[int, Timestamp]:
+        """Returns the timestamp of each of the given blocks
+
+        Blocks are looked up first in memory, then in the DB and any that are still
+        missing are queried from the nodes in batches.
+
+        May raise:
+        - RemoteError if the block timestamps could not be queried from any node
+        """
+        block_timestamps = {}
+        missing_blocks = []
+        for block_number in block_numbers:
+            timestamp = self.block_timestamps.get(block_number)
+            if timestamp is None:
+                missing_blocks.append(block_number)
+            else:
+                self.block_timestamps.move_to_end(block_number)
+                block_timestamps[block_number] = timestamp
+
+        if len(missing_blocks) == 0:
+            return block_timestamps
+
+        saved_timestamps = self.database.get_block_timestamps(missing_blocks)
+        self._cache_block_timestamps(saved_timestamps)
+        block_timestamps.update(saved_timestamps)
+        missing_blocks = sorted({x for x in missing_blocks if x not in saved_timestamps})
+        for chunk in get_chunks(missing_blocks, n=BLOCKS_BATCH_QUERY_SIZE):
+            queried_timestamps = self.query(
+                method=self._get_blocks_timestamps,
+                call_order=self.default_call_order(),
+                block_numbers=chunk,
+            )
+            self._save_block_timestamps(queried_timestamps)
+            block_timestamps.update(queried_timestamps)
+
+        return block_timestamps
+
+    def _cache_block_timestamps(self, block_timestamps: Dict[int, Timestamp]) -> None:
+        for block_number, timestamp in block_timestamps.items():
+            self.block_timestamps[block_number] = timestamp
+            self.block_timestamps.move_to_end(block_number)
+
+        while len(self.block_timestamps) > BLOCK_TIMESTAMPS_CACHE_SIZE:
+            self.block_timestamps.popitem(last=False)
+
+    def _save_block_timestamps(self, block_timestamps: Dict[int, Timestamp]) -> None:
+        if len(block_timestamps) == 0:
+            return
+
+        self._cache_block_timestamps(block_timestamps)
+        self.database.add_block_timestamps(block_timestamps)
+
+    def _get_blocks_timestamps(
+            self,
+            web3: Optional[Web3],
+            block_numbers: List[int],
+    ) -> Dict[int, Timestamp]:
+        """Queries the timestamps of the given blocks
+
+        For a node all blocks are asked for in a single batched JSON-RPC request.
+        Etherscan has no batching so there each block is queried separately.
+
+        May raise:
+        - RemoteError if the node does not return a valid response for all blocks
+        - BlockchainQueryError if the node returns an error for any of the blocks
+        - requests.exceptions.RequestException if the node can't be reached
+        """
+        if web3 is None:
+            return {
+                x: Timestamp(self.etherscan.get_block_by_number(x)['timestamp'])
+                for x in block_numbers
+            }
+
+        results = self._query_batched_rpc(
+            web3=web3,
+            method='eth_getBlockByNumber',
+            params_list=[[hex(block_number), False] for block_number in block_numbers],
+        )
+        block_timestamps = {}
+        for block_number, block in zip(block_numbers, results):
+            try:
+                block_timestamps[block_number] = Timestamp(
+                    deserialize_int_from_hex(
+                        symbol=block['timestamp'],
+                        location='batched block query',
+                    ),
+                )
+            except (KeyError, TypeError, DeserializationError) as e:
+                raise RemoteError(f'Got unexpected block in batched query: {block}') from e
+
+        return block_timestamps
+
+    def _query_batched_rpc(
+            self,
+            web3: Web3,
+            method: str,
+            params_list: List[List[Any]],
+    ) -> List[Any]:
+        """Sends one JSON-RPC request per given params in a single batch to the node
+
+        Returns the results in the order of the given params.
+
+        May raise:
+        - RemoteError if the node does not return a valid response for all requests
+        - BlockchainQueryError if the node returns an error for any of the requests
+        - requests.exceptions.RequestException if the node can't be reached or
+        responds with an error status
+        """
+        # web3.py can't batch requests so post the batch to the node's endpoint directly.
+        # It still goes through the provider's session, headers and timeout.
+        provider = cast(HTTPProvider, web3.provider)
+        payload = [{
+            'jsonrpc': '2.0',
+            'id': idx,
+            'method': method,
+            'params': params,
+        } for idx, params in enumerate(params_list)]
+        response = make_post_request(
+            provider.endpoint_uri,  # type: ignore
+            json.dumps(payload).encode(),
+            **dict(provider.get_request_kwargs()),
+        )
+        try:
+            entries = json.loads(response)
+        except (json.decoder.JSONDecodeError, UnicodeDecodeError) as e:
+            raise RemoteError(
+                f'Batched {method} query returned invalid JSON {response!r}',
+            ) from e
+
+        if not isinstance(entries, list):
+            raise RemoteError(f'Node does not support batched requests. Got {entries}')
+
+        results: List[Any] = [None] * len(params_list)
+        returned_ids = set()
+        for entry in entries:
+            try:
+                idx = entry['id']
+                if 'error' in entry:
+                    raise BlockchainQueryError(
+                        f'Batched {method} query with params {params_list[idx]} '
+                        f'failed due to {entry["error"]}',
+                    )
+                results[idx] = entry['result']
+            except (KeyError, IndexError, TypeError) as e:
+                raise RemoteError(
+                    f'Got unexpected entry in batched {method} query: {entry}',
+                ) from e
+            returned_ids.add(idx)
+
+        if len(returned_ids) != len(params_list):
+            raise RemoteError(
+                f'Batched {method} query returned {len(returned_ids)} results '
+                f'out of the {len(params_list)} requested',
+            )
+
+        return results
@@ -0,0 +1,62 @@
+from collections import deque
+from typing import Deque, Optional
+
+# How many of the latest queries to each node to keep statistics for
+NODE_STATS_WINDOW = 50
+# How many queries a node needs before its statistics are trusted
+NODE_STATS_MIN_SAMPLES = 5
+# Latency in seconds assumed for a node we have no statistics for yet
+NODE_DEFAULT_LATENCY = 1.0
+# Blocks a node can lag behind the chain head before it is penalized
+NODE_MAX_BLOCK_LAG = 20
+# Weight factor for nodes that are too far behind the chain head
+NODE_LAGGING_WEIGHT_FACTOR = 0.1
+# Minimum weight factor so that unhealthy nodes are still tried once in a while
+NODE_MIN_WEIGHT_FACTOR = 0.01
+
+
+class NodeStats():
+    """Rolling statistics of the queries performed against a single ethereum node"""
+
+    def __init__(self) -> None:
+        self.latencies: Deque[float] = deque(maxlen=NODE_STATS_WINDOW)
+        self.failures: Deque[bool] = deque(maxlen=NODE_STATS_WINDOW)
+        self.block_lag = 0
+
+    def record(self, latency: float, success: bool) -> None:
+        """Record the latency in seconds and the outcome of a query to the node"""
+        self.latencies.append(latency)
+        self.failures.append(not success)
+
+    def error_rate(self) -> float:
+        if len(self.failures) == 0:
+            return 0.0
+        return sum(self.failures) / len(self.failures)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Returns the given percentile (0-1) of the recorded latencies
+
+        Returns None if there are not enough samples for it to be meaningful
+        """
+        if len(self.latencies) < NODE_STATS_MIN_SAMPLES:
+            return None
+
+        ordered = sorted(self.latencies)
+        idx = min(int(percentile * len(ordered)), len(ordered) - 1)
+        return ordered[idx]
+
+    def weight_factor(self) -> float:
+        """A factor in (0, 1] by which to scale the selection weight of the node
+
+        Slow nodes, nodes with many errors and nodes lagging behind the chain
+        head get a smaller factor.
+        """
+        median_latency = self.latency_percentile(0.5)
+        if median_latency is None:
+            median_latency = NODE_DEFAULT_LATENCY
+
+        factor = (1 - self.error_rate()) ** 2 / (1 + median_latency)
+        if self.block_lag > NODE_MAX_BLOCK_LAG:
+            factor *= NODE_LAGGING_WEIGHT_FACTOR
+
+        return max(factor, NODE_MIN_WEIGHT_FACTOR)
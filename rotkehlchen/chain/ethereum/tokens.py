@@ -164,17 +164,22 @@ class EthTokens():
             account=address,
             call_order=call_order,
         )
+        unpriced_tokens = []
         for token_identifier, value in ret.items():
             token = EthereumToken(token_identifier)
             balances[token] += value
-            if token in token_usd_price:
-                continue
-            # else get the price
-            try:
-                usd_price = Inquirer().find_usd_price(token)
-            except RemoteError:
-                usd_price = Price(ZERO)
-            token_usd_price[token] = usd_price
+            if token not in token_usd_price:
+                unpriced_tokens.append(token)
+
+        if len(unpriced_tokens) == 0:
+            return
+        # else get the prices of all new tokens at once
+        try:
+            usd_prices = Inquirer().find_usd_prices(unpriced_tokens)
+        except RemoteError:
+            usd_prices = {}
+        for token in unpriced_tokens:
+            token_usd_price[token] = usd_prices.get(token, Price(ZERO))
 
     def _get_multitoken_multiaccount_balance(
             self,
@@ -1,6 +1,10 @@
+import hashlib
+import heapq
 import logging
 from collections import defaultdict
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
+
+from gevent.pool import Pool
 
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.ranges import DBQueryRanges
@@ -15,6 +19,33 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 FREE_ETH_TX_LIMIT = 250
+ETH_TRANSACTIONS_QUERY_CONCURRENCY = 8
+
+
+def _assign_internal_transaction_nonces(
+        transactions: List[EthereumTransaction],
+) -> List[EthereumTransaction]:
+    """Gives distinct nonces to the internal transactions of an etherscan query
+
+    Etherscan returns all internal transactions with a nonce of -1. Multiple internal
+    transactions of the same transaction and sender can be returned by the queries of
+    different addresses or time ranges. So the nonce is derived from the recipient and
+    the value, which tell them apart, and from how many identical internal transactions
+    came before in the query. The same internal transaction thus always gets the same
+    negative nonce, no matter which query returned it.
+    """
+    counters: Dict[
+        Tuple[bytes, ChecksumEthAddress, Optional[ChecksumEthAddress], str],
+        int,
+    ] = defaultdict(int)
+    result = []
+    for tx in transactions:
+        key = (tx.tx_hash, tx.from_address, tx.to_address, str(tx.value))
+        digest = hashlib.sha256(f'{key[2]}_{key[3]}_{counters[key]}'.encode()).digest()
+        result.append(tx._replace(nonce=-1 - int.from_bytes(digest[:6], byteorder='big')))
+        counters[key] += 1
+
+    return result
 
 
 class EthTransactions(LockableQueryObject):
@@ -36,9 +67,11 @@ class EthTransactions(LockableQueryObject):
             address: ChecksumEthAddress,
             start_ts: Timestamp,
             end_ts: Timestamp,
-            with_limit: bool,
     ) -> List[EthereumTransaction]:
-        self.tx_per_address[address] = 0
+        """Returns all transactions of the address in the range sorted from oldest to newest
+
+        Only the ranges not already in the DB are queried from etherscan.
+        """
         transactions = self.database.get_ethereum_transactions(
             from_ts=start_ts,
             to_ts=end_ts,
@@ -54,12 +87,12 @@ class EthTransactions(LockableQueryObject):
         for query_start_ts, query_end_ts in ranges_to_query:
             for internal in (False, True):
                 try:
-                    new_transactions.extend(self.etherscan.get_transactions(
+                    queried_transactions = self.etherscan.get_transactions(
                         account=address,
                         internal=internal,
                         from_ts=query_start_ts,
                         to_ts=query_end_ts,
-                    ))
+                    )
                 except RemoteError as e:
                     self.msg_aggregator.add_error(
                         f'Got error "{str(e)}" while querying ethereum transactions '
@@ -68,18 +101,25 @@ class EthTransactions(LockableQueryObject):
                         f'to_ts: {query_end_ts} '
                         f'internal: {internal}',
                     )
+                    continue
+
+                if internal:
+                    queried_transactions = _assign_internal_transaction_nonces(
+                        queried_transactions,
+                    )
+                new_transactions.extend(queried_transactions)
 
         # add new transactions to the DB
         if new_transactions != []:
-            self.database.add_ethereum_transactions(new_transactions, from_etherscan=True)
-            # And since at least for now the increasingly negative nonce for the internal
-            # transactions happens only in the DB writing, requery the entire batch from
-            # the DB to get the updated transactions
-            transactions = self.database.get_ethereum_transactions(
-                from_ts=start_ts,
-                to_ts=end_ts,
-                address=address,
-            )
+            self.database.add_ethereum_transactions(new_transactions)
+            # Internal transactions already got their final nonce so the new ones can
+            # be combined with the ones read from the DB instead of requerying it
+            known_transactions = set(transactions)
+            for tx in new_transactions:
+                if start_ts <= tx.timestamp <= end_ts and tx not in known_transactions:
+                    known_transactions.add(tx)
+                    transactions.append(tx)
+            transactions.sort(key=lambda tx: tx.timestamp)
 
         # and also set the last queried timestamps for the address
         ranges.update_used_query_range(
@@ -88,15 +128,6 @@ class EthTransactions(LockableQueryObject):
             end_ts=end_ts,
             ranges_to_query=ranges_to_query,
         )
-
-        if with_limit:
-            transactions_queried_so_far = sum(x for _, x in self.tx_per_address.items())
-            remaining_num_tx = FREE_ETH_TX_LIMIT - transactions_queried_so_far
-            returning_tx_length = min(remaining_num_tx, len(transactions))
-            # Note down how many we got for this address
-            self.tx_per_address[address] = returning_tx_length
-            return transactions[:returning_tx_length]
-
         return transactions
 
     @protect_with_lock()
@@ -111,6 +142,9 @@ class EthTransactions(LockableQueryObject):
         """Queries for all transactions (normal AND internal) of all ethereum accounts.
         Returns a list of all transactions of all accounts sorted by time.
 
+        The accounts are queried concurrently. Etherscan's rate limit is respected
+        by the etherscan object which all of the queries share.
+
         If `with_limit` is true then the api limit is applied
 
         if `recent_first` is true then the transactions are returned with the most
@@ -120,22 +154,46 @@ class EthTransactions(LockableQueryObject):
         - RemoteError if etherscan is used and there is a problem with reaching it or
         with parsing the response.
         """
-        transactions_set: Set[EthereumTransaction] = set()
-
         if addresses is not None:
             accounts = addresses
         else:
             accounts = self.database.get_blockchain_accounts().eth
 
-        for address in accounts:
-            new_transactions = self._single_address_query_transactions(
+        pool = Pool(ETH_TRANSACTIONS_QUERY_CONCURRENCY)
+        per_address_transactions = pool.map(
+            lambda address: self._single_address_query_transactions(
                 address=address,
                 start_ts=from_ts,
                 end_ts=to_ts,
-                with_limit=with_limit,
-            )
-            transactions_set.update(set(new_transactions))
+            ),
+            accounts,
+        )
+
+        if with_limit:
+            for address, address_transactions in zip(accounts, per_address_transactions):
+                self.tx_per_address[address] = 0
+                transactions_queried_so_far = sum(x for _, x in self.tx_per_address.items())
+                remaining_num_tx = FREE_ETH_TX_LIMIT - transactions_queried_so_far
+                returning_tx_length = min(remaining_num_tx, len(address_transactions))
+                # Note down how many we got for this address
+                self.tx_per_address[address] = returning_tx_length
+                del address_transactions[returning_tx_length:]
+
+        if recent_first:
+            for address_transactions in per_address_transactions:
+                address_transactions.reverse()
+
+        # Each list is already sorted so merge them. Transactions between two of the
+        # tracked accounts appear in both lists so skip the repeated ones.
+        transactions = []
+        seen_transactions: Set[EthereumTransaction] = set()
+        for tx in heapq.merge(
+                *per_address_transactions,
+                key=lambda tx: tx.timestamp,
+                reverse=recent_first,
+        ):
+            if tx not in seen_transactions:
+                seen_transactions.add(tx)
+                transactions.append(tx)
 
-        transactions = list(transactions_set)
-        transactions.sort(key=lambda tx: tx.timestamp, reverse=recent_first)
         return transactions
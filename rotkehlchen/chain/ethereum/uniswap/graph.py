@@ -5,8 +5,10 @@ LIQUIDITY_POSITIONS_QUERY = (
     liquidityPositions
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
+            id_gt: $last_id,
             user_in: $addresses,
             liquidityTokenBalance_gt: $balance,
         }}
@@ -43,12 +45,15 @@ TOKEN_DAY_DATAS_QUERY = (
     tokenDayDatas
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
+            id_gt: $last_id,
             token_in: $token_ids,
             date: $datetime,
         }}
     ) {{
+        id
         date
         token {{
             id
@@ -65,13 +70,16 @@ SWAPS_QUERY = (
     swaps
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
+            id_gt: $last_id,
             to: $address,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
         }}
     ) {{
+        id
         transaction {{
             swaps {{
                 id
@@ -114,13 +122,16 @@ MINTS_QUERY = (
     mints
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
+            id_gt: $last_id,
             to: $address,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
         }}
     ) {{
+        id
         transaction {{
             id
         }}
@@ -155,13 +166,16 @@ BURNS_QUERY = (
     burns
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
+            id_gt: $last_id,
             sender: $address,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
         }}
     ) {{
+        id
         transaction {{
             id
         }}
@@ -76,6 +76,8 @@ class LiquidityPool:
 AddressBalances = Dict[ChecksumEthAddress, List[LiquidityPool]]
 DDAddressBalances = DefaultDict[ChecksumEthAddress, List[LiquidityPool]]
 AssetPrice = Dict[ChecksumEthAddress, Price]
+# Tokens constructed from subgraph data keyed by the subgraph token id
+GraphTokens = Dict[str, Union[EthereumToken, UnknownEthereumToken]]
 
 
 class ProtocolBalance(NamedTuple):
@@ -11,7 +11,13 @@ from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.assets.asset import EthereumToken
 from rotkehlchen.assets.unknown_asset import UnknownEthereumToken
 from rotkehlchen.assets.utils import get_ethereum_token
-from rotkehlchen.chain.ethereum.graph import GRAPH_QUERY_LIMIT, Graph, format_query_indentation
+from rotkehlchen.chain.ethereum.graph import (
+    GRAPH_QUERY_LIMIT,
+    Graph,
+    format_query_indentation,
+    query_addresses_concurrently,
+    query_all_by_id,
+)
 from rotkehlchen.chain.ethereum.trades import AMMSwap, AMMTrade
 from rotkehlchen.constants import ZERO
 from rotkehlchen.errors import RemoteError
@@ -46,8 +52,8 @@ from .typing import (
     AggregatedAmount,
     AssetPrice,
     DDAddressBalances,
-    DDAddressEvents,
     EventType,
+    GraphTokens,
     LiquidityPool,
     LiquidityPoolAsset,
     LiquidityPoolEvent,
@@ -92,6 +98,28 @@ def add_trades_from_swaps(
     return trades
 
 
+def get_graph_token(
+        token_data: Dict[str, Any],
+        tokens: GraphTokens,
+) -> Union[EthereumToken, UnknownEthereumToken]:
+    """Get the token of the subgraph token data
+
+    Each token is only constructed once per subgraph token id and then reused
+    from the given tokens mapping.
+    """
+    token = tokens.get(token_data['id'])
+    if token is None:
+        token = get_ethereum_token(
+            symbol=token_data['symbol'],
+            ethereum_address=to_checksum_address(token_data['id']),
+            name=token_data['name'],
+            decimals=int(token_data['decimals']),
+        )
+        tokens[token_data['id']] = token
+
+    return token
+
+
 class Uniswap(EthereumModule):
     """Uniswap integration module
 
@@ -213,85 +241,67 @@ class Uniswap(EthereumModule):
         addresses_lower = [address.lower() for address in addresses]
         querystr = format_query_indentation(LIQUIDITY_POSITIONS_QUERY.format())
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
             '$addresses': '[String!]',
             '$balance': 'BigDecimal!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
             'addresses': addresses_lower,
             'balance': '0',
         }
-        while True:
-            result = self.graph.query(  # type: ignore # caller already checks
-                querystr=querystr,
-                param_types=param_types,
-                param_values=param_values,
-            )
-            result_data = result['liquidityPositions']
-
-            for lp in result_data:
-                user_address = to_checksum_address(lp['user']['id'])
-                user_lp_balance = FVal(lp['liquidityTokenBalance'])
-                lp_pair = lp['pair']
-                lp_address = to_checksum_address(lp_pair['id'])
-                lp_total_supply = FVal(lp_pair['totalSupply'])
-
-                # Insert LP tokens reserves within tokens dicts
-                token0 = lp_pair['token0']
-                token0['total_amount'] = lp_pair['reserve0']
-                token1 = lp_pair['token1']
-                token1['total_amount'] = lp_pair['reserve1']
-
-                liquidity_pool_assets = []
-
-                for token in token0, token1:
-                    # Get the token <EthereumToken> or <UnknownEthereumToken>
-                    asset = get_ethereum_token(
-                        symbol=token['symbol'],
-                        ethereum_address=to_checksum_address(token['id']),
-                        name=token['name'],
-                        decimals=int(token['decimals']),
-                    )
-
-                    # Classify the asset either as known or unknown
-                    if isinstance(asset, EthereumToken):
-                        known_assets.add(asset)
-                    elif isinstance(asset, UnknownEthereumToken):
-                        unknown_assets.add(asset)
-
-                    # Estimate the underlying asset total_amount
-                    asset_total_amount = FVal(token['total_amount'])
-                    user_asset_balance = (
-                        user_lp_balance / lp_total_supply * asset_total_amount
-                    )
-
-                    liquidity_pool_asset = LiquidityPoolAsset(
-                        asset=asset,
-                        total_amount=asset_total_amount,
-                        user_balance=Balance(amount=user_asset_balance),
-                    )
-                    liquidity_pool_assets.append(liquidity_pool_asset)
-
-                liquidity_pool = LiquidityPool(
-                    address=lp_address,
-                    assets=liquidity_pool_assets,
-                    total_supply=lp_total_supply,
-                    user_balance=Balance(amount=user_lp_balance),
+        result_data = query_all_by_id(
+            graph=self.graph,  # type: ignore # caller already checks
+            querystr=querystr,
+            schema='liquidityPositions',
+            param_types=param_types,
+            param_values=param_values,
+            limit=GRAPH_QUERY_LIMIT,
+        )
+        tokens: GraphTokens = {}
+        for lp in result_data:
+            user_address = to_checksum_address(lp['user']['id'])
+            user_lp_balance = FVal(lp['liquidityTokenBalance'])
+            lp_pair = lp['pair']
+            lp_address = to_checksum_address(lp_pair['id'])
+            lp_total_supply = FVal(lp_pair['totalSupply'])
+
+            # Insert LP tokens reserves within tokens dicts
+            token0 = lp_pair['token0']
+            token0['total_amount'] = lp_pair['reserve0']
+            token1 = lp_pair['token1']
+            token1['total_amount'] = lp_pair['reserve1']
+
+            liquidity_pool_assets = []
+
+            for token in token0, token1:
+                # Get the token <EthereumToken> or <UnknownEthereumToken>
+                asset = get_graph_token(token_data=token, tokens=tokens)
+
+                # Classify the asset either as known or unknown
+                if isinstance(asset, EthereumToken):
+                    known_assets.add(asset)
+                elif isinstance(asset, UnknownEthereumToken):
+                    unknown_assets.add(asset)
+
+                # Estimate the underlying asset total_amount
+                asset_total_amount = FVal(token['total_amount'])
+                user_asset_balance = (
+                    user_lp_balance / lp_total_supply * asset_total_amount
                 )
-                address_balances[user_address].append(liquidity_pool)
 
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
+                liquidity_pool_asset = LiquidityPoolAsset(
+                    asset=asset,
+                    total_amount=asset_total_amount,
+                    user_balance=Balance(amount=user_asset_balance),
+                )
+                liquidity_pool_assets.append(liquidity_pool_asset)
 
-            # Update pagination step
-            param_values = {
-                **param_values,
-                'offset': param_values['offset'] + GRAPH_QUERY_LIMIT,  # type: ignore
-            }
+            liquidity_pool = LiquidityPool(
+                address=lp_address,
+                assets=liquidity_pool_assets,
+                total_supply=lp_total_supply,
+                user_balance=Balance(amount=user_lp_balance),
+            )
+            address_balances[user_address].append(liquidity_pool)
 
         protocol_balance = ProtocolBalance(
             address_balances=dict(address_balances),
@@ -412,6 +422,28 @@ class Uniswap(EthereumModule):
 
         return trades
 
+    def _get_addresses_query_ranges(
+            self,
+            addresses: List[ChecksumEthAddress],
+            prefix: str,
+            to_timestamp: Timestamp,
+    ) -> Dict[ChecksumEthAddress, Tuple[Timestamp, Timestamp]]:
+        """Get the addresses that have to be queried up to the given timestamp
+
+        For each of them returns the start of its last used query range and the
+        timestamp to query it from, which is the end of that range. Addresses
+        that were never queried before are queried from the beginning.
+        """
+        query_ranges = {}
+        for address in addresses:
+            used_range = self.database.get_used_query_range(name=f'{prefix}_{address}')
+            if not used_range:
+                query_ranges[address] = (Timestamp(0), Timestamp(0))
+            elif used_range[1] <= to_timestamp:
+                query_ranges[address] = used_range
+
+        return query_ranges
+
     def _get_events_balances(
             self,
             addresses: List[ChecksumEthAddress],
@@ -424,70 +456,45 @@ class Uniswap(EthereumModule):
         total profit/loss per LP (stored within <LiquidityPoolEventsBalance>).
         """
         address_events_balances: AddressEventsBalances = {}
-        address_events: DDAddressEvents = defaultdict(list)
         db_address_events: AddressEvents = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
-        # Get addresses' last used query range for Uniswap events
-        for address in addresses:
-            entry_name = f'{UNISWAP_EVENTS_PREFIX}_{address}'
-            events_range = self.database.get_used_query_range(name=entry_name)
-
-            if not events_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, events_range[1])
-
-        # Request new addresses' events
-        if new_addresses:
-            start_ts = Timestamp(0)
-            for address in new_addresses:
-                for event_type in EventType:
-                    new_address_events = self._get_events_graph(
-                        address=address,
-                        start_ts=start_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if new_address_events:
-                        address_events[address].extend(new_address_events)
+        query_ranges = self._get_addresses_query_ranges(
+            addresses=addresses,
+            prefix=UNISWAP_EVENTS_PREFIX,
+            to_timestamp=to_timestamp,
+        )
+        tokens: GraphTokens = {}
 
-                # Insert new address' last used query range
-                self.database.update_used_query_range(
-                    name=f'{UNISWAP_EVENTS_PREFIX}_{address}',
-                    start_ts=start_ts,
+        def query_address_events(address: ChecksumEthAddress) -> List[LiquidityPoolEvent]:
+            address_events = []
+            for event_type in EventType:
+                address_events.extend(self._get_events_graph(
+                    address=address,
+                    start_ts=query_ranges[address][1],
                     end_ts=to_timestamp,
-                )
-
-        # Request existing DB addresses' events
-        if existing_addresses and min_end_ts <= to_timestamp:
-            for address in existing_addresses:
-                for event_type in EventType:
-                    address_new_events = self._get_events_graph(
-                        address=address,
-                        start_ts=min_end_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if address_new_events:
-                        address_events[address].extend(address_new_events)
+                    event_type=event_type,
+                    tokens=tokens,
+                ))
+            return address_events
 
-                # Update existing address' last used query range
-                self.database.update_used_query_range(
-                    name=f'{UNISWAP_EVENTS_PREFIX}_{address}',
-                    start_ts=min_end_ts,
-                    end_ts=to_timestamp,
-                )
+        # Request each address' events after the end of its last used query range
+        address_events = query_addresses_concurrently(
+            query_address=query_address_events,
+            addresses=list(query_ranges),
+        )
 
         # Insert requested events in DB
         all_events = []
         for address in filter(lambda address: address in address_events, addresses):
             all_events.extend(address_events[address])
 
-        self.database.add_uniswap_events(all_events)
+        with self.database.transaction():
+            self.database.add_uniswap_events(all_events)
+            for address, (start_ts, _) in query_ranges.items():
+                self.database.update_used_query_range(
+                    name=f'{UNISWAP_EVENTS_PREFIX}_{address}',
+                    start_ts=start_ts,
+                    end_ts=to_timestamp,
+                )
 
         # Fetch all DB events within the time range
         for address in addresses:
@@ -530,9 +537,12 @@ class Uniswap(EthereumModule):
             start_ts: Timestamp,
             end_ts: Timestamp,
             event_type: EventType,
+            tokens: GraphTokens,
     ) -> List[LiquidityPoolEvent]:
         """Get the address' events (mints & burns) querying the Uniswap subgraph
         Each event data is stored in a <LiquidityPoolEvent>.
+
+        The events' tokens are taken from and added to the given tokens mapping.
         """
         address_events: List[LiquidityPoolEvent] = []
         if event_type == EventType.MINT:
@@ -546,69 +556,40 @@ class Uniswap(EthereumModule):
             return address_events
 
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
             '$address': 'Bytes!',
             '$start_ts': 'BigInt!',
             '$end_ts': 'BigInt!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
             'address': address.lower(),
             'start_ts': str(start_ts),
             'end_ts': str(end_ts),
         }
         querystr = format_query_indentation(query.format())
-
-        while True:
-            result = self.graph.query(  # type: ignore # caller already checks
-                querystr=querystr,
-                param_types=param_types,
-                param_values=param_values,
+        result_data = query_all_by_id(
+            graph=self.graph,  # type: ignore # caller already checks
+            querystr=querystr,
+            schema=query_schema,
+            param_types=param_types,
+            param_values=param_values,
+            limit=GRAPH_QUERY_LIMIT,
+        )
+        for event in result_data:
+            lp_event = LiquidityPoolEvent(
+                tx_hash=event['transaction']['id'],
+                log_index=int(event['logIndex']),
+                address=address,
+                timestamp=Timestamp(int(event['timestamp'])),
+                event_type=event_type,
+                pool_address=to_checksum_address(event['pair']['id']),
+                token0=get_graph_token(token_data=event['pair']['token0'], tokens=tokens),
+                token1=get_graph_token(token_data=event['pair']['token1'], tokens=tokens),
+                amount0=AssetAmount(FVal(event['amount0'])),
+                amount1=AssetAmount(FVal(event['amount1'])),
+                usd_price=Price(FVal(event['amountUSD'])),
+                lp_amount=AssetAmount(FVal(event['liquidity'])),
             )
-            result_data = result[query_schema]
-
-            for event in result_data:
-                token0_ = event['pair']['token0']
-                token1_ = event['pair']['token1']
-                token0 = get_ethereum_token(
-                    symbol=token0_['symbol'],
-                    ethereum_address=to_checksum_address(token0_['id']),
-                    name=token0_['name'],
-                    decimals=token0_['decimals'],
-                )
-                token1 = get_ethereum_token(
-                    symbol=token1_['symbol'],
-                    ethereum_address=to_checksum_address(token1_['id']),
-                    name=token1_['name'],
-                    decimals=int(token1_['decimals']),
-                )
-                lp_event = LiquidityPoolEvent(
-                    tx_hash=event['transaction']['id'],
-                    log_index=int(event['logIndex']),
-                    address=address,
-                    timestamp=Timestamp(int(event['timestamp'])),
-                    event_type=event_type,
-                    pool_address=to_checksum_address(event['pair']['id']),
-                    token0=token0,
-                    token1=token1,
-                    amount0=AssetAmount(FVal(event['amount0'])),
-                    amount1=AssetAmount(FVal(event['amount1'])),
-                    usd_price=Price(FVal(event['amountUSD'])),
-                    lp_amount=AssetAmount(FVal(event['liquidity'])),
-                )
-                address_events.append(lp_event)
-
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            param_values = {
-                **param_values,
-                'offset': param_values['offset'] + GRAPH_QUERY_LIMIT,  # type: ignore
-            }
+            address_events.append(lp_event)
 
         return address_events
 
@@ -622,59 +603,21 @@ class Uniswap(EthereumModule):
         for already existing addresses. Then the requested trade are written in
         DB and finally all DB trades are read and returned.
         """
-        address_amm_trades: AddressTrades = {}
         db_address_trades: AddressTrades = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
-        # Get addresses' last used query range for Uniswap trades
-        for address in addresses:
-            entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
-            trades_range = self.database.get_used_query_range(name=entry_name)
-
-            if not trades_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, trades_range[1])
-
-        # Request new addresses' trades
-        if new_addresses:
-            start_ts = Timestamp(0)
-            new_address_trades = self._get_trades_graph(
-                addresses=new_addresses,
-                start_ts=start_ts,
-                end_ts=to_timestamp,
-            )
-            address_amm_trades.update(new_address_trades)
-
-            # Insert last used query range for new addresses
-            for address in new_addresses:
-                entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
-                self.database.update_used_query_range(
-                    name=entry_name,
-                    start_ts=start_ts,
-                    end_ts=to_timestamp,
-                )
-
-        # Request existing DB addresses' trades
-        if existing_addresses and min_end_ts <= to_timestamp:
-            address_new_trades = self._get_trades_graph(
-                addresses=existing_addresses,
-                start_ts=min_end_ts,
-                end_ts=to_timestamp,
-            )
-            address_amm_trades.update(address_new_trades)
+        query_ranges = self._get_addresses_query_ranges(
+            addresses=addresses,
+            prefix=UNISWAP_TRADES_PREFIX,
+            to_timestamp=to_timestamp,
+        )
 
-            # Update last used query range for existing addresses
-            for address in existing_addresses:
-                entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
-                self.database.update_used_query_range(
-                    name=entry_name,
-                    start_ts=min_end_ts,
-                    end_ts=to_timestamp,
-                )
+        # Request each address' trades after the end of its last used query range
+        addresses_start_ts = {
+            address: query_from_ts for address, (_, query_from_ts) in query_ranges.items()
+        }
+        address_amm_trades = self._get_trades_graph(
+            addresses_start_ts=addresses_start_ts,
+            end_ts=to_timestamp,
+        )
 
         # Insert all unique swaps to the D
         all_swaps = set()
@@ -683,7 +626,14 @@ class Uniswap(EthereumModule):
                 for swap in trade.swaps:
                     all_swaps.add(swap)
 
-        self.database.add_amm_swaps(list(all_swaps))
+        with self.database.transaction():
+            self.database.add_amm_swaps(list(all_swaps))
+            for address, (start_ts, _) in query_ranges.items():
+                self.database.update_used_query_range(
+                    name=f'{UNISWAP_TRADES_PREFIX}_{address}',
+                    start_ts=start_ts,
+                    end_ts=to_timestamp,
+                )
 
         # Fetch all DB Uniswap trades within the time range
         for address in addresses:
@@ -723,23 +673,28 @@ class Uniswap(EthereumModule):
 
     def _get_trades_graph(
             self,
-            addresses: List[ChecksumEthAddress],
-            start_ts: Timestamp,
+            addresses_start_ts: Dict[ChecksumEthAddress, Timestamp],
             end_ts: Timestamp,
     ) -> AddressTrades:
-        address_trades = {}
-        for address in addresses:
-            trades = self._get_trades_graph_for_address(address, start_ts, end_ts)
-            if len(trades) != 0:
-                address_trades[address] = trades
-
-        return address_trades
+        """Get the trades of each address from its given start timestamp"""
+        tokens: GraphTokens = {}
+        address_trades = query_addresses_concurrently(
+            query_address=lambda address: self._get_trades_graph_for_address(
+                address=address,
+                start_ts=addresses_start_ts[address],
+                end_ts=end_ts,
+                tokens=tokens,
+            ),
+            addresses=list(addresses_start_ts),
+        )
+        return {address: trades for address, trades in address_trades.items() if len(trades) != 0}
 
     def _get_trades_graph_for_address(
             self,
             address: ChecksumEthAddress,
             start_ts: Timestamp,
             end_ts: Timestamp,
+            tokens: GraphTokens,
     ) -> List[AMMTrade]:
         """Get the address' trades data querying the Uniswap subgraph
 
@@ -758,78 +713,52 @@ class Uniswap(EthereumModule):
         """
         trades: List[AMMTrade] = []
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
             '$address': 'Bytes!',
             '$start_ts': 'BigInt!',
             '$end_ts': 'BigInt!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
             'address': address.lower(),
             'start_ts': str(start_ts),
             'end_ts': str(end_ts),
         }
         querystr = format_query_indentation(SWAPS_QUERY.format())
-
-        while True:
-            result = self.graph.query(  # type: ignore # caller already checks
-                querystr=querystr,
-                param_types=param_types,
-                param_values=param_values,
-            )
-            result_data = result['swaps']
-            for entry in result_data:
-                swaps = []
-                for swap in entry['transaction']['swaps']:
-                    timestamp = swap['timestamp']
-                    swap_token0 = swap['pair']['token0']
-                    swap_token1 = swap['pair']['token1']
-                    token0 = get_ethereum_token(
-                        symbol=swap_token0['symbol'],
-                        ethereum_address=to_checksum_address(swap_token0['id']),
-                        name=swap_token0['name'],
-                        decimals=swap_token0['decimals'],
-                    )
-                    token1 = get_ethereum_token(
-                        symbol=swap_token1['symbol'],
-                        ethereum_address=to_checksum_address(swap_token1['id']),
-                        name=swap_token1['name'],
-                        decimals=int(swap_token1['decimals']),
-                    )
-                    amount0_in = FVal(swap['amount0In'])
-                    amount1_in = FVal(swap['amount1In'])
-                    amount0_out = FVal(swap['amount0Out'])
-                    amount1_out = FVal(swap['amount1Out'])
-                    swaps.append(AMMSwap(
-                        tx_hash=swap['id'].split('-')[0],
-                        log_index=int(swap['logIndex']),
-                        address=address,
-                        from_address=to_checksum_address(swap['sender']),
-                        to_address=to_checksum_address(swap['to']),
-                        timestamp=Timestamp(int(timestamp)),
-                        location=Location.UNISWAP,
-                        token0=token0,
-                        token1=token1,
-                        amount0_in=AssetAmount(amount0_in),
-                        amount1_in=AssetAmount(amount1_in),
-                        amount0_out=AssetAmount(amount0_out),
-                        amount1_out=AssetAmount(amount1_out),
-                    ))
-
-                # Now that we got all swaps for a transaction, create the trade object
-                trades.extend(self._tx_swaps_to_trades(swaps))
-
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            param_values = {
-                **param_values,
-                'offset': param_values['offset'] + GRAPH_QUERY_LIMIT,  # type: ignore
-            }
+        result_data = query_all_by_id(
+            graph=self.graph,  # type: ignore # caller already checks
+            querystr=querystr,
+            schema='swaps',
+            param_types=param_types,
+            param_values=param_values,
+            limit=GRAPH_QUERY_LIMIT,
+        )
+        for entry in result_data:
+            swaps = []
+            for swap in entry['transaction']['swaps']:
+                timestamp = swap['timestamp']
+                token0 = get_graph_token(token_data=swap['pair']['token0'], tokens=tokens)
+                token1 = get_graph_token(token_data=swap['pair']['token1'], tokens=tokens)
+                amount0_in = FVal(swap['amount0In'])
+                amount1_in = FVal(swap['amount1In'])
+                amount0_out = FVal(swap['amount0Out'])
+                amount1_out = FVal(swap['amount1Out'])
+                swaps.append(AMMSwap(
+                    tx_hash=swap['id'].split('-')[0],
+                    log_index=int(swap['logIndex']),
+                    address=address,
+                    from_address=to_checksum_address(swap['sender']),
+                    to_address=to_checksum_address(swap['to']),
+                    timestamp=Timestamp(int(timestamp)),
+                    location=Location.UNISWAP,
+                    token0=token0,
+                    token1=token1,
+                    amount0_in=AssetAmount(amount0_in),
+                    amount1_in=AssetAmount(amount1_in),
+                    amount0_out=AssetAmount(amount0_out),
+                    amount1_out=AssetAmount(amount1_out),
+                ))
+
+            # Now that we got all swaps for a transaction, create the trade object
+            trades.extend(self._tx_swaps_to_trades(swaps))
         return trades
 
     def _get_unknown_asset_price_graph(
@@ -854,38 +783,24 @@ class Uniswap(EthereumModule):
             datetime.combine(datetime.utcnow().date(), time.min).timestamp(),
         )
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
             '$token_ids': '[String!]',
             '$datetime': 'Int!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
             'token_ids': unknown_assets_addresses_lower,
             'datetime': today_epoch,
         }
-        while True:
-            result = self.graph.query(  # type: ignore # caller already checks
-                querystr=querystr,
-                param_types=param_types,
-                param_values=param_values,
-            )
-            result_data = result['tokenDayDatas']
-
-            for tdd in result_data:
-                token_address = to_checksum_address(tdd['token']['id'])
-                asset_price[token_address] = Price(FVal(tdd['priceUSD']))
-
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            param_values = {
-                **param_values,
-                'offset': param_values['offset'] + GRAPH_QUERY_LIMIT,  # type: ignore
-            }
+        result_data = query_all_by_id(
+            graph=self.graph,  # type: ignore # caller already checks
+            querystr=querystr,
+            schema='tokenDayDatas',
+            param_types=param_types,
+            param_values=param_values,
+            limit=GRAPH_QUERY_LIMIT,
+        )
+        for tdd in result_data:
+            token_address = to_checksum_address(tdd['token']['id'])
+            asset_price[token_address] = Price(FVal(tdd['priceUSD']))
 
         return asset_price
 
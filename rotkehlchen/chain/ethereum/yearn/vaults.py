@@ -4,6 +4,7 @@ from gevent.lock import Semaphore
 
 from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.chain.ethereum.contracts import ContractCall
 from rotkehlchen.chain.ethereum.structures import YearnVault, YearnVaultEvent
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
 from rotkehlchen.constants.ethereum import (
@@ -181,7 +182,7 @@ class YearnVaults(EthereumModule):
         self.premium = premium
         self.history_lock = Semaphore()
 
-    def _calculate_vault_roi(self, vault: YearnVault) -> FVal:
+    def _calculate_vaults_roi(self, vaults: List[YearnVault]) -> Dict[str, FVal]:
         """
         getPricePerFullShare A @ block X
         getPricePerFullShare B @ block Y
@@ -190,22 +191,33 @@ class YearnVaults(EthereumModule):
 
         So the numbers you see displayed on http://yearn.finance/vaults
         are ROI since launch of contract. All vaults start with pricePerFullShare = 1e18
+
+        The share prices of all given vaults are queried in a single aggregated call.
+        Returns the ROI of each vault keyed by the vault name.
         """
         now_block_number = self.ethereum.get_latest_block_number()
-        price_per_full_share = self.ethereum.call_contract(
+        prices_per_full_share = self.ethereum.call_contracts([ContractCall(
             contract_address=vault.contract.address,
             abi=YEARN_DAI_VAULT.abi,  # Any vault ABI will do
             method_name='getPricePerFullShare',
-        )
-        nominator = price_per_full_share - (10**18)
-        denonimator = now_block_number - vault.contract.deployed_block
-        return FVal(nominator) / FVal(denonimator) * BLOCKS_PER_YEAR / 10**18
+        ) for vault in vaults])
+        result = {}
+        for vault, price_per_full_share in zip(vaults, prices_per_full_share):
+            nominator = price_per_full_share - (10**18)
+            denonimator = now_block_number - vault.contract.deployed_block
+            result[vault.name] = FVal(nominator) / FVal(denonimator) * BLOCKS_PER_YEAR / 10**18
+
+        return result
 
     def _get_single_addr_balance(
             self,
             defi_balances: List['DefiProtocolBalances'],
             roi_cache: Dict[str, FVal],
     ) -> Dict[str, YearnVaultBalance]:
+        """Gets the yearn vault balances of a single address
+
+        roi_cache should contain the ROI of all vaults with a balance, keyed by vault name
+        """
         result = {}
         for balance in defi_balances:
             if balance.protocol.name == 'yearn.finance • Vaults':
@@ -227,17 +239,12 @@ class YearnVaults(EthereumModule):
                     )
                     continue
 
-                roi = roi_cache.get(underlying_symbol, None)
-                if roi is None:
-                    roi = self._calculate_vault_roi(vault)
-                    roi_cache[underlying_symbol] = roi
-
                 result[vault.name] = YearnVaultBalance(
                     underlying_token=underlying_asset,
                     vault_token=vault_asset,
                     underlying_value=balance.underlying_balances[0].balance,
                     vault_value=balance.base_balance.balance,
-                    roi=roi,
+                    roi=roi_cache[vault.name],
                 )
 
         return result
@@ -251,7 +258,14 @@ class YearnVaults(EthereumModule):
         else:
             defi_balances = given_defi_balances()
 
-        roi_cache: Dict[str, FVal] = {}
+        # Query the ROI of all vaults with a balance at once instead of per address
+        vaults: Dict[str, YearnVault] = {}
+        for balances in defi_balances.values():
+            for balance in balances:
+                vault = YEARN_VAULTS.get(balance.base_balance.token_symbol, None)
+                if balance.protocol.name == 'yearn.finance • Vaults' and vault is not None:
+                    vaults[vault.name] = vault
+        roi_cache = self._calculate_vaults_roi(list(vaults.values())) if len(vaults) != 0 else {}
         result = {}
         for address, balances in defi_balances.items():
             vault_balances = self._get_single_addr_balance(balances, roi_cache)
@@ -278,6 +292,7 @@ class YearnVaults(EthereumModule):
             from_block=from_block,
             to_block=to_block,
         )
+        self.ethereum.prefetch_event_timestamps(deposit_events)
         for deposit_event in deposit_events:
             timestamp = self.ethereum.get_event_timestamp(deposit_event)
             deposit_amount = token_normalized_value(
@@ -348,7 +363,7 @@ class YearnVaults(EthereumModule):
             from_block: int,
             to_block: int,
     ) -> List[YearnVaultEvent]:
-        """Get all withdraw events of the underlying token to the vault"""
+        """Get all withdraw events of the underlying token from the vault"""
         events: List[YearnVaultEvent] = []
         argument_filters = {'from': vault.contract.address, 'to': address}
         withdraw_events = self.ethereum.get_logs(
@@ -359,6 +374,7 @@ class YearnVaults(EthereumModule):
             from_block=from_block,
             to_block=to_block,
         )
+        self.ethereum.prefetch_event_timestamps(withdraw_events)
         for withdraw_event in withdraw_events:
             timestamp = self.ethereum.get_event_timestamp(withdraw_event)
             withdraw_amount = token_normalized_value(
@@ -1,5 +1,6 @@
 import logging
 import operator
+import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
@@ -39,7 +40,7 @@ from rotkehlchen.chain.ethereum.eth2 import (
     get_eth2_staking_deposits,
 )
 from rotkehlchen.chain.ethereum.makerdao import MakerDAODSR, MakerDAOVaults
-from rotkehlchen.chain.ethereum.tokens import EthTokens
+from rotkehlchen.chain.ethereum.tokens import EthTokens, TokensReturn
 from rotkehlchen.chain.ethereum.uniswap import Uniswap
 from rotkehlchen.chain.ethereum.yearn import YearnVaults
 from rotkehlchen.constants.assets import A_ADX, A_BTC, A_DAI, A_ETH, A_ETH2
@@ -81,6 +82,7 @@ log = RotkehlchenLogsAdapter(logger)
 
 DEFI_BALANCES_REQUERY_SECONDS = 600
 ETH2_DETAILS_REQUERY_SECONDS = 600
+PROTOCOL_BALANCES_QUERY_TIMEOUT = 120
 
 # Mapping to token symbols to ignore. True means all
 DEFI_PROTOCOLS_TO_SKIP_ASSETS = {
@@ -103,6 +105,15 @@ T = TypeVar('T')
 AddOrSub = Callable[[T, T], T]
 
 
+def _timed_module_query(name: str, method: Callable[..., T], **kwargs: Any) -> T:
+    """Runs the balances query of a single module logging how long it took"""
+    start = time.time()
+    try:
+        return method(**kwargs)
+    finally:
+        log.debug(f'Querying {name} balances took {time.time() - start:.2f} seconds')
+
+
 class AccountAction(Enum):
     QUERY = 1
     APPEND = 2
@@ -776,9 +787,28 @@ class ChainManager(CacheableObject, LockableQueryObject):
         else:
             accounts = given_accounts
 
+        tokens_result = self._fetch_ethereum_tokens(
+            accounts=accounts,
+            force_detection=force_detection,
+        )
+        self._update_ethereum_tokens(action=action, tokens_result=tokens_result)
+
+    def _fetch_ethereum_tokens(
+            self,
+            accounts: List[ChecksumEthAddress],
+            force_detection: bool,
+    ) -> TokensReturn:
+        """Queries the token balances of the given accounts without touching the state
+
+        May raise:
+        - RemoteError if an external service such as Etherscan or cryptocompare
+        is queried and there is a problem with its query.
+        - EthSyncError if querying the token balances through a provided ethereum
+        client and the chain is not synced
+        """
         ethtokens = EthTokens(database=self.database, ethereum=self.ethereum)
         try:
-            balance_result, token_usd_price = ethtokens.query_tokens_for_addresses(
+            return ethtokens.query_tokens_for_addresses(
                 addresses=accounts,
                 force_detection=force_detection,
             )
@@ -792,6 +822,9 @@ class ChainManager(CacheableObject, LockableQueryObject):
                 'token balances but the chain is not synced.',
             ) from e
 
+    def _update_ethereum_tokens(self, action: AccountAction, tokens_result: TokensReturn) -> None:
+        """Updates the per account and total token balances from a token query result"""
+        balance_result, token_usd_price = tokens_result
         # Update the per account token balance and usd value
         token_totals: Dict[EthereumToken, FVal] = defaultdict(FVal)
         eth_balances = self.balances.eth
@@ -830,14 +863,16 @@ class ChainManager(CacheableObject, LockableQueryObject):
         - EthSyncError if querying the token balances through a provided ethereum
         client and the chain is not synced
         """
-        # Clear out all previous token balances
+        self._clear_ethereum_tokens()
+        self._query_ethereum_tokens(action=AccountAction.QUERY, force_detection=force_detection)
+
+    def _clear_ethereum_tokens(self) -> None:
+        """Clear out all previous token balances from the totals"""
         for token in [x for x, _ in self.totals.assets.items() if x.is_eth_token()]:
             del self.totals.assets[token]
         for token in [x for x, _ in self.totals.liabilities.items() if x.is_eth_token()]:
             del self.totals.liabilities[token]
 
-        self._query_ethereum_tokens(action=AccountAction.QUERY, force_detection=force_detection)
-
     def query_defi_balances(self) -> Dict[ChecksumEthAddress, List[DefiProtocolBalances]]:
         """Queries DeFi balances from Zerion contract and updates the state
 
@@ -877,23 +912,102 @@ class ChainManager(CacheableObject, LockableQueryObject):
         for account, balance in balances.items():
             eth_total += balance
             usd_value = balance * eth_usd_price
+            previous_balances = self.balances.eth.get(account, None)
             self.balances.eth[account] = BalanceSheet(
                 assets=defaultdict(Balance, {A_ETH: Balance(balance, usd_value)}),
             )
+            # Keep the last known ETH2 balance in case the eth2 query fails
+            if previous_balances is not None and A_ETH2 in previous_balances.assets:
+                self.balances.eth[account].assets[A_ETH2] = previous_balances.assets[A_ETH2]
         self.totals.assets[A_ETH] = Balance(amount=eth_total, usd_value=eth_total * eth_usd_price)
 
-        self.query_defi_balances()
-        self.query_ethereum_tokens(force_token_detection)
-        self._add_protocol_balances()
+        # The rest of the queries are independent so run them all concurrently and
+        # only update the state once they are done, always in the same order
+        greenlets = self._spawn_ethereum_balance_queries(force_token_detection)
+        # A slow protocol module should not hold back the rest of the balances
+        gevent.joinall(list(greenlets.values()), timeout=PROTOCOL_BALANCES_QUERY_TIMEOUT)
+        try:
+            # Errors in the defi and token queries still fail the entire query
+            greenlets.pop('defi').get()
+            tokens_result = greenlets.pop('tokens').get()
+            protocol_balances = self._collect_protocol_balances(greenlets)
+        finally:
+            gevent.killall(list(greenlets.values()))
+
+        self._clear_ethereum_tokens()
+        self._update_ethereum_tokens(action=AccountAction.QUERY, tokens_result=tokens_result)
+        self._add_protocol_balances(protocol_balances)
+
+    def _spawn_ethereum_balance_queries(
+            self,
+            force_token_detection: bool,
+    ) -> Dict[str, gevent.Greenlet]:
+        """Spawns a greenlet for each of the independent ethereum balance queries
 
-    def _add_protocol_balances(self) -> None:
-        """Also count token balances that may come from various protocols"""
-        # If we have anything in DSR also count it towards total blockchain balances
-        eth_balances = self.balances.eth
+        The defi and tokens queries are always spawned. The rest are spawned per
+        active protocol module and return their balances without touching the state.
+        """
+        accounts = self.accounts.eth
+        queries: Dict[str, Tuple[Callable, Dict[str, Any]]] = {
+            'defi': (self.query_defi_balances, {}),
+            'tokens': (
+                self._fetch_ethereum_tokens,
+                {'accounts': accounts, 'force_detection': force_token_detection},
+            ),
+        }
         dsr_module = self.makerdao_dsr
         if dsr_module is not None:
+            queries['makerdao_dsr'] = (dsr_module.get_current_dsr, {})
+        vaults_module = self.makerdao_vaults
+        if vaults_module is not None:
+            queries['makerdao_vaults'] = (vaults_module.get_balances, {})
+        adex_module = self.adex
+        if adex_module is not None and self.premium is not None:
+            queries['adex'] = (adex_module.get_balances, {'addresses': accounts})
+        queries['eth2'] = (
+            get_eth2_balances,
+            {'beaconchain': self.beaconchain, 'addresses': accounts},
+        )
+
+        return {
+            name: gevent.spawn(_timed_module_query, name=name, method=method, **kwargs)
+            for name, (method, kwargs) in queries.items()
+        }
+
+    def _collect_protocol_balances(self, greenlets: Dict[str, gevent.Greenlet]) -> Dict[str, Any]:
+        """Gathers the results of the protocol module balance queries
+
+        Modules whose query failed or did not finish in time are reported to
+        the user and left out of the result so that the rest can still be counted.
+        """
+        results = {}
+        for name, greenlet in greenlets.items():
+            if not greenlet.ready():
+                msg = (
+                    f'Querying {name} balances did not finish within '
+                    f'{PROTOCOL_BALANCES_QUERY_TIMEOUT} seconds'
+                )
+            elif not greenlet.successful():
+                msg = f'Querying {name} balances failed due to {str(greenlet.exception)}'
+            else:
+                results[name] = greenlet.value
+                continue
+
+            log.error(msg)
+            self.msg_aggregator.add_error(f'{msg}. Skipping its balances.')
+
+        return results
+
+    def _add_protocol_balances(self, protocol_balances: Dict[str, Any]) -> None:
+        """Also count token balances that may come from various protocols
+
+        Takes the results of the protocol module queries keyed by module name
+        """
+        # If we have anything in DSR also count it towards total blockchain balances
+        eth_balances = self.balances.eth
+        current_dsr_report = protocol_balances.get('makerdao_dsr', None)
+        if current_dsr_report is not None:
             additional_total = Balance()
-            current_dsr_report = dsr_module.get_current_dsr()
             for dsr_account, balance_entry in current_dsr_report.balances.items():
 
                 if balance_entry.amount == ZERO:
@@ -906,9 +1020,8 @@ class ChainManager(CacheableObject, LockableQueryObject):
                 self.totals.assets[A_DAI] += additional_total
 
         # Also count the vault balance and add it to the totals
-        vaults_module = self.makerdao_vaults
-        if vaults_module is not None:
-            balances = vaults_module.get_balances()
+        balances = protocol_balances.get('makerdao_vaults', None)
+        if balances is not None:
             for address, entry in balances.items():
                 if address not in eth_balances:
                     self.msg_aggregator.add_error(
@@ -919,9 +1032,8 @@ class ChainManager(CacheableObject, LockableQueryObject):
                     eth_balances[address] += entry
                     self.totals += entry
 
-        adex_module = self.adex
-        if adex_module is not None and self.premium is not None:
-            adex_balances = adex_module.get_balances(addresses=self.accounts.eth)
+        adex_balances = protocol_balances.get('adex', None)
+        if adex_balances is not None:
             for address, pool_balances in adex_balances.items():
                 for pool_balance in pool_balances:
                     eth_balances[address].assets[A_ADX] += pool_balance.adx_balance
@@ -929,8 +1041,11 @@ class ChainManager(CacheableObject, LockableQueryObject):
                     eth_balances[address].assets[A_DAI] += pool_balance.dai_unclaimed_balance
                     self.totals.assets[A_DAI] += pool_balance.dai_unclaimed_balance
 
-        # Count ETH staked in Eth2 beacon chain
-        self.account_for_staked_eth2_balances(addresses=self.accounts.eth, at_addition=False)
+        # Count ETH staked in Eth2 beacon chain. If its query failed keep the last known
+        # balances instead of wiping them
+        eth2_balances = protocol_balances.get('eth2', None)
+        if eth2_balances is not None:
+            self._update_eth2_balances(mapping=eth2_balances, at_addition=False)
         # Finally count the balances detected in various protocols in defi balances
         self.add_defi_balances_to_token_and_totals()
 
@@ -1007,15 +1122,22 @@ class ChainManager(CacheableObject, LockableQueryObject):
             self,
             addresses: List[ChecksumEthAddress],
             at_addition: bool = False,
+    ) -> None:
+        mapping = get_eth2_balances(self.beaconchain, addresses)
+        self._update_eth2_balances(mapping=mapping, at_addition=at_addition)
+
+    def _update_eth2_balances(
+            self,
+            mapping: Dict[ChecksumEthAddress, Balance],
+            at_addition: bool,
     ) -> None:
         if not at_addition:
-            # Before querying the new balances, delete the ones in memory if any
+            # Before adding the new balances, delete the ones in memory if any
             self.totals.assets.pop(A_ETH2, None)
             for _, entry in self.balances.eth.items():
                 if A_ETH2 in entry.assets:
                     del entry.assets[A_ETH2]
 
-        mapping = get_eth2_balances(self.beaconchain, addresses)
         for address, balance in mapping.items():
             self.balances.eth[address].assets[A_ETH2] = balance
             self.totals.assets[A_ETH2] += balance
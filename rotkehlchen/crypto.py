@@ -1,5 +1,6 @@
 import base64
 from binascii import hexlify
+from typing import Iterable, Iterator
 
 from coincurve import PrivateKey
 from Crypto import Random
@@ -23,6 +24,29 @@ def encrypt(key: bytes, source: bytes) -> str:
     return base64.b64encode(data).decode("latin-1")
 
 
+def encrypt_stream(key: bytes, source: Iterable[bytes]) -> Iterator[bytes]:
+    """Encrypts the data given in chunks in the same way as encrypt()
+
+    Yields the iv and then the encrypted chunks, without encoding them in base64,
+    so that the whole data never needs to be in memory.
+    """
+    assert isinstance(key, bytes), 'key should be given in bytes'
+    key = SHA256.new(key).digest()
+    iv = Random.new().read(AES.block_size)
+    encryptor = AES.new(key, AES.MODE_CBC, iv)
+    yield iv
+    remainder = b''
+    for chunk in source:
+        data = remainder + chunk
+        cut = len(data) - len(data) % AES.block_size
+        remainder = data[cut:]
+        if cut != 0:
+            yield encryptor.encrypt(data[:cut])
+
+    padding = AES.block_size - len(remainder) % AES.block_size
+    yield encryptor.encrypt(remainder + bytes([padding]) * padding)
+
+
 def decrypt(key: bytes, given_source: str) -> bytes:
     """
     Decrypts the given source data we with the given key.
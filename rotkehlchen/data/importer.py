@@ -165,7 +165,7 @@ class DataImporter():
             )
 
     def import_cointracking_csv(self, filepath: Path) -> Tuple[bool, str]:
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.transaction():
             data = csv.reader(csvfile, delimiter=',', quotechar='"')
             header = remap_header(next(data))
             for row in data:
@@ -387,7 +387,7 @@ class DataImporter():
                 self.db.add_trades([trade])
 
     def import_cryptocom_csv(self, filepath: Path) -> Tuple[bool, str]:
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.transaction():
             data = csv.DictReader(csvfile)
             try:
                 #  Notice: Crypto.com csv export gathers all swapping entries (`lockup_swap_*`,
@@ -6,10 +6,12 @@ import tempfile
 import time
 import zlib
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import gevent
 
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.crypto import decrypt, encrypt
+from rotkehlchen.crypto import decrypt, encrypt_stream
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.settings import ModifiableDBSettings
 from rotkehlchen.errors import AuthenticationError, SystemPermissionError
@@ -22,6 +24,44 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 DEFAULT_START_DATE = "01/08/2015"
+# Size of the pieces in which the DB is read, compressed and encrypted for syncing.
+# A multiple of 3 so that each piece can be base64 encoded on its own.
+DB_SYNC_CHUNK_SIZE = 3 * 256 * 1024
+# Premium sync compares the size of the uploaded DB with that of the local DB of
+# other clients, so all clients have to compress at the same level
+DB_COMPRESSION_LEVEL = 9
+
+
+def _read_file_chunks(filepath: Path) -> Iterator[bytes]:
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(DB_SYNC_CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            yield chunk
+            # Let other greenlets run between the chunks
+            gevent.sleep(0)
+
+
+def _compress_chunks(chunks: Iterator[bytes], level: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if len(compressed) != 0:
+            yield compressed
+    yield compressor.flush()
+
+
+def _b64encode_chunks(chunks: Iterator[bytes]) -> bytes:
+    encoded = []
+    remainder = b''
+    for chunk in chunks:
+        data = remainder + chunk
+        cut = len(data) - len(data) % 3
+        remainder = data[cut:]
+        encoded.append(base64.b64encode(data[:cut]))
+    encoded.append(base64.b64encode(remainder))
+    return b''.join(encoded)
 
 
 class DataHandler():
@@ -184,25 +224,36 @@ class DataHandler():
 
         return users
 
-    def compress_and_encrypt_db(self, password: str) -> Tuple[B64EncodedBytes, str]:
+    def compress_and_encrypt_db(
+            self,
+            password: str,
+            known_hash: Optional[str] = None,
+    ) -> Tuple[Optional[B64EncodedBytes], str]:
         """Decrypt the DB, dump in temporary plaintextdb, compress it,
         and then re-encrypt it
 
-        Returns a b64 encoded binary blob"""
+        The DB is processed in chunks so only the compressed and encrypted result
+        is ever held in memory. If the hash of the DB is the given known_hash the
+        DB is not compressed at all and None is returned instead of the data.
+
+        Returns a b64 encoded binary blob and the b64 encoded sha256 hash of the DB"""
         log.info('Compress and encrypt DB')
         with tempfile.TemporaryDirectory() as tmpdirname:
             tempdb = Path(tmpdirname) / 'temp.db'
             self.db.export_unencrypted(tempdb)
-            with open(tempdb, 'rb') as f:
-                data_blob = f.read()
+            data_hash = hashlib.sha256()
+            for chunk in _read_file_chunks(tempdb):
+                data_hash.update(chunk)
+            original_data_hash = base64.b64encode(data_hash.digest()).decode()
+            if original_data_hash == known_hash:
+                return None, original_data_hash
 
-        original_data_hash = base64.b64encode(
-            hashlib.sha256(data_blob).digest(),
-        ).decode()
-        compressed_data = zlib.compress(data_blob, level=9)
-        encrypted_data = encrypt(password.encode(), compressed_data)
+            encrypted_data = _b64encode_chunks(encrypt_stream(
+                key=password.encode(),
+                source=_compress_chunks(_read_file_chunks(tempdb), level=DB_COMPRESSION_LEVEL),
+            ))
 
-        return B64EncodedBytes(encrypted_data.encode()), original_data_hash
+        return B64EncodedBytes(encrypted_data), original_data_hash
 
     def decompress_and_decrypt_db(self, password: str, encrypted_data: B64EncodedString) -> None:
         """Decrypt and decompress the encrypted data we receive from the server
@@ -218,6 +269,7 @@ class DataHandler():
         log.info('Decompress and decrypt DB')
 
         # First make a backup of the DB we are about to replace
+        self.db.checkpoint()
         date = timestamp_to_date(ts=ts_now(), formatstr='%Y_%m_%d_%H_%M_%S')
         shutil.copyfile(
             self.data_directory / self.username / 'rotkehlchen.db',
@@ -4,12 +4,16 @@ import os
 import re
 import shutil
 import tempfile
+import time
+from contextlib import contextmanager
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
+import gevent
 from eth_utils import is_checksum_address
 from eth_utils.typing import HexStr
+from gevent.queue import Queue
 from pysqlcipher3 import dbapi2 as sqlcipher
 from typing_extensions import Literal
 
@@ -46,7 +50,7 @@ from rotkehlchen.chain.ethereum.uniswap import (
 )
 from rotkehlchen.constants.assets import A_USD, S_BTC, S_ETH
 from rotkehlchen.constants.ethereum import YEARN_VAULTS_PREFIX
-from rotkehlchen.db.schema import DB_SCRIPT_CREATE_TABLES
+from rotkehlchen.db.schema import DB_SCRIPT_CREATE_INDEXES, DB_SCRIPT_CREATE_TABLES
 from rotkehlchen.db.settings import (
     DEFAULT_PREMIUM_SHOULD_SYNC,
     ROTKEHLCHEN_DB_VERSION,
@@ -63,6 +67,7 @@ from rotkehlchen.db.utils import (
     SingleAssetBalance,
     Tag,
     deserialize_tags_from_db,
+    form_paginated_query,
     form_query_to_filter_timestamps,
     insert_tag_mappings,
     str_to_bool,
@@ -110,8 +115,9 @@ from rotkehlchen.typing import (
     Timestamp,
 )
 from rotkehlchen.user_messages import MessagesAggregator
-from rotkehlchen.utils.hashing import file_md5
-from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.hashing import file_fingerprint, file_md5
+from rotkehlchen.utils.misc import get_chunks, ts_now
+from rotkehlchen.utils.profiling import record_db_query
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -119,6 +125,8 @@ log = RotkehlchenLogsAdapter(logger)
 
 KDF_ITER = 64000
 DBINFO_FILENAME = 'dbinfo.json'
+# How many read only connections are kept open for the queries of read_query
+DB_READ_POOL_SIZE = 2
 
 DBTupleType = Literal[
     'trade',
@@ -129,6 +137,82 @@ DBTupleType = Literal[
 ]
 
 
+class ProfiledCursor(sqlcipher.Cursor):  # pylint: disable=no-member
+    """A DB cursor whose queries count towards the profile of the current task"""
+
+    def execute(self, *args: Any) -> 'ProfiledCursor':
+        start = time.time()
+        try:
+            return super().execute(*args)
+        finally:
+            record_db_query(time.time() - start)
+
+    def executemany(self, *args: Any) -> 'ProfiledCursor':
+        start = time.time()
+        try:
+            return super().executemany(*args)
+        finally:
+            record_db_query(time.time() - start)
+
+    def executescript(self, *args: Any) -> 'ProfiledCursor':
+        start = time.time()
+        try:
+            return super().executescript(*args)
+        finally:
+            record_db_query(time.time() - start)
+
+
+class ProfiledConnection(sqlcipher.Connection):  # pylint: disable=no-member
+    """A DB connection whose cursors are all ProfiledCursor
+
+    The execute shortcuts are redirected to a cursor explicitly so they are
+    profiled no matter how the underlying library creates its cursors.
+    """
+
+    # Not useless. It changes the default factory to ProfiledCursor
+    def cursor(  # pylint: disable=useless-super-delegation
+            self,
+            factory: Any = ProfiledCursor,
+    ) -> Any:
+        return super().cursor(factory)
+
+    def execute(self, *args: Any) -> ProfiledCursor:
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args: Any) -> ProfiledCursor:
+        return self.cursor().executemany(*args)
+
+    def executescript(self, *args: Any) -> ProfiledCursor:
+        return self.cursor().executescript(*args)
+
+
+class TransactionalConnection(ProfiledConnection):
+    """A DB connection whose commits can be grouped into a single transaction
+
+    While a DBHandler.transaction() context is open the commits of the DB
+    methods called inside it are deferred to the end of the context. The
+    writes in pending_writes are performed right before the next actual commit.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.transaction_depth = 0
+        self.pending_writes: Dict[str, Tuple[str, Tuple[Any, ...]]] = {}
+
+    def commit(self) -> None:
+        if self.transaction_depth != 0:
+            return
+
+        for querystr, bindings in self.pending_writes.values():
+            self.execute(querystr, bindings)
+        self.pending_writes = {}
+        super().commit()
+
+
+def _fetch_all(conn: Any, querystr: str, bindings: Sequence[Any]) -> List[Tuple[Any, ...]]:
+    return conn.execute(querystr, bindings).fetchall()
+
+
 def _protect_password_sqlcipher(password: str) -> str:
     """A double quote in the password would close the string. To escape it double it
 
@@ -212,6 +296,8 @@ class DBHandler:
         self.user_data_dir = user_data_dir
         self.sqlcipher_version = detect_sqlcipher_version()
         self.last_write_ts: Optional[Timestamp] = None
+        self.read_connections: List[Any] = []
+        self.idle_read_connections: Queue = Queue()
         action = self.read_info_at_start()
         if action == DBStartupAction.UPGRADE_3_4:
             result, msg = self.upgrade_db_sqlcipher_3_to_4(password)
@@ -241,7 +327,10 @@ class DBHandler:
     def __del__(self) -> None:
         self.disconnect()
         try:
-            dbinfo = {'sqlcipher_version': self.sqlcipher_version, 'md5_hash': self.get_md5hash()}
+            dbinfo = {
+                'sqlcipher_version': self.sqlcipher_version,
+                'fingerprint': self.get_fingerprint(),
+            }
         except (SystemPermissionError, FileNotFoundError) as e:
             # If there is problems opening the DB at destruction just log and exit
             log.error(f'At DB teardown could not open the DB: {str(e)}')
@@ -256,6 +345,7 @@ class DBHandler:
         Such as:
             - Create tables that are missing
             - DB Upgrades
+            - Create indexes that are missing
 
         May raise:
         - AuthenticationError if a wrong password is given or if the DB is corrupt
@@ -280,12 +370,20 @@ class DBHandler:
                     'Wrong password or invalid/corrupt database for user',
                 ) from e
 
+        # In WAL mode readers and the writer don't block each other and a
+        # commit does not need to rewrite the DB file. The mode is persistent.
+        self.conn.execute('PRAGMA journal_mode=WAL;')
         # Run upgrades if needed
         DBUpgradeManager(self).run_upgrades()
+        self.conn.executescript(DB_SCRIPT_CREATE_INDEXES)
+        self._connect_read_pool(password)
 
     def get_md5hash(self) -> str:
         """Get the md5hash of the DB
 
+        Only needed to check a dbinfo.json written by older versions since it
+        reads the whole DB file. Use get_fingerprint instead.
+
         May raise:
         - SystemPermissionError if there are permission errors when accessing the DB
         """
@@ -293,6 +391,16 @@ class DBHandler:
         assert no_active_connection, 'md5hash should be taken only with a closed DB'
         return file_md5(self.user_data_dir / 'rotkehlchen.db')
 
+    def get_fingerprint(self) -> str:
+        """Get a fingerprint of the DB file that only reads a constant part of it
+
+        May raise:
+        - SystemPermissionError if there are permission errors when accessing the DB
+        """
+        no_active_connection = not hasattr(self, 'conn') or not self.conn
+        assert no_active_connection, 'fingerprint should be taken only with a closed DB'
+        return file_fingerprint(self.user_data_dir / 'rotkehlchen.db')
+
     def read_info_at_start(self) -> DBStartupAction:
         """Read some metadata info at initialization
 
@@ -312,16 +420,22 @@ class DBHandler:
             except JSONDecodeError:
                 log.warning('dbinfo.json file is corrupt. Does not contain expected keys')
                 return action
-        current_md5_hash = self.get_md5hash()
 
         if not dbinfo:
             return action
 
-        if 'sqlcipher_version' not in dbinfo or 'md5_hash' not in dbinfo:
+        has_hash = 'fingerprint' in dbinfo or 'md5_hash' in dbinfo
+        if 'sqlcipher_version' not in dbinfo or not has_hash:
             log.warning('dbinfo.json file is corrupt. Does not contain expected keys')
             return action
 
-        if dbinfo['md5_hash'] != current_md5_hash:
+        if 'fingerprint' in dbinfo:
+            db_unchanged = dbinfo['fingerprint'] == self.get_fingerprint()
+        else:
+            # dbinfo.json written by an older version. Its fingerprint gets written at logout
+            db_unchanged = dbinfo['md5_hash'] == self.get_md5hash()
+
+        if not db_unchanged:
             log.warning(
                 'dbinfo.json contains an outdated hash. Was data changed outside the program?',
             )
@@ -361,8 +475,10 @@ class DBHandler:
         )
         self.conn.commit()
 
-    def connect(self, password: str) -> None:
-        """Connect to the DB using password
+    def _open_connection(self, password: str, **kwargs: Any) -> Any:
+        """Open a new connection to the DB and set its key
+
+        Keyword arguments are passed on to sqlcipher.connect
 
         May raise:
         - SystemPermissionError if we are unable to open the DB file,
@@ -370,19 +486,111 @@ class DBHandler:
         """
         fullpath = self.user_data_dir / 'rotkehlchen.db'
         try:
-            self.conn = sqlcipher.connect(str(fullpath))  # pylint: disable=no-member
+            conn = sqlcipher.connect(str(fullpath), **kwargs)  # pylint: disable=no-member
         except sqlcipher.OperationalError as e:  # pylint: disable=no-member
             raise SystemPermissionError(
                 f'Could not open database file: {fullpath}. Permission errors?',
             ) from e
 
-        self.conn.text_factory = str
+        conn.text_factory = str
         password_for_sqlcipher = _protect_password_sqlcipher(password)
         script = f'PRAGMA key="{password_for_sqlcipher}";'
         if self.sqlcipher_version == 3:
             script += f'PRAGMA kdf_iter={KDF_ITER};'
-        self.conn.executescript(script)
+        conn.executescript(script)
+        return conn
+
+    def connect(self, password: str) -> None:
+        """Connect to the DB using password
+
+        May raise:
+        - SystemPermissionError if we are unable to open the DB file,
+        probably due to permission errors
+        """
+        self.conn = self._open_connection(password, factory=TransactionalConnection)
         self.conn.execute('PRAGMA foreign_keys=ON')
+        # The DB may have been replaced, as when importing a synced DB, so read the
+        # last write timestamp from it again
+        self.last_write_ts = None
+
+    def _connect_read_pool(self, password: str) -> None:
+        """Open the read only connections used by read_query
+
+        Their queries run in the threads of the gevent threadpool so they are
+        allowed to be used from a thread other than the one that opened them.
+        They are not profiled since no task profile can be found from those
+        threads. read_query records the queries in the calling greenlet instead.
+        """
+        self._disconnect_read_pool()
+        for _ in range(DB_READ_POOL_SIZE):
+            conn = self._open_connection(password, check_same_thread=False)
+            conn.execute('PRAGMA query_only=ON;')
+            self.read_connections.append(conn)
+            self.idle_read_connections.put(conn)
+
+    def _disconnect_read_pool(self) -> None:
+        for conn in self.read_connections:
+            conn.close()
+        self.read_connections = []
+        self.idle_read_connections = Queue()
+
+    def read_query(
+            self,
+            querystr: str,
+            bindings: Sequence[Any] = (),
+    ) -> List[Tuple[Any, ...]]:
+        """Run a read query on a connection of the read pool and return all its rows
+
+        The query runs in a thread of the gevent threadpool. So a long read blocks
+        neither the other greenlets nor the writes of the main connection.
+        Inside a transaction context the query runs on the main connection instead,
+        so that it sees the uncommitted writes of the transaction.
+        """
+        if len(self.read_connections) == 0 or self.conn.transaction_depth != 0:
+            # The pool is only opened once the DB is set up and upgraded
+            return self.conn.execute(querystr, bindings).fetchall()
+
+        conn = self.idle_read_connections.get()
+        start = time.time()
+        try:
+            return gevent.get_hub().threadpool.apply(_fetch_all, (conn, querystr, bindings))
+        finally:
+            record_db_query(time.time() - start)
+            if conn in self.read_connections:
+                self.idle_read_connections.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group all DB writes performed inside the context into a single transaction
+
+        The writes are committed once when the outermost context exits or rolled
+        back if it exits with an exception. The context applies to the whole
+        connection, so it should only wrap DB work and nothing that yields to
+        other greenlets, like network queries.
+        """
+        if self.conn.transaction_depth == 0 and not self.conn.in_transaction:
+            # Begin explicitly so that the savepoints of the DB methods called inside
+            # nest in this transaction instead of starting and committing their own
+            self.conn.execute('BEGIN;')
+        self.conn.transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.conn.transaction_depth -= 1
+            if self.conn.transaction_depth == 0:
+                self.conn.pending_writes = {}
+                self.conn.rollback()
+            raise
+        else:
+            self.conn.transaction_depth -= 1
+            self.conn.commit()
+
+    def checkpoint(self) -> None:
+        """Commit and move all the write ahead log contents into the DB file
+
+        Needs to be done before copying the DB file while the DB is open"""
+        self.conn.commit()
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE);')
 
     def change_password(self, new_password: str) -> bool:
         """Changes the password for the currently logged in user
@@ -392,11 +600,19 @@ class DBHandler:
         script = f'PRAGMA rekey="{new_password_for_sqlcipher}";'
         if self.sqlcipher_version == 3:
             script += f'PRAGMA kdf_iter={KDF_ITER};'
+        # Re-keying rewrites the whole DB so do it with exclusive access and
+        # with everything moved out of the write ahead log
+        self._disconnect_read_pool()
+        self.conn.commit()
+        self.conn.execute('PRAGMA journal_mode=DELETE;')
         try:
             self.conn.executescript(script)
         except sqlcipher.OperationalError as e:  # pylint: disable=no-member
             log.error(f'At change password could not re-key the open database: {str(e)}')
             return False
+        finally:
+            self.conn.execute('PRAGMA journal_mode=WAL;')
+        self._connect_read_pool(new_password)
         return True
 
     def upgrade_db_sqlcipher_3_to_4(self, password: str) -> Tuple[bool, str]:
@@ -420,11 +636,16 @@ class DBHandler:
         return success, msg
 
     def disconnect(self) -> None:
+        if hasattr(self, 'read_connections'):
+            self._disconnect_read_pool()
         if hasattr(self, 'conn') and self.conn:
+            # Also writes anything pending, like the last write timestamp
+            self.conn.commit()
             self.conn.close()
             self.conn = None
 
     def export_unencrypted(self, temppath: Path) -> None:
+        self.conn.commit()
         self.conn.executescript(
             'ATTACH DATABASE "{}" AS plaintext KEY "";'
             'SELECT sqlcipher_export("plaintext");'
@@ -474,16 +695,21 @@ class DBHandler:
         (self.user_data_dir / 'rotkehlchen_temp_backup.db').unlink()
 
     def update_last_write(self) -> None:
-        # Also keep it in memory for faster querying
+        """Remember the time of the latest DB write
+
+        It's kept in memory and only saved in the DB together with the next commit
+        or at disconnect, so that a write does not need a second commit for it.
+        """
         self.last_write_ts = ts_now()
-        cursor = self.conn.cursor()
-        cursor.execute(
+        self.conn.pending_writes['last_write_ts'] = (
             'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
             ('last_write_ts', str(self.last_write_ts)),
         )
-        self.conn.commit()
 
     def get_last_write_ts(self) -> Timestamp:
+        if self.last_write_ts is not None:
+            return self.last_write_ts
+
         cursor = self.conn.cursor()
         query = cursor.execute(
             'SELECT value FROM settings where name=?;', ('last_write_ts',),
@@ -552,6 +778,9 @@ class DBHandler:
 
         # Also add the non-DB saved settings
         settings_dict['have_premium'] = have_premium
+        if self.last_write_ts is not None:
+            # The latest one may not be saved in the DB yet
+            settings_dict['last_write_ts'] = self.last_write_ts
 
         return db_settings_from_dict(settings_dict, self.msg_aggregator)
 
@@ -666,7 +895,13 @@ class DBHandler:
                     'INSERT INTO timed_balances('
                     '    time, currency, amount, usd_value, category) '
                     ' VALUES(?, ?, ?, ?, ?)',
-                    (entry.time, entry.asset.identifier, entry.amount, entry.usd_value, entry.category.serialize_for_db()),  # noqa: E501
+                    (
+                        entry.time,
+                        entry.asset.identifier,
+                        entry.amount,
+                        entry.usd_value,
+                        entry.category.serialize_for_db(),
+                    ),
                 )
             except sqlcipher.IntegrityError:  # pylint: disable=no-member
                 self.msg_aggregator.add_warning(
@@ -1144,9 +1379,203 @@ class DBHandler:
         self.conn.commit()
         self.update_last_write()
 
+    def get_exchange_trade_cursors(self, exchange_name: str) -> Dict[str, int]:
+        """Returns a mapping of market to the last trade id seen for the given exchange"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT market, last_trade_id FROM exchange_trade_cursors WHERE exchange=?;',
+            (exchange_name,),
+        )
+        return dict(query)
+
+    def update_exchange_trade_cursors(
+            self,
+            exchange_name: str,
+            trade_cursors: Dict[str, int],
+    ) -> None:
+        """Sets the last trade id seen for each of the given markets of an exchange"""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO exchange_trade_cursors(exchange, market, last_trade_id) '
+            'VALUES (?, ?, ?)',
+            [(exchange_name, market, trade_id) for market, trade_id in trade_cursors.items()],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_block_timestamps(self, block_numbers: List[int]) -> Dict[int, Timestamp]:
+        """Returns the saved timestamps of those of the given blocks that are in the DB"""
+        cursor = self.conn.cursor()
+        block_timestamps = {}
+        # Stay well below sqlite's limit of variables in a single statement
+        for chunk in get_chunks(block_numbers, n=500):
+            result = cursor.execute(
+                f'SELECT block_number, timestamp FROM block_timestamps '
+                f'WHERE block_number IN ({",".join(["?"] * len(chunk))});',
+                chunk,
+            )
+            for block_number, timestamp in result:
+                block_timestamps[block_number] = Timestamp(timestamp)
+
+        return block_timestamps
+
+    def add_block_timestamps(self, block_timestamps: Dict[int, Timestamp]) -> None:
+        """Saves the timestamps of the given blocks. Already saved blocks are ignored"""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO block_timestamps(block_number, timestamp) VALUES (?, ?)',
+            list(block_timestamps.items()),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_ethereum_log_range(self, filter_key: str) -> Optional[Tuple[int, int]]:
+        """Returns the from/to block range for which the logs of the filter are saved"""
+        cursor = self.conn.cursor()
+        result = cursor.execute(
+            'SELECT from_block, to_block FROM ethereum_log_ranges WHERE filter_key=?;',
+            (filter_key,),
+        ).fetchone()
+        if result is None:
+            return None
+
+        return result[0], result[1]
+
+    def add_ethereum_logs(
+            self,
+            logs: List[Dict[str, Any]],
+            filter_key: str,
+            from_block: int,
+            to_block: int,
+    ) -> None:
+        """Saves the given logs and that all logs of the filter in the block range are saved
+
+        Logs already in the DB are ignored. Logs and range are saved atomically
+        so a range can never claim logs that were not saved.
+        """
+        cursor = self.conn.cursor()
+        entries = []
+        for entry in logs:
+            topics = list(entry['topics']) + [None] * (4 - len(entry['topics']))
+            entries.append((
+                entry['transactionHash'],
+                entry['logIndex'],
+                entry['address'],
+                entry['blockNumber'],
+                entry['transactionIndex'],
+                *topics,
+                entry['data'],
+            ))
+        cursor.executemany(
+            'INSERT OR IGNORE INTO ethereum_logs(tx_hash, log_index, address, block_number, '
+            'transaction_index, topic0, topic1, topic2, topic3, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            entries,
+        )
+        cursor.execute(
+            'INSERT OR REPLACE INTO ethereum_log_ranges(filter_key, from_block, to_block) '
+            'VALUES (?, ?, ?)',
+            (filter_key, from_block, to_block),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_ethereum_logs(
+            self,
+            address: ChecksumEthAddress,
+            topics: Sequence[Optional[Union[str, Sequence[str]]]],
+            from_block: int,
+            to_block: int,
+    ) -> List[Dict[str, Any]]:
+        """Returns the saved logs of the contract in the block range that match the topics
+
+        A topic of None matches anything and a list of topics matches any of them.
+        Logs are returned in the order they happened.
+        """
+        querystr = (
+            'SELECT tx_hash, log_index, address, block_number, transaction_index, '
+            'topic0, topic1, topic2, topic3, data FROM ethereum_logs '
+            'WHERE address=? AND block_number >= ? AND block_number <= ?'
+        )
+        bindings: List[Any] = [address, from_block, to_block]
+        for idx, topic in enumerate(topics):
+            if topic is None:
+                continue
+            if isinstance(topic, str):
+                querystr += f' AND topic{idx}=?'
+                bindings.append(topic)
+            else:
+                querystr += f' AND topic{idx} IN ({",".join(["?"] * len(topic))})'
+                bindings.extend(topic)
+
+        cursor = self.conn.cursor()
+        result = cursor.execute(querystr + ' ORDER BY block_number, log_index;', bindings)
+        return [{
+            'transactionHash': entry[0],
+            'logIndex': entry[1],
+            'address': entry[2],
+            'blockNumber': entry[3],
+            'transactionIndex': entry[4],
+            'topics': [topic for topic in entry[5:9] if topic is not None],
+            'data': entry[9],
+        } for entry in result]
+
+    def get_accounting_checkpoints(
+            self,
+            settings_key: str,
+            up_to_ts: Timestamp,
+    ) -> List[Tuple[Timestamp, str, str]]:
+        """Returns the (timestamp, actions digest, state) of all accounting checkpoints
+        saved for the given settings up to the given timestamp, oldest first"""
+        cursor = self.conn.cursor()
+        result = cursor.execute(
+            'SELECT timestamp, actions_digest, state FROM accounting_checkpoints '
+            'WHERE settings_key=? AND timestamp <= ? ORDER BY timestamp ASC;',
+            (settings_key, up_to_ts),
+        )
+        return [(Timestamp(entry[0]), entry[1], entry[2]) for entry in result]
+
+    def add_accounting_checkpoint(
+            self,
+            settings_key: str,
+            timestamp: Timestamp,
+            actions_digest: str,
+            state: str,
+            keep_latest: int,
+    ) -> None:
+        """Saves an accounting checkpoint keeping only the latest ones for the settings"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO accounting_checkpoints'
+            '(settings_key, timestamp, actions_digest, state) VALUES (?, ?, ?, ?)',
+            (settings_key, timestamp, actions_digest, state),
+        )
+        cursor.execute(
+            'DELETE FROM accounting_checkpoints WHERE settings_key=? AND timestamp NOT IN '
+            '(SELECT timestamp FROM accounting_checkpoints WHERE settings_key=? '
+            'ORDER BY timestamp DESC LIMIT ?);',
+            (settings_key, settings_key, keep_latest),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def delete_accounting_checkpoints(self, settings_key: str, from_ts: Timestamp) -> None:
+        """Deletes the accounting checkpoints of the given settings from the given time on"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'DELETE FROM accounting_checkpoints WHERE settings_key=? AND timestamp >= ?;',
+            (settings_key, from_ts),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
     def purge_exchange_data(self, exchange_name: str) -> None:
         self.delete_used_query_range_for_exchange(exchange_name)
         cursor = self.conn.cursor()
+        cursor.execute(
+            'DELETE FROM exchange_trade_cursors WHERE exchange = ?;',
+            (exchange_name,),
+        )
         cursor.execute(
             'DELETE FROM trades WHERE location = ?;',
             (deserialize_location(exchange_name).serialize_for_db(),),
@@ -1166,6 +1595,8 @@ class DBHandler:
             ('ethtxs\\_%', '\\'),
         )
         cursor.execute('DELETE FROM ethereum_transactions;')
+        cursor.execute('DELETE FROM ethereum_logs;')
+        cursor.execute('DELETE FROM ethereum_log_ranges;')
         self.conn.commit()
         self.update_last_write()
 
@@ -1669,47 +2100,73 @@ class DBHandler:
         and 'net_usd'. This gives us the balance data per assets, the balance data
         per location and finally the total balance
 
-        The balances are saved in the DB at the given timestamp
+        The balances are saved in the DB at the given timestamp with a single
+        insertion per table in one transaction
         """
         balances = []
-        locations = []
+        categories = (('assets', BalanceType.ASSET), ('liabilities', BalanceType.LIABILITY))
+        for key, category in categories:
+            db_category = category.serialize_for_db()
+            for asset, val in data[key].items():
+                msg = (
+                    f'at this point the key should be of Asset type and '
+                    f'not {type(asset)} {str(asset)}'
+                )
+                assert isinstance(asset, Asset), msg
+                balances.append((
+                    timestamp,
+                    asset.identifier,
+                    str(val['amount']),
+                    str(val['usd_value']),
+                    db_category,
+                ))
 
-        for key, val in data['assets'].items():
-            msg = f'at this point the key should be of Asset type and not {type(key)} {str(key)}'
-            assert isinstance(key, Asset), msg
-            balances.append(AssetBalance(
-                category=BalanceType.ASSET,
-                time=timestamp,
-                asset=key,
-                amount=str(val['amount']),
-                usd_value=str(val['usd_value']),
-            ))
-        for key, val in data['liabilities'].items():
-            msg = f'at this point the key should be of Asset type and not {type(key)} {str(key)}'
-            assert isinstance(key, Asset), msg
-            balances.append(AssetBalance(
-                category=BalanceType.LIABILITY,
-                time=timestamp,
-                asset=key,
-                amount=str(val['amount']),
-                usd_value=str(val['usd_value']),
-            ))
+        locations = [(
+            timestamp,
+            deserialize_location(location).serialize_for_db(),
+            str(val['usd_value']),
+        ) for location, val in data['location'].items()]
+        locations.append((timestamp, Location.TOTAL.serialize_for_db(), str(data['net_usd'])))
 
-        for key2, val2 in data['location'].items():
-            # Here we know val2 is just a Dict since the key to data is 'location'
-            val2 = cast(Dict, val2)
-            location = deserialize_location(key2).serialize_for_db()
-            locations.append(LocationData(
-                time=timestamp, location=location, usd_value=str(val2['usd_value']),
-            ))
-        locations.append(LocationData(
-            time=timestamp,
-            location=Location.TOTAL.serialize_for_db(),
-            usd_value=str(data['net_usd']),
-        ))
+        cursor = self.conn.cursor()
+        # A savepoint so that a failed insertion can be undone without rolling back
+        # the other writes of an enclosing transaction context
+        cursor.execute('SAVEPOINT save_balances_data;')
+        try:
+            cursor.executemany(
+                'INSERT INTO timed_balances('
+                '    time, currency, amount, usd_value, category) '
+                ' VALUES(?, ?, ?, ?, ?)',
+                balances,
+            )
+            cursor.executemany(
+                'INSERT INTO timed_location_data('
+                '    time, location, usd_value) '
+                ' VALUES(?, ?, ?)',
+                locations,
+            )
+        except sqlcipher.IntegrityError:  # pylint: disable=no-member
+            # Some entries already exist for this timestamp. Add them one by one
+            # so that the existing ones are skipped with a warning
+            cursor.execute('ROLLBACK TO SAVEPOINT save_balances_data;')
+            cursor.execute('RELEASE SAVEPOINT save_balances_data;')
+            self.add_multiple_balances([AssetBalance(
+                category=BalanceType.deserialize_from_db(entry[4]),
+                time=entry[0],
+                asset=Asset(entry[1]),
+                amount=entry[2],
+                usd_value=entry[3],
+            ) for entry in balances])
+            self.add_multiple_location_data([LocationData(
+                time=entry[0],
+                location=entry[1],
+                usd_value=entry[2],
+            ) for entry in locations])
+            return
 
-        self.add_multiple_balances(balances)
-        self.add_multiple_location_data(locations)
+        cursor.execute('RELEASE SAVEPOINT save_balances_data;')
+        self.conn.commit()
+        self.update_last_write()
 
     def add_exchange(
             self,
@@ -1764,7 +2221,6 @@ class DBHandler:
             tuple_type: DBTupleType,
             query: str,
             tuples: List[Tuple[Any, ...]],
-            **kwargs: Any,
     ) -> None:
         cursor = self.conn.cursor()
         try:
@@ -1774,51 +2230,17 @@ class DBHandler:
             # already existing in the DB, in which case we resort to writing them
             # one by one to only reject the duplicates
 
-            nonces_set: Set[int] = set()
-            if tuple_type == 'ethereum_transaction':
-                nonces_set = set(range(len([t for t in tuples if t[10] == -1])))
-
             for entry in tuples:
                 try:
                     cursor.execute(query, entry)
                 except sqlcipher.IntegrityError:  # pylint: disable=no-member
                     if tuple_type == 'ethereum_transaction':
-                        nonce = entry[10]
-                        # If it's not an internal transaction with the same hash
-                        # ignore it. That is since it's indeed a duplicate because
-                        # when we query etherscan we get all transactions where
-                        # the given address is either the from or the to.
-                        if nonce != -1:
-                            continue
-
-                        if 'from_etherscan' in kwargs and kwargs['from_etherscan'] is True:
-                            # If it's an internal transaction with the same hash then
-                            # still input it as there is no way to distinguish between
-                            # multiple etherscan internal transactions with the same
-                            # original transaction hash. Here we trust the data source.
-                            # To differentiate between them in Rotkehlchen we use a
-                            # more negative nonce
-                            entry_list = list(entry)
-                            # Make sure that the internal etherscan transaction nonce
-                            # is increasingly negative (> -1)
-                            # If a key error is thrown here due to popping from an empty
-                            # set then something is really wrong so not catching it
-                            entry_list[10] = -1 - nonces_set.pop() - 1
-                            entry = tuple(entry_list)
-                            try:
-                                cursor.execute(query, entry)
-                                # Success so just go to the next entry
-                                continue
-                            except sqlcipher.IntegrityError:  # pylint: disable=no-member
-                                # the error is logged right below
-                                pass
-
-                        # if we reach here it means the transaction is already in the DB
-                        # But this can't be avoided with the way we query etherscan
-                        # right now since we don't query transactions in a specific
-                        # time range, so duplicate addition attempts can happen.
-                        # Also if we have transactions of one account sending to the
-                        # other and both accounts are being tracked.
+                        # The transaction is already in the DB. This can't be avoided
+                        # since we get all transactions where the given address is
+                        # either the from or the to, so transactions between two tracked
+                        # accounts are added twice. Internal transactions get a nonce
+                        # derived from their data when they are queried, so a colliding
+                        # one is the same internal transaction queried again.
                         string_repr = db_tuple_to_str(entry, tuple_type)
                         logger.debug(
                             f'Did not add "{string_repr}" to the DB since'
@@ -1879,7 +2301,6 @@ class DBHandler:
 
         The returned list is ordered from oldest to newest
         """
-        cursor = self.conn.cursor()
         query = (
             'SELECT id,'
             '  location,'
@@ -1895,7 +2316,7 @@ class DBHandler:
         if location is not None:
             query += f'WHERE location="{deserialize_location(location).serialize_for_db()}" '
         query, bindings = form_query_to_filter_timestamps(query, 'close_time', from_ts, to_ts)
-        results = cursor.execute(query, bindings)
+        results = self.read_query(query, bindings)
 
         margin_positions = []
         for result in results:
@@ -1966,17 +2387,60 @@ class DBHandler:
         """
         self.write_tuples(tuple_type='asset_movement', query=query, tuples=movement_tuples)
 
+    @staticmethod
+    def _asset_movements_filters(
+            from_ts: Optional[Timestamp],
+            to_ts: Optional[Timestamp],
+            location: Optional[Location],
+            asset: Optional[Asset],
+    ) -> Tuple[List[str], List[Any]]:
+        filters = []
+        bindings: List[Any] = []
+        if location is not None:
+            filters.append('location=?')
+            bindings.append(location.serialize_for_db())
+        if asset is not None:
+            filters.append('asset=?')
+            bindings.append(asset.identifier)
+        if from_ts is not None:
+            filters.append('time >= ?')
+            bindings.append(from_ts)
+        if to_ts is not None:
+            filters.append('time <= ?')
+            bindings.append(to_ts)
+        return filters, bindings
+
+    def count_asset_movements(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            location: Optional[Location] = None,
+            asset: Optional[Asset] = None,
+    ) -> int:
+        """Returns how many asset movements match the given filters"""
+        filters, bindings = self._asset_movements_filters(from_ts, to_ts, location, asset)
+        query = 'SELECT COUNT(*) FROM asset_movements'
+        if len(filters) != 0:
+            query += ' WHERE ' + ' AND '.join(filters)
+        cursor = self.conn.cursor()
+        return cursor.execute(query, bindings).fetchone()[0]
+
     def get_asset_movements(
             self,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             location: Optional[Location] = None,
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            descending: bool = False,
     ) -> List[AssetMovement]:
-        """Returns a list of asset movements optionally filtered by time and location
+        """Returns a list of asset movements optionally filtered by time, location and asset
 
-        The returned list is ordered from oldest to newest
+        The returned list is ordered by time and identifier, from oldest to newest unless
+        descending is True. For the next page of up to `limit` movements give the time
+        and identifier of the last movement of the previous page as `after`.
         """
-        cursor = self.conn.cursor()
         query = (
             'SELECT id,'
             '  location,'
@@ -1988,12 +2452,19 @@ class DBHandler:
             '  fee,'
             '  link,'
             '  address,'
-            '  transaction_id FROM asset_movements '
+            '  transaction_id FROM asset_movements'
         )
-        if location is not None:
-            query += f'WHERE location="{location.serialize_for_db()}" '
-        query, bindings = form_query_to_filter_timestamps(query, 'time', from_ts, to_ts)
-        results = cursor.execute(query, bindings)
+        filters, filter_bindings = self._asset_movements_filters(from_ts, to_ts, location, asset)
+        query, bindings = form_paginated_query(
+            query=query,
+            filters=filters,
+            bindings=filter_bindings,
+            order_by=('time', 'id'),
+            after=after,
+            limit=limit,
+            descending=descending,
+        )
+        results = self.read_query(query, bindings)
 
         asset_movements = []
         for result in results:
@@ -2052,14 +2523,11 @@ class DBHandler:
     def add_ethereum_transactions(
             self,
             ethereum_transactions: List[EthereumTransaction],
-            from_etherscan: bool,
     ) -> None:
         """Adds ethereum transactions to the database
 
-        If from_etherscan is True then this means that the source of the transactions
-        is an etherscan query. This is used to determine how we should handle the
-        transactions with nonce "-1" as this is how we currently identify internal
-        ethereum transactions from etherscan.
+        Transactions already in the DB are skipped. Internal transactions from
+        etherscan are expected to already have their distinct negative nonces.
         """
         tx_tuples: List[Tuple[Any, ...]] = []
         for tx in ethereum_transactions:
@@ -2096,20 +2564,56 @@ class DBHandler:
             tuple_type='ethereum_transaction',
             query=query,
             tuples=tx_tuples,
-            from_etherscan=from_etherscan,
         )
 
+    @staticmethod
+    def _ethereum_transactions_filters(
+            from_ts: Optional[Timestamp],
+            to_ts: Optional[Timestamp],
+            address: Optional[ChecksumEthAddress],
+    ) -> Tuple[List[str], List[Any]]:
+        filters = []
+        bindings: List[Any] = []
+        if address is not None:
+            filters.append('(from_address=? OR to_address=?)')
+            bindings.extend([address, address])
+        if from_ts is not None:
+            filters.append('timestamp >= ?')
+            bindings.append(from_ts)
+        if to_ts is not None:
+            filters.append('timestamp <= ?')
+            bindings.append(to_ts)
+        return filters, bindings
+
+    def count_ethereum_transactions(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            address: Optional[ChecksumEthAddress] = None,
+    ) -> int:
+        """Returns how many ethereum transactions match the given filters"""
+        filters, bindings = self._ethereum_transactions_filters(from_ts, to_ts, address)
+        query = 'SELECT COUNT(*) FROM ethereum_transactions'
+        if len(filters) != 0:
+            query += ' WHERE ' + ' AND '.join(filters)
+        cursor = self.conn.cursor()
+        return cursor.execute(query, bindings).fetchone()[0]
+
     def get_ethereum_transactions(
             self,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             address: Optional[ChecksumEthAddress] = None,
+            limit: Optional[int] = None,
+            after: Optional[EthereumTransaction] = None,
+            descending: bool = False,
     ) -> List[EthereumTransaction]:
-        """Returns a list of ethereum transactions optionally filtered by time and/or from address
+        """Returns a list of ethereum transactions optionally filtered by time and/or address
 
-        The returned list is ordered from oldest to newest
+        The returned list is ordered by time from oldest to newest unless descending
+        is True. For the next page of up to `limit` transactions give the last
+        transaction of the previous page as `after`.
         """
-        cursor = self.conn.cursor()
         query = """
             SELECT tx_hash,
               timestamp,
@@ -2123,10 +2627,20 @@ class DBHandler:
               input_data,
               nonce FROM ethereum_transactions
         """
-        if address is not None:
-            query += f'WHERE (from_address="{address}" OR to_address="{address}") '
-        query, bindings = form_query_to_filter_timestamps(query, 'timestamp', from_ts, to_ts)
-        results = cursor.execute(query, bindings)
+        filters, filter_bindings = self._ethereum_transactions_filters(from_ts, to_ts, address)
+        query, bindings = form_paginated_query(
+            query=query,
+            filters=filters,
+            bindings=filter_bindings,
+            order_by=('timestamp', 'tx_hash', 'nonce', 'from_address'),
+            after=(
+                None if after is None else
+                (after.timestamp, after.tx_hash, after.nonce, after.from_address)
+            ),
+            limit=limit,
+            descending=descending,
+        )
+        results = self.read_query(query, bindings)
 
         ethereum_transactions = []
         for result in results:
@@ -2282,17 +2796,64 @@ class DBHandler:
         self.conn.commit()
         return True, ''
 
+    @staticmethod
+    def _trades_filters(
+            from_ts: Optional[Timestamp],
+            to_ts: Optional[Timestamp],
+            location: Optional[Location],
+            asset: Optional[Asset],
+    ) -> Tuple[List[str], List[Any]]:
+        filters = []
+        bindings: List[Any] = []
+        if location is not None:
+            filters.append('location=?')
+            bindings.append(location.serialize_for_db())
+        if asset is not None:
+            # The pair is stored as BASE_QUOTE so match either side of the underscore
+            identifier = (
+                asset.identifier.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            )
+            filters.append("(pair LIKE ? ESCAPE '\\' OR pair LIKE ? ESCAPE '\\')")
+            bindings.extend([f'{identifier}\\_%', f'%\\_{identifier}'])
+        if from_ts is not None:
+            filters.append('time >= ?')
+            bindings.append(from_ts)
+        if to_ts is not None:
+            filters.append('time <= ?')
+            bindings.append(to_ts)
+        return filters, bindings
+
+    def count_trades(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            location: Optional[Location] = None,
+            asset: Optional[Asset] = None,
+    ) -> int:
+        """Returns how many trades match the given filters"""
+        filters, bindings = self._trades_filters(from_ts, to_ts, location, asset)
+        query = 'SELECT COUNT(*) FROM trades'
+        if len(filters) != 0:
+            query += ' WHERE ' + ' AND '.join(filters)
+        cursor = self.conn.cursor()
+        return cursor.execute(query, bindings).fetchone()[0]
+
     def get_trades(
             self,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             location: Optional[Location] = None,
+            asset: Optional[Asset] = None,
+            limit: Optional[int] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            descending: bool = False,
     ) -> List[Trade]:
-        """Returns a list of trades optionally filtered by time and location
+        """Returns a list of trades optionally filtered by time, location and asset
 
-        The returned list is ordered from oldest to newest
+        The returned list is ordered by time and trade id, from oldest to newest unless
+        descending is True. For the next page of up to `limit` trades give the time
+        and id of the last trade of the previous page as `after`.
         """
-        cursor = self.conn.cursor()
         query = (
             'SELECT id,'
             '  time,'
@@ -2304,12 +2865,19 @@ class DBHandler:
             '  fee,'
             '  fee_currency,'
             '  link,'
-            '  notes FROM trades '
+            '  notes FROM trades'
         )
-        if location is not None:
-            query += f'WHERE location="{location.serialize_for_db()}" '
-        query, bindings = form_query_to_filter_timestamps(query, 'time', from_ts, to_ts)
-        results = cursor.execute(query, bindings)
+        filters, filter_bindings = self._trades_filters(from_ts, to_ts, location, asset)
+        query, bindings = form_paginated_query(
+            query=query,
+            filters=filters,
+            bindings=filter_bindings,
+            order_by=('time', 'id'),
+            after=after,
+            limit=limit,
+            descending=descending,
+        )
+        results = self.read_query(query, bindings)
 
         trades = []
         for result in results:
@@ -2592,9 +3160,8 @@ class DBHandler:
 
     def get_netvalue_data(self, from_ts: Timestamp) -> Tuple[List[str], List[str]]:
         """Get all entries of net value data from the DB"""
-        cursor = self.conn.cursor()
         # Get the total location ("H") entries in ascending time
-        query = cursor.execute(
+        query = self.read_query(
             f'SELECT time, usd_value FROM timed_location_data '
             f'WHERE location="H" AND time >= {from_ts} ORDER BY time ASC;',
         )
@@ -2631,9 +3198,7 @@ class DBHandler:
             querystr += f' AND category="{balance_type.serialize_for_db()}"'
         querystr += ' ORDER BY time ASC;'
 
-        cursor = self.conn.cursor()
-        results = cursor.execute(querystr)
-        results = results.fetchall()
+        results = self.read_query(querystr)
         balances = []
         for result in results:
             balances.append(
@@ -2652,8 +3217,7 @@ class DBHandler:
 
         This list will also include liabilities as owned assets
         """
-        cursor = self.conn.cursor()
-        query = cursor.execute(
+        query = self.read_query(
             'SELECT DISTINCT currency FROM timed_balances ORDER BY time ASC;',
         )
 
@@ -3042,6 +3606,48 @@ class DBHandler:
         last_change_idx = int(result[0][0]) if result[0][0] is not None else 0
         return last_receiving_idx, last_change_idx
 
+    def get_xpub_derived_addresses_cache(
+            self,
+            xpub_data: XpubData,
+    ) -> Dict[int, Dict[int, BTCAddress]]:
+        """Get all addresses derived so far from the given xpub
+
+        Returns a mapping of account index to a mapping of derived index to address
+        """
+        cursor = self.conn.cursor()
+        result = cursor.execute(
+            'SELECT account_index, derived_index, address FROM xpub_derived_addresses_cache '
+            'WHERE xpub=? AND derivation_path IS ?;',
+            (xpub_data.xpub.xpub, xpub_data.serialize_derivation_path_for_db()),
+        )
+        derived_cache: Dict[int, Dict[int, BTCAddress]] = {}
+        for account_index, derived_index, address in result:
+            derived_cache.setdefault(account_index, {})[derived_index] = address
+
+        return derived_cache
+
+    def update_xpub_derived_addresses_cache(
+            self,
+            xpub_data: XpubData,
+            derived_cache: Dict[int, Dict[int, BTCAddress]],
+    ) -> None:
+        """Add any addresses of the given derived cache that are not yet saved for the xpub"""
+        xpub = xpub_data.xpub.xpub
+        derivation_path = xpub_data.serialize_derivation_path_for_db()
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO xpub_derived_addresses_cache'
+            '(xpub, derivation_path, account_index, derived_index, address) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [
+                (xpub, derivation_path, account_index, derived_index, address)
+                for account_index, addresses in derived_cache.items()
+                for derived_index, address in addresses.items()
+            ],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
     def get_addresses_to_xpub_mapping(
             self,
             addresses: List[BTCAddress],
@@ -200,6 +200,20 @@ CREATE TABLE IF NOT EXISTS xpub_mappings (
 );
 """
 
+# All addresses ever derived from an xpub, whether they have been used or not,
+# so that checking for newly used addresses does not need to derive them again
+DB_CREATE_XPUB_DERIVED_ADDRESSES_CACHE = """
+CREATE TABLE IF NOT EXISTS xpub_derived_addresses_cache (
+    xpub TEXT NOT NULL,
+    derivation_path TEXT NOT NULL,
+    account_index INTEGER NOT NULL,
+    derived_index INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    FOREIGN KEY(xpub, derivation_path) REFERENCES xpubs(xpub, derivation_path) ON DELETE CASCADE
+    PRIMARY KEY (xpub, derivation_path, account_index, derived_index)
+);
+"""
+
 DB_CREATE_ETHEREUM_ACCOUNTS_DETAILS = """
 CREATE TABLE IF NOT EXISTS ethereum_accounts_details (
     account VARCHAR[42] NOT NULL PRIMARY KEY,
@@ -296,8 +310,8 @@ CREATE TABLE IF NOT EXISTS ethereum_transactions (
     gas_used TEXT,
     input_data BLOB,
     nonce INTEGER,
-    /* we determine uniqueness for ethereum internal transactions by using an
-    increasingly negative number */
+    /* we determine uniqueness for ethereum internal transactions by using a
+    negative number derived from their recipient and value */
     PRIMARY KEY (tx_hash, nonce, from_address)
 );
 """
@@ -310,6 +324,65 @@ CREATE TABLE IF NOT EXISTS used_query_ranges (
 );
 """
 
+# Last trade id seen per exchange market. Used by exchanges whose trade history
+# is paginated by trade id (e.g. binance) so that syncs can continue from there
+DB_CREATE_EXCHANGE_TRADE_CURSORS = """
+CREATE TABLE IF NOT EXISTS exchange_trade_cursors (
+    exchange VARCHAR[24] NOT NULL,
+    market VARCHAR[24] NOT NULL,
+    last_trade_id INTEGER NOT NULL,
+    PRIMARY KEY (exchange, market)
+);
+"""
+
+# Timestamp of each ethereum block number seen so far. Block timestamps never
+# change so once known they don't need to be queried from a node again
+DB_CREATE_BLOCK_TIMESTAMPS = """
+CREATE TABLE IF NOT EXISTS block_timestamps (
+    block_number INTEGER NOT NULL PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+"""
+
+# Raw ethereum logs queried so far. Each log is saved once no matter how many of
+# the queried log filters it matched
+DB_CREATE_ETHEREUM_LOGS = """
+CREATE TABLE IF NOT EXISTS ethereum_logs (
+    tx_hash VARCHAR[66] NOT NULL,
+    log_index INTEGER NOT NULL,
+    address VARCHAR[42] NOT NULL,
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    topic0 TEXT,
+    topic1 TEXT,
+    topic2 TEXT,
+    topic3 TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+"""
+
+# The block range for which all logs matching a log filter are in ethereum_logs
+DB_CREATE_ETHEREUM_LOG_RANGES = """
+CREATE TABLE IF NOT EXISTS ethereum_log_ranges (
+    filter_key TEXT NOT NULL PRIMARY KEY,
+    from_block INTEGER NOT NULL,
+    to_block INTEGER NOT NULL
+);
+"""
+
+# Snapshots of the accountant's state at regular points in time so that history
+# processing can resume from them instead of starting from the very first action
+DB_CREATE_ACCOUNTING_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS accounting_checkpoints (
+    settings_key TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    actions_digest TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (settings_key, timestamp)
+);
+"""
+
 DB_CREATE_SETTINGS = """
 CREATE TABLE IF NOT EXISTS settings (
     name VARCHAR[24] NOT NULL PRIMARY KEY,
@@ -408,7 +481,7 @@ CREATE TABLE IF NOT EXISTS adex_events (
 DB_SCRIPT_CREATE_TABLES = """
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
-{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
+{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
 COMMIT;
 PRAGMA foreign_keys=on;
 """.format(
@@ -429,6 +502,11 @@ PRAGMA foreign_keys=on;
     DB_CREATE_MARGIN,
     DB_CREATE_ASSET_MOVEMENTS,
     DB_CREATE_USED_QUERY_RANGES,
+    DB_CREATE_EXCHANGE_TRADE_CURSORS,
+    DB_CREATE_BLOCK_TIMESTAMPS,
+    DB_CREATE_ETHEREUM_LOGS,
+    DB_CREATE_ETHEREUM_LOG_RANGES,
+    DB_CREATE_ACCOUNTING_CHECKPOINTS,
     DB_CREATE_SETTINGS,
     DB_CREATE_TAGS_TABLE,
     DB_CREATE_TAG_MAPPINGS,
@@ -436,8 +514,22 @@ PRAGMA foreign_keys=on;
     DB_CREATE_YEARN_VAULT_EVENTS,
     DB_CREATE_XPUBS,
     DB_CREATE_XPUB_MAPPINGS,
+    DB_CREATE_XPUB_DERIVED_ADDRESSES_CACHE,
     DB_CREATE_AMM_SWAPS,
     DB_CREATE_UNISWAP_EVENTS,
     DB_CREATE_ETH2_DEPOSITS,
     DB_CREATE_ADEX_EVENTS,
 )
+
+# Indexes for the queries of trades, asset movements and ethereum transactions per
+# time range, location and page. Some indexed columns, such as the trades and asset
+# movements id, don't exist in old DB versions. So this runs only after all DB
+# upgrades, which may also recreate these tables and thus drop their indexes.
+DB_SCRIPT_CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS trades_time ON trades(time, id);
+CREATE INDEX IF NOT EXISTS trades_location_time ON trades(location, time, id);
+CREATE INDEX IF NOT EXISTS asset_movements_time ON asset_movements(time, id);
+CREATE INDEX IF NOT EXISTS asset_movements_location_time ON asset_movements(location, time, id);
+CREATE INDEX IF NOT EXISTS ethereum_transactions_timestamp ON ethereum_transactions(timestamp);
+CREATE INDEX IF NOT EXISTS ethereum_logs_address_block ON ethereum_logs(address, block_number);
+"""
@@ -216,6 +216,7 @@ class DBUpgradeManager():
         to_version = upgrade.from_version + 1
 
         # First make a backup of the DB
+        self.db.checkpoint()
         with TemporaryDirectory() as tmpdirname:
             tmp_db_filename = os.path.join(tmpdirname, 'rotkehlchen_db.backup')
             shutil.copyfile(
@@ -233,6 +234,7 @@ class DBUpgradeManager():
                     f'{to_version}: {str(e)}'
                 )
                 log.error(error_message)
+                self.db.checkpoint()
                 shutil.copyfile(
                     tmp_db_filename,
                     os.path.join(self.db.user_data_dir, 'rotkehlchen.db'),
@@ -1,6 +1,6 @@
 from enum import Enum
 from sqlite3 import Cursor
-from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from typing_extensions import Literal
 
@@ -101,6 +101,42 @@ def form_query_to_filter_timestamps(
     return query, tuple(bindings)
 
 
+def form_paginated_query(
+        query: str,
+        filters: List[str],
+        bindings: List[Any],
+        order_by: Sequence[str],
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+) -> Tuple[str, List[Any]]:
+    """Adds the given filters, ordering and keyset pagination to a select query
+
+    The order_by columns should uniquely identify a row. Then the next page is
+    requested by giving the order_by values of the last row of the previous page
+    as `after`, which unlike an offset lets the DB seek straight to the page
+    using an index.
+    """
+    filters = list(filters)
+    bindings = list(bindings)
+    if after is not None:
+        filters.append(
+            f'({", ".join(order_by)}) {"<" if descending else ">"} '
+            f'({", ".join("?" * len(order_by))})',
+        )
+        bindings.extend(after)
+
+    if len(filters) != 0:
+        query += ' WHERE ' + ' AND '.join(filters)
+    direction = 'DESC' if descending else 'ASC'
+    query += ' ORDER BY ' + ', '.join(f'{column} {direction}' for column in order_by)
+    if limit is not None:
+        query += ' LIMIT ?'
+        bindings.append(limit)
+
+    return query + ';', bindings
+
+
 def deserialize_tags_from_db(val: Optional[str]) -> Optional[List[str]]:
     """Read tags from the DB and turn it into a List of tags"""
     if val is None:
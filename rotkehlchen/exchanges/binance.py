@@ -2,15 +2,17 @@ import hashlib
 import hmac
 import logging
 from json.decoder import JSONDecodeError
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Set, Tuple, Type, Union
 from urllib.parse import urlencode
 
 import gevent
 import requests
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.accounting.structures import Balance
+from rotkehlchen.assets.asset import Asset
 from rotkehlchen.assets.converters import asset_from_binance
 from rotkehlchen.constants import BINANCE_BASE_URL, BINANCE_US_BASE_URL
 from rotkehlchen.constants.misc import ZERO
@@ -30,8 +32,10 @@ from rotkehlchen.serialization.deserialize import (
     deserialize_asset_amount,
     deserialize_asset_amount_force_positive,
     deserialize_fee,
+    deserialize_location,
     deserialize_price,
     deserialize_timestamp_from_binance,
+    pair_get_assets,
 )
 from rotkehlchen.typing import ApiKey, ApiSecret, AssetMovementCategory, Fee, Location, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
@@ -78,6 +82,12 @@ FAPI_METHODS = (
 )
 
 RETRY_AFTER_LIMIT = 60
+# Request weight limit per minute and weight of the myTrades endpoint
+# https://binance-docs.github.io/apidocs/spot/en/#limits
+API_REQUEST_WEIGHT_LIMIT_1M = 1200
+MY_TRADES_REQUEST_WEIGHT = 10
+# Number of symbols whose trades are queried concurrently
+TRADE_HISTORY_QUERY_CONCURRENCY = 4
 # Binance api error codes we check for (all below apis seem to have the same)
 # https://binance-docs.github.io/apidocs/spot/en/#error-codes-2
 # https://binance-docs.github.io/apidocs/futures/en/#error-codes-2
@@ -230,6 +240,10 @@ class Binance(ExchangeInterface):
         self.backoff_limit = backoff_limit
         self.nonce_lock = Semaphore()
         self.offset_ms = 0
+        # Request weight used in the current minute as last reported by binance
+        self.used_weight_1m = 0
+        # Per symbol last trade ids to be saved once the trades are in the DB
+        self.pending_trade_cursors: Dict[str, int] = {}
 
     def first_connection(self) -> None:
         if self.first_connection_made:
@@ -282,9 +296,10 @@ class Binance(ExchangeInterface):
 
         while True:
             with self.nonce_lock:
-                # Protect this region with a lock since binance will reject
-                # non-increasing nonces. So if two greenlets come in here at
-                # the same time one of them will fail
+                # Protect the signing with a lock so that the timestamps of two
+                # greenlets signing at the same time are taken in order. Binance
+                # only checks them against the recvWindow so the requests
+                # themselves can be sent concurrently.
                 if 'signature' in call_options:
                     del call_options['signature']
 
@@ -329,13 +344,24 @@ class Binance(ExchangeInterface):
                     f'https://{api_subdomain}.{self.uri}{api_type}/v{str(api_version)}/{method}?'
                 )
                 request_url += urlencode(call_options)
-                log.debug(f'{self.name} API request', request_url=request_url)
+
+            log.debug(f'{self.name} API request', request_url=request_url)
+            try:
+                response = self.session.get(request_url)
+            except requests.exceptions.RequestException as e:
+                raise RemoteError(
+                    f'{self.name} API request failed due to {str(e)}',
+                ) from e
+
+            used_weight = response.headers.get('x-mbx-used-weight-1m')
+            if used_weight is not None:
                 try:
-                    response = self.session.get(request_url)
-                except requests.exceptions.RequestException as e:
-                    raise RemoteError(
-                        f'{self.name} API request failed due to {str(e)}',
-                    ) from e
+                    self.used_weight_1m = int(used_weight)
+                except ValueError:
+                    log.warning(
+                        f'{self.name} returned a malformed used weight header {used_weight}. '
+                        f'Ignoring it',
+                    )
 
             if response.status_code not in (200, 418, 429):
                 code = 'no code found'
@@ -678,93 +704,231 @@ class Binance(ExchangeInterface):
         )
         return returned_balances, ''
 
+    def query_trade_history(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[Trade]:
+        """Queries the trade history and then saves the per symbol trade cursors
+
+        The cursors are only saved after the trades they cover are in the DB
+        so that an interrupted sync can never skip trades.
+        """
+        trades = super().query_trade_history(start_ts=start_ts, end_ts=end_ts)
+        if len(self.pending_trade_cursors) != 0:
+            self.db.update_exchange_trade_cursors(self.name, self.pending_trade_cursors)
+            self.pending_trade_cursors = {}
+
+        return trades
+
+    def _query_held_assets(self, end_ts: Timestamp) -> Set[Asset]:
+        """Returns the assets the user holds or has held in the account
+
+        Those are the assets of the current balances, of all deposits/withdrawals
+        and of the trades we already have in the DB.
+
+        May raise RemoteError
+        """
+        held_assets = set()
+        # We know account endpoint returns a dict
+        account_data = self.api_query_dict('api', 'account')
+        for entry in account_data['balances']:
+            if entry['free'] + entry['locked'] == ZERO:
+                continue
+            try:
+                held_assets.add(asset_from_binance(entry['asset']))
+            except (UnknownAsset, UnsupportedAsset, DeserializationError):
+                continue
+
+        movements = self.query_deposits_withdrawals(start_ts=Timestamp(0), end_ts=end_ts)
+        held_assets.update(movement.asset for movement in movements)
+        for trade in self.db.get_trades(location=deserialize_location(self.name)):
+            held_assets.update(pair_get_assets(trade.pair))
+
+        return held_assets
+
+    def _symbols_to_assets(self) -> Dict[str, Set[Asset]]:
+        """Returns the known assets of each binance symbol"""
+        symbols_to_assets = {}
+        for symbol, pair in self._symbols_to_pair.items():
+            assets = set()
+            for binance_asset in (pair.binance_base_asset, pair.binance_quote_asset):
+                try:
+                    assets.add(asset_from_binance(binance_asset))
+                except (UnknownAsset, UnsupportedAsset, DeserializationError):
+                    continue
+            symbols_to_assets[symbol] = assets
+
+        return symbols_to_assets
+
+    def _wait_for_request_weight(self, weight: int) -> None:
+        """Waits for the next minute if a request would exceed the request weight limit"""
+        if self.used_weight_1m + weight > API_REQUEST_WEIGHT_LIMIT_1M:
+            server_ms = ts_now_in_ms() + self.offset_ms
+            wait_seconds = 60 - (server_ms % 60000) / 1000
+            log.debug(
+                f'{self.name} request weight limit reached. Waiting',
+                seconds=wait_seconds,
+            )
+            gevent.sleep(wait_seconds)
+            self.used_weight_1m = 0
+
+        self.used_weight_1m += weight
+
+    def _query_symbol_trades(self, symbol: str, from_id: int) -> List[Dict[str, Any]]:
+        """Queries all trades of a symbol with an id greater or equal to from_id
+
+        May raise RemoteError
+        """
+        raw_trades = []
+        # Limit of results to return. 1000 is max limit according to docs
+        limit = 1000
+        len_result = limit
+        while len_result == limit:
+            self._wait_for_request_weight(MY_TRADES_REQUEST_WEIGHT)
+            # We know that myTrades returns a list from the api docs
+            result = self.api_query_list(
+                'api',
+                'myTrades',
+                options={
+                    'symbol': symbol,
+                    'fromId': from_id,
+                    'limit': limit,
+                    # Not specifying them since binance does not seem to
+                    # respect them and always return all trades
+                    # 'startTime': start_ts * 1000,
+                    # 'endTime': end_ts * 1000,
+                })
+            if result:
+                from_id = result[-1]['id'] + 1
+            len_result = len(result)
+            log.debug(f'{self.name} myTrades query result', symbol=symbol, results_num=len_result)
+            for r in result:
+                r['symbol'] = symbol
+            raw_trades.extend(result)
+
+        return raw_trades
+
+    def _deserialize_trade(self, raw_trade: Dict[str, Any]) -> Optional[Trade]:
+        """Processes a single trade from binance and deserializes it
+
+        Can log error/warning and return None if something went wrong at deserialization
+        """
+        try:
+            return trade_from_binance(
+                binance_trade=raw_trade,
+                binance_symbols_to_pair=self.symbols_to_pair,
+                name=self.name,
+            )
+        except UnknownAsset as e:
+            self.msg_aggregator.add_warning(
+                f'Found {self.name} trade with unknown asset '
+                f'{e.asset_name}. Ignoring it.',
+            )
+        except UnsupportedAsset as e:
+            self.msg_aggregator.add_warning(
+                f'Found {self.name} trade with unsupported asset '
+                f'{e.asset_name}. Ignoring it.',
+            )
+        except (DeserializationError, KeyError) as e:
+            msg = str(e)
+            if isinstance(e, KeyError):
+                msg = f'Missing key entry for {msg}.'
+            self.msg_aggregator.add_error(
+                f'Error processing a {self.name} trade. Check logs '
+                f'for details. Ignoring it.',
+            )
+            log.error(
+                f'Error processing a {self.name} trade',
+                trade=raw_trade,
+                error=msg,
+            )
+
+        return None
+
     def query_online_trade_history(
             self,
             start_ts: Timestamp,
             end_ts: Timestamp,
             markets: Optional[List[str]] = None,
     ) -> List[Trade]:
+        """Queries the trades of the given markets or of all markets the user may have used
+
+        Each symbol is queried starting after the last trade id saved for it in
+        the DB. If no markets are given then only the symbols with a saved trade
+        id or with an asset the user has held are queried. The assets of any
+        symbol with trades are then considered held too, until no new symbols
+        come up.
+
+        May raise RemoteError
+        """
         self.first_connection()
+        trade_cursors = self.db.get_exchange_trade_cursors(self.name)
 
-        if not markets:
-            iter_markets = list(self._symbols_to_pair.keys())
+        if markets:
+            symbols_to_assets: Dict[str, Set[Asset]] = {}
+            held_assets: Set[Asset] = set()
+            pending_symbols = list(markets)
         else:
-            iter_markets = markets
+            symbols_to_assets = self._symbols_to_assets()
+            held_assets = self._query_held_assets(end_ts)
+            pending_symbols = [
+                symbol for symbol, assets in symbols_to_assets.items()
+                if symbol in trade_cursors or not assets.isdisjoint(held_assets)
+            ]
+
+        symbols_raw_trades: Dict[str, List[Dict[str, Any]]] = {}
+        pool = Pool(TRADE_HISTORY_QUERY_CONCURRENCY)
+        while len(pending_symbols) != 0:
+            results = pool.map(
+                lambda symbol: self._query_symbol_trades(
+                    symbol=symbol,
+                    from_id=trade_cursors.get(symbol, -1) + 1,
+                ),
+                pending_symbols,
+            )
+            for symbol, raw_trades in zip(pending_symbols, results):
+                symbols_raw_trades[symbol] = raw_trades
+                if len(raw_trades) != 0:
+                    held_assets.update(symbols_to_assets.get(symbol, set()))
 
-        raw_data = []
-        # Limit of results to return. 1000 is max limit according to docs
-        limit = 1000
-        for symbol in iter_markets:
-            last_trade_id = 0
-            len_result = limit
-            while len_result == limit:
-                # We know that myTrades returns a list from the api docs
-                result = self.api_query_list(
-                    'api',
-                    'myTrades',
-                    options={
-                        'symbol': symbol,
-                        'fromId': last_trade_id,
-                        'limit': limit,
-                        # Not specifying them since binance does not seem to
-                        # respect them and always return all trades
-                        # 'startTime': start_ts * 1000,
-                        # 'endTime': end_ts * 1000,
-                    })
-                if result:
-                    last_trade_id = result[-1]['id'] + 1
-                len_result = len(result)
-                log.debug(f'{self.name} myTrades query result', results_num=len_result)
-                for r in result:
-                    r['symbol'] = symbol
-                raw_data.extend(result)
-
-            raw_data.sort(key=lambda x: x['time'])
+            pending_symbols = [
+                symbol for symbol, assets in symbols_to_assets.items()
+                if symbol not in symbols_raw_trades and not assets.isdisjoint(held_assets)
+            ]
 
         trades = []
-        for raw_trade in raw_data:
-            try:
-                trade = trade_from_binance(
-                    binance_trade=raw_trade,
-                    binance_symbols_to_pair=self.symbols_to_pair,
-                    name=self.name,
-                )
-            except UnknownAsset as e:
-                self.msg_aggregator.add_warning(
-                    f'Found {self.name} trade with unknown asset '
-                    f'{e.asset_name}. Ignoring it.',
-                )
-                continue
-            except UnsupportedAsset as e:
-                self.msg_aggregator.add_warning(
-                    f'Found {self.name} trade with unsupported asset '
-                    f'{e.asset_name}. Ignoring it.',
-                )
-                continue
-            except (DeserializationError, KeyError) as e:
-                msg = str(e)
-                if isinstance(e, KeyError):
-                    msg = f'Missing key entry for {msg}.'
-                self.msg_aggregator.add_error(
-                    f'Error processing a {self.name} trade. Check logs '
-                    f'for details. Ignoring it.',
-                )
-                log.error(
-                    f'Error processing a {self.name} trade',
-                    trade=raw_trade,
-                    error=msg,
-                )
-                continue
+        for symbol, raw_trades in symbols_raw_trades.items():
+            last_trade_id = None
+            cursor_can_advance = True
+            save_cursor = True
+            for raw_trade in raw_trades:
+                trade = self._deserialize_trade(raw_trade)
+                if trade is None:
+                    # Don't go past it so that it's retried in the next sync
+                    cursor_can_advance = False
+                    continue
 
-            # Since binance does not respect the given timestamp range, limit the range here
-            if trade.timestamp < start_ts:
-                continue
+                # Since binance does not respect the given timestamp range, limit the range
+                # here. Trades before the range are not returned so we can't go past them.
+                if trade.timestamp < start_ts:
+                    save_cursor = False
+                    continue
 
-            if trade.timestamp > end_ts:
-                break
+                if trade.timestamp > end_ts:
+                    break
 
-            trades.append(trade)
+                trades.append(trade)
+                if cursor_can_advance:
+                    last_trade_id = raw_trade['id']
+
+            if save_cursor and last_trade_id is not None:
+                self.pending_trade_cursors[symbol] = max(
+                    last_trade_id,
+                    self.pending_trade_cursors.get(symbol, last_trade_id),
+                )
 
+        trades.sort(key=lambda x: x.timestamp)
         return trades
 
     def _deserialize_asset_movement(self, raw_data: Dict[str, Any]) -> Optional[AssetMovement]:
@@ -1,8 +1,10 @@
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.ethereum.trades import AMMTrade
+from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.crypto import sha3
 from rotkehlchen.errors import UnknownAsset
 from rotkehlchen.fval import FVal
@@ -54,8 +56,108 @@ class SellEvent:
     gain: FVal  # Gain in profit currency for this trade. Fees are not counted here.
 
 
+# When this many buys have been consumed from the front of a BuyEventsQueue and
+# they are more than half of its lots, the consumed lots get dropped from memory
+BUY_EVENTS_QUEUE_COMPACT_THRESHOLD = 1024
+
+
+class BuyEventsQueue():
+    """A first-in-first-out queue of the buy lots of an asset
+
+    Consuming lots from the front is amortized O(1) since consumed lots are only
+    skipped over by moving a head index and are dropped in bulk from time to time.
+    A running cumulative amount is kept per lot so that the total remaining amount
+    and the amount remaining from buys before a given time don't need a rescan.
+
+    The amount of a lot in the queue must only be changed via reduce_first() so
+    that the running amounts stay correct.
+    """
+
+    def __init__(self) -> None:
+        self._lots: List[BuyEvent] = []
+        # timestamp of each lot, kept separately so that it can be bisected
+        self._timestamps: List[Timestamp] = []
+        # sum of the originally appended amounts of all lots up to and including each lot
+        self._cumulative_amounts: List[FVal] = []
+        self._head = 0
+        self._appended_amount = ZERO
+        self._consumed_amount = ZERO
+        self._timestamps_sorted = True
+
+    def __len__(self) -> int:
+        return len(self._lots) - self._head
+
+    def __iter__(self) -> Iterator[BuyEvent]:
+        for idx in range(self._head, len(self._lots)):
+            yield self._lots[idx]
+
+    def __getitem__(self, index: int) -> BuyEvent:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('BuyEventsQueue index out of range')
+        return self._lots[self._head + index]
+
+    def __repr__(self) -> str:
+        return f'BuyEventsQueue({list(self)})'
+
+    @property
+    def total_amount(self) -> FVal:
+        """The amount of the asset remaining in all lots of the queue"""
+        return self._appended_amount - self._consumed_amount
+
+    def append(self, buy: BuyEvent) -> None:
+        if len(self._timestamps) != 0 and buy.timestamp < self._timestamps[-1]:
+            self._timestamps_sorted = False
+        self._appended_amount += buy.amount
+        self._lots.append(buy)
+        self._timestamps.append(buy.timestamp)
+        self._cumulative_amounts.append(self._appended_amount)
+
+    def popleft(self) -> BuyEvent:
+        """Removes and returns the first lot of the queue. Raises IndexError if empty"""
+        if len(self) == 0:
+            raise IndexError('popleft from an empty BuyEventsQueue')
+        buy = self._lots[self._head]
+        self._consumed_amount += buy.amount
+        self._head += 1
+        self._maybe_compact()
+        return buy
+
+    def reduce_first(self, remaining_amount: FVal) -> None:
+        """Reduces the amount of the first lot of the queue to the given remaining amount"""
+        buy = self[0]
+        self._consumed_amount += buy.amount - remaining_amount
+        buy.amount = remaining_amount
+
+    def amount_bought_before(self, timestamp: Timestamp) -> FVal:
+        """The amount of the asset remaining in lots bought strictly before timestamp"""
+        if not self._timestamps_sorted:
+            amount = ZERO
+            for buy in self:
+                if buy.timestamp < timestamp:
+                    amount += buy.amount
+            return amount
+
+        end = bisect_left(self._timestamps, timestamp, lo=self._head)
+        if end == self._head:
+            return ZERO
+        # lots are consumed strictly from the front so everything consumed so far
+        # is accounted for in the cumulative amount of any remaining lot
+        return self._cumulative_amounts[end - 1] - self._consumed_amount
+
+    def _maybe_compact(self) -> None:
+        if self._head < BUY_EVENTS_QUEUE_COMPACT_THRESHOLD or self._head * 2 < len(self._lots):
+            return
+
+        del self._lots[:self._head]
+        del self._timestamps[:self._head]
+        del self._cumulative_amounts[:self._head]
+        self._head = 0
+
+
 class Events(NamedTuple):
-    buys: List[BuyEvent]
+    buys: BuyEventsQueue
     sells: List[SellEvent]
 
 
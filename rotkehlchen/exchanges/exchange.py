@@ -10,6 +10,7 @@ from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import deserialize_location
 from rotkehlchen.typing import ApiKey, ApiSecret, T_ApiKey, T_ApiSecret, Timestamp
 from rotkehlchen.utils.interfaces import CacheableObject, LockableQueryObject, protect_with_lock
+from rotkehlchen.utils.profiling import profile_session
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
@@ -47,7 +48,7 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
         self.api_key = api_key
         self.secret = secret
         self.first_connection_made = False
-        self.session = requests.session()
+        self.session = profile_session(requests.session())
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
         log.info(f'Initialized {name} exchange')
 
@@ -158,16 +159,17 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
                 msg = 'query_online_trade_history should only not be implemented by bitmex'
                 assert self.name == 'bitmex', msg
 
-        # make sure to add them to the DB
-        if new_trades != []:
-            self.db.add_trades(new_trades)
-        # and also set the used queried timestamp range for the exchange
-        ranges.update_used_query_range(
-            location_string=f'{self.name}_trades',
-            start_ts=start_ts,
-            end_ts=end_ts,
-            ranges_to_query=ranges_to_query,
-        )
+        with self.db.transaction():
+            # make sure to add them to the DB
+            if new_trades != []:
+                self.db.add_trades(new_trades)
+            # and also set the used queried timestamp range for the exchange
+            ranges.update_used_query_range(
+                location_string=f'{self.name}_trades',
+                start_ts=start_ts,
+                end_ts=end_ts,
+                ranges_to_query=ranges_to_query,
+            )
         # finally append them to the already returned DB trades
         trades.extend(new_trades)
 
@@ -201,16 +203,17 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             except NotImplementedError:
                 pass
 
-        # make sure to add them to the DB
-        if new_positions != []:
-            self.db.add_margin_positions(new_positions)
-        # and also set the last queried timestamp for the exchange
-        ranges.update_used_query_range(
-            location_string=f'{self.name}_margins',
-            start_ts=start_ts,
-            end_ts=end_ts,
-            ranges_to_query=ranges_to_query,
-        )
+        with self.db.transaction():
+            # make sure to add them to the DB
+            if new_positions != []:
+                self.db.add_margin_positions(new_positions)
+            # and also set the last queried timestamp for the exchange
+            ranges.update_used_query_range(
+                location_string=f'{self.name}_margins',
+                start_ts=start_ts,
+                end_ts=end_ts,
+                ranges_to_query=ranges_to_query,
+            )
         # finally append them to the already returned DB margin positions
         margin_positions.extend(new_positions)
 
@@ -241,14 +244,15 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
                 end_ts=query_end_ts,
             ))
 
-        if new_movements != []:
-            self.db.add_asset_movements(new_movements)
-        ranges.update_used_query_range(
-            location_string=f'{self.name}_asset_movements',
-            start_ts=start_ts,
-            end_ts=end_ts,
-            ranges_to_query=ranges_to_query,
-        )
+        with self.db.transaction():
+            if new_movements != []:
+                self.db.add_asset_movements(new_movements)
+            ranges.update_used_query_range(
+                location_string=f'{self.name}_asset_movements',
+                start_ts=start_ts,
+                end_ts=end_ts,
+                ranges_to_query=ranges_to_query,
+            )
         asset_movements.extend(new_movements)
 
         return asset_movements
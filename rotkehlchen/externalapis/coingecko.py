@@ -1,6 +1,7 @@
 import json
 import logging
-from typing import Any, Dict, List, NamedTuple, Optional, Union, overload
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union, overload
 from urllib.parse import urlencode
 
 import requests
@@ -12,6 +13,8 @@ from rotkehlchen.errors import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import Price
+from rotkehlchen.utils.misc import get_chunks
+from rotkehlchen.utils.profiling import profile_session
 from rotkehlchen.utils.serialization import rlk_jsonloads
 
 logger = logging.getLogger(__name__)
@@ -32,6 +35,8 @@ class CoingeckoAssetData(NamedTuple):
     images: CoingeckoImageURLs
 
 
+# Keeps the simple price request uri short enough
+COINGECKO_SIMPLE_PRICE_MAX_IDS = 100
 COINGECKO_SIMPLE_VS_CURRENCIES = [
     "btc",
     "eth",
@@ -97,7 +102,7 @@ COINGECKO_SIMPLE_VS_CURRENCIES = [
 class Coingecko():
 
     def __init__(self) -> None:
-        self.session = requests.session()
+        self.session = profile_session(requests.session())
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
 
     @overload  # noqa: F811
@@ -243,3 +248,43 @@ class Coingecko():
                 f'processing the result.',
             )
             return Price(ZERO)
+
+    def simple_prices(self, from_assets: Sequence[Asset], to_asset: Asset) -> Dict[Asset, Price]:
+        """Returns the simple prices of multiple assets to to_asset in coingecko
+
+        Like simple_price but queries the prices of many assets at once. Assets that
+        are not supported in coingecko or whose price is not returned are omitted.
+
+        May raise:
+        - RemoteError if there is a problem querying coingecko
+        """
+        vs_currency = to_asset.identifier.lower()
+        if vs_currency not in COINGECKO_SIMPLE_VS_CURRENCIES:
+            log.warning(
+                f'Tried to query coingecko simple prices to {to_asset.identifier}. '
+                f'But to_asset is not supported in simple price query',
+            )
+            return {}
+
+        id_to_assets: Dict[str, List[Asset]] = defaultdict(list)
+        for asset in from_assets:
+            if asset.has_coingecko():
+                id_to_assets[asset.coingecko].append(asset)  # type: ignore
+
+        prices = {}
+        for ids in get_chunks(list(id_to_assets), n=COINGECKO_SIMPLE_PRICE_MAX_IDS):
+            result = self._query(
+                module='simple/price',
+                options={
+                    'ids': ','.join(ids),
+                    'vs_currencies': vs_currency,
+                })
+            for coingecko_id in ids:
+                try:
+                    price = Price(FVal(result[coingecko_id][vs_currency]))
+                except KeyError:
+                    continue
+                for asset in id_to_assets[coingecko_id]:
+                    prices[asset] = price
+
+        return prices
@@ -11,6 +11,7 @@ import requests
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.profiling import profile_session
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -892,7 +893,7 @@ class Coinmarketcap():
         self.prefix = 'https://pro-api.coinmarketcap.com/'
         self.backoff_limit = 180
         self.data_directory = data_directory
-        self.session = requests.session()
+        self.session = profile_session(requests.session())
         # As per coinmarketcap's API
         self.session.headers.update({
             'User-Agent': 'rotkehlchen',
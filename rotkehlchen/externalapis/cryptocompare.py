@@ -2,12 +2,27 @@ import glob
 import logging
 import os
 import re
+import time
+from collections import defaultdict
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, NewType, Optional
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    Sequence,
+)
 
 import gevent
 import requests
+from gevent.lock import Semaphore
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.assets.asset import Asset
@@ -15,6 +30,7 @@ from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_BTC, A_COMP, A_DAI, A_USD, A_USDT, A_WETH
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.errors import (
+    DeserializationError,
     NoPriceForGivenTimestamp,
     PriceQueryUnsupportedAsset,
     RemoteError,
@@ -23,14 +39,15 @@ from rotkehlchen.errors import (
 from rotkehlchen.externalapis.interface import ExternalServiceWithApiKey
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
+from rotkehlchen.history.price_store import (
+    HourlyPriceSeries,
+    append_price_store_file,
+    write_price_store_file,
+)
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ExternalService, Price, Timestamp
-from rotkehlchen.utils.misc import (
-    convert_to_int,
-    timestamp_to_date,
-    ts_now,
-    write_history_data_in_file,
-)
+from rotkehlchen.utils.misc import timestamp_to_date, ts_now
+from rotkehlchen.utils.profiling import profile_session, record_price_cache
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -42,6 +59,15 @@ PairCacheKey = NewType('PairCacheKey', T_PairCacheKey)
 
 RATE_LIMIT_MSG = 'You are over your rate limit please upgrade your account!'
 CRYPTOCOMPARE_QUERY_RETRY_TIMES = 10
+# Cryptocompare allows 50 calls per second and 2500 per minute per client. All queries,
+# including the concurrent histohour windows of all prefetched pairs, share this budget
+CRYPTOCOMPARE_MIN_SECONDS_BETWEEN_QUERIES = 0.05
+# Maximum number of hours a single histohour query can return
+HISTOHOUR_QUERY_LIMIT = 2000
+# How many histohour queries of a pair's history to have in flight at once
+HISTOHOUR_QUERY_CONCURRENCY = 4
+# Cryptocompare rejects pricemulti queries whose fsyms are longer than this
+CRYPTOCOMPARE_PRICEMULTI_MAX_FSYMS_LENGTH = 300
 CRYPTOCOMPARE_SPECIAL_CASES_MAPPING = {
     Asset('TLN'): A_WETH,
     Asset('BLY'): A_USDT,
@@ -136,18 +162,6 @@ CRYPTOCOMPARE_SPECIAL_CASES_MAPPING = {
 CRYPTOCOMPARE_SPECIAL_CASES = CRYPTOCOMPARE_SPECIAL_CASES_MAPPING.keys()
 
 
-class PriceHistoryEntry(NamedTuple):
-    time: Timestamp
-    low: Price
-    high: Price
-
-
-class PriceHistoryData(NamedTuple):
-    data: List[PriceHistoryEntry]
-    start_time: Timestamp
-    end_time: Timestamp
-
-
 class HistoHourAssetData(NamedTuple):
     timestamp: Timestamp
     usd_price: Price
@@ -163,26 +177,6 @@ CRYPTOCOMPARE_SPECIAL_HISTOHOUR_CASES: Dict[Asset, HistoHourAssetData] = {
 }
 
 
-def _dict_history_to_entries(data: List[Dict[str, Any]]) -> List[PriceHistoryEntry]:
-    """Turns a list of dict of history entries to a list of proper objects"""
-    return [
-        PriceHistoryEntry(
-            time=Timestamp(entry['time']),
-            low=Price(FVal(entry['low'])),
-            high=Price(FVal(entry['high'])),
-        ) for entry in data
-    ]
-
-
-def _dict_history_to_data(data: Dict[str, Any]) -> PriceHistoryData:
-    """Turns a price history data dict entry into a proper object"""
-    return PriceHistoryData(
-        data=_dict_history_to_entries(data['data']),
-        start_time=Timestamp(data['start_time']),
-        end_time=Timestamp(data['end_time']),
-    )
-
-
 def _multiply_str_nums(a: str, b: str) -> str:
     """Multiples two string numbers and returns the result as a string"""
     return str(FVal(a) * FVal(b))
@@ -221,23 +215,34 @@ class Cryptocompare(ExternalServiceWithApiKey):
     def __init__(self, data_directory: Path, database: Optional[DBHandler]) -> None:
         super().__init__(database=database, service_name=ExternalService.CRYPTOCOMPARE)
         self.data_directory = data_directory
-        self.price_history: Dict[PairCacheKey, PriceHistoryData] = {}
+        # Memory mapped price series, opened lazily the first time a pair is queried
+        self.price_history: Dict[PairCacheKey, HourlyPriceSeries] = {}
         self.price_history_file: Dict[PairCacheKey, Path] = {}
-        self.session = requests.session()
+        # Price histories cached as JSON by older versions. Each one is migrated
+        # to the binary price store the first time its pair is queried
+        self.json_price_history_file: Dict[PairCacheKey, Path] = {}
+        self.price_history_locks: DefaultDict[PairCacheKey, Semaphore] = defaultdict(Semaphore)
+        self.session = profile_session(requests.session())
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        self.rate_limit_lock = Semaphore()
+        self.last_query_ts = 0.0
 
         # Check the data folder and remember the filenames of any cached history
         prefix = os.path.join(str(self.data_directory), 'price_history_')
         prefix = prefix.replace('\\', '\\\\')
-        regex = re.compile(prefix + r'(.*)\.json')
-        files_list = glob.glob(prefix + '*.json')
+        for extension, files_dict in (
+                ('bin', self.price_history_file),
+                ('json', self.json_price_history_file),
+        ):
+            regex = re.compile(prefix + r'(.*)\.' + extension)
+            files_list = glob.glob(prefix + '*.' + extension)
 
-        for file_ in files_list:
-            file_ = file_.replace('\\\\', '\\')
-            match = regex.match(file_)
-            assert match
-            cache_key = PairCacheKey(match.group(1))
-            self.price_history_file[cache_key] = Path(file_)
+            for file_ in files_list:
+                file_ = file_.replace('\\\\', '\\')
+                match = regex.match(file_)
+                assert match
+                cache_key = PairCacheKey(match.group(1))
+                files_dict[cache_key] = Path(file_)
 
     def set_database(self, database: DBHandler) -> None:
         """If the cryptocompare instance was initialized without a DB this sets its DB"""
@@ -253,6 +258,16 @@ class Cryptocompare(ExternalServiceWithApiKey):
         assert self.db is not None, msg
         self.db = None
 
+    def _wait_for_rate_limit(self) -> None:
+        """Blocks until a query can be made without exceeding cryptocompare's rate limit"""
+        with self.rate_limit_lock:
+            wait_seconds = (
+                self.last_query_ts + CRYPTOCOMPARE_MIN_SECONDS_BETWEEN_QUERIES - time.time()
+            )
+            if wait_seconds > 0:
+                gevent.sleep(wait_seconds)
+            self.last_query_ts = time.time()
+
     def _api_query(self, path: str) -> Dict[str, Any]:
         """Queries cryptocompare
 
@@ -267,6 +282,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
 
         tries = CRYPTOCOMPARE_QUERY_RETRY_TIMES
         while tries >= 0:
+            self._wait_for_rate_limit()
             try:
                 response = self.session.get(querystr)
             except requests.exceptions.RequestException as e:
@@ -460,6 +476,68 @@ class Cryptocompare(ExternalServiceWithApiKey):
         result = self._api_query(path=query_path)
         return result
 
+    def query_endpoint_pricemulti(
+            self,
+            from_assets: Sequence[Asset],
+            to_asset: Asset,
+    ) -> Dict[Asset, Price]:
+        """Returns the current prices of multiple assets compared to another asset
+
+        Uses as few pricemulti queries as the symbol length limit of the endpoint
+        allows. Assets that need intermediaries are queried one by one. Assets
+        that are not supported or whose price is not returned are omitted.
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise PriceQueryUnsupportedAsset if to_asset is not known to cryptocompare
+        """
+        try:
+            cc_to_asset_symbol = to_asset.to_cryptocompare()
+        except UnsupportedAsset as e:
+            raise PriceQueryUnsupportedAsset(e.asset_name) from e
+
+        prices: Dict[Asset, Price] = {}
+        symbol_to_assets: Dict[str, List[Asset]] = defaultdict(list)
+        for asset in from_assets:
+            if asset in CRYPTOCOMPARE_SPECIAL_CASES or to_asset in CRYPTOCOMPARE_SPECIAL_CASES:
+                try:
+                    result = self.query_endpoint_price(from_asset=asset, to_asset=to_asset)
+                except PriceQueryUnsupportedAsset:
+                    continue
+                if cc_to_asset_symbol in result:
+                    prices[asset] = Price(FVal(result[cc_to_asset_symbol]))
+                continue
+
+            try:
+                symbol_to_assets[asset.to_cryptocompare()].append(asset)
+            except UnsupportedAsset:
+                continue
+
+        chunk: List[str] = []
+        chunk_length = 0
+        symbol_chunks = []
+        for symbol in symbol_to_assets:
+            if chunk_length + len(symbol) + 1 > CRYPTOCOMPARE_PRICEMULTI_MAX_FSYMS_LENGTH:
+                symbol_chunks.append(chunk)
+                chunk, chunk_length = [], 0
+            chunk.append(symbol)
+            chunk_length += len(symbol) + 1
+        if len(chunk) != 0:
+            symbol_chunks.append(chunk)
+
+        for symbols in symbol_chunks:
+            query_path = f'pricemulti?fsyms={",".join(symbols)}&tsyms={cc_to_asset_symbol}'
+            result = self._api_query(path=query_path)
+            for symbol in symbols:
+                try:
+                    price = Price(FVal(result[symbol][cc_to_asset_symbol]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                for asset in symbol_to_assets[symbol]:
+                    prices[asset] = price
+
+        return prices
+
     def query_endpoint_pricehistorical(
             self,
             from_asset: Asset,
@@ -505,24 +583,61 @@ class Cryptocompare(ExternalServiceWithApiKey):
         result = self._api_query(query_path)
         return Price(FVal(result[cc_from_asset_symbol][cc_to_asset_symbol]))
 
+    def _price_store_path(self, cache_key: PairCacheKey) -> Path:
+        return self.data_directory / ('price_history_' + cache_key + '.bin')
+
+    def _migrate_json_price_history(self, cache_key: PairCacheKey) -> None:
+        """Converts a price history cached in JSON by older versions to the binary store
+
+        If the JSON file can't be read it is left untouched and the pair will
+        simply be queried again.
+        """
+        json_filepath = self.json_price_history_file.pop(cache_key)
+        filepath = self._price_store_path(cache_key)
+        try:
+            with open(json_filepath, 'r') as f:
+                data = rlk_jsonloads_dict(f.read())
+            write_price_store_file(
+                filepath=filepath,
+                data=data['data'],
+                start_time=Timestamp(data['start_time']),
+                end_time=Timestamp(data['end_time']),
+            )
+        except (OSError, JSONDecodeError, KeyError, ValueError, DeserializationError) as e:
+            log.warning(
+                f'Could not migrate cached price history {json_filepath} due to {str(e)}',
+            )
+            return
+
+        log.info('Migrated JSON price history cache', cache_key=cache_key, filename=filepath)
+        self.price_history_file[cache_key] = filepath
+        json_filepath.unlink()
+
     def _got_cached_price(self, cache_key: PairCacheKey, timestamp: Timestamp) -> bool:
         """Check if we got a price history for the timestamp cached"""
-        if cache_key in self.price_history_file:
-            if cache_key not in self.price_history:
-                try:
-                    with open(self.price_history_file[cache_key], 'r') as f:
-                        data = rlk_jsonloads_dict(f.read())
-                        self.price_history[cache_key] = _dict_history_to_data(data)
-                except (OSError, JSONDecodeError):
-                    return False
-
-            in_range = (
-                self.price_history[cache_key].start_time <= timestamp <
-                self.price_history[cache_key].end_time
-            )
-            if in_range:
-                log.debug('Found cached price', cache_key=cache_key, timestamp=timestamp)
-                return True
+        if cache_key not in self.price_history_file:
+            if cache_key not in self.json_price_history_file:
+                return False
+            self._migrate_json_price_history(cache_key)
+            if cache_key not in self.price_history_file:
+                return False
+
+        if cache_key not in self.price_history:
+            try:
+                self.price_history[cache_key] = HourlyPriceSeries(
+                    self.price_history_file[cache_key],
+                )
+            except (OSError, DeserializationError) as e:
+                log.warning(f'Could not open cached price history due to {str(e)}')
+                return False
+
+        in_range = (
+            self.price_history[cache_key].start_time <= timestamp <
+            self.price_history[cache_key].end_time
+        )
+        if in_range:
+            log.debug('Found cached price', cache_key=cache_key, timestamp=timestamp)
+            return True
 
         return False
 
@@ -532,11 +647,11 @@ class Cryptocompare(ExternalServiceWithApiKey):
             to_asset: Asset,
             timestamp: Timestamp,
             historical_data_start: Timestamp,
-    ) -> List[PriceHistoryEntry]:
+    ) -> HourlyPriceSeries:
         """
         Get historical price data from cryptocompare
 
-        Returns a sorted list of price entries.
+        Returns the sorted series of hourly price entries.
 
         - May raise RemoteError if there is a problem reaching the cryptocompare server
         or with reading the response returned by the server
@@ -551,108 +666,229 @@ class Cryptocompare(ExternalServiceWithApiKey):
 
         cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
         got_cached_value = self._got_cached_price(cache_key, timestamp)
+        record_price_cache(hits=int(got_cached_value), misses=int(not got_cached_value))
         if got_cached_value:
-            return self.price_history[cache_key].data
-
-        now_ts = ts_now()
-        cryptocompare_hourquerylimit = 2000
-        calculated_history: List[Dict[str, Any]] = []
-
-        if historical_data_start <= timestamp:
-            end_date = historical_data_start
-        else:
-            end_date = timestamp
-        while True:
-            pr_end_date = end_date
-            end_date = Timestamp(end_date + (cryptocompare_hourquerylimit) * 3600)
-
-            log.debug(
-                'Querying cryptocompare for hourly historical price',
+            return self.price_history[cache_key]
+
+        # Only one greenlet at a time may update the cached history of a pair, since
+        # updating unmaps the series. The greenlet that waited for the lock finds the
+        # history already updated if it wanted the same range.
+        with self.price_history_locks[cache_key]:
+            if self._got_cached_price(cache_key, timestamp):
+                return self.price_history[cache_key]
+            return self._update_historical_data(
+                cache_key=cache_key,
                 from_asset=from_asset,
                 to_asset=to_asset,
-                cryptocompare_hourquerylimit=cryptocompare_hourquerylimit,
-                end_date=end_date,
-            )
-
-            resp = self.query_endpoint_histohour(
-                from_asset=from_asset,
-                to_asset=to_asset,
-                limit=2000,
-                to_timestamp=end_date,
+                timestamp=timestamp,
+                historical_data_start=historical_data_start,
             )
 
-            if pr_end_date != resp['TimeFrom']:
-                # If we get more than we needed, since we are close to the now_ts
-                # then skip all the already included entries
-                diff = pr_end_date - resp['TimeFrom']
-                # If the start date has less than 3600 secs difference from previous
-                # end date then do nothing. If it has more skip all already included entries
-                if diff >= 3600:
-                    if resp['Data'][diff // 3600]['time'] != pr_end_date:
-                        raise RemoteError(
-                            'Unexpected fata format in cryptocompare query_endpoint_histohour. '
-                            'Expected to find the previous date timestamp during '
-                            'cryptocompare historical data fetching',
-                        )
-                    # just add only the part from the previous timestamp and on
-                    resp['Data'] = resp['Data'][diff // 3600:]
-
-            # The end dates of a cryptocompare query do not match. The end date
-            # can have up to 3600 secs different to the requested one since this is
-            # hourly historical data but no more.
-            end_dates_dont_match = (
-                end_date < now_ts and
-                resp['TimeTo'] != end_date
-            )
-            if end_dates_dont_match:
-                if resp['TimeTo'] - end_date >= 3600:
-                    raise RemoteError(
-                        'Unexpected fata format in cryptocompare query_endpoint_histohour. '
-                        'End dates do not match.',
-                    )
+    def _update_historical_data(
+            self,
+            cache_key: PairCacheKey,
+            from_asset: Asset,
+            to_asset: Asset,
+            timestamp: Timestamp,
+            historical_data_start: Timestamp,
+    ) -> HourlyPriceSeries:
+        """Queries the missing prices of the pair and updates its cached history
 
-                # else if it's just a drift within an hour just update the end_date so that
-                # it can be picked up by the next iterations in the loop
-                end_date = resp['TimeTo']
+        Has to be called with the pair's lock in price_history_locks held.
 
-            # If last time slot and first new are the same, skip the first new slot
-            last_entry_equal_to_first = (
-                len(calculated_history) != 0 and
-                calculated_history[-1]['time'] == resp['Data'][0]['time']
-            )
-            if last_entry_equal_to_first:
-                resp['Data'] = resp['Data'][1:]
-            calculated_history += resp['Data']
-            if end_date >= now_ts:
-                break
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise UnsupportedAsset if from/to asset is not supported by cryptocompare
+        """
+        series = self.price_history.get(cache_key, None)
+        if series is not None and len(series) != 0 and series.start_time <= timestamp:
+            # Only the tail after the cached end time is missing
+            try:
+                return self._extend_historical_data(
+                    cache_key=cache_key,
+                    from_asset=from_asset,
+                    to_asset=to_asset,
+                )
+            except (OSError, DeserializationError) as e:
+                log.warning(
+                    f'Could not extend cached price history of {cache_key} due to {str(e)}. '
+                    f'Querying all of it again.',
+                )
 
+        now_ts = ts_now()
+        calculated_history = self._query_histohour_range(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            start_ts=min(historical_data_start, timestamp),
+            end_ts=now_ts,
+        )
         # Let's always check for data sanity for the hourly prices.
         _check_hourly_data_sanity(calculated_history, from_asset, to_asset)
         # and now since we actually queried the data let's also cache them
-        filename = self.data_directory / ('price_history_' + cache_key + '.json')
+        filename = self._price_store_path(cache_key)
         log.info(
             'Updating price history cache',
             filename=filename,
             from_asset=from_asset,
             to_asset=to_asset,
         )
-        write_history_data_in_file(
-            data=calculated_history,
-            filepath=filename,
-            start_ts=historical_data_start,
-            end_ts=now_ts,
-        )
+        # The old series has to be unmapped before its file can be replaced
+        old_series = self.price_history.pop(cache_key, None)
+        if old_series is not None:
+            old_series.close()
+        try:
+            write_price_store_file(
+                filepath=filename,
+                data=calculated_history,
+                start_time=historical_data_start,
+                end_time=now_ts,
+            )
+        except DeserializationError as e:
+            raise RemoteError(
+                f'Cryptocompare returned an invalid price history for '
+                f'{from_asset.identifier} to {to_asset.identifier}: {str(e)}',
+            ) from e
 
-        # Finally save the objects in memory and return them
-        data_including_time = {
-            'data': calculated_history,
-            'start_time': historical_data_start,
-            'end_time': end_date,
-        }
+        # Finally map the new series and return it
         self.price_history_file[cache_key] = filename
-        self.price_history[cache_key] = _dict_history_to_data(data_including_time)
+        self.price_history[cache_key] = HourlyPriceSeries(filename)
+
+        return self.price_history[cache_key]
+
+    def _extend_historical_data(
+            self,
+            cache_key: PairCacheKey,
+            from_asset: Asset,
+            to_asset: Asset,
+    ) -> HourlyPriceSeries:
+        """Queries the prices after the last cached entry of the pair and appends them
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise UnsupportedAsset if from/to asset is not supported by cryptocompare
+        - May raise OSError or DeserializationError if the cached series can't be extended
+        """
+        series = self.price_history[cache_key]
+        last_entry_time = series[-1].time
+        now_ts = ts_now()
+        new_entries = [
+            entry for entry in self._query_histohour_range(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                start_ts=last_entry_time,
+                end_ts=now_ts,
+            ) if entry['time'] > last_entry_time
+        ]
+        _check_hourly_data_sanity(
+            [{'time': last_entry_time}] + new_entries,
+            from_asset,
+            to_asset,
+        )
+        log.info(
+            'Extending price history cache',
+            cache_key=cache_key,
+            from_time=last_entry_time,
+            entries=len(new_entries),
+        )
+        # The series has to be unmapped before its file can be extended
+        filename = self.price_history_file[cache_key]
+        self.price_history.pop(cache_key).close()
+        append_price_store_file(filepath=filename, data=new_entries, end_time=now_ts)
+        self.price_history[cache_key] = HourlyPriceSeries(filename)
+        return self.price_history[cache_key]
+
+    def _query_histohour_range(
+            self,
+            from_asset: Asset,
+            to_asset: Asset,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[Dict[str, Any]]:
+        """Queries the hourly prices of the pair from start_ts until end_ts
+
+        The range is split in windows of HISTOHOUR_QUERY_LIMIT hours which are
+        queried concurrently, at most HISTOHOUR_QUERY_CONCURRENCY at a time and
+        within the rate limit all cryptocompare queries share.
 
-        return self.price_history[cache_key].data
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise UnsupportedAsset if from/to asset is not supported by cryptocompare
+        """
+        window_ends = []
+        window_end = start_ts
+        while window_end < end_ts:
+            window_end = Timestamp(window_end + HISTOHOUR_QUERY_LIMIT * 3600)
+            window_ends.append(window_end)
+
+        log.debug(
+            'Querying cryptocompare for hourly historical prices',
+            from_asset=from_asset,
+            to_asset=to_asset,
+            start_ts=start_ts,
+            end_ts=end_ts,
+            windows=len(window_ends),
+        )
+        pool = Pool(HISTOHOUR_QUERY_CONCURRENCY)
+        responses = pool.map(
+            lambda to_timestamp: self.query_endpoint_histohour(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                limit=HISTOHOUR_QUERY_LIMIT,
+                to_timestamp=to_timestamp,
+            ),
+            window_ends,
+        )
+
+        now_ts = ts_now()
+        history: List[Dict[str, Any]] = []
+        # Entries up to an hour before the start are needed to price the start itself
+        last_time = start_ts - 3600
+        for window_end, resp in zip(window_ends, responses):
+            # The end dates of a cryptocompare query can have up to 3600 secs
+            # difference to the requested one since this is hourly data but no more.
+            if window_end < now_ts and resp['TimeTo'] - window_end >= 3600:
+                raise RemoteError(
+                    'Unexpected fata format in cryptocompare query_endpoint_histohour. '
+                    'End dates do not match.',
+                )
+
+            # Consecutive windows overlap at their edges so skip the already included entries
+            new_entries = [entry for entry in resp['Data'] if entry['time'] > last_time]
+            if len(new_entries) != 0:
+                history.extend(new_entries)
+                last_time = new_entries[-1]['time']
+
+        return history
+
+    def prefetch_historical_data(
+            self,
+            from_asset: Asset,
+            to_asset: Asset,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            historical_data_start: Timestamp,
+    ) -> None:
+        """Makes sure the cached price history of the pair covers start_ts to end_ts
+
+        If only the end of the range is missing from the cache the cached history
+        is extended. Otherwise the pair's history is queried once, starting from
+        the earliest of the two timestamps.
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise UnsupportedAsset if from/to asset is not supported by cryptocompare
+        """
+        cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
+        start_is_cached = self._got_cached_price(cache_key, start_ts)
+        if start_is_cached and self._got_cached_price(cache_key, end_ts):
+            return
+
+        self.get_historical_data(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            timestamp=end_ts if start_is_cached else start_ts,
+            historical_data_start=historical_data_start,
+        )
 
     @staticmethod
     def _check_and_get_special_histohour_price(
@@ -731,10 +967,9 @@ class Cryptocompare(ExternalServiceWithApiKey):
         price = Price(ZERO)
         # all data are sorted and timestamps are always increasing by 1 hour
         # find the closest entry to the provided timestamp
-        if timestamp >= data[0].time:
+        if len(data) != 0 and timestamp >= data.first_time:
             index_in_bounds = True
-            # convert_to_int can't raise here due to its input
-            index = convert_to_int((timestamp - data[0].time) / 3600, accept_only_exact=False)
+            index = data.hour_index(timestamp)
             if index > len(data) - 1:  # index out of bounds
                 # Try to see if index - 1 is there and if yes take it
                 if index > len(data):
@@ -756,8 +991,9 @@ class Cryptocompare(ExternalServiceWithApiKey):
                     if diff_p1 < diff:
                         index = index + 1
 
-                if data[index].high is not None and data[index].low is not None:
-                    price = Price((data[index].high + data[index].low) / 2)
+                entry = data[index]
+                if entry.high is not None and entry.low is not None:
+                    price = Price((entry.high + entry.low) / 2)
 
         else:
             # no price found in the historical data from/to asset, try alternatives
@@ -1,10 +1,12 @@
 import logging
+import time
 from json.decoder import JSONDecodeError
 from typing import Any, Dict, List, Optional, Union, overload
 
 import gevent
 import requests
 from eth_utils.address import to_checksum_address
+from gevent.lock import Semaphore
 from typing_extensions import Literal
 
 from rotkehlchen.db.dbhandler import DBHandler
@@ -15,9 +17,13 @@ from rotkehlchen.serialization.deserialize import deserialize_timestamp
 from rotkehlchen.typing import ChecksumEthAddress, EthereumTransaction, ExternalService, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import convert_to_int, hex_or_bytes_to_int, hexstring_to_bytes
+from rotkehlchen.utils.profiling import profile_session
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 ETHERSCAN_TX_QUERY_LIMIT = 10000
+# Etherscan allows 5 calls per second per API key. All queries share this budget
+# so that concurrent callers don't just end up backing off after rate limit errors
+ETHERSCAN_MIN_SECONDS_BETWEEN_QUERIES = 0.2
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -84,9 +90,19 @@ class Etherscan(ExternalServiceWithApiKey):
     def __init__(self, database: DBHandler, msg_aggregator: MessagesAggregator) -> None:
         super().__init__(database=database, service_name=ExternalService.ETHERSCAN)
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = profile_session(requests.session())
         self.warning_given = False
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        self.rate_limit_lock = Semaphore()
+        self.last_query_ts = 0.0
+
+    def _wait_for_rate_limit(self) -> None:
+        """Blocks until a query can be made without exceeding etherscan's rate limit"""
+        with self.rate_limit_lock:
+            wait_seconds = self.last_query_ts + ETHERSCAN_MIN_SECONDS_BETWEEN_QUERIES - time.time()
+            if wait_seconds > 0:
+                gevent.sleep(wait_seconds)
+            self.last_query_ts = time.time()
 
     @overload  # noqa: F811
     def _query(  # pylint: disable=no-self-use
@@ -171,6 +187,7 @@ class Etherscan(ExternalServiceWithApiKey):
         backoff = 1
         backoff_limit = 33
         while backoff < backoff_limit:
+            self._wait_for_rate_limit()
             try:
                 response = self.session.get(query_str)
             except requests.exceptions.RequestException as e:
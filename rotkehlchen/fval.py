@@ -1,5 +1,5 @@
 from decimal import Decimal, InvalidOperation
-from typing import Any, Union
+from typing import Any, Union, cast
 
 from rotkehlchen.errors import ConversionError
 
@@ -22,6 +22,14 @@ class FVal():
 
     def __init__(self, data: AcceptableFValInitInput = 0):
 
+        # Fast path for the inputs given by the FVal operations themselves
+        if data.__class__ is Decimal:
+            self.num = cast(Decimal, data)
+            return
+        if data.__class__ is FVal:
+            self.num = cast(FVal, data).num
+            return
+
         try:
             if isinstance(data, float):
                 self.num = Decimal(str(data))
@@ -52,76 +60,95 @@ class FVal():
         return 'FVal({})'.format(str(self.num))
 
     def __gt__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('1')
+        if other.__class__ is FVal:
+            return self.num > other.num  # type: ignore
+        return self.num > evaluate_input(other)
 
     def __lt__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('-1')
+        if other.__class__ is FVal:
+            return self.num < other.num  # type: ignore
+        return self.num < evaluate_input(other)
 
     def __le__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('-1'), Decimal('0'))
+        if other.__class__ is FVal:
+            return self.num <= other.num  # type: ignore
+        return self.num <= evaluate_input(other)
 
     def __ge__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('1'), Decimal('0'))
+        if other.__class__ is FVal:
+            return self.num >= other.num  # type: ignore
+        return self.num >= evaluate_input(other)
 
     def __eq__(self, other: object) -> bool:
-        evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('0')
+        if other.__class__ is FVal:
+            evaluated_other = other.num  # type: ignore
+        else:
+            evaluated_other = evaluate_input(other)
+
+        if self.num == evaluated_other:
+            return True
+        # Unlike the ordering comparisons Decimal equality does not signal NaNs
+        if self.num.is_nan() or isinstance(evaluated_other, Decimal) and evaluated_other.is_nan():
+            self.num.compare_signal(evaluated_other)
+        return False
 
     def __add__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__add__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num + other.num)  # type: ignore
+        return _fval_from_decimal(self.num + evaluate_input(other))
 
     def __sub__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__sub__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num - other.num)  # type: ignore
+        return _fval_from_decimal(self.num - evaluate_input(other))
 
     def __mul__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__mul__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num * other.num)  # type: ignore
+        return _fval_from_decimal(self.num * evaluate_input(other))
 
     def __truediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__truediv__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num / other.num)  # type: ignore
+        return _fval_from_decimal(self.num / evaluate_input(other))
 
     def __floordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__floordiv__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num // other.num)  # type: ignore
+        return _fval_from_decimal(self.num // evaluate_input(other))
 
     def __pow__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = evaluate_input(other)
-        return FVal(self.num.__pow__(evaluated_other))
+        if other.__class__ is FVal:
+            return _fval_from_decimal(self.num ** other.num)  # type: ignore
+        return _fval_from_decimal(self.num ** evaluate_input(other))
 
     def __radd__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__radd__(evaluated_other))
+        return _fval_from_decimal(evaluated_other + self.num)
 
     def __rsub__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rsub__(evaluated_other))
+        return _fval_from_decimal(evaluated_other - self.num)
 
     def __rmul__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rmul__(evaluated_other))
+        return _fval_from_decimal(evaluated_other * self.num)
 
     def __rtruediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rtruediv__(evaluated_other))
+        return _fval_from_decimal(evaluated_other / self.num)
 
     def __rfloordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rfloordiv__(evaluated_other))
+        return _fval_from_decimal(evaluated_other // self.num)
 
     def __mod__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__mod__(evaluated_other))
+        return _fval_from_decimal(self.num % evaluated_other)
 
     def __rmod__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rmod__(evaluated_other))
+        return _fval_from_decimal(evaluated_other % self.num)
 
     def __float__(self) -> float:
         return float(self.num)
@@ -129,10 +156,10 @@ class FVal():
     # --- Unary operands
 
     def __neg__(self) -> 'FVal':
-        return FVal(self.num.__neg__())
+        return _fval_from_decimal(-self.num)
 
     def __abs__(self) -> 'FVal':
-        return FVal(self.num.copy_abs())
+        return _fval_from_decimal(self.num.copy_abs())
 
     # --- Other operations
 
@@ -143,7 +170,7 @@ class FVal():
         """
         evaluated_other = evaluate_input(other)
         evaluated_third = evaluate_input(third)
-        return FVal(self.num.fma(evaluated_other, evaluated_third))
+        return _fval_from_decimal(self.num.fma(evaluated_other, evaluated_third))
 
     def to_percentage(self, precision: int = 4) -> str:
         return '{:.{}%}'.format(self.num, precision)
@@ -161,13 +188,25 @@ class FVal():
         return int(self.num)
 
     def is_close(self, other: AcceptableFValInitInput, max_diff: str = "1e-6") -> bool:
-        evaluated_max_diff = FVal(max_diff)
+        evaluated_max_diff = Decimal(max_diff)
 
         if not isinstance(other, FVal):
             other = FVal(other)
 
         diff_num = abs(self.num - other.num)
-        return diff_num <= evaluated_max_diff.num
+        return diff_num <= evaluated_max_diff
+
+
+def _fval_from_decimal(num: Decimal) -> FVal:
+    """Creates an FVal out of the Decimal result of an operation
+
+    This skips the input type checks of the constructor since the input is known
+    to be a Decimal. Operations are the hot path of all accounting code so this
+    saves quite some time.
+    """
+    value = object.__new__(FVal)
+    value.num = num
+    return value
 
 
 def evaluate_input(other: Any) -> Union[Decimal, int]:
@@ -1,11 +1,18 @@
 import logging
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from gevent.pool import Pool
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.assets import A_USD
 from rotkehlchen.constants.misc import ZERO
-from rotkehlchen.errors import NoPriceForGivenTimestamp, RemoteError
+from rotkehlchen.errors import (
+    NoPriceForGivenTimestamp,
+    PriceQueryUnsupportedAsset,
+    RemoteError,
+    UnsupportedAsset,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -19,6 +26,10 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# How many pairs to fetch in parallel when prefetching historical prices.
+# Kept low so that we don't hit the price oracle's rate limits
+PRICE_PREFETCH_CONCURRENCY = 4
+
 
 def query_usd_price_or_use_default(
         asset: Asset,
@@ -140,3 +151,55 @@ class PriceHistorian():
             timestamp=timestamp,
             historical_data_start=instance._historical_data_start,
         )
+
+    @staticmethod
+    def _prefetch_pair_prices(
+            from_asset: Asset,
+            to_asset: Asset,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> None:
+        instance = PriceHistorian()
+        try:
+            instance._cryptocompare.prefetch_historical_data(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                historical_data_start=instance._historical_data_start,
+            )
+        except (PriceQueryUnsupportedAsset, UnsupportedAsset, RemoteError) as e:
+            # Not fatal. Any price queried for the pair later will hit the same
+            # error and it will be handled there
+            log.warning(
+                f'Could not prefetch historical prices of {from_asset.identifier} in '
+                f'{to_asset.identifier} due to {str(e)}',
+            )
+
+    @staticmethod
+    def prefetch_historical_prices(
+            price_ranges: Dict[Tuple[Asset, Asset], Tuple[Timestamp, Timestamp]],
+    ) -> None:
+        """Fills the historical price cache of each (from, to) pair for the given time range
+
+        This is meant to be called ahead of a big batch of historical price queries
+        so that each pair's history is fetched once and concurrently with the other
+        pairs, instead of at each cache miss of the batch. Failures are only logged.
+        """
+        pool = Pool(PRICE_PREFETCH_CONCURRENCY)
+        for (from_asset, to_asset), (start_ts, end_ts) in price_ranges.items():
+            if from_asset == to_asset:
+                continue
+            if from_asset.is_fiat() and to_asset.is_fiat():
+                # historical forex rates don't go through cryptocompare's hourly data
+                continue
+
+            pool.spawn(
+                PriceHistorian._prefetch_pair_prices,
+                from_asset=from_asset,
+                to_asset=to_asset,
+                start_ts=start_ts,
+                end_ts=end_ts,
+            )
+
+        pool.join()
@@ -0,0 +1,259 @@
+import logging
+import mmap
+import os
+import struct
+from decimal import Context, Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union, overload
+
+from rotkehlchen.errors import DeserializationError
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import Price, Timestamp
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+PRICE_STORE_MAGIC = b'RKPH'
+PRICE_STORE_VERSION = 3
+# magic, version, start_time, end_time
+HEADER = struct.Struct('<4sBqq')
+# time, high, low
+RECORD = struct.Struct('<q16s16s')
+# Prices are stored as decimal floating point numbers. A signed 120 bit coefficient
+# followed by a signed 8 bit decimal exponent.
+PRICE = struct.Struct('<15sb')
+PRICE_SIGNIFICANT_DIGITS = 35
+PRICE_MIN_EXPONENT = -127
+PRICE_MAX_EXPONENT = 127
+# Exponent marking a price missing from the queried data
+PRICE_MISSING_EXPONENT = -128
+
+
+class PriceHistoryEntry(NamedTuple):
+    time: Timestamp
+    low: Optional[Price]
+    high: Optional[Price]
+
+
+def _pack_price(value: Any) -> bytes:
+    """Packs a histohour price into a decimal coefficient and exponent
+
+    Up to PRICE_SIGNIFICANT_DIGITS significant digits are kept. Only digits smaller
+    than 10^PRICE_MIN_EXPONENT are lost, so prices are kept as given in practice.
+    A missing price is packed as such.
+
+    May raise:
+    - DeserializationError if the value is not a number or is too big to store
+    """
+    if value is None:
+        return PRICE.pack(bytes(PRICE.size - 1), PRICE_MISSING_EXPONENT)
+
+    try:
+        number = FVal(value).num
+    except ValueError as e:
+        raise DeserializationError(f'Invalid price {value} in the price history') from e
+    if not number.is_finite():
+        raise DeserializationError(f'Invalid price {value} in the price history')
+
+    context = Context(prec=PRICE_SIGNIFICANT_DIGITS)
+    number = context.normalize(number)
+    if number.as_tuple().exponent < PRICE_MIN_EXPONENT:
+        number = context.quantize(number, Decimal(1).scaleb(PRICE_MIN_EXPONENT))
+    sign, digits, exponent = number.as_tuple()
+    if exponent > PRICE_MAX_EXPONENT:
+        raise DeserializationError(f'Price {value} is too big for the price history')
+
+    coefficient = int(''.join(str(x) for x in digits)) * (-1 if sign else 1)
+    return PRICE.pack(
+        coefficient.to_bytes(PRICE.size - 1, byteorder='little', signed=True),
+        exponent,
+    )
+
+
+def _unpack_price(data: bytes) -> Optional[Price]:
+    coefficient, exponent = PRICE.unpack(data)
+    if exponent == PRICE_MISSING_EXPONENT:
+        return None
+    scaled = int.from_bytes(coefficient, byteorder='little', signed=True)
+    return Price(FVal(Decimal(scaled).scaleb(exponent, Context(prec=PRICE_SIGNIFICANT_DIGITS))))
+
+
+def _pack_entries(data: List[Dict[str, Any]]) -> bytes:
+    """Packs a list of histohour dict entries into consecutive binary records
+
+    May raise:
+    - DeserializationError if an entry has an invalid price
+    """
+    return b''.join(
+        RECORD.pack(
+            entry['time'],
+            _pack_price(entry['high']),
+            _pack_price(entry['low']),
+        ) for entry in data
+    )
+
+
+class HourlyPriceSeries(Sequence[PriceHistoryEntry]):
+    """A read only, memory mapped view over the stored hourly prices of a pair
+
+    Entries are decoded only when accessed so opening a series costs the same
+    no matter how long its history is. Consecutive entries are exactly an hour
+    apart so the entry of any timestamp is found without searching.
+    """
+
+    def __init__(self, filepath: Path) -> None:
+        """May raise:
+        - OSError if the file can't be opened or mapped
+        - DeserializationError if the file is not a valid price store file
+        """
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise DeserializationError(f'Price store file {filepath} is too small')
+
+        magic, version, start_time, end_time = HEADER.unpack_from(self._mmap, 0)
+        if magic != PRICE_STORE_MAGIC or version != PRICE_STORE_VERSION:
+            self.close()
+            raise DeserializationError(f'Price store file {filepath} has an unknown format')
+
+        self.start_time = Timestamp(start_time)
+        self.end_time = Timestamp(end_time)
+        self._length = (len(self._mmap) - HEADER.size) // RECORD.size
+        self.first_time = self._read_entry(0).time if self._length != 0 else self.start_time
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _read_entry(self, index: int) -> PriceHistoryEntry:
+        time, high, low = RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size)
+        return PriceHistoryEntry(
+            time=Timestamp(time),
+            low=_unpack_price(low),
+            high=_unpack_price(high),
+        )
+
+    def hour_index(self, timestamp: Timestamp) -> int:
+        """Returns the index of the entry of the hour timestamp falls in
+
+        The index is not checked against the bounds of the series
+        """
+        return (timestamp - self.first_time) // 3600
+
+    @overload
+    def __getitem__(self, index: int) -> PriceHistoryEntry:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[PriceHistoryEntry]:  # noqa: F811
+        ...
+
+    def __getitem__(  # noqa: F811
+            self,
+            index: Union[int, slice],
+    ) -> Union[PriceHistoryEntry, List[PriceHistoryEntry]]:
+        if isinstance(index, slice):
+            return [self._read_entry(i) for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError('HourlyPriceSeries index out of range')
+        return self._read_entry(index)
+
+    def __iter__(self) -> Iterator[PriceHistoryEntry]:
+        for index in range(self._length):
+            yield self._read_entry(index)
+
+
+def write_price_store_file(
+        filepath: Path,
+        data: List[Dict[str, Any]],
+        start_time: Timestamp,
+        end_time: Timestamp,
+) -> None:
+    """Writes a list of histohour entries to a price store file replacing any existing one
+
+    The file is first written next to the target and then moved in place so that
+    a crash can never leave behind a half written series.
+
+    May raise:
+    - OSError if the file can't be written
+    - DeserializationError if an entry has an invalid price
+    """
+    log.info(
+        'Writing price store file',
+        filepath=filepath,
+        start_time=start_time,
+        end_time=end_time,
+        entries=len(data),
+    )
+    records = _pack_entries(data)
+    tmp_filepath = filepath.with_suffix('.tmp')
+    with open(tmp_filepath, 'wb') as f:
+        f.write(HEADER.pack(PRICE_STORE_MAGIC, PRICE_STORE_VERSION, start_time, end_time))
+        f.write(records)
+    os.replace(tmp_filepath, filepath)
+
+
+def append_price_store_file(
+        filepath: Path,
+        data: List[Dict[str, Any]],
+        end_time: Timestamp,
+) -> None:
+    """Appends histohour entries to an existing price store file and moves its end time
+
+    The entries are written before the header so a crash can at worst leave behind
+    entries past the end time, which are still valid prices. A partially written
+    record left by such a crash is dropped before appending.
+
+    Each entry has to be exactly an hour after the one before it, and the first one
+    an hour after the last stored record, since the series is indexed by hour.
+
+    May raise:
+    - OSError if the file can't be opened or written
+    - DeserializationError if the file is not a valid price store file, if the
+    entries would not continue it hour by hour or if an entry has an invalid price
+    """
+    log.info(
+        'Appending to price store file',
+        filepath=filepath,
+        end_time=end_time,
+        entries=len(data),
+    )
+    with open(filepath, 'r+b') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise DeserializationError(f'Price store file {filepath} is too small')
+
+        magic, version, start_time, _ = HEADER.unpack(header)
+        if magic != PRICE_STORE_MAGIC or version != PRICE_STORE_VERSION:
+            raise DeserializationError(f'Price store file {filepath} has an unknown format')
+
+        records_size = f.seek(0, os.SEEK_END) - HEADER.size
+        records_end = HEADER.size + records_size - records_size % RECORD.size
+        expected_time = None
+        if records_end != HEADER.size:
+            f.seek(records_end - RECORD.size)
+            expected_time = RECORD.unpack(f.read(RECORD.size))[0] + 3600
+        for entry in data:
+            if expected_time is not None and entry['time'] != expected_time:
+                raise DeserializationError(
+                    f'Can not append an entry at {entry["time"]} to price store file '
+                    f'{filepath}. Expected an entry at {expected_time}',
+                )
+            expected_time = entry['time'] + 3600
+
+        records = _pack_entries(data)
+        f.truncate(records_end)
+        f.seek(records_end)
+        f.write(records)
+        f.flush()
+        f.seek(0)
+        f.write(HEADER.pack(magic, version, start_time, end_time))
@@ -3,9 +3,10 @@ from __future__ import unicode_literals  # isort:skip
 import logging
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional
 
 import requests
+from gevent.event import AsyncResult
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.ethereum.defi.price import handle_defi_price_query
@@ -23,11 +24,12 @@ from rotkehlchen.constants.assets import (
     A_YFI,
     FIAT_CURRENCIES,
 )
-from rotkehlchen.errors import PriceQueryUnsupportedAsset, RemoteError, UnableToDecryptRemoteData
+from rotkehlchen.errors import RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import Price, Timestamp
 from rotkehlchen.utils.misc import request_get_dict, retry_calls, timestamp_to_date, ts_now
+from rotkehlchen.utils.profiling import record_price_cache
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 if TYPE_CHECKING:
@@ -70,6 +72,15 @@ SPECIAL_SYMBOLS = (
     'fcrvRenWBTC',
 )
 
+# For how many seconds a queried current price is reused
+CURRENT_PRICE_CACHE_SECS = 300
+
+
+class CachedPriceEntry(NamedTuple):
+    price: Price
+    time: Timestamp
+
+
 ASSETS_UNDERLYING_BTC = (
     'fcrvRenWBTC',
     'frenBTC',
@@ -141,6 +152,9 @@ def _query_exchanges_rateapi(base: Asset, quote: Asset) -> Optional[Price]:
 class Inquirer():
     __instance: Optional['Inquirer'] = None
     _cached_forex_data: Dict
+    _cached_current_price: Dict[Asset, CachedPriceEntry]
+    # The current price queries that are in progress so that concurrent callers can wait on them
+    _current_price_queries: Dict[Asset, AsyncResult]
     _data_directory: Path
     _cryptocompare: 'Cryptocompare'
     _coingecko: 'Coingecko'
@@ -162,6 +176,8 @@ class Inquirer():
         Inquirer.__instance = object.__new__(cls)
 
         Inquirer.__instance._data_directory = data_dir
+        Inquirer.__instance._cached_current_price = {}
+        Inquirer.__instance._current_price_queries = {}
         Inquirer._cryptocompare = cryptocompare
         Inquirer._coingecko = coingecko
         filename = data_dir / 'price_history_forex.json'
@@ -180,67 +196,126 @@ class Inquirer():
         Inquirer()._ethereum = ethereum
 
     @staticmethod
-    def _cryptocompare_find_usd_price(asset: Asset) -> Price:
-        """Returns the current USD price of the asset
-
-        Return Price(ZERO) if price can't be found.
-
-        May raise:
-        - RemoteError if the cryptocompare query has a problem
-        """
-        try:
-            result = Inquirer()._cryptocompare.query_endpoint_price(
-                from_asset=asset,
-                to_asset=A_USD,
-            )
-        except PriceQueryUnsupportedAsset:
-            log.error(
-                'Cryptocompare usd price for asset failed since it is not known to cryptocompare',
-                asset=asset,
-            )
-            return Price(ZERO)
-        if 'USD' not in result:
-            log.error('Cryptocompare usd price query failed', asset=asset)
+    def _find_special_symbol_usd_price(asset: Asset) -> Price:
+        ethereum = Inquirer()._ethereum
+        assert ethereum, 'Inquirer should never be called before the injection of ethereum'
+        underlying_asset_price = get_underlying_asset_price(asset.identifier)
+        usd_price = handle_defi_price_query(
+            ethereum=ethereum,
+            token_symbol=asset.identifier,
+            underlying_asset_price=underlying_asset_price,
+        )
+        if usd_price is None:
             return Price(ZERO)
 
-        price = Price(FVal(result['USD']))
-        log.debug('Got usd price from cryptocompare', asset=asset, price=price)
-        return price
+        return Price(usd_price)
 
     @staticmethod
-    def find_usd_price(asset: Asset) -> Price:
-        """Returns the current USD price of the asset
+    def _query_usd_prices(assets: List[Asset]) -> Dict[Asset, Price]:
+        """Queries the current USD prices of the assets
 
-        Returns Price(ZERO) if all options have been exhausted and errors are logged in the logs
+        Asks cryptocompare for all of them at once and then coingecko for all
+        those that cryptocompare could not price. Assets for which no price could
+        be found get Price(ZERO).
         """
-        if asset.identifier in SPECIAL_SYMBOLS:
-            ethereum = Inquirer()._ethereum
-            assert ethereum, 'Inquirer should never be called before the injection of ethereum'
-            underlying_asset_price = get_underlying_asset_price(asset.identifier)
-            usd_price = handle_defi_price_query(
-                ethereum=ethereum,
-                token_symbol=asset.identifier,
-                underlying_asset_price=underlying_asset_price,
-            )
-            if usd_price is None:
-                return Price(ZERO)
+        instance = Inquirer()
+        prices: Dict[Asset, Price] = {}
+        remaining = []
+        for asset in assets:
+            if asset.identifier in SPECIAL_SYMBOLS:
+                prices[asset] = instance._find_special_symbol_usd_price(asset)
+            else:
+                remaining.append(asset)
+
+        if len(remaining) != 0:
+            try:
+                prices.update(instance._cryptocompare.query_endpoint_pricemulti(
+                    from_assets=remaining,
+                    to_asset=A_USD,
+                ))
+            except RemoteError as e:
+                log.error(f'Cryptocompare usd prices query failed due to {str(e)}')
+            remaining = [x for x in remaining if prices.get(x, ZERO) == ZERO]
+
+        if len(remaining) != 0:
+            try:
+                prices.update(instance._coingecko.simple_prices(
+                    from_assets=remaining,
+                    to_asset=A_USD,
+                ))
+            except RemoteError as e:
+                log.error(f'Coingecko usd prices query failed due to {str(e)}')
+
+        for asset in assets:
+            if prices.get(asset, ZERO) == ZERO:
+                log.error('Could not find the usd price of an asset', asset=asset)
+                prices[asset] = Price(ZERO)
+            else:
+                log.debug('Got usd price', asset=asset, price=prices[asset])
 
-            return Price(usd_price)
+        return prices
 
+    @staticmethod
+    def find_usd_prices(assets: Iterable[Asset], ignore_cache: bool = False) -> Dict[Asset, Price]:
+        """Returns the current USD prices of the assets
+
+        Prices found in the last CURRENT_PRICE_CACHE_SECS are reused unless ignore_cache
+        is True. If another caller is already querying the price of an asset then
+        its result is awaited instead of querying again. All remaining assets are
+        queried together.
+
+        Assets whose price could not be found get Price(ZERO) and errors are logged
+        """
+        instance = Inquirer()
+        now = ts_now()
+        prices: Dict[Asset, Price] = {}
+        pending: Dict[Asset, AsyncResult] = {}
+        to_query: List[Asset] = []
+        for asset in assets:
+            if asset in prices or asset in pending:
+                continue
+
+            cached = instance._cached_current_price.get(asset, None)
+            if (
+                not ignore_cache and cached is not None and
+                now - cached.time <= CURRENT_PRICE_CACHE_SECS
+            ):
+                prices[asset] = cached.price
+                continue
+
+            query = instance._current_price_queries.get(asset, None)
+            if query is None:
+                query = AsyncResult()
+                instance._current_price_queries[asset] = query
+                to_query.append(asset)
+            pending[asset] = query
+
+        queried: Dict[Asset, Price] = {}
         try:
-            price = Inquirer()._cryptocompare_find_usd_price(asset)
-        except RemoteError:
-            price = Price(ZERO)
+            if len(to_query) != 0:
+                queried = instance._query_usd_prices(to_query)
+        finally:
+            record_price_cache(hits=len(prices), misses=len(pending))
+            # Always wake up the waiters, even if the query failed with an exception
+            queried_at = ts_now()
+            for asset in to_query:
+                price = queried.get(asset, Price(ZERO))
+                if price != ZERO:
+                    instance._cached_current_price[asset] = CachedPriceEntry(price, queried_at)
+                instance._current_price_queries.pop(asset).set(price)
+
+        for asset, query in pending.items():
+            prices[asset] = query.get()
+
+        return prices
 
-        if price == Price(ZERO):
-            try:
-                price = Inquirer()._coingecko.simple_price(from_asset=asset, to_asset=A_USD)
-            except RemoteError as e:
-                log.error(
-                    f'Coingecko usd price query for {asset.identifier} failed due to {str(e)}',
-                )
-                price = Price(ZERO)
-        return price
+    @staticmethod
+    def find_usd_price(asset: Asset, ignore_cache: bool = False) -> Price:
+        """Returns the current USD price of the asset
+
+        Returns Price(ZERO) if all options have been exhausted and errors are logged in the logs
+        """
+        return Inquirer().find_usd_prices([asset], ignore_cache=ignore_cache)[asset]
 
     @staticmethod
     def get_fiat_usd_exchange_rates(
@@ -1,4 +1,3 @@
-import base64
 import logging
 import shutil
 from enum import Enum
@@ -21,6 +20,11 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 
+def _b64_decoded_size(data: bytes) -> int:
+    """Returns the size of the given base64 encoded data without decoding it"""
+    return len(data) // 4 * 3 - data[-2:].count(b'=')
+
+
 class CanSync(Enum):
     YES = 0
     NO = 1
@@ -56,8 +60,6 @@ class PremiumSyncManager():
         if self.premium is None:
             return SyncCheckResult(can_sync=CanSync.NO, message='', payload=None)
 
-        b64_encoded_data, our_hash = self.data.compress_and_encrypt_db(self.password)
-
         try:
             metadata = self.premium.query_last_data_metadata()
         except RemoteError as e:
@@ -71,18 +73,22 @@ class PremiumSyncManager():
             # If it's not a new account and the db setting for premium syncing is off stop
             return SyncCheckResult(can_sync=CanSync.NO, message='', payload=None)
 
+        b64_encoded_data, our_hash = self.data.compress_and_encrypt_db(
+            password=self.password,
+            known_hash=metadata.data_hash,
+        )
         log.debug(
             'CAN_PULL',
             ours=our_hash,
             theirs=metadata.data_hash,
         )
-        if our_hash == metadata.data_hash:
+        if b64_encoded_data is None:
             log.debug('sync from server stopped -- same hash')
             # same hash -- no need to get anything
             return SyncCheckResult(can_sync=CanSync.NO, message='', payload=None)
 
         our_last_write_ts = self.data.db.get_last_write_ts()
-        data_bytes_size = len(base64.b64decode(b64_encoded_data))
+        data_bytes_size = _b64_decoded_size(b64_encoded_data)
 
         local_more_recent = our_last_write_ts >= metadata.last_modify_ts
         local_bigger = data_bytes_size >= metadata.data_size
@@ -159,14 +165,18 @@ class PremiumSyncManager():
         except RemoteError as e:
             log.debug('upload to server -- fetching metadata error', error=str(e))
             return False
-        b64_encoded_data, our_hash = self.data.compress_and_encrypt_db(self.password)
+        # Unless forced, the DB is only compressed and encrypted if it changed
+        b64_encoded_data, our_hash = self.data.compress_and_encrypt_db(
+            password=self.password,
+            known_hash=None if force_upload else metadata.data_hash,
+        )
 
         log.debug(
             'CAN_PUSH',
             ours=our_hash,
             theirs=metadata.data_hash,
         )
-        if our_hash == metadata.data_hash and not force_upload:
+        if b64_encoded_data is None:
             log.debug('upload to server stopped -- same hash')
             # same hash -- no need to upload anything
             return False
@@ -180,7 +190,7 @@ class PremiumSyncManager():
             )
             return False
 
-        data_bytes_size = len(base64.b64decode(b64_encoded_data))
+        data_bytes_size = _b64_decoded_size(b64_encoded_data)
         if data_bytes_size < metadata.data_size and not force_upload:
             # Let's be conservative.
             # TODO: Here perhaps prompt user in the future
@@ -5,8 +5,9 @@ import logging.config
 import os
 import time
 from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, overload
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union, overload
 
 import gevent
 from gevent.lock import Semaphore
@@ -14,6 +15,7 @@ from typing_extensions import Literal
 
 from rotkehlchen.accounting.accountant import Accountant
 from rotkehlchen.assets.resolver import AssetResolver
+from rotkehlchen.balances.aggregator import BalanceSheetAggregator
 from rotkehlchen.balances.manual import account_for_manually_tracked_balances
 from rotkehlchen.chain.bitcoin.xpub import XpubManager
 from rotkehlchen.chain.ethereum.manager import (
@@ -24,7 +26,6 @@ from rotkehlchen.chain.ethereum.manager import (
 from rotkehlchen.chain.ethereum.trades import AMMTrade
 from rotkehlchen.chain.manager import BlockchainBalancesUpdate, ChainManager
 from rotkehlchen.config import default_data_directory
-from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.data.importer import DataImporter
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.settings import DBSettings, ModifiableDBSettings
@@ -42,7 +43,6 @@ from rotkehlchen.externalapis.beaconchain import BeaconChain
 from rotkehlchen.externalapis.coingecko import Coingecko
 from rotkehlchen.externalapis.cryptocompare import Cryptocompare
 from rotkehlchen.externalapis.etherscan import Etherscan
-from rotkehlchen.fval import FVal
 from rotkehlchen.greenlets import GreenletManager
 from rotkehlchen.history import PriceHistorian, TradesHistorian
 from rotkehlchen.icons import IconManager
@@ -67,7 +67,6 @@ from rotkehlchen.typing import (
 )
 from rotkehlchen.usage_analytics import maybe_submit_usage_analytics
 from rotkehlchen.user_messages import MessagesAggregator
-from rotkehlchen.utils.misc import combine_stat_dicts, dict_get_sumof, merge_dicts
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.bitcoin.xpub import XpubData
@@ -86,10 +85,40 @@ LIMITS_MAPPING = {
 ICONS_BATCH_SIZE = 5
 ICONS_QUERY_SLEEP = 10
 
+# Seconds after which a balances source is given up when querying all balances
+EXCHANGE_BALANCES_QUERY_TIMEOUT = 120
+BLOCKCHAIN_BALANCES_QUERY_TIMEOUT = 600
+
 
 TRADES_LIST = List[Union[Trade, AMMTrade]]
 
 
+def _timed_balances_query(
+        source: str,
+        timeout: int,
+        query_fn: Callable[[], Optional[Dict[str, Any]]],
+) -> Tuple[str, Optional[Dict[str, Any]], int]:
+    """Runs the balances query of a single source within the given timeout
+
+    Returns the source name, its balances or None if the query failed or timed
+    out and the milliseconds the query took.
+    """
+    start = time.time()
+    result = None
+    timer = gevent.Timeout(timeout)
+    timer.start()
+    try:
+        result = query_fn()
+    except gevent.Timeout as e:
+        if e is not timer:
+            raise
+        log.error(f'Querying {source} balances timed out after {timeout} seconds')
+    finally:
+        timer.close()
+
+    return source, result, int((time.time() - start) * 1000)
+
+
 class Rotkehlchen():
     def __init__(self, args: argparse.Namespace) -> None:
         """Initialize the Rotkehlchen object
@@ -692,86 +721,72 @@ class Rotkehlchen():
         to be saved in the DB
         If ignore_cache is True then all underlying calls that have a cache ignore it
 
-        Returns a dictionary with the queried balances.
+        All exchanges and the blockchains are queried concurrently and each one
+        of them is given up if it takes longer than its timeout.
+
+        Returns a dictionary with the queried balances and the time in
+        milliseconds the query of each source took.
         """
         log.info('query_balances called', requested_save_data=requested_save_data)
 
-        balances = {}
-        problem_free = True
-        for _, exchange in self.exchange_manager.connected_exchanges.items():
+        def query_exchange_balances(exchange: ExchangeInterface) -> Optional[Dict[str, Any]]:
             exchange_balances, _ = exchange.query_balances(ignore_cache=ignore_cache)
-            # If we got an error, disregard that exchange but make sure we don't save data
-            if not isinstance(exchange_balances, dict):
-                problem_free = False
-            else:
-                balances[exchange.name] = exchange_balances
-
+            return exchange_balances
+
+        def query_blockchain_balances() -> Optional[Dict[str, Any]]:
+            try:
+                blockchain_result = self.chain_manager.query_balances(
+                    blockchain=None,
+                    force_token_detection=ignore_cache,
+                    ignore_cache=ignore_cache,
+                )
+            except (RemoteError, EthSyncError) as e:
+                log.error(f'Querying blockchain balances failed due to: {str(e)}')
+                return None
+
+            return blockchain_result.totals.to_dict()
+
+        # Query all exchanges and the blockchains concurrently
+        greenlets = [
+            gevent.spawn(
+                _timed_balances_query,
+                source=exchange.name,
+                timeout=EXCHANGE_BALANCES_QUERY_TIMEOUT,
+                query_fn=partial(query_exchange_balances, exchange),
+            ) for exchange in self.exchange_manager.connected_exchanges.values()
+        ]
+        greenlets.append(gevent.spawn(
+            _timed_balances_query,
+            source='blockchain',
+            timeout=BLOCKCHAIN_BALANCES_QUERY_TIMEOUT,
+            query_fn=query_blockchain_balances,
+        ))
+
+        aggregator = BalanceSheetAggregator()
+        query_times_ms = {}
+        problem_free = True
         try:
-            blockchain_result = self.chain_manager.query_balances(
-                blockchain=None,
-                force_token_detection=ignore_cache,
-                ignore_cache=ignore_cache,
-            )
-            serialized_chain_result = blockchain_result.totals.to_dict()
-            balances['blockchain'] = serialized_chain_result['assets']
-        except (RemoteError, EthSyncError) as e:
-            problem_free = False
-            log.error(f'Querying blockchain balances failed due to: {str(e)}')
-
-        balances = account_for_manually_tracked_balances(db=self.data.db, balances=balances)
-
-        combined = combine_stat_dicts([v for k, v in balances.items()])
-        total_usd_per_location = [(k, dict_get_sumof(v, 'usd_value')) for k, v in balances.items()]
-        liabilities = serialized_chain_result['liabilities']  # atm liabilities only on chain
-
-        # calculate net usd value
-        net_usd = ZERO
-        for _, v in combined.items():
-            net_usd += FVal(v['usd_value'])
-        # subtract liabilities
-        liabilities_total_usd = sum(x['usd_value'] for _, x in liabilities.items())
-        net_usd -= liabilities_total_usd
-
-        stats: Dict[str, Any] = {
-            'location': {
-            },
-            'net_usd': net_usd,
-        }
-        for entry in total_usd_per_location:
-            name = entry[0]
-            total = entry[1]
-            if name == 'blockchain':  # blockchain is the only location with liabilities atm
-                total -= liabilities_total_usd
-
-            if net_usd != ZERO:
-                percentage = (total / net_usd).to_percentage()
-            else:
-                percentage = '0%'
-            stats['location'][name] = {
-                'usd_value': total,
-                'percentage_of_net_value': percentage,
-            }
-
-        for k, v in combined.items():
-            if net_usd != ZERO:
-                percentage = (v['usd_value'] / net_usd).to_percentage()
-            else:
-                percentage = '0%'
-            combined[k]['percentage_of_net_value'] = percentage
-
-        for k, v in liabilities.items():
-            if net_usd != ZERO:
-                percentage = (v['usd_value'] / net_usd).to_percentage()
-            else:
-                percentage = '0%'
-            liabilities[k]['percentage_of_net_value'] = percentage
-
-        balance_sheet = {
-            'assets': combined,
-            'liabilities': liabilities,
-        }
+            for greenlet in gevent.iwait(greenlets):
+                source, source_balances, duration_ms = greenlet.get()
+                query_times_ms[source] = duration_ms
+                # If we got an error, disregard that source but make sure we don't save data
+                if not isinstance(source_balances, dict):
+                    problem_free = False
+                elif source == 'blockchain':
+                    aggregator.add_location_balances('blockchain', source_balances['assets'])
+                    # atm liabilities only on chain
+                    aggregator.add_location_liabilities(
+                        'blockchain',
+                        source_balances['liabilities'],
+                    )
+                else:
+                    aggregator.add_location_balances(source, source_balances)
+        finally:
+            gevent.killall(greenlets)
 
-        result_dict = merge_dicts(balance_sheet, stats)
+        account_for_manually_tracked_balances(db=self.data.db, aggregator=aggregator)
+        result_dict = aggregator.serialize()
+        result_dict['query_times_ms'] = query_times_ms
 
         allowed_to_save = requested_save_data or self.data.should_save_balances()
 
@@ -151,3 +151,41 @@ def test_query_async_task_that_died(rotkehlchen_api_server_with_exchanges):
     assert json_data['result']['outcome']['result'] is None
     msg = 'The backend query task died unexpectedly: BOOM!'
     assert json_data['result']['outcome']['message'] == msg
+
+
+@pytest.mark.parametrize('added_exchanges', [('binance',)])
+def test_query_async_task_profile(rotkehlchen_api_server_with_exchanges):
+    """Test that the profile of an async task can be queried after it finished"""
+    server = rotkehlchen_api_server_with_exchanges
+    binance = server.rest_api.rotkehlchen.exchange_manager.connected_exchanges['binance']
+
+    binance_patch = patch.object(binance.session, 'get', side_effect=mock_binance_balance_response)
+    with binance_patch:
+        response = requests.get(api_url_for(
+            server,
+            "named_exchanges_balances_resource",
+            name='binance',
+        ), json={'async_query': True})
+        task_id = assert_ok_async_response(response)
+        while True:
+            response = requests.get(
+                api_url_for(server, "specific_async_tasks_resource", task_id=task_id),
+            )
+            assert_proper_response(response)
+            if response.json()['result']['status'] == 'completed':
+                break
+            gevent.sleep(1)
+
+    response = requests.get(api_url_for(server, "asynctaskprofileresource", task_id=task_id))
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert result['finished'] is True
+    assert result['wall_time'] >= 0
+    assert set(result.keys()) == {'finished', 'wall_time', 'http', 'db', 'price_cache'}
+
+    response = requests.get(api_url_for(server, "asynctaskprofileresource", task_id=568))
+    assert_error_response(
+        response=response,
+        contained_in_msg='No profile for task with id 568 found',
+        status_code=HTTPStatus.NOT_FOUND,
+    )
@@ -47,7 +47,7 @@ def assert_all_balances(
 
     got_external = any(x.location == Location.EXTERNAL for x in setup.manually_tracked_balances)
 
-    assert len(result) == 4
+    assert len(result) == 5
     assert result['liabilities'] == {}
     assets = result['assets']
     assert FVal(assets['ETH']['amount']) == total_eth
@@ -64,6 +64,9 @@ def assert_all_balances(
         assert assets['EUR']['percentage_of_net_value'] is not None
 
     assert result['net_usd'] is not None
+    # Check that each queried source reports how long its query took
+    assert set(result['query_times_ms'].keys()) == {'binance', 'poloniex', 'blockchain'}
+    assert all(duration >= 0 for duration in result['query_times_ms'].values())
     # Check that the 4 locations are there
     assert len(result['location']) == 5 if got_external else 4
     assert result['location']['binance']['usd_value'] is not None
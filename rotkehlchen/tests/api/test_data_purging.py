@@ -111,7 +111,6 @@ def test_purge_ethereum_transaction_data(rotkehlchen_api_server):
             input_data=bytes(),
             nonce=1,
         )],
-        from_etherscan=True,
     )
     assert len(db.get_ethereum_transactions()) == 1
     response = requests.delete(
@@ -311,7 +311,7 @@ def test_query_transactions_over_limit(
         nonce=x,
     ) for x in range(60)])
 
-    db.add_ethereum_transactions(transactions, from_etherscan=True)
+    db.add_ethereum_transactions(transactions)
     # Also make sure to update query ranges so as not to query etherscan at all
     for address in ethereum_accounts:
         DBQueryRanges(db).update_used_query_range(
@@ -392,7 +392,7 @@ def test_query_transactions_from_to_address(
         input_data=b'',
         nonce=55,
     )]
-    db.add_ethereum_transactions(transactions, from_etherscan=True)
+    db.add_ethereum_transactions(transactions)
     # Also make sure to update query ranges so as not to query etherscan at all
     for address in ethereum_accounts:
         DBQueryRanges(db).update_used_query_range(
@@ -488,7 +488,7 @@ def test_query_transactions_removed_address(
         input_data=b'',
         nonce=0,
     )]
-    db.add_ethereum_transactions(transactions, from_etherscan=True)
+    db.add_ethereum_transactions(transactions)
     # Also make sure to update query ranges so as not to query etherscan at all
     for address in ethereum_accounts:
         DBQueryRanges(db).update_used_query_range(
@@ -594,3 +594,50 @@ def test_transaction_same_hash_same_nonce_two_tracked_accounts(
         result = assert_proper_response_with_result(response)
         assert len(result['entries']) == 2
         assert result['entries_found'] == 2
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [2])
+def test_internal_transactions_same_hash_get_distinct_nonces(
+        rotkehlchen_api_server,
+        ethereum_accounts,
+):
+    """Make sure that multiple internal transactions of the same transaction are all
+    returned and saved in the DB with distinct negative nonces
+
+    The first account receives two internal transactions and the second account one,
+    all of them from the same sender in the same transaction. Each account's query
+    only returns its own internal transactions.
+    """
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    internal_tx = """{{"blockNumber":"1","timeStamp":"1","hash":"0x9c81f44c29ff0226f835cd0a8a2f2a7eca6db52a711f8211b566fd15d3e0e8d4","from":"0x9531C059098e3d194fF87FebB587aB07B30B1306","to":"{to}","value":"{value}","contractAddress":"","input":"","type":"call","gas":"2300","gasUsed":"0","traceId":"0","isError":"0","errCode":""}}"""  # noqa: E501
+    received = {ethereum_accounts[0]: (1, 2), ethereum_accounts[1]: (3,)}
+
+    def mocked_request_dict(url, *_args, **_kwargs):
+        if '=txlistinternal&' in url:
+            address = next(x for x in ethereum_accounts if x in url)
+            txs = ','.join(internal_tx.format(to=address, value=x) for x in received[address])
+            payload = f'{{"status":"1","message":"OK","result":[{txs}]}}'
+        elif '=txlist&' in url:
+            payload = '{"status":"1","message":"OK","result":[]}'
+        elif '=getblocknobytime&' in url:
+            # we don't really care about this so just return whatever
+            payload = '{"status":"1","message":"OK","result": "1"}'
+
+        return MockResponse(200, payload)
+
+    with patch.object(rotki.etherscan.session, 'get', wraps=mocked_request_dict):
+        response = requests.get(
+            api_url_for(
+                rotkehlchen_api_server,
+                'ethereumtransactionsresource',
+            ),
+        )
+        result = assert_proper_response_with_result(response)
+
+    assert sorted(x['value'] for x in result['entries']) == ['1', '2', '3']
+    nonces = {x['nonce'] for x in result['entries']}
+    assert len(nonces) == 3 and all(x < 0 for x in nonces)
+    db_transactions = rotki.data.db.get_ethereum_transactions()
+    assert {(x.value, x.nonce) for x in db_transactions} == {
+        (int(x['value']), x['nonce']) for x in result['entries']
+    }
@@ -1,16 +1,24 @@
+import json
 import os
+import sqlite3
+import tempfile
 import time
+import zlib
 from copy import deepcopy
+from pathlib import Path
 from shutil import copyfile
 from unittest.mock import patch
 
+import gevent
 import pytest
 
 from rotkehlchen.accounting.structures import BalanceType
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.balances.manual import ManuallyTrackedBalance
+from rotkehlchen.chain.ethereum.transactions import _assign_internal_transaction_nonces
 from rotkehlchen.constants import YEAR_IN_SECONDS
 from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_EUR, A_USD
+from rotkehlchen.crypto import decrypt
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.dbhandler import DBINFO_FILENAME, DBHandler, detect_sqlcipher_version
 from rotkehlchen.db.queried_addresses import QueriedAddresses
@@ -54,19 +62,25 @@ from rotkehlchen.tests.utils.rotkehlchen import add_starting_balances
 from rotkehlchen.typing import (
     ApiKey,
     ApiSecret,
+    AssetAmount,
     AssetMovementCategory,
     BlockchainAccountData,
+    ChecksumEthAddress,
     EthereumTransaction,
     ExternalService,
     ExternalServiceApiCredentials,
     Fee,
     Location,
+    Price,
     SupportedBlockchain,
     Timestamp,
+    TradePair,
     TradeType,
 )
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.hashing import file_fingerprint
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.profiling import TaskProfile
 from rotkehlchen.utils.serialization import rlk_jsondumps
 
 TABLES_AT_INIT = [
@@ -98,6 +112,12 @@ TABLES_AT_INIT = [
     'uniswap_events',
     'eth2_deposits',
     'adex_events',
+    'exchange_trade_cursors',
+    'block_timestamps',
+    'ethereum_logs',
+    'ethereum_log_ranges',
+    'accounting_checkpoints',
+    'xpub_derived_addresses_cache',
 ]
 
 
@@ -192,6 +212,20 @@ def test_export_import_db(data_dir, username):
     assert balances == [starting_balance]
 
 
+def test_sync_db_is_compressed_at_max_level(data_dir, username):
+    """Test that the DB uploaded for sync is compressed at level 9 like all clients
+    do, since the compressed sizes of the DBs are compared across clients"""
+    data = DataHandler(data_dir, MessagesAggregator())
+    data.unlock(username, '123', create_new=True)
+    encoded_data, _ = data.compress_and_encrypt_db('123')
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tempdb = Path(tmpdirname) / 'temp.db'
+        data.db.export_unencrypted(tempdb)
+        expected = zlib.compress(tempdb.read_bytes(), level=9)
+
+    assert decrypt(b'123', encoded_data.decode()) == expected  # pylint: disable=no-member
+
+
 def test_writing_fetching_data(data_dir, username):
     msg_aggregator = MessagesAggregator()
     data = DataHandler(data_dir, msg_aggregator)
@@ -419,6 +453,41 @@ def test_upgrade_sqlcipher_v3_to_v4_with_dbinfo(user_data_dir):
     assert db.get_version() == ROTKEHLCHEN_DB_VERSION
 
 
+def test_upgrade_sqlcipher_v3_to_v4_with_dbinfo_fingerprint(user_data_dir):
+    """Test that the dbinfo fingerprint detects the sqlcipher v3 DB and that a
+    new fingerprint is written at teardown"""
+    sqlcipher_version = detect_sqlcipher_version()
+    if sqlcipher_version != 4:
+        # nothing to test
+        return
+
+    # get the v3 database file and copy it into the user's data directory
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    copyfile(
+        os.path.join(os.path.dirname(dir_path), 'data', 'sqlcipher_v3_rotkehlchen.db'),
+        user_data_dir / 'rotkehlchen.db',
+    )
+    dbinfo = {
+        'sqlcipher_version': 3,
+        'fingerprint': file_fingerprint(user_data_dir / 'rotkehlchen.db'),
+    }
+    with open(os.path.join(user_data_dir, DBINFO_FILENAME), 'w') as f:
+        f.write(rlk_jsondumps(dbinfo))
+
+    # the constructor should migrate it in-place and we should have a working DB
+    msg_aggregator = MessagesAggregator()
+    db = DBHandler(user_data_dir, '123', msg_aggregator, None)
+    assert db.get_version() == ROTKEHLCHEN_DB_VERSION
+    del db
+
+    with open(os.path.join(user_data_dir, DBINFO_FILENAME), 'r') as f:
+        dbinfo = json.loads(f.read())
+    assert dbinfo == {
+        'sqlcipher_version': 4,
+        'fingerprint': file_fingerprint(user_data_dir / 'rotkehlchen.db'),
+    }
+
+
 def test_sqlcipher_detect_version():
     class QueryMock():
         def __init__(self, version):
@@ -728,6 +797,48 @@ def test_add_trades(data_dir, username):
     assert returned_trades == [trade1, trade2, trade3]
 
 
+def test_get_trades_paginated(database):
+    """Test that trades can be filtered, counted and queried page by page"""
+    trades = [
+        Trade(
+            timestamp=Timestamp(1451606400 + (idx // 2) * 100),
+            location=Location.KRAKEN if idx % 3 == 0 else Location.BINANCE,
+            pair=TradePair('ETH_EUR') if idx % 2 == 0 else TradePair('BTC_ETH'),
+            trade_type=TradeType.BUY,
+            amount=AssetAmount(FVal(idx + 1)),
+            rate=Price(FVal('10')),
+            fee=Fee(FVal('0.01')),
+            fee_currency=A_EUR,
+            link='',
+            notes='',
+        ) for idx in range(7)
+    ]
+    database.add_trades(trades)
+    all_trades = database.get_trades()
+    assert len(all_trades) == 7
+    assert database.count_trades() == 7
+
+    for descending in (False, True):
+        pages = []
+        after = None
+        while True:
+            page = database.get_trades(limit=3, after=after, descending=descending)
+            if len(page) == 0:
+                break
+            assert len(page) <= 3
+            pages.extend(page)
+            after = (page[-1].timestamp, page[-1].identifier)
+        expected = list(reversed(all_trades)) if descending else all_trades
+        assert pages == expected
+
+    assert database.count_trades(asset=A_BTC) == 3
+    assert all('BTC' in x.pair for x in database.get_trades(asset=A_BTC))
+    assert database.count_trades(asset=A_EUR) == 4
+    assert database.count_trades(location=Location.KRAKEN, asset=A_ETH) == 3
+    assert database.count_trades(from_ts=Timestamp(1451606500)) == 5
+    assert database.count_trades(from_ts=Timestamp(1451606500), asset=A_EUR) == 3
+
+
 def test_add_margin_positions(data_dir, username):
     """Test that adding and retrieving margin positions from the DB works fine.
 
@@ -907,7 +1018,7 @@ def test_add_ethereum_transactions(data_dir, username):
     )
 
     # Add and retrieve the first 2 margins. All should be fine.
-    data.db.add_ethereum_transactions([tx1, tx2], from_etherscan=True)
+    data.db.add_ethereum_transactions([tx1, tx2])
     errors = msg_aggregator.consume_errors()
     warnings = msg_aggregator.consume_warnings()
     assert len(errors) == 0
@@ -917,7 +1028,7 @@ def test_add_ethereum_transactions(data_dir, username):
 
     # Add the last 2 transactions. Since tx2 already exists in the DB it should be
     # ignored (no errors shown for attempting to add already existing transaction)
-    data.db.add_ethereum_transactions([tx2, tx3], from_etherscan=True)
+    data.db.add_ethereum_transactions([tx2, tx3])
     errors = msg_aggregator.consume_errors()
     warnings = msg_aggregator.consume_warnings()
     assert len(errors) == 0
@@ -926,6 +1037,68 @@ def test_add_ethereum_transactions(data_dir, username):
     assert returned_transactions == [tx1, tx2, tx3]
 
 
+def test_add_internal_ethereum_transactions_again(database):
+    """Test that internal transactions keep the nonces they are given when added
+
+    Adding the same internal transactions again should skip them instead of
+    saving them again with other nonces
+    """
+    internal_txs = [EthereumTransaction(
+        tx_hash=b'1',
+        timestamp=Timestamp(1451606400),
+        block_number=1,
+        from_address=ETH_ADDRESS1,
+        to_address=ETH_ADDRESS3,
+        value=FVal(value),
+        gas=FVal('2300'),
+        gas_price=FVal('2000000000'),
+        gas_used=FVal('0'),
+        input_data=b'',
+        nonce=nonce,
+    ) for value, nonce in ((1, -1), (2, -2))]
+
+    database.add_ethereum_transactions(internal_txs[:1])
+    database.add_ethereum_transactions(internal_txs)
+    database.add_ethereum_transactions(internal_txs)
+    saved_txs = database.get_ethereum_transactions()
+    assert sorted(saved_txs, key=lambda tx: tx.nonce, reverse=True) == internal_txs
+    assert database.msg_aggregator.consume_warnings() == []
+
+
+def test_internal_transactions_of_two_addresses_same_parent(database):
+    """Test that internal transactions of the same parent transaction and sender that
+    are queried for different addresses don't collide in the DB
+
+    Querying them again should give them the same nonces so they are not saved twice
+    """
+    def make_internal_tx(to_address: ChecksumEthAddress, value: int) -> EthereumTransaction:
+        return EthereumTransaction(
+            tx_hash=b'1',
+            timestamp=Timestamp(1451606400),
+            block_number=1,
+            from_address=ETH_ADDRESS1,
+            to_address=to_address,
+            value=FVal(value),
+            gas=FVal('2300'),
+            gas_price=FVal(-1),
+            gas_used=FVal('0'),
+            input_data=b'',
+            nonce=-1,
+        )
+
+    address2_query = [make_internal_tx(ETH_ADDRESS2, 1), make_internal_tx(ETH_ADDRESS2, 1)]
+    address3_query = [make_internal_tx(ETH_ADDRESS3, 1)]
+    for _ in range(2):
+        for query in (address2_query, address3_query):
+            database.add_ethereum_transactions(_assign_internal_transaction_nonces(query))
+
+    saved_txs = database.get_ethereum_transactions()
+    assert len(saved_txs) == 3
+    assert len({tx.nonce for tx in saved_txs}) == 3
+    assert [tx.to_address for tx in saved_txs].count(ETH_ADDRESS2) == 2
+    assert database.msg_aggregator.consume_warnings() == []
+
+
 @pytest.mark.parametrize('ethereum_accounts', [[]])
 def test_non_checksummed_eth_account_in_db(database):
     """
@@ -1076,6 +1249,36 @@ def test_multiple_location_data_and_balances_same_timestamp(user_data_dir):
     assert locations[0].usd_value == '55'
 
 
+def test_save_balances_data_same_timestamp(user_data_dir):
+    """Test that saving a balance snapshot twice at the same timestamp keeps the first one"""
+    msg_aggregator = MessagesAggregator()
+    db = DBHandler(user_data_dir, '123', msg_aggregator, None)
+
+    def make_snapshot(btc_amount):
+        return {
+            'assets': {A_BTC: {'amount': FVal(btc_amount), 'usd_value': FVal('8500')}},
+            'liabilities': {A_DAI: {'amount': FVal('10'), 'usd_value': FVal('10.1')}},
+            'location': {'blockchain': {'usd_value': FVal('8489.9')}},
+            'net_usd': FVal('8489.9'),
+        }
+
+    db.save_balances_data(data=make_snapshot('1'), timestamp=Timestamp(1590676728))
+    assert len(msg_aggregator.consume_warnings()) == 0
+    db.save_balances_data(data=make_snapshot('2'), timestamp=Timestamp(1590676728))
+    assert len(msg_aggregator.consume_warnings()) == 4
+
+    balances = db.query_timed_balances(asset=A_BTC)
+    assert len(balances) == 1
+    assert balances[0].amount == '1'
+    liabilities = db.query_timed_balances(asset=A_DAI, balance_type=BalanceType.LIABILITY)
+    assert len(liabilities) == 1
+    locations = db.get_latest_location_value_distribution()
+    assert {x.location for x in locations} == {
+        Location.BLOCKCHAIN.serialize_for_db(),
+        Location.TOTAL.serialize_for_db(),
+    }
+
+
 def test_set_get_rotkehlchen_premium_credentials(data_dir, username):
     """Test that setting the premium credentials and getting them back from the DB works
     """
@@ -1175,3 +1378,113 @@ def test_remove_queried_address_on_account_remove(data_dir, username):
     )
     addresses = queried_addresses.get_queried_addresses_for_module('makerdao_vaults')
     assert not addresses
+
+
+def test_transaction_groups_writes(user_data_dir):
+    """Test that the writes inside a transaction context are all committed or all rolled back
+
+    Also test that the DB is in WAL mode and that the latest write timestamp,
+    which is only kept in memory at first, is saved in the DB at disconnect
+    """
+    msg_aggregator = MessagesAggregator()
+    db = DBHandler(user_data_dir, '123', msg_aggregator, None)
+    assert db.conn.execute('PRAGMA journal_mode;').fetchone()[0] == 'wal'
+    trade = Trade(
+        timestamp=Timestamp(1451606400),
+        location=Location.KRAKEN,
+        pair=TradePair('ETH_EUR'),
+        trade_type=TradeType.BUY,
+        amount=AssetAmount(FVal('1')),
+        rate=Price(FVal('100')),
+        fee=Fee(FVal('0.1')),
+        fee_currency=A_EUR,
+        link='',
+        notes='',
+    )
+
+    def add_trade_and_fail():
+        with db.transaction():
+            db.add_trades([trade])
+            db.update_used_query_range(name='kraken_trades', start_ts=0, end_ts=1451606400)
+            raise ValueError('failed in the middle of the transaction')
+
+    with pytest.raises(ValueError):
+        add_trade_and_fail()
+    assert db.get_trades() == []
+    assert db.get_used_query_range('kraken_trades') is None
+
+    with db.transaction():
+        db.add_trades([trade])
+        with db.transaction():
+            db.update_used_query_range(name='kraken_trades', start_ts=0, end_ts=1451606400)
+        # reads inside the context see its uncommitted writes
+        assert db.get_trades() == [trade]
+        assert db.conn.in_transaction
+    assert not db.conn.in_transaction
+    assert db.get_trades() == [trade]
+    assert db.get_used_query_range('kraken_trades') == (0, 1451606400)
+
+    balances_data = {
+        'assets': {A_BTC: {'amount': '1', 'usd_value': '100'}},
+        'liabilities': {},
+        'location': {'kraken': {'usd_value': '100'}},
+        'net_usd': '100',
+    }
+    db.save_balances_data(data=balances_data, timestamp=Timestamp(1451606400))
+    with db.transaction():
+        db.update_used_query_range(name='binance_trades', start_ts=0, end_ts=1451606400)
+        # the balances already exist so only their failed insertion should be undone
+        db.save_balances_data(data=balances_data, timestamp=Timestamp(1451606400))
+    assert db.get_used_query_range('binance_trades') == (0, 1451606400)
+
+    def save_balances_and_fail():
+        with db.transaction():
+            # the savepoint of the first write of the context must not commit it
+            db.save_balances_data(data=balances_data, timestamp=Timestamp(1451610000))
+            raise ValueError('failed after saving the balances')
+
+    with pytest.raises(ValueError):
+        save_balances_and_fail()
+    query = 'SELECT COUNT(*) FROM timed_balances WHERE time=?'
+    assert db.conn.execute(query, (1451610000,)).fetchone()[0] == 0
+
+    last_write_ts = db.get_last_write_ts()
+    assert 0 <= ts_now() - last_write_ts < 3
+    db.disconnect()
+    db = DBHandler(user_data_dir, '123', msg_aggregator, None)
+    assert db.get_last_write_ts() == last_write_ts
+
+
+def test_read_query_counts_towards_task_profile(database):
+    """Test that queries of the read pool, which run in other threads, are profiled"""
+    profile = TaskProfile()
+
+    def task():
+        database.get_trades()
+        database.get_asset_movements()
+
+    greenlet = gevent.Greenlet(task)
+    greenlet.task_profile = profile
+    greenlet.start()
+    greenlet.get()
+    assert profile.serialize()['db']['queries'] == 2
+
+
+def test_import_unencrypted_resets_last_write_ts(database):
+    """Test that the last write timestamp is read from a newly imported DB"""
+    database.update_used_query_range(name='kraken_trades', start_ts=0, end_ts=1)
+    assert database.get_last_write_ts() != 1
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tempdbpath = Path(tmpdirname) / 'temp.db'
+        database.export_unencrypted(tempdbpath)
+        conn = sqlite3.connect(str(tempdbpath))
+        conn.execute(
+            'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
+            ('last_write_ts', '1'),
+        )
+        conn.commit()
+        conn.close()
+        unencrypted_db_data = tempdbpath.read_bytes()
+
+    database.import_unencrypted(unencrypted_db_data, '123')
+    assert database.get_last_write_ts() == 1
@@ -31,16 +31,21 @@ from rotkehlchen.tests.utils.constants import A_BCH, A_BSV, A_RDN
 from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.user_messages import MessagesAggregator
 
-creation_patch = patch(
-    'rotkehlchen.db.dbhandler.DB_SCRIPT_CREATE_TABLES',
-    new=OLD_DB_SCRIPT_CREATE_TABLES,
+# The old tables lack columns that the indexes of the latest DB version need
+creation_patch = patch.multiple(
+    'rotkehlchen.db.dbhandler',
+    DB_SCRIPT_CREATE_TABLES=OLD_DB_SCRIPT_CREATE_TABLES,
+    DB_SCRIPT_CREATE_INDEXES='',
 )
 
 
 @contextmanager
 def target_patch(target_version: int):
     """Patches the upgrades to stop at target_version and also sets
-    ROTKEHLCHEN_DB_VERSION to the target_version"""
+    ROTKEHLCHEN_DB_VERSION to the target_version
+
+    The indexes of the latest DB version are not created since the tables
+    of the target version may lack the indexed columns"""
     a = patch(
         'rotkehlchen.db.upgrade_manager.ROTKEHLCHEN_DB_VERSION',
         new=target_version,
@@ -57,9 +62,10 @@ def target_patch(target_version: int):
         'rotkehlchen.db.upgrade_manager.UPGRADES_LIST',
         new=new_upgrades_list,
     )
+    d = patch('rotkehlchen.db.dbhandler.DB_SCRIPT_CREATE_INDEXES', new='')
 
-    with a, b, c:
-        yield (a, b, c)
+    with a, b, c, d:
+        yield (a, b, c, d)
 
 
 def _init_db_with_target_version(
@@ -1160,6 +1166,40 @@ def test_upgrade_db_21_to_22(user_data_dir):  # pylint: disable=unused-argument
     assert db.get_version() == 22
 
 
+def test_upgrade_old_db_to_latest_creates_indexes(user_data_dir):
+    """Test that a DB from before the trades had an id upgrades to the latest version
+
+    The indexes on the trades and asset movements ids must only be created after
+    the upgrades have added the columns. Creating them any earlier fails the login.
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v5_rotkehlchen.db')
+    db = DBHandler(
+        user_data_dir=user_data_dir,
+        password='123',
+        msg_aggregator=msg_aggregator,
+        initial_settings=None,
+    )
+    assert db.get_version() == ROTKEHLCHEN_DB_VERSION
+    cursor = db.conn.cursor()
+    indexes = {
+        entry[0] for entry in cursor.execute(
+            'SELECT name FROM sqlite_master WHERE type="index" AND name NOT LIKE "sqlite_%";',
+        )
+    }
+    assert indexes == {
+        'trades_time',
+        'trades_location_time',
+        'asset_movements_time',
+        'asset_movements_location_time',
+        'ethereum_transactions_timestamp',
+        'ethereum_logs_address_block',
+    }
+    trades = db.get_trades()
+    assert len(trades) != 0
+    assert db.get_trades(limit=1, after=(trades[0].timestamp, trades[0].identifier)) == trades[1:2]
+
+
 def test_db_newer_than_software_raises_error(data_dir, username):
     """
     If the DB version is greater than the current known version in the
@@ -1,6 +1,6 @@
 import pytest
 
-from rotkehlchen.db.utils import form_query_to_filter_timestamps
+from rotkehlchen.db.utils import form_paginated_query, form_query_to_filter_timestamps
 
 
 @pytest.mark.parametrize(
@@ -56,3 +56,29 @@ def test_form_query_to_filter_timestamps(
     )
     assert query_out == expected_query_out
     assert bindings == expected_bindings
+
+
+def test_form_paginated_query():
+    query, bindings = form_paginated_query(
+        query='SELECT * FROM trades',
+        filters=[],
+        bindings=[],
+        order_by=('time', 'id'),
+    )
+    assert query == 'SELECT * FROM trades ORDER BY time ASC, id ASC;'
+    assert bindings == []
+
+    query, bindings = form_paginated_query(
+        query='SELECT * FROM trades',
+        filters=['location=?'],
+        bindings=['B'],
+        order_by=('time', 'id'),
+        after=(1609336000, 'foo'),
+        limit=10,
+        descending=True,
+    )
+    assert query == (
+        'SELECT * FROM trades WHERE location=? AND (time, id) < (?, ?) '
+        'ORDER BY time DESC, id DESC LIMIT ?;'
+    )
+    assert bindings == ['B', 1609336000, 'foo', 10]
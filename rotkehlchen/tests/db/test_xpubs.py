@@ -209,3 +209,23 @@ def test_edit_bitcoin_xpub_not_existing_tag(setup_db_for_xpub_tests):
     assert result[1].label == xpub.label
     assert result[1].derivation_path == xpub.derivation_path
     assert result[1].tags != {'test'}
+
+
+def test_xpub_derived_addresses_cache(setup_db_for_xpub_tests):
+    """Test that derived xpub addresses are cached per xpub and go away with it"""
+    db, xpub1, xpub2, _, _ = setup_db_for_xpub_tests
+    assert db.get_xpub_derived_addresses_cache(xpub1) == {}
+
+    derived_cache = {
+        0: {0: '1LZypJUwJJRdfdndwvDmtAjrVYaHko136r', 1: '1MKSdDCtBSXiE49vik8xUG2pTgTGGh5pqe'},
+        1: {0: '12wxFzpjdymPk3xnHmdDLCTXUT9keY3XRd'},
+    }
+    db.update_xpub_derived_addresses_cache(xpub1, derived_cache)
+    derived_cache[1][1] = '16zNpyv8KxChtjXnE5nYcPqcXcrSQXX2JW'
+    # Already cached addresses are ignored and only the new one is added
+    db.update_xpub_derived_addresses_cache(xpub1, derived_cache)
+    assert db.get_xpub_derived_addresses_cache(xpub1) == derived_cache
+    assert db.get_xpub_derived_addresses_cache(xpub2) == {}
+
+    db.delete_bitcoin_xpub(xpub1)
+    assert db.get_xpub_derived_addresses_cache(xpub1) == {}
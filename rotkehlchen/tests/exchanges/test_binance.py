@@ -26,6 +26,7 @@ from rotkehlchen.tests.utils.constants import A_BNB, A_BUSD, A_DOT, A_RDN, A_USD
 from rotkehlchen.tests.utils.exchanges import (
     BINANCE_MYTRADES_RESPONSE,
     mock_binance_balance_response,
+    mock_binance_held_assets_response,
 )
 from rotkehlchen.tests.utils.factories import make_api_key, make_api_secret
 from rotkehlchen.tests.utils.mock import MockResponse
@@ -216,6 +217,8 @@ def test_binance_query_trade_history(function_scope_binance):
     binance = function_scope_binance
 
     def mock_my_trades(url):  # pylint: disable=unused-argument
+        if 'myTrades' not in url:
+            return mock_binance_held_assets_response(url)
         if 'symbol=BNBBTC' in url:
             text = BINANCE_MYTRADES_RESPONSE
         else:
@@ -242,12 +245,55 @@ def test_binance_query_trade_history(function_scope_binance):
     assert trades[0] == expected_trade
 
 
+def test_binance_query_trade_history_is_incremental(function_scope_binance):
+    """Test that binance trades are queried per held symbol starting after the last seen id"""
+    binance = function_scope_binance
+    queried_symbols_from_ids = {}
+
+    def mock_my_trades(url):
+        if 'myTrades' not in url:
+            return mock_binance_held_assets_response(url)
+
+        options = dict(x.split('=') for x in url.split('?')[1].split('&'))
+        queried_symbols_from_ids[options['symbol']] = int(options['fromId'])
+        if options['symbol'] == 'BNBBTC' and options['fromId'] == '0':
+            text = BINANCE_MYTRADES_RESPONSE
+        else:
+            text = '[]'
+
+        return MockResponse(200, text)
+
+    with patch.object(binance.session, 'get', side_effect=mock_my_trades):
+        trades = binance.query_trade_history(start_ts=0, end_ts=1564301134)
+
+    assert len(trades) == 1
+    assert binance.db.get_exchange_trade_cursors('binance') == {'BNBBTC': 28457}
+    # BTC and ETH are in the balances and BNB was found in the BNBBTC trades
+    assert queried_symbols_from_ids['BNBBTC'] == 0
+    assert 'ETHBTC' in queried_symbols_from_ids
+    assert 'BNBUSDT' in queried_symbols_from_ids
+    # No asset of this symbol has ever been held
+    assert 'ADAUSDT' not in queried_symbols_from_ids
+
+    queried_symbols_from_ids.clear()
+    with patch.object(binance.session, 'get', side_effect=mock_my_trades):
+        trades = binance.query_online_trade_history(start_ts=0, end_ts=1564301134)
+
+    assert len(trades) == 0
+    assert queried_symbols_from_ids['BNBBTC'] == 28458
+
+    binance.db.purge_exchange_data('binance')
+    assert binance.db.get_exchange_trade_cursors('binance') == {}
+
+
 def test_binance_query_trade_history_unexpected_data(function_scope_binance):
     """Test that turning a binance trade that contains unexpected data is handled gracefully"""
     binance = function_scope_binance
     binance.cache_ttl_secs = 0
 
     def mock_my_trades(url):  # pylint: disable=unused-argument
+        if 'myTrades' not in url:
+            return mock_binance_held_assets_response(url)
         if 'symbol=BNBBTC' in url or 'symbol=doesnotexist' in url:
             text = BINANCE_MYTRADES_RESPONSE
         else:
@@ -839,3 +885,28 @@ def test_api_query_retry_on_status_code_429(function_scope_binance):
             )
     assert 'myTrades failed with HTTP status code: 418' in str(e.value)
     assert binance_mock_get.call_args_list == expected_calls
+
+
+def test_api_query_ignores_malformed_used_weight(function_scope_binance):
+    """Test that a malformed used weight header does not fail the query and that
+    the last known used weight is kept"""
+    binance = function_scope_binance
+    responses = iter([
+        MockResponse(200, '[]', headers={'x-mbx-used-weight-1m': '42'}),
+        MockResponse(200, '[]', headers={'x-mbx-used-weight-1m': 'foo'}),
+    ])
+
+    def mock_response(url):  # pylint: disable=unused-argument
+        return next(responses)
+
+    with patch.object(binance.session, 'get', side_effect=mock_response):
+        binance.api_query(api_type='api', method='myTrades', options={'symbol': 'BNBBTC'})
+        assert binance.used_weight_1m == 42
+        result = binance.api_query(
+            api_type='api',
+            method='myTrades',
+            options={'symbol': 'BNBBTC'},
+        )
+
+    assert result == []
+    assert binance.used_weight_1m == 42
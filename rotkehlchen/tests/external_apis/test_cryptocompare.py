@@ -1,21 +1,31 @@
 import os
+import time
 import warnings as test_warnings
 from unittest.mock import patch
 
+import gevent
 import pytest
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.assets import A_BTC, A_ETH, A_USD, A_USDT
 from rotkehlchen.constants.misc import ZERO
-from rotkehlchen.errors import NoPriceForGivenTimestamp
+from rotkehlchen.errors import DeserializationError, NoPriceForGivenTimestamp
 from rotkehlchen.externalapis.cryptocompare import (
     A_COMP,
     CRYPTOCOMPARE_SPECIAL_HISTOHOUR_CASES,
     Cryptocompare,
+    PairCacheKey,
 )
 from rotkehlchen.fval import FVal
+from rotkehlchen.history.price_store import (
+    HourlyPriceSeries,
+    append_price_store_file,
+    write_price_store_file,
+)
 from rotkehlchen.tests.utils.constants import A_SNGLS
+from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import Price, Timestamp
+from rotkehlchen.utils.misc import ts_now
 
 
 def test_cryptocompare_query_pricehistorical(cryptocompare):
@@ -31,7 +41,11 @@ def test_cryptocompare_query_pricehistorical(cryptocompare):
 
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 def test_cryptocompare_historical_data_use_cached_price(data_dir, database):
-    """Test that the cryptocompare cache is used and also properly deserialized"""
+    """Test that the cryptocompare cache is used and also properly deserialized
+
+    The cache is written in the JSON format of older versions so this also tests
+    that it gets migrated to the binary price store.
+    """
     # Create a cache file for SNGLS_BTC
     contents = """{"start_time": 0, "end_time": 1439390800,
     "data": [{"time": 1438387200, "close": 10, "high": 10, "low": 10, "open": 10,
@@ -61,6 +75,209 @@ def test_cryptocompare_historical_data_use_cached_price(data_dir, database):
     assert isinstance(result[1].high, FVal)
     assert result[1].high == FVal(20)
 
+    # The JSON cache should have been replaced by the binary price store
+    assert not os.path.exists(os.path.join(data_dir, 'price_history_SNGLS_BTC.json'))
+    assert os.path.exists(os.path.join(data_dir, 'price_history_SNGLS_BTC.bin'))
+
+    # and a new instance should find and use the binary store
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    with patch.object(cc, 'query_endpoint_histohour') as histohour_mock:
+        result = cc.get_historical_data(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=1438390801,
+            historical_data_start=0,
+        )
+        assert histohour_mock.call_count == 0
+
+    assert len(result) == 2
+    assert result[0].time == 1438387200
+    assert result[1].time == 1438390800
+    assert result[-1].low == FVal(20)
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_queries_share_rate_limit(data_dir, database):
+    """Test that concurrent cryptocompare queries are spaced by the shared rate limit"""
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    query_times = []
+
+    def mock_get(url, *args, **kwargs):  # pylint: disable=unused-argument
+        query_times.append(time.time())
+        return MockResponse(200, '{"Response": "Success", "Data": {}}')
+
+    patch_min_seconds = patch(
+        'rotkehlchen.externalapis.cryptocompare.CRYPTOCOMPARE_MIN_SECONDS_BETWEEN_QUERIES',
+        new=0.1,
+    )
+    with patch_min_seconds, patch.object(cc.session, 'get', side_effect=mock_get):
+        greenlets = [gevent.spawn(cc._api_query, 'histohour?fsym=BTC&tsym=USD') for _ in range(4)]
+        gevent.joinall(greenlets, raise_error=True)
+
+    assert len(query_times) == 4
+    for previous_time, query_time in zip(query_times, query_times[1:]):
+        assert query_time - previous_time >= 0.09
+
+
+def test_price_store_keeps_price_precision(tmp_path):
+    """Test that stored prices keep their significant digits no matter how small they
+    are, that missing prices stay missing and that entries are indexed by hour"""
+    prices = [
+        '0.000000012345678901',
+        '123456789.123456789012345678',
+        '0.1',
+        7,
+        '0.000000000001234567890123456789',
+        '1.5E-25',
+        None,
+    ]
+    filepath = tmp_path / 'price_history_SNGLS_BTC.bin'
+    write_price_store_file(
+        filepath=filepath,
+        data=[
+            {'time': 1438387200 + 3600 * idx, 'high': price, 'low': price}
+            for idx, price in enumerate(prices)
+        ],
+        start_time=Timestamp(0),
+        end_time=Timestamp(1438387200 + 3600 * len(prices)),
+    )
+
+    series = HourlyPriceSeries(filepath)
+    expected = [FVal(price) if price is not None else None for price in prices]
+    assert [entry.high for entry in series] == expected
+    assert [entry.low for entry in series] == expected
+    assert series.first_time == 1438387200
+    assert series.hour_index(Timestamp(1438387200)) == 0
+    assert series.hour_index(Timestamp(1438387200 + 3599)) == 0
+    assert series.hour_index(Timestamp(1438387200 + 3600 * 3 + 1)) == 3
+    series.close()
+
+    for invalid_price in ('NaN', 'foo'):
+        with pytest.raises(DeserializationError):
+            write_price_store_file(
+                filepath=filepath,
+                data=[{'time': 1438387200, 'high': invalid_price, 'low': 1}],
+                start_time=Timestamp(0),
+                end_time=Timestamp(1438390800),
+            )
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_historical_data_extends_cached_tail(data_dir, database):
+    """Test that a cached price history missing only its tail gets extended
+
+    Only the hours after the last cached entry should be queried and appended
+    """
+    now = ts_now()
+    last_cached_hour = (now // 3600 - 10) * 3600
+    cached_data = [
+        {'time': last_cached_hour - 3600 * i, 'high': 10, 'low': 10} for i in range(5, -1, -1)
+    ]
+    write_price_store_file(
+        filepath=data_dir / 'price_history_SNGLS_BTC.bin',
+        data=cached_data,
+        start_time=Timestamp(0),
+        end_time=Timestamp(last_cached_hour + 1800),
+    )
+
+    def mock_histohour(from_asset, to_asset, limit, to_timestamp):  # pylint: disable=unused-argument  # noqa: E501
+        time_to = min(to_timestamp, now) // 3600 * 3600
+        time_from = time_to - limit * 3600
+        return {
+            'TimeFrom': time_from,
+            'TimeTo': time_to,
+            'Data': [
+                {'time': x, 'high': 20, 'low': 20} for x in range(time_from, time_to + 1, 3600)
+            ],
+        }
+
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    with patch.object(cc, 'query_endpoint_histohour', side_effect=mock_histohour) as histohour_mock:  # noqa: E501
+        result = cc.get_historical_data(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=Timestamp(now - 1800),
+            historical_data_start=Timestamp(0),
+        )
+        assert histohour_mock.call_count == 1
+        assert histohour_mock.call_args[1]['to_timestamp'] > last_cached_hour
+
+    assert result.start_time == 0
+    assert result.end_time >= now
+    times = [entry.time for entry in result]
+    assert times == list(range(times[0], times[-1] + 1, 3600)), 'should have no gaps or duplicates'
+    assert result[5].time == last_cached_hour and result[5].high == FVal(10)
+    assert result[6].time == last_cached_hour + 3600 and result[6].high == FVal(20)
+    assert times[-1] == now // 3600 * 3600
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_concurrent_extensions_of_a_pair(data_dir, database):
+    """Test that concurrent queries needing the tail of the same pair extend it only once"""
+    now = ts_now()
+    last_cached_hour = (now // 3600 - 10) * 3600
+    write_price_store_file(
+        filepath=data_dir / 'price_history_SNGLS_BTC.bin',
+        data=[{'time': last_cached_hour, 'high': 10, 'low': 10}],
+        start_time=Timestamp(0),
+        end_time=Timestamp(last_cached_hour + 1800),
+    )
+
+    def mock_histohour(from_asset, to_asset, limit, to_timestamp):  # pylint: disable=unused-argument  # noqa: E501
+        gevent.sleep(0.05)  # let the other greenlet run in the meantime
+        time_to = min(to_timestamp, now) // 3600 * 3600
+        return {
+            'TimeFrom': last_cached_hour,
+            'TimeTo': time_to,
+            'Data': [
+                {'time': x, 'high': 20, 'low': 20}
+                for x in range(last_cached_hour, time_to + 1, 3600)
+            ],
+        }
+
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    with patch.object(cc, 'query_endpoint_histohour', side_effect=mock_histohour) as histohour_mock:  # noqa: E501
+        greenlets = [gevent.spawn(
+            cc.get_historical_data,
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=Timestamp(now - 1800),
+            historical_data_start=Timestamp(0),
+        ) for _ in range(2)]
+        gevent.joinall(greenlets, raise_error=True)
+        assert histohour_mock.call_count == 1
+
+    times = [entry.time for entry in cc.price_history[PairCacheKey('SNGLS_BTC')]]
+    assert times == list(range(last_cached_hour, now // 3600 * 3600 + 1, 3600))
+
+
+def test_price_store_append_rejects_gaps(tmp_path):
+    """Test that only entries continuing the stored series hour by hour can be appended"""
+    filepath = tmp_path / 'price_history_SNGLS_BTC.bin'
+    write_price_store_file(
+        filepath=filepath,
+        data=[{'time': 3600, 'high': 1, 'low': 1}],
+        start_time=Timestamp(0),
+        end_time=Timestamp(7200),
+    )
+    for times in ((3600,), (10800,), (7200, 14400)):
+        with pytest.raises(DeserializationError):
+            append_price_store_file(
+                filepath=filepath,
+                data=[{'time': x, 'high': 2, 'low': 2} for x in times],
+                end_time=Timestamp(18000),
+            )
+
+    append_price_store_file(
+        filepath=filepath,
+        data=[{'time': 7200, 'high': 2, 'low': 2}],
+        end_time=Timestamp(10800),
+    )
+    series = HourlyPriceSeries(filepath)
+    assert [entry.time for entry in series] == [3600, 7200]
+    assert series.end_time == 10800
+    series.close()
+
 
 @pytest.mark.skip(
     'Same test as test_end_to_end_tax_report::'
@@ -155,6 +155,11 @@ def create_inquirer(data_directory, should_mock_current_price_queries, mocked_pr
 
     inquirer.find_usd_price = mock_find_usd_price  # type: ignore
 
+    def mock_find_usd_prices(assets):
+        return {asset: mock_find_usd_price(asset) for asset in assets}
+
+    inquirer.find_usd_prices = mock_find_usd_prices  # type: ignore
+
     def mock_query_fiat_pair(base, quote):  # pylint: disable=unused-argument
         return FVal(1)
 
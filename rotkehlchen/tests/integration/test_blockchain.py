@@ -11,7 +11,8 @@ from rotkehlchen.chain.ethereum.defi.structures import (
     DefiProtocol,
     DefiProtocolBalances,
 )
-from rotkehlchen.constants.assets import A_BTC, A_DAI
+from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_ETH2
+from rotkehlchen.errors import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.blockchain import mock_etherscan_query
 from rotkehlchen.typing import SupportedBlockchain
@@ -156,3 +157,57 @@ def test_multiple_concurrent_ethereum_blockchain_queries(blockchain):
 
     assert blockchain.totals.assets['DAI'].amount == 2
     assert blockchain.balances.eth[addr1].assets['DAI'].amount == 2
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [0])
+def test_failing_protocol_module_does_not_fail_ethereum_balances(blockchain):
+    """Test that if the balances query of a protocol module fails the error is
+    reported and the rest of the ethereum balances are still counted"""
+    addr1 = '0xe188c6BEBB81b96A65aa20dDB9e2aef62627fa4c'
+    etherscan_patch = mock_etherscan_query(
+        eth_map={addr1: {'ETH': 1, 'DAI': 1 * 10**18}},
+        etherscan=blockchain.ethereum.etherscan,
+        original_requests_get=requests.get,
+        original_queries=[],
+    )
+    ethtokens_max_chunks_patch = patch(
+        'rotkehlchen.chain.ethereum.tokens.ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH',
+        new=800,
+    )
+    defi_balances_mock = patch.object(blockchain, 'query_defi_balances', return_value={})
+
+    def mock_get_eth2_balances(beaconchain, addresses):  # pylint: disable=unused-argument
+        raise RemoteError('beaconcha.in is down')
+
+    eth2_patch = patch(
+        'rotkehlchen.chain.manager.get_eth2_balances',
+        side_effect=mock_get_eth2_balances,
+    )
+
+    eth2_balance = Balance(amount=FVal(32), usd_value=FVal(12800))
+    working_eth2_patch = patch(
+        'rotkehlchen.chain.manager.get_eth2_balances',
+        return_value={addr1: eth2_balance},
+    )
+    with etherscan_patch, ethtokens_max_chunks_patch, working_eth2_patch:
+        blockchain.add_blockchain_accounts(
+            blockchain=SupportedBlockchain.ETHEREUM,
+            accounts=[addr1],
+        )
+    blockchain.msg_aggregator.consume_errors()
+
+    with etherscan_patch, ethtokens_max_chunks_patch, defi_balances_mock, working_eth2_patch:
+        blockchain.query_ethereum_balances(force_token_detection=False)
+    assert blockchain.totals.assets[A_ETH2] == eth2_balance
+
+    with etherscan_patch, ethtokens_max_chunks_patch, defi_balances_mock, eth2_patch:
+        blockchain.query_ethereum_balances(force_token_detection=False, ignore_cache=True)
+
+    assert blockchain.totals.assets[A_ETH].amount == 1
+    assert blockchain.totals.assets[A_DAI].amount == 1
+    # the last known eth2 balances are kept when the eth2 query fails
+    assert blockchain.totals.assets[A_ETH2] == eth2_balance
+    assert blockchain.balances.eth[addr1].assets[A_ETH2] == eth2_balance
+    errors = blockchain.msg_aggregator.consume_errors()
+    assert len(errors) == 1
+    assert 'eth2 balances failed due to beaconcha.in is down' in errors[0]
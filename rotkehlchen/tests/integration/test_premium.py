@@ -114,7 +114,12 @@ def test_upload_data_to_server_same_hash(rotkehlchen_instance, db_password):
         saved_data='foo',
     )
 
-    with patched_get, patched_put as put_mock:
+    patched_encrypt = patch(
+        'rotkehlchen.data_handler.encrypt_stream',
+        side_effect=AssertionError('The DB should not be encrypted if the hash is the same'),
+    )
+
+    with patched_get, patched_put as put_mock, patched_encrypt:
         rotkehlchen_instance.premium_sync_manager.maybe_upload_data_to_server()
         # The upload mock should not have been called since the hash is the same
         assert not put_mock.called
@@ -1,6 +1,9 @@
+import json
+from unittest.mock import patch
+
 import pytest
 
-from rotkehlchen.constants.assets import A_BTC, A_ETH
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR
 from rotkehlchen.exchanges.data_structures import AssetMovement, MarginPosition
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.accounting import accounting_history_process
@@ -548,3 +551,87 @@ def test_assets_movements_not_accounted_for(accountant, expected):
     assert FVal(result['overview']['asset_movement_fees']).is_close(expected)
     assert FVal(result['overview']['total_taxable_profit_loss']).is_close(-expected)
     assert FVal(result['overview']['total_profit_loss']).is_close(-expected)
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_prices_are_prefetched_per_pair(accountant, price_historian):
+    """Test that before processing, the needed prices are collected per pair
+    along with the time range in which they are needed"""
+    with patch.object(price_historian, 'prefetch_historical_prices') as prefetch_mock:
+        accounting_history_process(accountant, 1436979735, 1495751688, history1)
+
+    assert prefetch_mock.call_count == 1
+    price_ranges = prefetch_mock.call_args[0][0]
+    # EUR is the profit currency so it needs no price
+    assert price_ranges == {
+        (A_BTC, A_EUR): (Timestamp(1446979735), Timestamp(1475042230)),
+        (A_ETH, A_EUR): (Timestamp(1446979735), Timestamp(1475042230)),
+    }
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_history_processing_resumes_from_checkpoint(accountant):
+    """Test that processing the same history again resumes from the latest checkpoint
+    before the start of the period and that changing earlier trades invalidates it"""
+    start_ts = 1475000000
+    end_ts = 1495751688
+    first_result = accounting_history_process(accountant, start_ts, end_ts, history1)
+    assert len(accountant.db.get_accounting_checkpoints(
+        settings_key=accountant._checkpoint_settings_key(accountant.db.get_settings()),
+        up_to_ts=start_ts,
+    )) == 2
+
+    with patch.object(accountant, 'process_action', wraps=accountant.process_action) as mock:
+        result = accounting_history_process(accountant, start_ts, end_ts, history1)
+    # only the sell after the last checkpoint is processed
+    assert mock.call_count == 1
+    assert result['overview'] == first_result['overview']
+
+    # Changing a trade before the checkpoints means they can't be used anymore
+    changed_history = [dict(x) for x in history1]
+    changed_history[1]['rate'] = 0.3
+    with patch.object(accountant, 'process_action', wraps=accountant.process_action) as mock:
+        result = accounting_history_process(accountant, start_ts, end_ts, changed_history)
+    assert mock.call_count == 4
+    assert result['overview'] != first_result['overview']
+    # and processing the changed history once more uses the checkpoints saved for it
+    with patch.object(accountant, 'process_action', wraps=accountant.process_action) as mock:
+        assert accounting_history_process(
+            accountant,
+            start_ts,
+            end_ts,
+            changed_history,
+        )['overview'] == result['overview']
+    assert mock.call_count == 1
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_history_processing_falls_back_to_older_checkpoint(accountant):
+    """Test that if the latest checkpoint can't be restored, for example due to an
+    asset unknown to this version, the older one is used instead"""
+    start_ts = 1475000000
+    end_ts = 1495751688
+    first_result = accounting_history_process(accountant, start_ts, end_ts, history1)
+    settings_key = accountant._checkpoint_settings_key(accountant.db.get_settings())
+    checkpoints = accountant.db.get_accounting_checkpoints(
+        settings_key=settings_key,
+        up_to_ts=start_ts,
+    )
+    assert len(checkpoints) == 2
+
+    latest_ts, latest_digest, latest_state = checkpoints[-1]
+    state = json.loads(latest_state)
+    state['events']['events']['NOTANASSET'] = {'buys': [], 'sells': []}
+    accountant.db.add_accounting_checkpoint(
+        settings_key=settings_key,
+        timestamp=latest_ts,
+        actions_digest=latest_digest,
+        state=json.dumps(state),
+        keep_latest=2,
+    )
+
+    with patch.object(accountant, 'process_action', wraps=accountant.process_action) as mock:
+        result = accounting_history_process(accountant, start_ts, end_ts, history1)
+    # the actions after the older checkpoint are processed again
+    assert mock.call_count == 2
+    assert result['overview'] == first_result['overview']
@@ -1,6 +1,7 @@
 import pytest
 
-from rotkehlchen.exchanges.data_structures import BuyEvent, Events
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.exchanges.data_structures import BuyEvent, BuyEventsQueue, Events
 from rotkehlchen.fval import FVal
 
 
@@ -8,7 +9,7 @@ from rotkehlchen.fval import FVal
 def test_search_buys_calculate_profit_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -60,7 +61,7 @@ def test_search_buys_calculate_profit_1_buy_consumed_by_1_sell(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -94,7 +95,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxable(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -147,7 +148,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -195,7 +196,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
 def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -234,7 +235,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accounta
 def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -272,7 +273,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountan
 def test_reduce_asset_amount(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -307,7 +308,7 @@ def test_reduce_asset_amount(accountant):
 def test_reduce_asset_amount_exact(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -337,7 +338,7 @@ def test_reduce_asset_amount_not_bought(accountant):
 def test_reduce_asset_amount_more_that_bought(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyEventsQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -357,3 +358,35 @@ def test_reduce_asset_amount_more_that_bought(accountant):
 
     assert not accountant.events.reduce_asset_amount(asset, FVal(3))
     assert (len(accountant.events.events[asset].buys)) == 0, 'all buys should be used'
+
+
+def test_buy_events_queue_running_amounts():
+    """Test that the buy events queue keeps its running amounts correct as lots
+    are consumed from the front, fully or partially"""
+    buys = BuyEventsQueue()
+    for idx in range(3000):
+        buys.append(BuyEvent(
+            amount=FVal(2),
+            timestamp=1446979735 + idx * 3600,
+            rate=FVal(1),
+            fee_rate=FVal(0),
+        ))
+
+    assert len(buys) == 3000
+    assert buys.total_amount == FVal(6000)
+    assert buys.amount_bought_before(1446979735) == ZERO
+    assert buys.amount_bought_before(1446979735 + 10 * 3600) == FVal(20)
+
+    # consume enough lots to trigger dropping them from memory
+    for _ in range(2000):
+        buys.popleft()
+    buys.reduce_first(FVal('0.5'))
+
+    assert len(buys) == 1000
+    assert buys[0].amount == FVal('0.5')
+    assert buys[0].timestamp == 1446979735 + 2000 * 3600
+    assert buys[-1].timestamp == 1446979735 + 2999 * 3600
+    assert buys.total_amount == FVal('1998.5')
+    assert buys.amount_bought_before(1446979735 + 10 * 3600) == ZERO
+    assert buys.amount_bought_before(1446979735 + 2002 * 3600) == FVal('2.5')
+    assert sum((buy.amount for buy in buys), ZERO) == buys.total_amount
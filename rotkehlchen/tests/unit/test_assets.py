@@ -1,4 +1,6 @@
+import copy
 import json
+import pickle
 import warnings as test_warnings
 from pathlib import Path
 
@@ -66,6 +68,23 @@ def test_ethereum_tokens():
         EthereumToken('BTC')
 
 
+def test_assets_are_interned():
+    """Test that constructing the same asset returns the same instance"""
+    eth_asset = Asset('ETH')
+    assert Asset('ETH') is eth_asset
+    assert Asset('eth') is eth_asset, 'non canonical identifiers should resolve to it too'
+    assert copy.deepcopy(eth_asset) is eth_asset
+    assert pickle.loads(pickle.dumps(eth_asset)) is eth_asset
+
+    dai_token = EthereumToken('DAI')
+    assert EthereumToken('DAI') is dai_token
+    assert Asset('DAI') is not dai_token, 'each class should keep its own instances'
+    assert Asset('DAI') == dai_token
+
+    with pytest.raises(UnknownAsset):
+        Asset('jsakdjsladjsakdj')
+
+
 def test_tokens_address_is_checksummed():
     """Test that all ethereum saved token asset addresses are checksummed"""
     for _, asset_data in AssetResolver().assets.items():
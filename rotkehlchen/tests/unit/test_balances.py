@@ -0,0 +1,47 @@
+from rotkehlchen.balances.aggregator import BalanceSheetAggregator
+from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH
+from rotkehlchen.fval import FVal
+
+
+def test_balance_sheet_aggregator():
+    aggregator = BalanceSheetAggregator()
+    aggregator.add_location_balances('binance', {
+        A_BTC: {'amount': FVal('1'), 'usd_value': FVal('300')},
+        A_ETH: {'amount': FVal('2'), 'usd_value': FVal('100')},
+    })
+    aggregator.add_location_balances('kraken', {})
+    aggregator.add_location_balances('blockchain', {
+        A_ETH: {'amount': FVal('6'), 'usd_value': FVal('300')},
+    })
+    aggregator.add_location_liabilities('blockchain', {
+        A_DAI: {'amount': FVal('200'), 'usd_value': FVal('200')},
+    })
+    aggregator.add_balance(location='banks', asset=A_ETH, amount=FVal('2'), usd_value=FVal('0'))
+
+    result = aggregator.serialize()
+    assert result['net_usd'] == FVal('500')
+    assert result['assets'] == {
+        A_BTC: {
+            'amount': FVal('1'),
+            'usd_value': FVal('300'),
+            'percentage_of_net_value': '60.0000%',
+        },
+        A_ETH: {
+            'amount': FVal('10'),
+            'usd_value': FVal('400'),
+            'percentage_of_net_value': '80.0000%',
+        },
+    }
+    assert result['liabilities'] == {
+        A_DAI: {
+            'amount': FVal('200'),
+            'usd_value': FVal('200'),
+            'percentage_of_net_value': '40.0000%',
+        },
+    }
+    assert result['location'] == {
+        'binance': {'usd_value': FVal('400'), 'percentage_of_net_value': '80.0000%'},
+        'kraken': {'usd_value': FVal('0'), 'percentage_of_net_value': '0.0000%'},
+        'blockchain': {'usd_value': FVal('100'), 'percentage_of_net_value': '20.0000%'},
+        'banks': {'usd_value': FVal('0'), 'percentage_of_net_value': '0.0000%'},
+    }
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pytest
 
 from rotkehlchen.chain.bitcoin.hdkey import HDKey, XpubType
@@ -7,7 +9,8 @@ from rotkehlchen.chain.bitcoin.utils import (
     pubkey_to_base58_address,
     pubkey_to_bech32_address,
 )
-from rotkehlchen.chain.bitcoin.xpub import XpubData
+from rotkehlchen.chain.bitcoin.xpub import XpubData, _derive_addresses_loop
+from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.errors import XPUBError
 from rotkehlchen.tests.utils.factories import (
     UNIT_BTC_ADDRESS1,
@@ -170,6 +173,35 @@ def test_xpub_to_addresses():
         assert child.address() == expected_addresses[i]
 
 
+def test_derive_addresses_stops_at_first_unused_batch():
+    """Test that deriving addresses stops at the first batch with no used address
+    and that the batch derived in advance after it is not cached"""
+    xpub = 'xpub68V4ZQQ62mea7ZUKn2urQu47Bdn2Wr7SxrBxBDDwE3kjytj361YBGSKDT4WoBrE5htrSB8eAMe59NPnKrcAbiv2veN5GQUmfdjRddD1Hxrk'  # noqa: E501
+    root = HDKey.from_xpub(xpub=xpub, path='m').derive_child(0)
+    used_address = '1L5ic1V3bTJahEdwjufGJ28PjRcMcHWGka'  # m/0/1
+
+    def mock_have_bitcoin_transactions(accounts):
+        return {x: (x == used_address, ZERO) for x in accounts}
+
+    derived_cache = {}
+    with patch(
+        'rotkehlchen.chain.bitcoin.xpub.have_bitcoin_transactions',
+        side_effect=mock_have_bitcoin_transactions,
+    ) as have_tx_mock:
+        addresses = _derive_addresses_loop(
+            account_index=0,
+            start_index=0,
+            root=root,
+            gap_limit=2,
+            derived_cache=derived_cache,
+        )
+
+    # batches [0, 1] and [2, 3] are scanned while [4, 5] is derived in advance but unused
+    assert have_tx_mock.call_count == 2
+    assert sorted(derived_cache) == [0, 1, 2, 3]
+    assert [x.address for x in addresses if x.derived_index == 1] == [used_address]
+
+
 def test_ypub_to_addresses():
     """Test vectors from here: https://iancoleman.io/bip39/"""
     xpub = 'ypub6WkRUvNhspMCJLiLgeP7oL1pzrJ6wA2tpwsKtXnbmpdAGmHHcC6FeZeF4VurGU14dSjGpF2xLavPhgvCQeXd6JxYgSfbaD1wSUi2XmEsx33'  # noqa: E501
@@ -1,5 +1,5 @@
 import pytest
-from rotkehlchen.chain.ethereum.airdrops import check_airdrops, AIRDROPS
+from rotkehlchen.chain.ethereum.airdrops import AIRDROPS, AIRDROPS_INDEX_FILENAME, check_airdrops
 from rotkehlchen.constants.assets import A_UNI, A_1INCH, A_GRAIN
 
 TEST_ADDR1 = '0x2B888954421b424C5D3D9Ce9bB67c9bD47537d12'
@@ -43,3 +43,28 @@ def test_check_airdrops(ethereum_accounts, data_dir):
     # Test cache files are created
     for protocol_name in AIRDROPS:
         assert (data_dir / 'airdrops' / f'{protocol_name}.csv').is_file()
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_airdrops_index_is_rebuilt_when_csv_changes(data_dir):
+    airdrops_dir = data_dir / 'airdrops'
+    airdrops_dir.mkdir(parents=True, exist_ok=True)
+    for protocol_name in AIRDROPS:
+        with open(airdrops_dir / f'{protocol_name}.csv', 'w') as f:
+            f.write(f'address,amount\n{TEST_ADDR1},400\n')
+
+    data = check_airdrops(addresses=[TEST_ADDR1, TEST_ADDR2], data_dir=data_dir)
+    assert list(data) == [TEST_ADDR1]
+    assert data[TEST_ADDR1]['uniswap']['amount'] == '400'
+    assert data[TEST_ADDR1]['grain']['amount'] == '4E-16'
+    assert (airdrops_dir / AIRDROPS_INDEX_FILENAME).is_file()
+
+    with open(airdrops_dir / 'uniswap.csv', 'w') as f:
+        f.write(f'address,amount\n{TEST_ADDR2},400.050642\n{TEST_ADDR1},1\n')
+    data = check_airdrops(addresses=[TEST_ADDR1, TEST_ADDR2], data_dir=data_dir)
+    assert data[TEST_ADDR1]['uniswap']['amount'] == '1'
+    assert data[TEST_ADDR2] == {'uniswap': {
+        'amount': '400.050642',
+        'asset': A_UNI,
+        'link': 'https://app.uniswap.org/',
+    }}
@@ -1,13 +1,19 @@
+import json
 import os
+from unittest.mock import patch
 
+import gevent
 import pytest
+from web3 import HTTPProvider, Web3
 
+from rotkehlchen.chain.ethereum.log_indexer import LOG_INDEXER_CONFIRMATIONS
 from rotkehlchen.chain.ethereum.manager import (
     ETHEREUM_NODES_TO_CONNECT_AT_START,
     OPEN_NODES,
     OPEN_NODES_WEIGHT_MAP,
     NodeName,
 )
+from rotkehlchen.chain.ethereum.node_stats import NodeStats
 from rotkehlchen.constants.ethereum import (
     ATOKEN_ABI,
     ERC20TOKEN_ABI,
@@ -21,6 +27,7 @@ from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_TEST_PARAMETERS,
     wait_until_all_nodes_connected,
 )
+from rotkehlchen.utils.misc import address_to_bytes32
 
 
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
@@ -35,6 +42,38 @@ def test_get_block_by_number(ethereum_manager, call_order, ethereum_manager_conn
     assert block['hash'] == '0xe2217ba1639c6ca2183f40b0f800185b3901faece2462854b3162d4c5077752c'
 
 
+def test_event_timestamps_are_cached(ethereum_manager, database):
+    """Test that each block timestamp is queried once and then served from memory or the DB"""
+    events = [{'blockNumber': 10304885}, {'blockNumber': 10304886}, {'blockNumber': 10304885}]
+    block_timestamps = {10304885: 1592686213, 10304886: 1592686214}
+
+    def mock_get_block_by_number(block_number):
+        return {'number': block_number, 'timestamp': block_timestamps[block_number]}
+
+    etherscan_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_block_by_number',
+        side_effect=mock_get_block_by_number,
+    )
+    with etherscan_patch as get_block_mock:
+        ethereum_manager.prefetch_event_timestamps(events)
+        assert [ethereum_manager.get_event_timestamp(x) for x in events] == [
+            1592686213,
+            1592686214,
+            1592686213,
+        ]
+        assert get_block_mock.call_count == 2
+        assert database.get_block_timestamps([10304885, 10304886, 1]) == block_timestamps
+
+        # with the memory cache gone the timestamps should come from the DB
+        ethereum_manager.block_timestamps.clear()
+        assert ethereum_manager.get_event_timestamp(events[1]) == 1592686214
+        assert get_block_mock.call_count == 2
+
+    # etherscan events already carry their timestamp
+    assert ethereum_manager.get_event_timestamp({'blockNumber': 1, 'timeStamp': 5}) == 5
+
+
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
 def test_get_transaction_receipt(ethereum_manager, call_order, ethereum_manager_connect_at_start):
     wait_until_all_nodes_connected(
@@ -110,6 +149,27 @@ def test_call_contract(ethereum_manager, call_order, ethereum_manager_connect_at
     assert result >= 0
 
 
+@pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
+def test_call_contracts(ethereum_manager, call_order, ethereum_manager_connect_at_start):
+    """Test that aggregated contract calls return the same as calling one by one"""
+    wait_until_all_nodes_connected(
+        ethereum_manager_connect_at_start=ethereum_manager_connect_at_start,
+        ethereum=ethereum_manager,
+    )
+
+    address = '0x5dbcF33D8c2E976c6b560249878e6F1491Bca25c'
+    calls = [
+        YEARN_YCRV_VAULT.contract_call('symbol'),
+        YEARN_YCRV_VAULT.contract_call('token'),
+        YEARN_YCRV_VAULT.contract_call('balanceOf', arguments=[address]),
+    ]
+    results = ethereum_manager.call_contracts(calls, call_order=call_order)
+    assert results[0] == 'yyDAI+yUSDC+yUSDT+yTUSD'
+    assert results[1] == YEARN_YCRV_VAULT.call(ethereum_manager, 'token', call_order=call_order)
+    assert results[2] >= 0
+    assert ethereum_manager.call_contracts([], call_order=call_order) == []
+
+
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
 def test_get_logs(ethereum_manager, call_order, ethereum_manager_connect_at_start):
     wait_until_all_nodes_connected(
@@ -158,6 +218,63 @@ def test_get_logs(ethereum_manager, call_order, ethereum_manager_connect_at_star
     )
 
 
+def test_log_indexer_only_queries_missing_blocks(ethereum_manager):
+    """Test that the log index only queries the blocks it has not yet seen for a filter
+
+    Logs of the last LOG_INDEXER_CONFIRMATIONS blocks should be queried every time
+    """
+    token_address = '0xdF5e0e81Dff6FAF3A7e52BA697820c5e32D806A8'
+    transfer_topic = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+    all_logs = [{
+        'address': token_address,
+        'blockNumber': block_number,
+        'data': '0x' + '00' * 31 + '01',
+        'logIndex': 1,
+        'topics': [transfer_topic, address_to_bytes32(ZERO_ADDRESS)],
+        'transactionHash': f'0x{block_number:064x}',
+        'transactionIndex': 0,
+    } for block_number in range(100, 200, 10)]
+
+    def mock_query_logs(from_block, to_block, **kwargs):  # pylint: disable=unused-argument
+        return [dict(x) for x in all_logs if from_block <= x['blockNumber'] <= to_block]
+
+    def get_logs(from_block, to_block):
+        return ethereum_manager.get_logs(
+            contract_address=token_address,
+            abi=ERC20TOKEN_ABI,
+            event_name='Transfer',
+            argument_filters={'from': ZERO_ADDRESS},
+            from_block=from_block,
+            to_block=to_block,
+        )
+
+    query_patch = patch.object(ethereum_manager, 'query_logs', side_effect=mock_query_logs)
+    latest_block_patch = patch.object(
+        ethereum_manager,
+        'get_latest_block_number',
+        return_value=150 + LOG_INDEXER_CONFIRMATIONS,
+    )
+    with query_patch as query_mock, latest_block_patch:
+        logs = get_logs(from_block=120, to_block='latest')
+        assert [x['blockNumber'] for x in logs] == [120, 130, 140, 150, 160]
+        assert query_mock.call_args[1]['from_block'] == 120
+        assert query_mock.call_args[1]['to_block'] == 150 + LOG_INDEXER_CONFIRMATIONS
+
+        # Blocks in the index should be read from the DB
+        logs = get_logs(from_block=130, to_block=150)
+        assert [x['blockNumber'] for x in logs] == [130, 140, 150]
+        assert query_mock.call_count == 1
+        assert logs[0]['topics'] == all_logs[3]['topics']
+        assert logs[0]['data'] == all_logs[3]['data']
+
+        # Older blocks and the unconfirmed blocks should be queried
+        logs = get_logs(from_block=100, to_block='latest')
+        assert [x['blockNumber'] for x in logs] == [100, 110, 120, 130, 140, 150, 160]
+        assert query_mock.call_count == 3
+        queried_ranges = [(x[1]['from_block'], x[1]['to_block']) for x in query_mock.call_args_list]  # noqa: E501
+        assert queried_ranges[1:] == [(100, 119), (151, 150 + LOG_INDEXER_CONFIRMATIONS)]
+
+
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
 def test_get_log_and_receipt_etherscan_bad_tx_index(
         ethereum_manager,
@@ -227,3 +344,94 @@ def test_nodes_sets():
 )
 def test_nodes_speed():
     """TODO"""
+
+
+def test_node_stats_weight_factor():
+    """Test that slow, failing and lagging nodes get a smaller selection weight"""
+    fast_node, slow_node, failing_node, lagging_node = (NodeStats() for _ in range(4))
+    for _ in range(10):
+        fast_node.record(latency=0.1, success=True)
+        slow_node.record(latency=3, success=True)
+        failing_node.record(latency=0.1, success=False)
+        lagging_node.record(latency=0.1, success=True)
+    lagging_node.block_lag = 100
+
+    assert fast_node.latency_percentile(0.5) == 0.1
+    assert failing_node.error_rate() == 1
+    assert NodeStats().latency_percentile(0.5) is None, 'no stats without enough samples'
+    assert fast_node.weight_factor() > NodeStats().weight_factor() > slow_node.weight_factor()
+    assert fast_node.weight_factor() > lagging_node.weight_factor()
+    assert failing_node.weight_factor() > 0, 'failing nodes should still be tried sometimes'
+
+
+def test_hedged_query_returns_first_successful_response(ethereum_manager):
+    """Test that a hedged query also queries the next node if the first is slow
+    and returns whichever node responds successfully first"""
+    ethereum_manager.web3_mapping[NodeName.MYCRYPTO] = 'slow node'
+    ethereum_manager.web3_mapping[NodeName.BLOCKSCOUT] = 'fast node'
+    call_order = [NodeName.MYCRYPTO, NodeName.BLOCKSCOUT]
+
+    def mock_query(web3):
+        if web3 == 'slow node':
+            gevent.sleep(1)
+        return web3
+
+    slow_node_stats = ethereum_manager.node_stats[NodeName.MYCRYPTO]
+    with patch('rotkehlchen.chain.ethereum.manager.HEDGE_DEFAULT_DELAY', new=0.1):
+        result = ethereum_manager.query(method=mock_query, call_order=call_order, hedge=True)
+        assert result == 'fast node'
+        assert slow_node_stats.error_rate() == 1, 'losing the race should count as failed'
+        result = ethereum_manager.query(method=mock_query, call_order=call_order)
+        assert result == 'slow node', 'without hedging the first node should be waited for'
+
+    assert len(ethereum_manager.node_stats[NodeName.BLOCKSCOUT].latencies) == 1
+    assert len(slow_node_stats.latencies) == 2
+    assert slow_node_stats.error_rate() == 0.5
+
+
+def test_batched_rpc_uses_provider_session_settings(ethereum_manager):
+    """Test that batched JSON-RPC requests are sent with the provider's request
+    settings and that the results are returned in the order of the requests"""
+    web3 = Web3(HTTPProvider(endpoint_uri='http://localhost:8545', request_kwargs={'timeout': 3}))
+    response = json.dumps([
+        {'jsonrpc': '2.0', 'id': 1, 'result': '0x2'},
+        {'jsonrpc': '2.0', 'id': 0, 'result': '0x1'},
+    ]).encode()
+    with patch(
+        'rotkehlchen.chain.ethereum.manager.make_post_request',
+        return_value=response,
+    ) as post_mock:
+        results = ethereum_manager._query_batched_rpc(
+            web3=web3,
+            method='eth_blockNumber',
+            params_list=[[], []],
+        )
+
+    assert results == ['0x1', '0x2']
+    assert post_mock.call_count == 1
+    assert post_mock.call_args[0][0] == 'http://localhost:8545'
+    assert [x['id'] for x in json.loads(post_mock.call_args[0][1])] == [0, 1]
+    assert post_mock.call_args[1]['timeout'] == 3
+    assert post_mock.call_args[1]['headers']['Content-Type'] == 'application/json'
+
+
+def test_hedged_query_does_not_hedge_own_node(ethereum_manager):
+    """Test that a slow own node is waited for instead of being hedged to the open
+    nodes, unless hedging the own node is explicitly asked for"""
+    ethereum_manager.web3_mapping[NodeName.OWN] = 'own node'
+    ethereum_manager.web3_mapping[NodeName.BLOCKSCOUT] = 'open node'
+    call_order = [NodeName.OWN, NodeName.BLOCKSCOUT]
+
+    def mock_query(web3):
+        if web3 == 'own node':
+            gevent.sleep(0.3)
+        return web3
+
+    with patch('rotkehlchen.chain.ethereum.manager.HEDGE_DEFAULT_DELAY', new=0.1):
+        result = ethereum_manager.query(method=mock_query, call_order=call_order, hedge=True)
+        assert result == 'own node'
+        assert NodeName.BLOCKSCOUT not in ethereum_manager.node_stats
+
+        ethereum_manager.hedge_own_node = True
+        result = ethereum_manager.query(method=mock_query, call_order=call_order, hedge=True)
+        assert result == 'open node'
@@ -1,3 +1,5 @@
+from decimal import Decimal, InvalidOperation
+
 import pytest
 
 from rotkehlchen.errors import ConversionError
@@ -182,3 +184,36 @@ def test_initialize_with_bool_fails():
     with pytest.raises(ValueError):
         FVal(True)
         FVal(False)
+
+
+def test_operations_return_exact_fvals():
+    """Test that the fast paths of the FVal operations give FVals with the exact
+    Decimal results for both FVal and int operands"""
+    a = FVal('0.1')
+    b = FVal('0.2')
+
+    for result in (a + b, a - b, a * b, a / b, a // b, a ** 2, a + 1, 1 - a, -a, abs(a)):
+        assert isinstance(result, FVal)
+        assert isinstance(result.num, Decimal)
+
+    assert a + b == FVal('0.3')
+    assert (a + b).num == Decimal('0.3')
+    assert 1 - a == FVal('0.9')
+    assert a.fma(b, a) == FVal('0.12')
+    assert FVal(a) is not a
+    assert FVal(a.num) == a
+
+
+def test_comparisons_signal_nan():
+    """Test that comparing against NaN raises for both FVal and int operands"""
+    nan = FVal('NaN')
+    for comparison in (
+            lambda: nan == FVal(1),
+            lambda: FVal(1) == nan,
+            lambda: nan == 1,
+            lambda: nan != FVal(1),
+            lambda: nan < FVal(1),
+            lambda: nan >= 1,
+    ):
+        with pytest.raises(InvalidOperation):
+            comparison()
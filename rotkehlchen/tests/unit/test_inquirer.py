@@ -88,3 +88,40 @@ def test_fallback_to_coingecko(inquirer):  # pylint: disable=unused-argument
     assert price != Price(ZERO)
     price = inquirer.find_usd_price(Asset('TLN'))
     assert price != Price(ZERO)
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_current_prices_are_batched_and_cached(inquirer):
+    """Test that multiple current prices are found with a single query per provider
+    and that they are then reused from the cache"""
+    a_btc, a_eth, a_rari = Asset('BTC'), Asset('ETH'), Asset('RARI')
+
+    def mock_pricemulti(from_assets, to_asset):  # pylint: disable=unused-argument
+        return {x: Price(FVal(100)) for x in from_assets if x != a_rari}
+
+    def mock_simple_prices(from_assets, to_asset):  # pylint: disable=unused-argument
+        return {x: Price(FVal(5)) for x in from_assets}
+
+    cryptocompare_patch = patch.object(
+        inquirer._cryptocompare,
+        'query_endpoint_pricemulti',
+        side_effect=mock_pricemulti,
+    )
+    coingecko_patch = patch.object(
+        inquirer._coingecko,
+        'simple_prices',
+        side_effect=mock_simple_prices,
+    )
+    with cryptocompare_patch as cryptocompare_mock, coingecko_patch as coingecko_mock:
+        prices = inquirer.find_usd_prices([a_btc, a_eth, a_rari, a_btc])
+        assert prices == {a_btc: FVal(100), a_eth: FVal(100), a_rari: FVal(5)}
+        assert cryptocompare_mock.call_count == 1
+        assert coingecko_mock.call_count == 1
+        coingecko_mock.assert_called_with(from_assets=[a_rari], to_asset=A_USD)
+
+        assert inquirer.find_usd_price(a_eth) == FVal(100)
+        assert inquirer.find_usd_prices([a_rari]) == {a_rari: FVal(5)}
+        assert cryptocompare_mock.call_count == 1, 'cached prices should have been used'
+
+        assert inquirer.find_usd_price(a_eth, ignore_cache=True) == FVal(100)
+        assert cryptocompare_mock.call_count == 2
@@ -1,18 +1,22 @@
+import base64
 import json
 import time
 from unittest.mock import patch
 
+import gevent
 import pytest
 from eth_utils import to_checksum_address
 from eth_utils.typing import HexAddress, HexStr
 from hexbytes import HexBytes
 
 from rotkehlchen.chain.ethereum.utils import generate_address_via_create2
+from rotkehlchen.crypto import decrypt, encrypt_stream
 from rotkehlchen.errors import ConversionError, UnprocessableTradePair
 from rotkehlchen.exchanges.data_structures import invert_pair
 from rotkehlchen.fval import FVal
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.utils.hashing import file_fingerprint
 from rotkehlchen.utils.interfaces import CacheableObject, cache_response_timewise
 from rotkehlchen.utils.misc import (
     combine_dicts,
@@ -20,6 +24,12 @@ from rotkehlchen.utils.misc import (
     convert_to_int,
     iso8601ts_to_timestamp,
 )
+from rotkehlchen.utils.profiling import (
+    TaskProfile,
+    current_task_profile,
+    record_db_query,
+    record_http_request,
+)
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 
@@ -338,3 +348,65 @@ def test_generate_address_via_create2(
         init_code=HexStr(init_code),
     )
     assert contract_address == to_checksum_address(expected_contract_address)
+
+
+@pytest.mark.parametrize('chunk_sizes', [[], [5], [16, 16], [3, 30, 1, 0, 77]])
+def test_encrypt_stream_can_be_decrypted(chunk_sizes):
+    """Test that data encrypted in chunks is decrypted like data encrypted at once"""
+    key = b'123'
+    data = bytes(range(256)) * 2
+    chunks, start = [], 0
+    for size in chunk_sizes:
+        chunks.append(data[start:start + size])
+        start += size
+    encrypted = b''.join(encrypt_stream(key=key, source=chunks))
+    assert decrypt(key, base64.b64encode(encrypted).decode()) == b''.join(chunks)
+
+
+def test_task_profile_covers_spawned_greenlets():
+    """Test that work done in greenlets spawned by a task counts towards its profile"""
+    profile = TaskProfile()
+
+    def spawned_work():
+        record_http_request(host='api.etherscan.io', duration=0.5)
+        record_db_query(duration=0.1)
+
+    def task():
+        gevent.joinall([gevent.spawn(spawned_work) for _ in range(3)])
+        record_http_request(host='min-api.cryptocompare.com', duration=1.0)
+        return current_task_profile()
+
+    greenlet = gevent.Greenlet(task)
+    greenlet.task_profile = profile
+    greenlet.start()
+    assert greenlet.get() is profile
+    profile.finish()
+
+    assert current_task_profile() is None
+    record_db_query(duration=5)  # outside of the task so should not be recorded
+    result = profile.serialize()
+    assert result['finished'] is True
+    assert result['http'] == {
+        'api.etherscan.io': {'requests': 3, 'time': 1.5},
+        'min-api.cryptocompare.com': {'requests': 1, 'time': 1.0},
+    }
+    assert result['db'] == {'queries': 3, 'time': 0.3}
+    assert result['price_cache'] == {'hits': 0, 'misses': 0}
+
+
+def test_file_fingerprint(tmpdir):
+    """Test that the fingerprint changes with the size, the start and the end of the file"""
+    filepath = tmpdir / 'data.bin'
+    data = bytearray(range(256)) * 100
+    filepath.write_binary(bytes(data))
+    fingerprint = file_fingerprint(filepath, sample_size=1024)
+    assert fingerprint == file_fingerprint(filepath, sample_size=1024)
+
+    for idx in (0, len(data) - 1):
+        changed_data = data.copy()
+        changed_data[idx] ^= 1
+        filepath.write_binary(bytes(changed_data))
+        assert file_fingerprint(filepath, sample_size=1024) != fingerprint
+
+    filepath.write_binary(bytes(data + b'\x00'))
+    assert file_fingerprint(filepath, sample_size=1024) != fingerprint
@@ -70,7 +70,8 @@ def test_pagination(
         mock_graph_query_limit,  # pylint: disable=unused-argument
 ):
     """Test an extra graph request is done when the number of items in the
-    response equals GRAPH_QUERY_LIMIT.
+    response equals GRAPH_QUERY_LIMIT and that it continues after the id of
+    the last item.
     """
     def get_graph_response():
         responses = [
@@ -96,7 +97,8 @@ def test_pagination(
     mock_uniswap._get_balances_graph(addresses=addresses)
 
     assert len(mock_response.calls) == no_requests
+    expected_last_ids = ['', LIQUIDITY_POSITION_2['id']]
     for idx, call_args in enumerate(mock_response.calls):
         param_values = call_args['kwargs']['param_values']
         assert param_values['limit'] == graph_query_limit
-        assert param_values['offset'] == idx * graph_query_limit
+        assert param_values['last_id'] == expected_last_ids[idx]
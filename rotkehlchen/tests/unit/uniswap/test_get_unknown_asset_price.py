@@ -41,7 +41,8 @@ def test_pagination(
         mock_graph_query_limit,  # pylint: disable=unused-argument
 ):
     """Test an extra graph request is done when the number of items in the
-    response equals GRAPH_QUERY_LIMIT.
+    response equals GRAPH_QUERY_LIMIT and that it continues after the id of
+    the last item.
     """
     def get_graph_response():
         responses = [
@@ -67,7 +68,8 @@ def test_pagination(
     mock_uniswap._get_unknown_asset_price_graph(unknown_assets=unknown_assets)
 
     assert len(mock_response.calls) == no_requests
+    expected_last_ids = ['', TOKEN_DAY_DATA_SHUF['id']]
     for idx, call_args in enumerate(mock_response.calls):
         param_values = call_args['kwargs']['param_values']
         assert param_values['limit'] == graph_query_limit
-        assert param_values['offset'] == idx * graph_query_limit
+        assert param_values['last_id'] == expected_last_ids[idx]
@@ -177,11 +177,13 @@ EXP_UNKNOWN_ASSETS_2 = {ASSET_TGX}
 # Method: `_get_unknown_asset_price_graph`
 # 'tokenDayDatas' subgraph response data for SHUF
 TOKEN_DAY_DATA_SHUF = {
+    'id': f'{ASSET_SHUF.ethereum_address.lower()}-18567',
     'token': {'id': ASSET_SHUF.ethereum_address},
     'priceUSD': '0.2373897544244518146892192714786454',
 }
 # 'tokenDayDatas' subgraph response data for TGX
 TOKEN_DAY_DATA_TGX = {
+    'id': f'{ASSET_TGX.ethereum_address.lower()}-18567',
     'token': {'id': ASSET_TGX.ethereum_address},
     'priceUSD': '0.2635575008126147388714187358722384',
 }
@@ -262,6 +262,18 @@ def mock_binance_balance_response(url):
     return MockResponse(200, BINANCE_BALANCES_RESPONSE)
 
 
+def mock_binance_held_assets_response(url):
+    """Mocks the balances and deposit/withdrawal queries binance makes to find
+    the symbols to query trades for"""
+    if 'depositHistory.html' in url:
+        return MockResponse(200, '{"success": true, "depositList": []}')
+    if 'withdrawHistory.html' in url:
+        return MockResponse(200, '{"success": true, "withdrawList": []}')
+
+    # else
+    return MockResponse(200, BINANCE_BALANCES_RESPONSE)
+
+
 def patch_binance_balances_query(binance: 'Binance'):
     def mock_binance_asset_return(url, *args):  # pylint: disable=unused-argument
         if 'futures' in url:
@@ -21,7 +21,10 @@ from rotkehlchen.tests.utils.constants import (
     TX_HASH_STR2,
     TX_HASH_STR3,
 )
-from rotkehlchen.tests.utils.exchanges import POLONIEX_MOCK_DEPOSIT_WITHDRAWALS_RESPONSE
+from rotkehlchen.tests.utils.exchanges import (
+    BINANCE_BALANCES_RESPONSE,
+    POLONIEX_MOCK_DEPOSIT_WITHDRAWALS_RESPONSE,
+)
 from rotkehlchen.tests.utils.kraken import MockKraken
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import (
@@ -192,6 +195,9 @@ def mock_exchange_responses(rotki: Rotkehlchen, remote_errors: bool):
             payload = '{"success": true, "depositList": []}'
         elif 'withdrawHistory.html' in url:
             payload = '{"success": true, "withdrawList": []}'
+        elif 'v3/account' in url:
+            # Holding BTC and ETH makes the ETHBTC and RDNETH markets be queried
+            payload = BINANCE_BALANCES_RESPONSE
         else:
             raise RuntimeError(f'Binance test mock got unexpected/unmocked url {url}')
 
@@ -1066,3 +1072,5 @@ def maybe_mock_historical_price_queries(
         return price
 
     historian.query_historical_price = mock_historical_price_query
+    # With mocked prices there is nothing to prefetch from the network
+    historian.prefetch_historical_prices = lambda price_ranges: None
@@ -1,4 +1,5 @@
 import hashlib
+import os
 from pathlib import Path
 
 from rotkehlchen.errors import SystemPermissionError
@@ -22,3 +23,31 @@ def file_md5(filepath: Path) -> str:
         raise SystemPermissionError(f'Failed to open: {filepath}. {str(e)}') from e
 
     return md5_hash.hexdigest()
+
+
+def file_fingerprint(filepath: Path, sample_size: int = 4096) -> str:
+    """Gets a hexadecimal fingerprint of filepath reading only a constant part of it
+
+    The fingerprint covers the file size and its first and last sample_size
+    bytes. Unlike a hash of the whole contents it does not detect every change.
+    It is enough to tell whether an SQLCipher DB file was replaced, since the
+    first bytes of such a file are its random salt and every rewritten page is
+    encrypted with a new random IV.
+
+    Before calling the function, caller has to make sure path exists and is a file
+
+    May raise:
+    - SystemPermissionError if the file can't be accessed for some reason
+    """
+    fingerprint = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            fingerprint.update(str(size).encode())
+            fingerprint.update(f.read(sample_size))
+            f.seek(max(size - sample_size, 0))
+            fingerprint.update(f.read(sample_size))
+    except PermissionError as e:
+        raise SystemPermissionError(f'Failed to open: {filepath}. {str(e)}') from e
+
+    return fingerprint.hexdigest()
@@ -29,6 +29,7 @@ from rotkehlchen.errors import (
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ChecksumEthAddress, Fee, Timestamp, TimestampMS
+from rotkehlchen.utils.profiling import record_http_response
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads
 
 logger = logging.getLogger(__name__)
@@ -256,6 +257,7 @@ def request_get(
         # function's arguments
         url=url,
         timeout=timeout,
+        hooks={'response': record_http_response},
     )
 
     try:
@@ -0,0 +1,101 @@
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Optional
+from urllib.parse import urlparse
+
+import gevent
+import requests
+
+
+class TaskProfile():
+    """Timing information collected while an async API task runs
+
+    Everything that runs in the task's greenlet or in any greenlet spawned
+    from it is attributed to the task.
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.http_time: DefaultDict[str, float] = defaultdict(float)
+        self.http_requests: DefaultDict[str, int] = defaultdict(int)
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.price_cache_hits = 0
+        self.price_cache_misses = 0
+
+    def finish(self) -> None:
+        self.end_time = time.time()
+
+    def serialize(self) -> Dict[str, Any]:
+        end_time = self.end_time if self.end_time is not None else time.time()
+        return {
+            'finished': self.end_time is not None,
+            'wall_time': round(end_time - self.start_time, 3),
+            'http': {
+                host: {'requests': self.http_requests[host], 'time': round(duration, 3)}
+                for host, duration in self.http_time.items()
+            },
+            'db': {'queries': self.db_queries, 'time': round(self.db_time, 3)},
+            'price_cache': {'hits': self.price_cache_hits, 'misses': self.price_cache_misses},
+        }
+
+
+def current_task_profile() -> Optional[TaskProfile]:
+    """Returns the profile of the task the current greenlet runs for, if any
+
+    Walks up the greenlets that spawned the current one until one of them
+    has a task profile attached.
+    """
+    greenlet = gevent.getcurrent()
+    while greenlet is not None:
+        profile = getattr(greenlet, 'task_profile', None)
+        if profile is not None:
+            return profile
+
+        spawning_greenlet = getattr(greenlet, 'spawning_greenlet', None)
+        greenlet = spawning_greenlet() if spawning_greenlet is not None else None
+
+    return None
+
+
+def record_http_request(host: str, duration: float) -> None:
+    profile = current_task_profile()
+    if profile is not None:
+        profile.http_time[host] += duration
+        profile.http_requests[host] += 1
+
+
+def record_http_response(  # pylint: disable=unused-argument
+        response: requests.Response,
+        *args: Any,
+        **kwargs: Any,
+) -> None:
+    """A requests response hook recording the time until the response arrived
+
+    Add it to a session with profile_session or pass it as a hook to requests calls
+    """
+    record_http_request(
+        host=urlparse(response.url).netloc,
+        duration=response.elapsed.total_seconds(),
+    )
+
+
+def profile_session(session: requests.Session) -> requests.Session:
+    """Makes all responses received through the session count towards the task profile"""
+    session.hooks['response'].append(record_http_response)
+    return session
+
+
+def record_db_query(duration: float) -> None:
+    profile = current_task_profile()
+    if profile is not None:
+        profile.db_time += duration
+        profile.db_queries += 1
+
+
+def record_price_cache(hits: int, misses: int) -> None:
+    profile = current_task_profile()
+    if profile is not None:
+        profile.price_cache_hits += hits
+        profile.price_cache_misses += misses
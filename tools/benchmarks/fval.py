@@ -0,0 +1,75 @@
+"""
+Micro benchmarks of the FVal operations used in the accounting hot loops
+
+These are the operations performed per buy/sell lot in rotkehlchen/accounting/events.py.
+Run with:
+
+    python -m tools.benchmarks.fval [--number N]
+
+Each line shows the best time out of a few repeats for N executions.
+"""
+import argparse
+import timeit
+from typing import Dict, List, Tuple
+
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.fval import FVal
+
+BENCHMARK_GLOBALS: Dict[str, object] = {
+    'FVal': FVal,
+    'ZERO': ZERO,
+    'amount': FVal('0.0821534'),
+    'other_amount': FVal('15.25'),
+    'rate': FVal('612.45'),
+    'fee_rate': FVal('0.0019'),
+}
+
+BENCHMARKS: List[Tuple[str, str]] = [
+    ('construct from str', "FVal('612.45')"),
+    ('construct from FVal', 'FVal(rate)'),
+    ('add', 'amount + other_amount'),
+    ('subtract', 'other_amount - amount'),
+    ('multiply', 'amount * rate'),
+    ('divide', 'rate / other_amount'),
+    ('add int', 'amount + 1'),
+    ('less than', 'amount < other_amount'),
+    ('equal', 'amount == other_amount'),
+    ('equal ZERO', 'amount == ZERO'),
+    ('fma', 'amount.fma(rate, fee_rate * amount)'),
+    ('is_close', 'amount.is_close(other_amount)'),
+    (
+        'sell over a partial buy',
+        'amount < other_amount and amount.fma(rate, fee_rate * amount) + ZERO',
+    ),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Micro benchmarks of FVal operations')
+    parser.add_argument(
+        '--number',
+        type=int,
+        default=200000,
+        help='How many times to execute each operation per repeat',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='How many times to repeat each benchmark. The best time is shown',
+    )
+    args = parser.parse_args()
+
+    for name, statement in BENCHMARKS:
+        best = min(timeit.repeat(
+            stmt=statement,
+            globals=BENCHMARK_GLOBALS,
+            number=args.number,
+            repeat=args.repeat,
+        ))
+        per_op_ns = best / args.number * 1e9
+        print(f'{name:<30} {best:8.4f}s {per_op_ns:10.1f} ns/op')
+
+
+if __name__ == '__main__':
+    main()